@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.responses import PlainTextResponse
+from typing import Any, Dict, List, Optional
+
+from ..core.profiling import profiler, summarize, to_folded
+
+
+async def verify_profiling_access(x_profile_token: Optional[str] = Header(default=None)):
+    """プロファイリングが有効で、トークン設定時は一致することを確認"""
+    if not profiler.enabled:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if profiler.token and x_profile_token != profiler.token:
+        raise HTTPException(status_code=403, detail="Invalid profile token")
+
+
+router = APIRouter(
+    prefix="/admin", tags=["admin"], dependencies=[Depends(verify_profiling_access)]
+)
+
+
+def _get_profile(profile_id: str) -> Dict[str, Any]:
+    profile = profiler.store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile not found: {profile_id}")
+    return profile
+
+
+@router.get("/profiles")
+async def list_profiles() -> List[Dict[str, Any]]:
+    """
+    保存済みプロファイルの一覧（新しい順）
+
+    プロファイル対象のリクエストには X-Profile-Id レスポンスヘッダが付与される。
+    """
+    return [summarize(profile) for profile in profiler.store.list()]
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str) -> Dict[str, Any]:
+    """
+    プロファイルの詳細
+
+    - sample: スタックごとのサンプル数
+    - cprofile: 累積時間順の関数統計
+    """
+    profile = _get_profile(profile_id)
+    return {k: v for k, v in profile.items() if k != "pstats"}
+
+
+@router.get("/profiles/{profile_id}/folded", response_class=PlainTextResponse)
+async def get_profile_folded(profile_id: str):
+    """folded stacks 形式（flamegraph.pl / speedscope 用、sampleモードのみ）"""
+    profile = _get_profile(profile_id)
+    if profile["mode"] != "sample":
+        raise HTTPException(status_code=400, detail="Folded stacks are only available in sample mode")
+    return PlainTextResponse(to_folded(profile))
+
+
+@router.get("/profiles/{profile_id}/pstats")
+async def get_profile_pstats(profile_id: str):
+    """pstats 形式（snakeviz / flameprof 用、cprofileモードのみ）"""
+    profile = _get_profile(profile_id)
+    if profile["mode"] != "cprofile":
+        raise HTTPException(status_code=400, detail="pstats is only available in cprofile mode")
+    return Response(
+        content=profile["pstats"],
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.prof"'}
+    )
+
+
+@router.delete("/profiles")
+async def clear_profiles():
+    """保存済みプロファイルを削除"""
+    profiler.store.clear()
+    return {"status": "cleared"}
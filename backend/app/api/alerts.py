@@ -0,0 +1,71 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional
+
+from ..models.market import Alert, AlertEvent, AlertRequest
+from ..services.registry import alerts
+from ..core.metrics import InstrumentedRoute
+
+router = APIRouter(prefix="/alerts", tags=["alerts"], route_class=InstrumentedRoute)
+
+
+@router.post("", response_model=Alert)
+async def create_alert(request: AlertRequest):
+    """
+    アラートを登録
+
+    - **price**: 価格が value を横切ったとき（direction: above / below / cross）
+    - **indicator**: timeframe の指標 field（rsi など）が value を横切ったとき
+    - **signal**: timeframe のシグナル強度が変わったとき（signal を指定するとその強度になったときのみ）
+    - **level**: 価格が timeframe のサポート・レジスタンスの distance% 以内に入ったとき
+
+    成立したアラートは /ws/alerts/{owner} に配信されます。repeat が false なら成立後に削除されます。
+    価格以外はウォッチリストで事前計算しているシンボル・時間足のみ登録できます。
+    """
+    try:
+        return alerts.create(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("", response_model=List[Alert])
+async def list_alerts(
+    owner: Optional[str] = Query(default=None),
+    symbol: Optional[str] = Query(default=None)
+):
+    """
+    登録中のアラートを取得
+    """
+    try:
+        return alerts.list_alerts(owner, symbol)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/events", response_model=List[AlertEvent])
+async def get_alert_events(
+    owner: Optional[str] = Query(default=None),
+    limit: int = Query(default=100, ge=1, le=1000)
+):
+    """
+    最近成立したアラートを取得（新しい順）
+    """
+    try:
+        return alerts.events(owner, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.delete("/{alert_id}")
+async def delete_alert(alert_id: int):
+    """
+    アラートを削除
+    """
+    try:
+        removed = alerts.cancel(alert_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if not removed:
+        raise HTTPException(status_code=404, detail=f"Alert {alert_id} not found")
+    return {"deleted": alert_id}
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Dict, List, Optional
+
+from ..models.market import CorrelationMatrix, TimeFrame
+from ..services.registry import correlation_service
+from ..core.metrics import InstrumentedRoute
+
+router = APIRouter(prefix="/correlation", tags=["correlation"], route_class=InstrumentedRoute)
+
+
+@router.get("/{timeframe}", response_model=CorrelationMatrix)
+async def get_correlation_matrix(
+    timeframe: TimeFrame,
+    symbols: Optional[List[str]] = Query(default=None),
+    covariance: bool = Query(default=False)
+):
+    """
+    ローリング相関行列を取得
+
+    - **timeframe**: 時間足（CORRELATION_TIMEFRAMES のいずれか）
+    - **symbols**: 指定したシンボルの部分行列のみ返す
+    - **covariance**: 対数リターンの共分散行列も返す
+
+    直近 CORRELATION_WINDOW 本の確定バーの対数リターンから計算し、バー確定ごとに差分で更新しています。
+    """
+    try:
+        return correlation_service.matrix(timeframe, symbols, covariance)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{timeframe}/{symbol}", response_model=Dict[str, Optional[float]])
+async def get_symbol_correlations(timeframe: TimeFrame, symbol: str):
+    """
+    1シンボルと他の全シンボルの相関を取得
+    """
+    try:
+        return correlation_service.pairs(timeframe, symbol)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, HTTPException
+from typing import Dict
+
+from ..models.market import CurrencyStrength, TimeFrame
+from ..services.registry import currency_strength
+from ..core.metrics import InstrumentedRoute
+
+router = APIRouter(prefix="/currency-strength", tags=["currency-strength"], route_class=InstrumentedRoute)
+
+
+@router.get("", response_model=Dict[TimeFrame, CurrencyStrength])
+async def get_all_currency_strength():
+    """
+    全時間足（STRENGTH_TIMEFRAMES）の通貨強弱を取得
+    """
+    try:
+        return {tf: currency_strength.strength(tf) for tf in currency_strength.timeframes}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{timeframe}", response_model=CurrencyStrength)
+async def get_currency_strength(timeframe: TimeFrame):
+    """
+    通貨強弱を取得
+
+    ウォッチリストの全通貨ペアのリターン・RSI・トレンドを通貨ごとのスコア（-1〜1）に分解した値です。
+    バーの確定とウォッチリストの再計算のたびに更新しています。
+    """
+    try:
+        return currency_strength.strength(timeframe)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
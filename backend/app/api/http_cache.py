@@ -0,0 +1,127 @@
+"""
+HTTPキャッシュヘッダと条件付きGET
+
+分析結果は元になったバーが変わらない限り変わらないため、最新バーの指紋（算出時刻や age などの
+揮発する項目を除いた内容）から ETag を作り、If-None-Match が一致すれば 304 を返す。
+Last-Modified は最新バーの時刻で、If-Modified-Since は最新バーが確定済みの場合のみ評価する。
+Cache-Control の max-age は時間足ごとの設定値と現在のバーが確定するまでの秒数の小さい方とし、
+過去の期間を指定した履歴（確定済みのバーのみ）は長期間キャッシュ可能とする。
+"""
+
+import hashlib
+import json
+import math
+from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Optional, Sequence
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from ..core.config import settings
+from ..models.market import TimeFrame
+from ..services.providers import market_now
+from ..services.tick_store import bar_bounds
+
+
+def max_age_for(timeframe: TimeFrame) -> int:
+    """時間足ごとの Cache-Control max-age（秒）"""
+    return int(settings.HTTP_CACHE_MAX_AGE.get(TimeFrame(timeframe).value, 60))
+
+
+def bar_closed(timeframe: TimeFrame, ts: datetime) -> bool:
+    """ts を含むバーが確定済みか"""
+    return bar_bounds(timeframe, ts.timestamp())[1] <= market_now().timestamp()
+
+
+def _strip(data: Any, volatile: Sequence[str]) -> Any:
+    if isinstance(data, dict):
+        return {k: v for k, v in data.items() if k not in volatile}
+    if isinstance(data, list):
+        return [_strip(item, volatile) for item in data]
+    return data
+
+
+def make_etag(fingerprint: Any, volatile: Sequence[str] = ("age",)) -> str:
+    """指紋から弱いETagを作る（volatile の項目は除く）"""
+    data = _strip(jsonable_encoder(fingerprint), volatile)
+    digest = hashlib.sha1(
+        json.dumps(data, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match の弱い比較"""
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for tag in header.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == opaque:
+            return True
+    return False
+
+
+def _not_modified_since(header: str, modified: float) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    # HTTP日付は秒単位
+    return math.floor(modified) <= since.timestamp()
+
+
+def conditional_response(
+    request: Request,
+    content: Any,
+    max_age: int,
+    timeframe: Optional[TimeFrame] = None,
+    last_bar: Optional[datetime] = None,
+    fingerprint: Any = None,
+    volatile: Sequence[str] = ("age",),
+    immutable: bool = False,
+    no_cache: bool = False
+) -> Response:
+    """
+    ETag・Last-Modified・Cache-Control を付けたJSONレスポンス（条件が一致すれば 304）
+
+    fingerprint を省略した場合は content 全体（volatile の項目を除く）を指紋とする。
+    """
+    etag = make_etag(content if fingerprint is None else fingerprint, volatile)
+    headers = {"ETag": etag}
+
+    closed = immutable
+    if last_bar is not None:
+        modified = last_bar.timestamp()
+        headers["Last-Modified"] = formatdate(modified, usegmt=True)
+        if timeframe is not None:
+            until_close = bar_bounds(timeframe, modified)[1] - market_now().timestamp()
+            if until_close > 0:
+                max_age = min(max_age, math.ceil(until_close))
+                # 終了日時より後の（未確定の）バーを含む場合は不変ではない
+                immutable = closed = False
+            else:
+                closed = True
+
+    if no_cache:
+        headers["Cache-Control"] = "no-cache"
+    elif immutable:
+        headers["Cache-Control"] = f"public, max-age={settings.HTTP_CACHE_IMMUTABLE_MAX_AGE}, immutable"
+    else:
+        headers["Cache-Control"] = f"public, max-age={max_age}"
+
+    # If-None-Match があれば If-Modified-Since は評価しない（RFC 9110）
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, etag)
+    elif if_modified_since is not None and last_bar is not None and closed:
+        not_modified = _not_modified_since(if_modified_since, last_bar.timestamp())
+    else:
+        not_modified = False
+
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=jsonable_encoder(content), headers=headers)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from typing import List, Optional
 from datetime import datetime
 
@@ -6,28 +6,35 @@ from ..models.market import (
     MarketQuote, OHLCV, TimeFrame, TechnicalIndicators,
     TrendAnalysis, MultiTimeframeAnalysis
 )
-from ..services.market_data import MarketDataService
+from ..services.registry import market_service, signal_service, watchlist
+from ..services.analysis_cache import indicators_cache, quote_cache
+from ..core.metrics import InstrumentedRoute
+from .http_cache import bar_closed, conditional_response, max_age_for
 
-router = APIRouter(prefix="/market", tags=["market"])
-market_service = MarketDataService()
+router = APIRouter(prefix="/market", tags=["market"], route_class=InstrumentedRoute)
 
 
 @router.get("/quote/{symbol}", response_model=MarketQuote)
-async def get_quote(symbol: str):
+async def get_quote(request: Request, symbol: str):
     """
     リアルタイム価格を取得
     
     - **symbol**: 通貨ペアまたは銘柄シンボル (例: USDJPY, AAPL)
     """
     try:
-        quote = await market_service.get_quote(symbol)
-        return quote
+        # ティック受信中のシンボルは常に最新値、それ以外は最後に取得した価格を返しつつ再取得
+        quote = market_service.tick_store.get_quote(symbol)
+        if quote is None:
+            quote = await quote_cache.get(symbol, lambda: market_service.get_quote(symbol))
+        # 価格は常に再検証させ、変わっていなければ 304
+        return conditional_response(request, quote, 0, no_cache=True)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/history/{symbol}", response_model=List[OHLCV])
 async def get_historical_data(
+    request: Request,
     symbol: str,
     timeframe: TimeFrame = Query(TimeFrame.H1),
     start: Optional[datetime] = None,
@@ -40,18 +47,33 @@ async def get_historical_data(
     - **timeframe**: 時間足 (1m, 5m, 15m, 30m, 1h, 4h, 1d, 1w, 1M)
     - **start**: 開始日時（オプション）
     - **end**: 終了日時（オプション）
+    
+    過去の終了日時を指定した場合（確定済みのバーのみ）は長期間キャッシュ可能です。
     """
     try:
-        data = await market_service.get_historical_data(
-            symbol, timeframe, start, end
+        data = None
+        # 期間指定がなければウォッチリストの計算済みデータ
+        if start is None and end is None:
+            data = watchlist.history(symbol, timeframe)
+        if data is None:
+            data = await market_service.get_historical_data(
+                symbol, timeframe, start, end
+            )
+        return conditional_response(
+            request, data, max_age_for(timeframe),
+            timeframe=timeframe,
+            last_bar=data[-1].timestamp if data else None,
+            # 全バーではなく本数と先頭・最新のバーから ETag を作る
+            fingerprint=[len(data), data[0], data[-1]] if data else [],
+            immutable=end is not None and bar_closed(timeframe, end)
         )
-        return data
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/indicators/{symbol}", response_model=TechnicalIndicators)
 async def get_technical_indicators(
+    request: Request,
     symbol: str,
     timeframe: TimeFrame = Query(TimeFrame.H1)
 ):
@@ -72,14 +94,20 @@ async def get_technical_indicators(
     - VWAP
     """
     try:
-        indicators = await market_service.calculate_indicators(symbol, timeframe)
-        return indicators
+        indicators = watchlist.indicators(symbol, timeframe) or await indicators_cache.get(
+            (symbol, timeframe), lambda: market_service.calculate_indicators(symbol, timeframe)
+        )
+        return conditional_response(
+            request, indicators, max_age_for(timeframe),
+            timeframe=timeframe, last_bar=indicators.timestamp
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/trend/{symbol}", response_model=TrendAnalysis)
 async def get_trend_analysis(
+    request: Request,
     symbol: str,
     timeframe: TimeFrame = Query(TimeFrame.H1)
 ):
@@ -95,16 +123,22 @@ async def get_trend_analysis(
     - サポートレベル
     - レジスタンスレベル
     - 分析の説明
+    
+    ウォッチリストのシンボル・時間足は事前計算済みの結果を返します。
     """
     try:
-        analysis = await market_service.analyze_trend(symbol, timeframe)
-        return analysis
+        analysis = (
+            watchlist.trend(symbol, timeframe)
+            or await market_service.analyze_trend(symbol, timeframe)
+        )
+        return conditional_response(request, analysis, max_age_for(timeframe))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/multi-timeframe/{symbol}", response_model=MultiTimeframeAnalysis)
 async def get_multi_timeframe_analysis(
+    request: Request,
     symbol: str,
     timeframes: List[TimeFrame] = Query(
         default=[TimeFrame.M15, TimeFrame.H1, TimeFrame.H4, TimeFrame.D1]
@@ -118,13 +152,17 @@ async def get_multi_timeframe_analysis(
     
     複数の時間足を同時に分析し、全体的なトレンドと
     コンセンサスシグナルを提供します。
+    ウォッチリストのシンボル・時間足は事前計算済みのトレンドから組み立てます。
     """
     try:
-        from ..services.signal_service import SignalService
-        signal_service = SignalService(market_service)
-        analysis = await signal_service.get_multi_timeframe_analysis(
-            symbol, timeframes
+        analysis = (
+            watchlist.multi_timeframe(symbol, timeframes)
+            or await signal_service.get_multi_timeframe_analysis(symbol, timeframes)
+        )
+        # timestamp は組み立てた時刻なので ETag には含めない
+        return conditional_response(
+            request, analysis, min(max_age_for(tf) for tf in timeframes),
+            volatile=("age", "timestamp")
         )
-        return analysis
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
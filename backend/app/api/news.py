@@ -3,12 +3,12 @@ from typing import List, Optional
 from datetime import datetime
 
 from ..models.market import (
-    NewsItem, EconomicEvent, MarketSentiment
+    NewsItem, NewsImpact, EconomicEvent, MarketSentiment
 )
-from ..services.news_service import NewsService
+from ..services.registry import news_service
+from ..core.metrics import InstrumentedRoute
 
-router = APIRouter(prefix="/news", tags=["news"])
-news_service = NewsService()
+router = APIRouter(prefix="/news", tags=["news"], route_class=InstrumentedRoute)
 
 
 @router.get("/latest", response_model=List[NewsItem])
@@ -46,6 +46,9 @@ async def get_market_sentiment(symbol: str):
     
     - **symbol**: 通貨ペアまたは銘柄シンボル
     
+    ニュースセンチメントは時間減衰付きで集計済みの値、テクニカルセンチメントは
+    直近に計算された指標から求めた値を返します（`/ws/sentiment/{symbol}` で配信も可能）。
+    
     返される情報:
     - 総合センチメント
     - ニュースセンチメント
@@ -62,13 +65,17 @@ async def get_market_sentiment(symbol: str):
 @router.get("/calendar", response_model=List[EconomicEvent])
 async def get_economic_calendar(
     start_date: Optional[datetime] = None,
-    end_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None,
+    currencies: Optional[List[str]] = Query(default=None),
+    impact: Optional[NewsImpact] = None
 ):
     """
     経済カレンダーを取得
     
     - **start_date**: 開始日時（オプション）
     - **end_date**: 終了日時（オプション）
+    - **currencies**: 通貨で絞り込み（オプション、例: USD, JPY）
+    - **impact**: 指定した影響度以上のイベントのみ（オプション）
     
     返される情報:
     - イベント名
@@ -79,7 +86,27 @@ async def get_economic_calendar(
     - 説明
     """
     try:
-        events = await news_service.get_economic_calendar(start_date, end_date)
+        events = await news_service.get_economic_calendar(start_date, end_date, currencies, impact)
+        return events
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/calendar/upcoming", response_model=List[EconomicEvent])
+async def get_upcoming_events(
+    minutes: int = Query(default=60, ge=1, le=10080),
+    currencies: Optional[List[str]] = Query(default=None),
+    impact: Optional[NewsImpact] = None
+):
+    """
+    直近に発表される経済イベントを取得
+    
+    - **minutes**: 現在から何分以内のイベントか (1-10080)
+    - **currencies**: 通貨で絞り込み（オプション）
+    - **impact**: 指定した影響度以上のイベントのみ（オプション）
+    """
+    try:
+        events = await news_service.get_upcoming_events(minutes, currencies, impact)
         return events
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
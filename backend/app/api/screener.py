@@ -0,0 +1,50 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Any, Dict, List, Optional
+
+from ..models.market import ScreenerResult
+from ..services.registry import screener
+from ..core.config import settings
+from ..core.metrics import InstrumentedRoute
+
+router = APIRouter(prefix="/screener", tags=["screener"], route_class=InstrumentedRoute)
+
+
+@router.get("", response_model=ScreenerResult)
+async def run_screener(
+    filter: Optional[str] = Query(default=None, description="条件式（例: 1h.rsi < 30 and 1d.trend == bullish）"),
+    sort: Optional[str] = Query(default=None, description="並べ替える項目（先頭に - で降順、例: -1h.confidence）"),
+    limit: int = Query(default=50, ge=1, le=settings.SCREENER_MAX_LIMIT),
+    fields: Optional[List[str]] = Query(default=None, description="結果に含める追加の項目")
+):
+    """
+    スクリーナーを実行
+
+    - **filter**: 「時間足.項目」を比較する条件式（and / or / not / 括弧が使えます）
+    - **sort**: 並べ替える数値項目
+    - **limit**: 返すシンボルの最大数
+    - **fields**: 条件式・並べ替えの項目に加えて返す項目
+
+    ユニバースの事前計算済みの値の索引から絞り込むため、指標の再計算は行いません。
+    使える項目は /screener/fields で確認できます。
+    """
+    try:
+        query = screener.compile(filter, sort, limit, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        return screener.query(query)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/fields", response_model=Dict[str, Any])
+async def get_screener_fields():
+    """
+    条件式で使える項目を取得
+
+    項目は「時間足.項目」の形式で指定します（例: 4h.macd_histogram, 1d.signal）。
+    """
+    try:
+        return screener.describe_fields()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
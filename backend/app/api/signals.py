@@ -1,19 +1,20 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from typing import List
 
 from ..models.market import (
     TradingSignal, TimeFrame
 )
-from ..services.market_data import MarketDataService
-from ..services.signal_service import SignalService
+from ..services.registry import signal_service, watchlist
+from ..services.analysis_cache import signal_cache
+from ..core.metrics import InstrumentedRoute
+from .http_cache import conditional_response, max_age_for
 
-router = APIRouter(prefix="/signals", tags=["signals"])
-market_service = MarketDataService()
-signal_service = SignalService(market_service)
+router = APIRouter(prefix="/signals", tags=["signals"], route_class=InstrumentedRoute)
 
 
 @router.get("/{symbol}", response_model=TradingSignal)
 async def get_trading_signal(
+    request: Request,
     symbol: str,
     timeframe: TimeFrame = Query(TimeFrame.H1)
 ):
@@ -30,16 +31,24 @@ async def get_trading_signal(
     - エントリー価格
     - ストップロス
     - テイクプロフィット
+    
+    ウォッチリストのシンボル・時間足は事前計算済みの結果を返します。
     """
     try:
-        signal = await signal_service.generate_signal(symbol, timeframe)
-        return signal
+        signal = watchlist.signal(symbol, timeframe) or await signal_cache.get(
+            (symbol, timeframe), lambda: signal_service.generate_signal(symbol, timeframe)
+        )
+        # timestamp は生成した時刻なので ETag には含めない
+        return conditional_response(
+            request, signal, max_age_for(timeframe), volatile=("age", "timestamp")
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/multi/{symbol}", response_model=List[TradingSignal])
 async def get_multi_timeframe_signals(
+    request: Request,
     symbol: str,
     timeframes: List[TimeFrame] = Query(
         default=[TimeFrame.M15, TimeFrame.H1, TimeFrame.H4, TimeFrame.D1]
@@ -56,8 +65,13 @@ async def get_multi_timeframe_signals(
     try:
         signals = []
         for tf in timeframes:
-            signal = await signal_service.generate_signal(symbol, tf)
+            signal = watchlist.signal(symbol, tf) or await signal_cache.get(
+                (symbol, tf), lambda tf=tf: signal_service.generate_signal(symbol, tf)
+            )
             signals.append(signal)
-        return signals
+        return conditional_response(
+            request, signals, min(max_age_for(tf) for tf in timeframes),
+            volatile=("age", "timestamp")
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,17 +1,23 @@
 from fastapi import WebSocket, WebSocketDisconnect, APIRouter
-from typing import Dict, Set
+from typing import Dict, List, Optional, Set
 import asyncio
 import json
+import logging
 from datetime import datetime
 
-from ..services.market_data import MarketDataService
-from ..services.news_service import NewsService
-from ..models.market import TimeFrame
+from ..services.registry import (
+    alerts, correlation_service, currency_strength, market_service, news_service, screener, watchlist
+)
+from ..services.providers import market_now, market_sleep
+from ..services.news_store import normalize_symbol, normalize_symbols
+from ..services.economic_calendar import IMPACT_RANK
+from ..core.config import settings
+from ..core.metrics import DROPPED_MESSAGES, ERRORS, WEBSOCKET_CONNECTIONS, stage_timer
+from ..models.market import NewsImpact, NewsItem, TimeFrame
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
 
-market_service = MarketDataService()
-news_service = NewsService()
+router = APIRouter()
 
 
 class ConnectionManager:
@@ -27,11 +33,14 @@ class ConnectionManager:
         if channel not in self.active_connections:
             self.active_connections[channel] = set()
         self.active_connections[channel].add(websocket)
+        WEBSOCKET_CONNECTIONS.labels(channel=channel.split(":")[0]).inc()
     
     def disconnect(self, websocket: WebSocket, channel: str):
         """接続を削除"""
         if channel in self.active_connections:
-            self.active_connections[channel].discard(websocket)
+            if websocket in self.active_connections[channel]:
+                self.active_connections[channel].discard(websocket)
+                WEBSOCKET_CONNECTIONS.labels(channel=channel.split(":")[0]).dec()
             if not self.active_connections[channel]:
                 del self.active_connections[channel]
                 # タスクをキャンセル
@@ -49,6 +58,7 @@ class ConnectionManager:
             try:
                 await connection.send_json(message)
             except Exception:
+                DROPPED_MESSAGES.labels(source="websocket").inc()
                 disconnected.add(connection)
         
         # 切断された接続を削除
@@ -91,19 +101,69 @@ async def websocket_market_endpoint(websocket: WebSocket, symbol: str):
     except WebSocketDisconnect:
         manager.disconnect(websocket, channel)
     except Exception as e:
-        print(f"WebSocket error: {str(e)}")
+        ERRORS.labels(component="websocket").inc()
+        logger.warning(f"WebSocket error: {str(e)}")
         manager.disconnect(websocket, channel)
 
 
+class NewsSubscription:
+    """ニュース配信の購読条件（シンボル・最低影響度）"""
+    
+    def __init__(self, symbols: Optional[List[str]] = None, impact: Optional[NewsImpact] = None):
+        # 文字列はカンマ区切りとして扱う（そのまま反復すると1文字ずつになるため）
+        if isinstance(symbols, str):
+            symbols = [s for s in symbols.split(",") if s.strip()]
+        elif symbols is not None and not isinstance(symbols, list):
+            raise ValueError("symbols must be a list of strings")
+        if symbols and not all(isinstance(s, str) for s in symbols):
+            raise ValueError("symbols must be a list of strings")
+        self.symbols = set(normalize_symbols(symbols))
+        self.impact = impact
+    
+    def matches(self, item: NewsItem) -> bool:
+        if self.impact is not None and IMPACT_RANK[item.impact] > IMPACT_RANK[self.impact]:
+            return False
+        if self.symbols and not self.symbols.intersection(normalize_symbols(item.related_symbols)):
+            return False
+        return True
+
+
+def _parse_subscription(symbols: Optional[str], impact: Optional[str]) -> NewsSubscription:
+    return NewsSubscription(
+        [s for s in (symbols or "").split(",") if s.strip()],
+        NewsImpact(impact) if impact else None
+    )
+
+
+news_subscriptions: Dict[WebSocket, NewsSubscription] = {}
+
+
 @router.websocket("/ws/news")
-async def websocket_news_endpoint(websocket: WebSocket):
+async def websocket_news_endpoint(
+    websocket: WebSocket,
+    symbols: Optional[str] = None,
+    impact: Optional[str] = None
+):
     """
     ニュースのリアルタイム配信
     
-    接続後、最新のニュースを定期的に配信します。
+    新着記事を取り込み次第配信します（同じ記事は一度だけ）。
+    
+    - **symbols**: 関連シンボルで絞り込み（カンマ区切り、例: USDJPY,EURUSD）
+    - **impact**: 指定した影響度以上の記事のみ (critical, high, medium, low)
+    
+    接続中に {"symbols": [...], "impact": "high"} を送ると購読条件を変更できます
+    （symbols は配列またはカンマ区切りの文字列）。
     """
     channel = "news"
+    try:
+        subscription = _parse_subscription(symbols, impact)
+    except ValueError:
+        await websocket.close(code=1008)
+        return
+    
     await manager.connect(websocket, channel)
+    news_subscriptions[websocket] = subscription
     
     try:
         # バックグラウンドタスクを開始（まだ実行されていない場合）
@@ -117,80 +177,564 @@ async def websocket_news_endpoint(websocket: WebSocket):
             data = await websocket.receive_text()
             if data == "ping":
                 await websocket.send_text("pong")
+                continue
+            try:
+                request = json.loads(data)
+                news_subscriptions[websocket] = NewsSubscription(
+                    request.get("symbols"),
+                    NewsImpact(request["impact"]) if request.get("impact") else None
+                )
+                await websocket.send_json({"type": "subscribed", **request})
+            except (ValueError, AttributeError):
+                await websocket.send_json({"type": "error", "message": "Invalid subscription"})
     
     except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        ERRORS.labels(component="websocket").inc()
+        logger.warning(f"WebSocket error: {str(e)}")
+    finally:
+        news_subscriptions.pop(websocket, None)
         manager.disconnect(websocket, channel)
+
+
+class ScreenerSubscription:
+    """スクリーナーの購読（条件式と、前回通知した時点で条件に合っていたシンボル）"""
+    
+    def __init__(self, query):
+        self.query = query
+        self.members: List[str] = []
+
+
+screener_subscriptions: Dict[WebSocket, ScreenerSubscription] = {}
+
+
+def _compile_screen(request: dict):
+    # 件数は REST の /screener と同じ範囲に収める
+    limit = min(max(int(request.get("limit") or 50), 1), settings.SCREENER_MAX_LIMIT)
+    return screener.compile(request.get("filter"), request.get("sort"), limit, request.get("fields"))
+
+
+def screener_snapshot(subscription: ScreenerSubscription) -> dict:
+    """条件に合うシンボルの一覧を配信メッセージにする（購読の状態も更新）"""
+    result = screener.query(subscription.query)
+    subscription.members = [row.symbol for row in result.rows]
+    return {
+        "type": "screener_snapshot",
+        "timestamp": datetime.now().isoformat(),
+        **result.model_dump(mode="json")
+    }
+
+
+@router.websocket("/ws/screener")
+async def websocket_screener_endpoint(
+    websocket: WebSocket,
+    filter: Optional[str] = None,
+    sort: Optional[str] = None,
+    limit: int = 50
+):
+    """
+    スクリーナーの購読
+    
+    接続時に条件に合うシンボルの一覧を送信し、以降は索引の更新で条件に合うようになったシンボル（entered）と
+    外れたシンボル（left）を配信します。
+    
+    - **filter**: 条件式（例: 1h.rsi < 30 and 1d.trend == bullish）
+    - **sort** / **limit**: 並べ替えと件数（上位 limit 件への出入りを配信、上限は REST の /screener と同じ）
+    
+    接続中に {"filter": "...", "sort": "...", "limit": 10} を送ると購読条件を変更できます。
+    """
+    channel = "screener"
+    try:
+        subscription = ScreenerSubscription(_compile_screen({"filter": filter, "sort": sort, "limit": limit}))
+    except ValueError:
+        await websocket.close(code=1008)
+        return
+    
+    await manager.connect(websocket, channel)
+    screener_subscriptions[websocket] = subscription
+    
+    try:
+        await websocket.send_json(screener_snapshot(subscription))
+        
+        # バックグラウンドタスクを開始（まだ実行されていない場合）
+        if channel not in manager.market_tasks:
+            manager.market_tasks[channel] = asyncio.create_task(
+                broadcast_screener(channel)
+            )
+        
+        # 接続を維持
+        while True:
+            data = await websocket.receive_text()
+            if data == "ping":
+                await websocket.send_text("pong")
+                continue
+            try:
+                subscription = ScreenerSubscription(_compile_screen(json.loads(data)))
+            except (ValueError, TypeError, AttributeError) as e:
+                await websocket.send_json({"type": "error", "message": f"Invalid subscription: {str(e)}"})
+                continue
+            screener_subscriptions[websocket] = subscription
+            await websocket.send_json(screener_snapshot(subscription))
+    
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        ERRORS.labels(component="websocket").inc()
+        logger.warning(f"WebSocket error: {str(e)}")
+    finally:
+        screener_subscriptions.pop(websocket, None)
+        manager.disconnect(websocket, channel)
+
+
+async def push_screener_changes(channel: str):
+    """購読ごとに条件を評価し直し、出入りしたシンボルがあれば送信"""
+    if channel not in manager.active_connections:
+        return
+    
+    disconnected = set()
+    for connection in list(manager.active_connections[channel]):
+        subscription = screener_subscriptions.get(connection)
+        if subscription is None:
+            continue
+        members = screener.match(subscription.query)
+        previous = set(subscription.members)
+        entered = [symbol for symbol in members if symbol not in previous]
+        left = [symbol for symbol in subscription.members if symbol not in set(members)]
+        subscription.members = members
+        if not entered and not left:
+            continue
+        
+        message = {
+            "type": "screener_update",
+            "timestamp": datetime.now().isoformat(),
+            "entered": [
+                screener.row(symbol, subscription.query.fields).model_dump(mode="json")
+                for symbol in entered
+            ],
+            "left": left,
+            "symbols": members
+        }
+        try:
+            await connection.send_json(message)
+        except Exception:
+            DROPPED_MESSAGES.labels(source="websocket").inc()
+            disconnected.add(connection)
+    
+    for connection in disconnected:
+        screener_subscriptions.pop(connection, None)
+        manager.disconnect(connection, channel)
+
+
+async def broadcast_screener(channel: str):
+    """スクリーナーの索引の更新を待ち、購読ごとの出入りを配信"""
+    changed = asyncio.Event()
+    remove_listener = screener.add_listener(lambda symbol: changed.set())
+    try:
+        while True:
+            await changed.wait()
+            changed.clear()
+            try:
+                await push_screener_changes(channel)
+            except Exception as e:
+                ERRORS.labels(component="websocket").inc()
+                logger.warning(f"Error broadcasting screener: {str(e)}")
+            # ウォッチリストの再計算中に続く更新はまとめて評価
+            await asyncio.sleep(settings.SCREENER_PUSH_INTERVAL)
+    except asyncio.CancelledError:
+        pass
+    finally:
+        remove_listener()
+
+
+@router.websocket("/ws/alerts/{owner}")
+async def websocket_alerts_endpoint(websocket: WebSocket, owner: str):
+    """
+    アラートの配信
+    
+    owner で登録したアラートが成立し次第配信します（アラートは POST /api/v1/alerts で登録）。
+    """
+    if not settings.ALERTS_ENABLED:
+        await websocket.close(code=1008)
+        return
+    channel = f"alerts:{owner}"
+    await manager.connect(websocket, channel)
+    
+    try:
+        # バックグラウンドタスクを開始（まだ実行されていない場合）
+        if channel not in manager.market_tasks:
+            manager.market_tasks[channel] = asyncio.create_task(
+                broadcast_alerts(channel, owner)
+            )
+        
+        # 接続を維持
+        while True:
+            data = await websocket.receive_text()
+            if data == "ping":
+                await websocket.send_text("pong")
+    
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
-        print(f"WebSocket error: {str(e)}")
+        ERRORS.labels(component="websocket").inc()
+        logger.warning(f"WebSocket error: {str(e)}")
+    finally:
         manager.disconnect(websocket, channel)
 
 
+async def broadcast_alerts(channel: str, owner: str):
+    """成立したアラートを所有者のチャンネルに配信"""
+    # ティックの取り込み経路から呼ばれるため、リスナーはキューに積むだけにする
+    queue: asyncio.Queue = asyncio.Queue(maxsize=settings.WS_MESSAGE_QUEUE_SIZE)
+    
+    def enqueue(event):
+        if event.owner != owner:
+            return
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            DROPPED_MESSAGES.labels(source="alerts").inc()
+    
+    remove_listener = alerts.add_listener(enqueue)
+    try:
+        while True:
+            event = await queue.get()
+            await manager.broadcast(channel, {
+                "type": "alert",
+                "timestamp": datetime.now().isoformat(),
+                "data": event.model_dump(mode="json")
+            })
+    except asyncio.CancelledError:
+        pass
+    finally:
+        remove_listener()
+
+
+@router.websocket("/ws/correlation/{timeframe}")
+async def websocket_correlation_endpoint(websocket: WebSocket, timeframe: str, covariance: bool = False):
+    """
+    相関行列の配信
+    
+    接続時に現在の相関行列を送信し、以降はバーが確定して行列を更新するたびに配信します。
+    
+    - **covariance**: 共分散行列も配信する
+    """
+    try:
+        tf = TimeFrame(timeframe)
+        snapshot = correlation_service.matrix(tf, covariance=covariance)
+    except ValueError:
+        await websocket.close(code=1008)
+        return
+    
+    channel = f"correlation:{tf.value}:{int(covariance)}"
+    await manager.connect(websocket, channel)
+    
+    try:
+        await websocket.send_json({
+            "type": "correlation_snapshot",
+            "timestamp": datetime.now().isoformat(),
+            "data": snapshot.model_dump(mode="json")
+        })
+        
+        # バックグラウンドタスクを開始（まだ実行されていない場合）
+        if channel not in manager.market_tasks:
+            manager.market_tasks[channel] = asyncio.create_task(
+                broadcast_correlation(channel, tf, covariance)
+            )
+        
+        # 接続を維持
+        while True:
+            data = await websocket.receive_text()
+            if data == "ping":
+                await websocket.send_text("pong")
+    
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        ERRORS.labels(component="websocket").inc()
+        logger.warning(f"WebSocket error: {str(e)}")
+    finally:
+        manager.disconnect(websocket, channel)
+
+
+async def broadcast_correlation(channel: str, timeframe: TimeFrame, covariance: bool):
+    """相関行列の更新を待って配信"""
+    updated = asyncio.Event()
+    remove_listener = correlation_service.add_listener(
+        lambda tf: updated.set() if tf == timeframe else None
+    )
+    try:
+        while True:
+            await updated.wait()
+            updated.clear()
+            try:
+                matrix = correlation_service.matrix(timeframe, covariance=covariance)
+                await manager.broadcast(channel, {
+                    "type": "correlation_update",
+                    "timestamp": datetime.now().isoformat(),
+                    "data": matrix.model_dump(mode="json")
+                })
+            except Exception as e:
+                ERRORS.labels(component="websocket").inc()
+                logger.warning(f"Error broadcasting correlation: {str(e)}")
+            # 全シンボルの再計算が続く間の更新はまとめて配信
+            await asyncio.sleep(settings.CORRELATION_PUSH_INTERVAL)
+    except asyncio.CancelledError:
+        pass
+    finally:
+        remove_listener()
+
+
+@router.websocket("/ws/currency-strength/{timeframe}")
+async def websocket_currency_strength_endpoint(websocket: WebSocket, timeframe: str):
+    """
+    通貨強弱の配信
+    
+    接続時に現在の通貨強弱を送信し、以降はバー確定・ウォッチリストの再計算で更新するたびに配信します。
+    """
+    try:
+        tf = TimeFrame(timeframe)
+        snapshot = currency_strength.strength(tf)
+    except ValueError:
+        await websocket.close(code=1008)
+        return
+    
+    channel = f"currency_strength:{tf.value}"
+    await manager.connect(websocket, channel)
+    
+    try:
+        await websocket.send_json({
+            "type": "currency_strength",
+            "timestamp": datetime.now().isoformat(),
+            "data": snapshot.model_dump(mode="json")
+        })
+        
+        # バックグラウンドタスクを開始（まだ実行されていない場合）
+        if channel not in manager.market_tasks:
+            manager.market_tasks[channel] = asyncio.create_task(
+                broadcast_currency_strength(channel, tf)
+            )
+        
+        # 接続を維持
+        while True:
+            data = await websocket.receive_text()
+            if data == "ping":
+                await websocket.send_text("pong")
+    
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        ERRORS.labels(component="websocket").inc()
+        logger.warning(f"WebSocket error: {str(e)}")
+    finally:
+        manager.disconnect(websocket, channel)
+
+
+async def broadcast_currency_strength(channel: str, timeframe: TimeFrame):
+    """通貨強弱の更新を待って配信（スコアが変わらない更新は送らない）"""
+    updated = asyncio.Event()
+    remove_listener = currency_strength.add_listener(
+        lambda tf: updated.set() if tf == timeframe else None
+    )
+    last_scores = None
+    try:
+        while True:
+            await updated.wait()
+            updated.clear()
+            try:
+                strength = currency_strength.strength(timeframe)
+                if strength.scores != last_scores:
+                    last_scores = strength.scores
+                    await manager.broadcast(channel, {
+                        "type": "currency_strength",
+                        "timestamp": datetime.now().isoformat(),
+                        "data": strength.model_dump(mode="json")
+                    })
+            except Exception as e:
+                ERRORS.labels(component="websocket").inc()
+                logger.warning(f"Error broadcasting currency strength: {str(e)}")
+            # 全シンボルの再計算が続く間の更新はまとめて配信
+            await asyncio.sleep(settings.STRENGTH_PUSH_INTERVAL)
+    except asyncio.CancelledError:
+        pass
+    finally:
+        remove_listener()
+
+
+@router.websocket("/ws/sentiment/{symbol}")
+async def websocket_sentiment_endpoint(websocket: WebSocket, symbol: str):
+    """
+    センチメントのリアルタイム配信
+    
+    接続時に現在のセンチメントを送信し、以降は新しい記事や指標の更新で値が変わるたびに配信します。
+    """
+    channel = f"sentiment:{normalize_symbol(symbol)}"
+    await manager.connect(websocket, channel)
+    
+    try:
+        await websocket.send_json(sentiment_message(symbol))
+        
+        # バックグラウンドタスクを開始（まだ実行されていない場合）
+        if channel not in manager.market_tasks:
+            manager.market_tasks[channel] = asyncio.create_task(
+                broadcast_sentiment(symbol, channel)
+            )
+        
+        # 接続を維持
+        while True:
+            data = await websocket.receive_text()
+            if data == "ping":
+                await websocket.send_text("pong")
+    
+    except WebSocketDisconnect:
+        manager.disconnect(websocket, channel)
+    except Exception as e:
+        ERRORS.labels(component="websocket").inc()
+        logger.warning(f"WebSocket error: {str(e)}")
+        manager.disconnect(websocket, channel)
+
+
+def sentiment_message(symbol: str) -> dict:
+    """集計済みのセンチメントを配信メッセージに変換"""
+    return {
+        "type": "sentiment_update",
+        "symbol": symbol,
+        "timestamp": datetime.now().isoformat(),
+        "data": news_service.get_sentiment_snapshot(symbol).model_dump(mode="json")
+    }
+
+
+async def broadcast_sentiment(symbol: str, channel: str):
+    """センチメントの更新を配信（更新がなくてもニュースのTTLごとに再取得して配信）"""
+    key = normalize_symbol(symbol)
+    changed = asyncio.Event()
+    remove_listener = news_service.sentiment.add_listener(
+        lambda updated: changed.set() if updated == key else None
+    )
+    try:
+        while True:
+            try:
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=settings.NEWS_UPDATE_INTERVAL)
+                except asyncio.TimeoutError:
+                    # 新しい記事があれば集計に反映される
+                    await news_service.get_latest_news([symbol], limit=1)
+                changed.clear()
+                
+                await manager.broadcast(channel, sentiment_message(symbol))
+                
+                # 短時間に更新が続く場合はまとめて配信
+                await asyncio.sleep(settings.SENTIMENT_PUSH_INTERVAL)
+            
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                ERRORS.labels(component="websocket").inc()
+                logger.warning(f"Error broadcasting sentiment: {str(e)}")
+                await asyncio.sleep(settings.SENTIMENT_PUSH_INTERVAL)
+    finally:
+        remove_listener()
+
+
 async def broadcast_market_data(symbol: str, channel: str):
     """市場データを定期的にブロードキャスト"""
     while True:
         try:
             # 市場データを取得
             quote = await market_service.get_quote(symbol)
-            indicators = await market_service.calculate_indicators(
-                symbol, TimeFrame.H1
-            )
-            trend = await market_service.analyze_trend(symbol, TimeFrame.H1)
+            # ウォッチリストの計算済みの結果を使い、なければ履歴を1回だけ取得して計算
+            indicators = watchlist.indicators(symbol, TimeFrame.H1)
+            trend = watchlist.trend(symbol, TimeFrame.H1)
+            if indicators is None or trend is None:
+                bars = await market_service.get_historical_data(symbol, TimeFrame.H1)
+                indicators = await market_service.calculate_indicators(symbol, TimeFrame.H1, bars)
+                trend = await market_service.analyze_trend(symbol, TimeFrame.H1, indicators, bars)
             
             # データをJSON形式で送信
-            message = {
-                "type": "market_update",
-                "symbol": symbol,
-                "timestamp": datetime.now().isoformat(),
-                "data": {
-                    "quote": quote.model_dump(),
-                    "indicators": indicators.model_dump(),
-                    "trend": trend.model_dump()
+            with stage_timer("serialize"):
+                message = {
+                    "type": "market_update",
+                    "symbol": symbol,
+                    "timestamp": datetime.now().isoformat(),
+                    "data": {
+                        "quote": quote.model_dump(mode="json"),
+                        "indicators": indicators.model_dump(mode="json"),
+                        "trend": trend.model_dump(mode="json")
+                    }
                 }
-            }
             
             await manager.broadcast(channel, message)
             
             # 60秒待機
-            await asyncio.sleep(60)
+            await market_sleep(60)
         
         except asyncio.CancelledError:
             break
         except Exception as e:
-            print(f"Error broadcasting market data: {str(e)}")
-            await asyncio.sleep(60)
+            ERRORS.labels(component="websocket").inc()
+            logger.warning(f"Error broadcasting market data: {str(e)}")
+            await market_sleep(60)
 
 
-async def broadcast_news(channel: str):
-    """ニュースを定期的にブロードキャスト"""
-    last_update = datetime.now()
+async def push_news(channel: str, items: List[NewsItem]):
+    """新着記事を購読条件に合う接続にのみ送信"""
+    if not items or channel not in manager.active_connections:
+        return
     
-    while True:
-        try:
-            # 最新ニュースを取得
-            news_items = await news_service.get_latest_news(limit=10)
-            
-            # 新しいニュースのみをフィルタ
-            new_items = [
-                item for item in news_items
-                if item.published_at > last_update
-            ]
-            
-            if new_items:
-                message = {
-                    "type": "news_update",
-                    "timestamp": datetime.now().isoformat(),
-                    "count": len(new_items),
-                    "items": [item.model_dump() for item in new_items]
-                }
-                
-                await manager.broadcast(channel, message)
-                last_update = datetime.now()
-            
-            # 300秒（5分）待機
-            await asyncio.sleep(300)
+    payloads = {}
+    disconnected = set()
+    for connection in list(manager.active_connections[channel]):
+        subscription = news_subscriptions.get(connection) or NewsSubscription()
+        matched = [item for item in items if subscription.matches(item)]
+        if not matched:
+            continue
         
-        except asyncio.CancelledError:
-            break
+        message = {
+            "type": "news_update",
+            "timestamp": datetime.now().isoformat(),
+            "count": len(matched),
+            "items": [
+                payloads.setdefault(item.id, item.model_dump(mode="json")) for item in matched
+            ]
+        }
+        try:
+            await connection.send_json(message)
+        except Exception:
+            DROPPED_MESSAGES.labels(source="websocket").inc()
+            disconnected.add(connection)
+    
+    for connection in disconnected:
+        news_subscriptions.pop(connection, None)
+        manager.disconnect(connection, channel)
+
+
+async def broadcast_news(channel: str):
+    """ニュースの取り込みを行い、新着記事を配信"""
+    queue: asyncio.Queue = asyncio.Queue()
+    ingestion = None
+    remove_listener = None
+    try:
+        # 接続前から公開されている記事は配信しない
+        try:
+            await news_service.poll_news()
         except Exception as e:
-            print(f"Error broadcasting news: {str(e)}")
-            await asyncio.sleep(300)
+            logger.warning(f"Failed to poll news: {str(e)}")
+        
+        remove_listener = news_service.add_news_listener(queue.put_nowait)
+        ingestion = asyncio.create_task(news_service.run_ingestion())
+        
+        while True:
+            items = await queue.get()
+            try:
+                await push_news(channel, items)
+            except Exception as e:
+                ERRORS.labels(component="websocket").inc()
+                logger.warning(f"Error broadcasting news: {str(e)}")
+    
+    except asyncio.CancelledError:
+        pass
+    finally:
+        if ingestion is not None:
+            ingestion.cancel()
+        if remove_listener is not None:
+            remove_listener()
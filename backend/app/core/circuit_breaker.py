@@ -0,0 +1,92 @@
+"""
+外部APIのサーキットブレーカー
+
+連続して failure_threshold 回失敗すると回路を開き、reset_timeout 秒の間は呼び出さずに
+CircuitOpenError を送出する。その後1回だけ試行し（half_open）、成功すれば閉じ、失敗すれば再び開く。
+障害中の上流を叩き続けず、呼び出し側はすぐにキャッシュ等へフォールバックできる。
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+from .metrics import CIRCUIT_STATE, UPSTREAM_REQUESTS
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """回路が開いているため呼び出さなかった"""
+
+
+class CircuitBreaker:
+    """連続失敗で呼び出しを一時停止するサーキットブレーカー"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self._state = CLOSED
+        self._trial_running = False
+        # yfinance の呼び出しは上流用のスレッドプールから並行して行われる
+        self._lock = threading.Lock()
+        CIRCUIT_STATE.labels(upstream=name).set(0)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        CIRCUIT_STATE.labels(upstream=self.name).set(_STATE_VALUES[state])
+
+    def _before_call(self) -> None:
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            if self._state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._set_state(HALF_OPEN)
+            if self._state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return
+        UPSTREAM_REQUESTS.labels(upstream=self.name, outcome="rejected").inc()
+        raise CircuitOpenError(f"Circuit for {self.name} is open")
+
+    def _on_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._trial_running = False
+            if self._state != CLOSED:
+                self._set_state(CLOSED)
+
+    def _on_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self._state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    @contextmanager
+    def call(self):
+        """回路が開いていれば CircuitOpenError、そうでなければ本体の成否を記録"""
+        self._before_call()
+        try:
+            yield
+        except Exception:
+            self._on_failure()
+            raise
+        except BaseException:
+            with self._lock:
+                self._trial_running = False
+            raise
+        self._on_success()
@@ -24,6 +24,18 @@ class Settings(BaseSettings):
     ALPHA_VANTAGE_API_KEY: Optional[str] = None
     NEWS_API_KEY: Optional[str] = None
     FINNHUB_API_KEY: Optional[str] = None
+    NEWS_API_URL: str = "https://newsapi.org/v2/everything"  # ローカルのスタブに差し替え可能
+    NEWS_RSS_FEEDS: list = []  # 追加で取得するRSS/AtomフィードのURL
+    
+    # ニュース取得のHTTP設定
+    NEWS_HTTP_TIMEOUT: float = 10.0
+    NEWS_HTTP_CONNECT_TIMEOUT: float = 3.0
+    NEWS_HTTP_RETRIES: int = 3
+    NEWS_HTTP_BACKOFF: float = 0.5  # 初回リトライまでの待機（秒）、以降は倍々
+    NEWS_HTTP_POOL_SIZE: int = 100
+    NEWS_HTTP_POOL_PER_HOST: int = 10
+    NEWS_HTTP_KEEPALIVE: float = 30.0
+    NEWS_HTTP_CACHE_ENTRIES: int = 256  # 条件付きリクエスト用に前回の本文を保持するURL+パラメータの数
     
     # WebSocket設定
     WS_MESSAGE_QUEUE_SIZE: int = 100
@@ -31,7 +43,126 @@ class Settings(BaseSettings):
     
     # 市場データ更新間隔（秒）
     MARKET_DATA_UPDATE_INTERVAL: int = 60
-    NEWS_UPDATE_INTERVAL: int = 300
+    NEWS_UPDATE_INTERVAL: int = 300  # ニュースストアのTTL
+    NEWS_POLL_INTERVAL: int = 60  # WebSocket配信中のニュース取り込み間隔
+    NEWS_FETCH_SIZE: int = 100  # 1回の取得で各ソースに要求する記事数
+    NEWS_STORE_MAX_ARTICLES: int = 2000
+    
+    # ニュースの関連付け対象の通貨ペア
+    FX_SYMBOLS: list = [
+        "USDJPY", "EURUSD", "GBPUSD", "AUDUSD", "NZDUSD", "USDCAD", "USDCHF", "USDCNH",
+        "EURJPY", "GBPJPY", "AUDJPY", "NZDJPY", "CADJPY", "CHFJPY",
+        "EURGBP", "EURAUD", "EURCHF", "GBPAUD", "AUDNZD",
+    ]
+    
+    # 経済指標カレンダー設定
+    ECONOMIC_CALENDAR_FILE: Optional[str] = None  # JSON / JSONL / CSV（未指定時はデモデータ）
+    ECONOMIC_CALENDAR_RELOAD_INTERVAL: int = 3600  # カレンダーを読み込み直す間隔（秒）
+    ECONOMIC_CALENDAR_RETRY_INTERVAL: int = 60  # 読み込みに失敗したときの再試行までの秒数（失敗が続くと倍に延ばす）
+    SIGNAL_EVENT_BLACKOUT_BEFORE: int = 30  # 重要指標の発表何分前からシグナルに注意を付けるか
+    SIGNAL_EVENT_BLACKOUT_AFTER: int = 15  # 発表後何分まで注意を付けるか
+    
+    # センチメント集計設定
+    SENTIMENT_HALF_LIFE: float = 21600  # ニュースの影響が半減する時間（秒）
+    SENTIMENT_PRIOR_WEIGHT: float = 0.0  # 記事の重みが少ないほどニュースセンチメントを0に寄せる強さ（0で重み付き平均）
+    SENTIMENT_COUNT_WINDOW: float = 86400  # 強気・弱気・中立の記事数を数える期間（秒）
+    SENTIMENT_PUSH_INTERVAL: float = 1.0  # WebSocket配信の最短間隔（秒）
+    
+    # ニュース分類パイプライン設定（バックフィル用）
+    NEWS_CLASSIFY_BATCH_SIZE: int = 256
+    NEWS_CLASSIFY_QUEUE_SIZE: int = 4096
+    NEWS_CLASSIFY_WORKERS: int = 0  # 0でイベントループ内、1以上でプロセスプール
+    
+    # ティック取り込み設定
+    TICK_BUFFER_SIZE: int = 4096  # シンボルごとのティック保持数
+    BAR_BUFFER_SIZE: int = 1024  # 時間足ごとのバー保持数
+    TICK_QUEUE_SIZE: int = 10000
+    TICK_REPLAY_FILE: Optional[str] = None  # 指定するとファイルからティックを再生
+    TICK_REPLAY_SPEED: float = 1.0  # 0で最速再生
+    
+    # データソース設定（live: Yahoo Finance / replay: 記録済みテープを再生 / synthetic: 合成データ / shared: 共有メモリのバー）
+    MARKET_DATA_MODE: str = "live"
+    REPLAY_TAPE_FILE: Optional[str] = None
+    REPLAY_SPEED: float = 1.0  # 1.0=実時間, 10.0=10倍速, 0=最速
+    
+    # マルチプロセスモード（取り込みプロセスが上流から取得したバーを共有メモリに書き込み、APIワーカーが読む）
+    SHARED_BARS_NAME: Optional[str] = None  # 共有メモリの名前（起動スクリプトがワーカーに渡す）
+    SHARED_BARS_UPSTREAM: str = "live"  # 取り込みプロセスの取得元（live / synthetic）
+    SHARED_BARS_SYMBOLS: list = []  # ウォッチリスト・スクリーナーのシンボルに加えて取り込むシンボル
+    SHARED_BARS_TIMEFRAMES: list = ["1m", "15m", "1h", "4h", "1d"]  # 1mは価格、1dは前日終値にも使う
+    SHARED_BARS_MAX_SYMBOLS: int = 64
+    SHARED_BARS_CAPACITY: int = 2048  # 系列ごとに保持するバーの本数
+    SHARED_BARS_POLL_INTERVAL: int = 60  # 上流から取得する間隔（秒）
+    SHARED_BARS_FETCH_WORKERS: int = 8  # 取り込みプロセスで同時に取得する系列数
+    SHARED_BARS_FALLBACK: bool = False  # 取り込み対象外のシンボル・時間足をワーカーが上流から直接取得（無効ならエラー）
+    
+    # 分析結果のキャッシュ（TTL内はそのまま返し、最大経過時間までは古い結果を返しつつ裏で再計算）
+    QUOTE_CACHE_TTL: float = 2
+    QUOTE_MAX_STALENESS: float = 300
+    INDICATORS_CACHE_TTL: float = 30
+    INDICATORS_MAX_STALENESS: float = 1800
+    SIGNAL_CACHE_TTL: float = 30
+    SIGNAL_MAX_STALENESS: float = 900
+    ANALYSIS_CACHE_MAX_ENTRIES: int = 2048
+    
+    # HTTPキャッシュ（/market・/signals の Cache-Control max-age。現在のバーが確定するまでの秒数が上限）
+    HTTP_CACHE_MAX_AGE: dict = {
+        "1m": 5, "5m": 15, "15m": 30, "30m": 30, "45m": 30,
+        "1h": 60, "4h": 120, "1d": 300, "1w": 600, "1M": 600,
+    }
+    HTTP_CACHE_IMMUTABLE_MAX_AGE: int = 86400  # 過去の期間を指定した履歴（確定済みのバーのみ）
+    
+    # 外部API（Yahoo Finance）のサーキットブレーカー
+    UPSTREAM_FAILURE_THRESHOLD: int = 5  # 連続失敗でこの回数に達すると呼び出しを停止
+    UPSTREAM_RESET_TIMEOUT: float = 30  # 停止してから再試行するまでの秒数
+    UPSTREAM_MAX_WORKERS: int = 8  # 上流の取得（ブロッキング）を同時に実行するスレッド数
+    
+    # 起動設定（false の場合は分析モジュールを最初のリクエストで読み込み、ウォッチリストも事前計算しない）
+    WARMUP_ON_STARTUP: bool = True
+    
+    # ウォッチリスト（起動時に事前計算し、バー確定時と一定間隔で更新）
+    WATCHLIST_SYMBOLS: list = ["USDJPY=X", "EURUSD=X", "GBPUSD=X", "EURJPY=X"]
+    WATCHLIST_TIMEFRAMES: list = ["15m", "1h", "4h", "1d"]
+    WATCHLIST_REFRESH_INTERVAL: int = 60  # バー確定を待たずに更新する間隔（秒、下記にない時間足）
+    # 時間足ごとの間隔（長い時間足のバーは確定までの変化がゆっくりなため、確定時以外はまれに更新する）
+    WATCHLIST_REFRESH_INTERVALS: dict = {
+        "1h": 300, "4h": 900, "1d": 1800, "1w": 3600, "1M": 3600,
+    }
+    WATCHLIST_MAX_STALENESS: int = 120  # これより古い結果は返さずその場で計算（秒、間隔の長い時間足はその差だけ延ばす）
+    
+    # スクリーナー（ユニバースはウォッチリストに加えて事前計算し、再計算のたびに索引を更新）
+    SCREENER_SYMBOLS: list = [
+        "USDJPY=X", "EURUSD=X", "GBPUSD=X", "AUDUSD=X", "NZDUSD=X", "USDCAD=X", "USDCHF=X",
+        "EURJPY=X", "GBPJPY=X", "AUDJPY=X", "NZDJPY=X", "CADJPY=X", "CHFJPY=X",
+        "EURGBP=X", "EURAUD=X", "EURCHF=X", "GBPAUD=X", "AUDNZD=X",
+    ]
+    SCREENER_TIMEFRAMES: list = ["1h", "4h", "1d"]
+    SCREENER_MAX_LIMIT: int = 1000  # 1回の問い合わせ・購読で返すシンボルの上限
+    SCREENER_PUSH_INTERVAL: float = 1.0  # WebSocket配信の最短間隔（秒）
+    
+    # 複数シンボルの分析（確定したバーの終値をシンボル × 時刻のパネルに揃え、バー確定ごとに差分で更新）
+    BAR_PANEL_SIZE: int = 500  # 時間足ごとに保持するバーの本数
+    BAR_PANEL_MAX_PENDING: int = 3  # 全シンボルの終値が揃うのを待つ行数（超えたら欠けた終値を埋めて確定）
+    CORRELATION_TIMEFRAMES: list = ["1h", "4h", "1d"]
+    CORRELATION_WINDOW: int = 100  # 相関を計算するリターンの本数
+    CORRELATION_PUSH_INTERVAL: float = 1.0  # WebSocket配信の最短間隔（秒）
+    STRENGTH_TIMEFRAMES: list = ["1h", "4h", "1d"]
+    STRENGTH_LOOKBACK: int = 20  # 通貨強弱のリターンの本数
+    STRENGTH_WEIGHTS: dict = {"returns": 0.5, "rsi": 0.25, "trend": 0.25}
+    STRENGTH_PUSH_INTERVAL: float = 1.0  # WebSocket配信の最短間隔（秒）
+    
+    # アラート（価格はティックごと、指標・シグナル・サポート/レジスタンスはウォッチリストの再計算ごとに評価）
+    ALERTS_ENABLED: bool = True  # 無効にすると /alerts と /ws/alerts を提供しない（状態はプロセスごと）
+    ALERT_MAX_ACTIVE: int = 200000
+    ALERT_HISTORY_SIZE: int = 1000  # 保持する成立履歴の件数
+    
+    # プロファイリング設定（X-Profile ヘッダ / ?profile=1 またはサンプリング率で対象を選択）
+    PROFILING_ENABLED: bool = False
+    PROFILE_SAMPLE_RATE: float = 0.0  # 0.01 = 全リクエストの1%を計測
+    PROFILE_MODE: str = "sample"  # sample: スタックサンプリング / cprofile: cProfile
+    PROFILE_SAMPLE_INTERVAL: float = 0.005  # スタック採取間隔（秒）
+    PROFILE_RING_SIZE: int = 50  # 保持するプロファイル数
+    PROFILE_TOKEN: Optional[str] = None  # 指定時は X-Profile-Token ヘッダが必要
     
     # CORS設定
     CORS_ORIGINS: list = [
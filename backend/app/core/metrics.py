@@ -0,0 +1,361 @@
+"""
+Prometheus形式のメトリクス
+
+外部ライブラリに依存しない最小限の Counter / Gauge / Histogram と、
+ルートごとのレイテンシを記録するASGIミドルウェアを提供する。
+"""
+
+import bisect
+import contextvars
+import functools
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from fastapi.routing import APIRoute
+
+# 既定のレイテンシ用バケット（秒）
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """メトリクスの登録先"""
+
+    def __init__(self):
+        self._metrics: List["_Metric"] = []
+
+    def register(self, metric: "_Metric") -> None:
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        """Prometheusのテキスト形式で出力"""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class _Metric(ABC):
+    kind = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional[MetricsRegistry] = REGISTRY
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if registry is not None:
+            registry.register(self)
+
+    @abstractmethod
+    def _new_child(self):
+        """ラベル値ごとの系列を生成"""
+
+    def labels(self, **labels: str):
+        """ラベル値ごとの系列を取得"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    def _default(self):
+        return self.labels() if not self.labelnames else None
+
+    @abstractmethod
+    def samples(self) -> Iterator[str]:
+        """Prometheus形式のサンプル行"""
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Counter(_Metric):
+    """単調増加するカウンタ"""
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def samples(self) -> Iterator[str]:
+        for key, child in self._children.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+
+
+class _GaugeChild:
+    __slots__ = ("value", "function")
+
+    def __init__(self):
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """出力時に値を取得する関数を設定（キュー長など）"""
+        self.function = function
+
+    def get(self) -> float:
+        if self.function is not None:
+            try:
+                return float(self.function())
+            except Exception:
+                return float("nan")
+        return self.value
+
+
+class Gauge(_Metric):
+    """増減する値"""
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default().dec(amount)
+
+    def samples(self) -> Iterator[str]:
+        for key, child in self._children.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.get())}"
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @contextmanager
+    def time(self):
+        """ブロックの処理時間を記録"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    """バケットごとの分布"""
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+    def samples(self) -> Iterator[str]:
+        for key, child in self._children.items():
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {child.count}"
+
+
+# --- アプリケーションのメトリクス ---
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTPリクエストの処理時間", ["method", "route", "status"]
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge("http_requests_in_progress", "処理中のHTTPリクエスト数")
+STAGE_DURATION = Histogram(
+    "service_stage_duration_seconds",
+    "サービス処理段階ごとの処理時間（fetch, convert, indicators, trend, signal, serialize など）",
+    ["stage"]
+)
+CACHE_REQUESTS = Counter("cache_requests_total", "キャッシュ参照数", ["cache", "result"])
+CACHE_HIT_RATIO = Gauge("cache_hit_ratio", "キャッシュヒット率", ["cache"])
+UPSTREAM_REQUESTS = Counter(
+    "upstream_requests_total", "外部データソースへの呼び出し数", ["upstream", "outcome"]
+)
+UPSTREAM_DURATION = Histogram(
+    "upstream_request_duration_seconds", "外部データソースの応答時間", ["upstream"]
+)
+WEBSOCKET_CONNECTIONS = Gauge("websocket_connections", "WebSocket接続数", ["channel"])
+QUEUE_DEPTH = Gauge("queue_depth", "内部キューの滞留数", ["queue"])
+DROPPED_MESSAGES = Counter("dropped_messages_total", "破棄されたメッセージ数", ["source"])
+ERRORS = Counter("errors_total", "処理中に発生したエラー数", ["component"])
+STALE_RESPONSES = Counter(
+    "stale_responses_total", "再取得中・障害中に古い結果を返した回数", ["cache"]
+)
+CIRCUIT_STATE = Gauge(
+    "circuit_breaker_state", "外部APIの回路の状態（0: closed, 1: half_open, 2: open）", ["upstream"]
+)
+ACTIVE_ALERTS = Gauge("active_alerts", "登録中のアラート数")
+ALERTS_FIRED = Counter("alerts_fired_total", "成立したアラート数", ["type"])
+
+
+def stage_timer(stage: str):
+    """サービス処理段階の計測ブロック"""
+    return STAGE_DURATION.labels(stage=stage).time()
+
+
+@contextmanager
+def upstream_call(upstream: str):
+    """外部呼び出しの回数・成否・応答時間を記録"""
+    start = time.perf_counter()
+    outcome = "success"
+    try:
+        yield
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        UPSTREAM_DURATION.labels(upstream=upstream).observe(time.perf_counter() - start)
+        UPSTREAM_REQUESTS.labels(upstream=upstream, outcome=outcome).inc()
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """キャッシュのヒット・ミスを記録し、ヒット率を更新"""
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+    hits = CACHE_REQUESTS.labels(cache=cache, result="hit").value
+    misses = CACHE_REQUESTS.labels(cache=cache, result="miss").value
+    CACHE_HIT_RATIO.labels(cache=cache).set(hits / (hits + misses))
+
+
+# --- ルート計測 ---
+
+_endpoint_elapsed: contextvars.ContextVar = contextvars.ContextVar("endpoint_elapsed", default=None)
+
+
+class InstrumentedRoute(APIRoute):
+    """エンドポイント処理とレスポンスのシリアライズ時間を分けて計測するルート"""
+
+    def get_route_handler(self):
+        call = self.dependant.call
+        if not getattr(call, "_instrumented", False):
+            @functools.wraps(call)
+            async def timed_call(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await call(*args, **kwargs)
+                finally:
+                    _endpoint_elapsed.set(time.perf_counter() - start)
+
+            timed_call._instrumented = True
+            self.dependant.call = timed_call
+
+        handler = super().get_route_handler()
+
+        async def instrumented_handler(request):
+            token = _endpoint_elapsed.set(None)
+            start = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                endpoint = _endpoint_elapsed.get()
+                if endpoint is not None:
+                    # バリデーション・シリアライズ・JSONエンコードにかかった時間
+                    STAGE_DURATION.labels(stage="serialize").observe(
+                        max(time.perf_counter() - start - endpoint, 0.0)
+                    )
+                _endpoint_elapsed.reset(token)
+
+        return instrumented_handler
+
+
+class MetricsMiddleware:
+    """ルートごとのレイテンシを記録するASGIミドルウェア"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        method = scope.get("method", "GET")
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            # ルーティング後のscopeからパステンプレートを取得（未マッチは集約）
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_DURATION.labels(method=method, route=path, status=status).observe(
+                time.perf_counter() - start
+            )
@@ -0,0 +1,287 @@
+"""
+リクエスト単位のプロファイリング
+
+ヘッダ（X-Profile）・クエリ（?profile=1）またはサンプリング率で選んだリクエストだけを計測する。
+計測方式は2種類:
+
+- sample: 別スレッドからイベントループのスタックを定期採取し、フレームグラフ用の
+  folded stacks（"frame;frame;frame count"）として集計する
+- cprofile: cProfile で関数ごとの呼び出し回数・処理時間を集計する（pstats形式でも取得可能）
+
+結果は件数上限付きのリングバッファに保存し、/admin/profiles から取得する。
+無効時・対象外のリクエストでは計測処理を一切行わない。
+
+同じイベントループ上で並行して処理されている他のリクエストのフレームも含まれるため、
+負荷の低い状態で単一リクエストを計測するのが最も正確。
+"""
+
+import cProfile
+import collections
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+from urllib.parse import parse_qs
+
+from .config import settings
+
+PROFILE_MODES = ("sample", "cprofile")
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# フレームグラフの根とするディレクトリ（ルーター・サービス層）
+_ROOT_DIRS = tuple(os.path.join(_APP_DIR, name) + os.sep for name in ("api", "services"))
+_OTHER_STACK = "(other)"
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(_APP_DIR):
+        filename = os.path.relpath(filename, os.path.dirname(_APP_DIR))
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ",")
+
+
+def fold_stack(frame) -> str:
+    """フレームを folded stack 形式の文字列に変換（ルーター・サービス層より外側は省略）"""
+    codes = []
+    while frame is not None:
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    codes.reverse()
+    for i, code in enumerate(codes):
+        if code.co_filename.startswith(_ROOT_DIRS):
+            return ";".join(_frame_label(c) for c in codes[i:])
+    # アプリのコードを実行していない（I/O待ちなど）
+    return _OTHER_STACK
+
+
+class StackSampler:
+    """対象スレッドのスタックを一定間隔で採取するサンプリングプロファイラ"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts: Dict[str, int] = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Dict[str, int]:
+        self._stop.set()
+        self._thread.join()
+        return dict(self.counts)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.counts[fold_stack(frame)] += 1
+            del frame
+
+
+def _cprofile_summary(profiler: cProfile.Profile, limit: int) -> Dict[str, Any]:
+    """cProfile の結果を累積時間順の関数一覧に変換"""
+    stats = pstats.Stats(profiler)
+    functions = []
+    for (filename, line, name), (cc, nc, tt, ct, _) in stats.stats.items():
+        functions.append({
+            "function": name,
+            "file": filename,
+            "line": line,
+            "ncalls": nc,
+            "primitive_calls": cc,
+            "tottime": tt,
+            "cumtime": ct,
+        })
+    functions.sort(key=lambda f: f["cumtime"], reverse=True)
+    return {
+        "total_calls": stats.total_calls,
+        "functions": functions[:limit],
+        # pstats.Stats / snakeviz / flameprof で読み込める形式（dump_stats と同じ）
+        "pstats": marshal.dumps(stats.stats),
+    }
+
+
+class ProfileStore:
+    """プロファイル結果のリングバッファ"""
+
+    def __init__(self, size: int):
+        self._profiles: Deque[Dict[str, Any]] = collections.deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, profile: Dict[str, Any]) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for profile in self._profiles:
+                if profile["id"] == profile_id:
+                    return profile
+        return None
+
+    def list(self) -> List[Dict[str, Any]]:
+        """新しい順の一覧"""
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+
+def summarize(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """一覧表示用の要約（スタック・統計本体を除く）"""
+    return {k: v for k, v in profile.items() if k not in ("stacks", "functions", "pstats")}
+
+
+def to_folded(profile: Dict[str, Any]) -> str:
+    """flamegraph.pl / speedscope で読み込める folded stacks 形式"""
+    stacks = profile.get("stacks") or {}
+    return "".join(
+        f"{stack} {count}\n"
+        for stack, count in sorted(stacks.items(), key=lambda item: item[1], reverse=True)
+    )
+
+
+class RequestProfiler:
+    """プロファイル対象の選択と計測"""
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        sample_rate: float = 0.0,
+        default_mode: str = "sample",
+        interval: float = 0.005,
+        ring_size: int = 50,
+        token: Optional[str] = None,
+        top_functions: int = 100
+    ):
+        if default_mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {default_mode}")
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.default_mode = default_mode
+        self.interval = interval
+        self.token = token
+        self.top_functions = top_functions
+        self.store = ProfileStore(ring_size)
+        # sys.setprofile / スタック採取はスレッド全体に効くため同時に1件のみ計測
+        self._active = threading.Lock()
+
+    def select(self, scope) -> Optional[str]:
+        """計測するモードを返す（対象外なら None）"""
+        requested = None
+        token = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-profile":
+                requested = value.decode("latin-1")
+            elif name == b"x-profile-token":
+                token = value.decode("latin-1")
+
+        query = scope.get("query_string", b"")
+        if requested is None and b"profile=" in query:
+            requested = parse_qs(query.decode("latin-1")).get("profile", [None])[0]
+
+        if requested and requested not in ("0", "false"):
+            if self.token and token != self.token:
+                return None
+            return requested if requested in PROFILE_MODES else self.default_mode
+
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return self.default_mode
+        return None
+
+    def try_acquire(self) -> bool:
+        return self._active.acquire(blocking=False)
+
+    def release(self) -> None:
+        self._active.release()
+
+
+profiler = RequestProfiler(
+    enabled=settings.PROFILING_ENABLED,
+    sample_rate=settings.PROFILE_SAMPLE_RATE,
+    default_mode=settings.PROFILE_MODE,
+    interval=settings.PROFILE_SAMPLE_INTERVAL,
+    ring_size=settings.PROFILE_RING_SIZE,
+    token=settings.PROFILE_TOKEN
+)
+
+
+class ProfilingMiddleware:
+    """選択されたリクエストをプロファイルするASGIミドルウェア"""
+
+    def __init__(self, app, request_profiler: Optional[RequestProfiler] = None):
+        self.app = app
+        self.profiler = request_profiler or profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        mode = self.profiler.select(scope)
+        if mode is None or not self.profiler.try_acquire():
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex[:12]
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile_id.encode())
+                ]
+            await send(message)
+
+        sampler = None
+        cprofiler = None
+        started_at = datetime.now()
+        start = time.perf_counter()
+        try:
+            if mode == "cprofile":
+                cprofiler = cProfile.Profile()
+                cprofiler.enable()
+            else:
+                sampler = StackSampler(threading.get_ident(), self.profiler.interval)
+                sampler.start()
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            if cprofiler is not None:
+                cprofiler.disable()
+            stacks = sampler.stop() if sampler is not None else None
+            self.profiler.release()
+
+            route = scope.get("route")
+            profile = {
+                "id": profile_id,
+                "mode": mode,
+                "method": scope.get("method"),
+                "path": scope.get("path"),
+                "route": getattr(route, "path", None),
+                "status": status,
+                "started_at": started_at.isoformat(),
+                "duration": duration,
+            }
+            if stacks is not None:
+                profile["interval"] = self.profiler.interval
+                profile["samples"] = sum(stacks.values())
+                profile["stacks"] = stacks
+            else:
+                profile.update(_cprofile_summary(cprofiler, self.profiler.top_functions))
+            self.profiler.store.add(profile)
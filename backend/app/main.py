@@ -1,10 +1,22 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
+from typing import Optional
+import asyncio
+import logging
 import os
 
 from .core.config import settings
-from .api import market, news, signals, websocket
+from .core.metrics import REGISTRY, MetricsMiddleware
+from .core.profiling import ProfilingMiddleware
+from .api import admin, alerts, correlation, currency_strength, market, news, screener, signals, websocket
+from .services.tick_store import FileReplayTickProvider, TickIngestor, tick_store
+from .services.providers import (
+    SyntheticMarketDataProvider, set_market_provider, set_news_provider
+)
+from .services import registry
+
+logger = logging.getLogger(__name__)
 
 # FastAPIアプリケーションを作成
 app = FastAPI(
@@ -22,11 +34,104 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ルートごとのレイテンシを記録
+app.add_middleware(MetricsMiddleware)
+
+# 指定されたリクエストのみプロファイル（PROFILING_ENABLED=true のとき）
+app.add_middleware(ProfilingMiddleware)
+
 # APIルーターを登録
 app.include_router(market.router, prefix=settings.API_V1_PREFIX)
 app.include_router(news.router, prefix=settings.API_V1_PREFIX)
 app.include_router(signals.router, prefix=settings.API_V1_PREFIX)
+app.include_router(screener.router, prefix=settings.API_V1_PREFIX)
+if settings.ALERTS_ENABLED:
+    app.include_router(alerts.router, prefix=settings.API_V1_PREFIX)
+app.include_router(correlation.router, prefix=settings.API_V1_PREFIX)
+app.include_router(currency_strength.router, prefix=settings.API_V1_PREFIX)
 app.include_router(websocket.router)
+app.include_router(admin.router)
+
+# ティック取り込みパイプライン（プロバイダ設定時のみ起動）
+tick_ingestor = None
+
+# 分析モジュールの読み込み・サービス生成・ウォッチリストの事前計算（完了するまで /ready は503）
+warmup_task: Optional[asyncio.Task] = None
+
+
+@app.on_event("startup")
+async def start_market_data():
+    """データソースを設定し、ティック取り込みを開始"""
+    global tick_ingestor
+    if settings.MARKET_DATA_MODE == "replay":
+        from .services.replay import ReplayController
+        
+        # 記録済みテープでプロバイダを差し替え、ティックはライブと同じ経路で流す
+        controller = ReplayController.from_file(
+            settings.REPLAY_TAPE_FILE, speed=settings.REPLAY_SPEED
+        )
+        set_market_provider(controller.market_provider)
+        set_news_provider(controller.news_provider)
+        tick_ingestor = TickIngestor(controller, tick_store)
+        await tick_ingestor.start()
+    elif settings.MARKET_DATA_MODE == "synthetic":
+        set_market_provider(SyntheticMarketDataProvider())
+    elif settings.MARKET_DATA_MODE == "shared":
+        from .services.shared_bars import SharedBarStore, SharedBarsProvider, upstream_provider
+        
+        # 取り込みプロセスが共有メモリに書き込んだバーを読む（上流から取得するのは取り込み対象外のみ）
+        fallback = upstream_provider(settings.SHARED_BARS_UPSTREAM) if settings.SHARED_BARS_FALLBACK else None
+        store = SharedBarStore.attach(settings.SHARED_BARS_NAME)
+        set_market_provider(SharedBarsProvider(store, fallback=fallback))
+    
+    if tick_ingestor is None and settings.TICK_REPLAY_FILE:
+        provider = FileReplayTickProvider(
+            settings.TICK_REPLAY_FILE, speed=settings.TICK_REPLAY_SPEED
+        )
+        tick_ingestor = TickIngestor(provider, tick_store)
+        await tick_ingestor.start()
+
+
+async def warm_up():
+    """分析モジュールの読み込みとサービス生成、ウォッチリストの事前計算"""
+    try:
+        # インポートはイベントループを止めないよう別スレッドで行う
+        await asyncio.to_thread(registry.warm_up)
+        await registry.watchlist.start()
+    except Exception as e:
+        logger.error(f"Warm-up failed: {str(e)}")
+        raise
+
+
+@app.on_event("startup")
+async def start_warm_up():
+    """ウォームアップをバックグラウンドで開始（リクエストの受付は待たずに始める）"""
+    global warmup_task
+    if settings.WARMUP_ON_STARTUP:
+        warmup_task = asyncio.create_task(warm_up())
+
+
+@app.on_event("shutdown")
+async def stop_watchlist():
+    """ウォッチリストの更新とウォームアップを停止"""
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    if registry.watchlist.loaded:
+        await registry.watchlist.stop()
+
+
+@app.on_event("shutdown")
+async def stop_tick_ingestion():
+    """ティック取り込みを停止"""
+    if tick_ingestor is not None:
+        await tick_ingestor.stop()
+
+
+@app.on_event("shutdown")
+async def close_http_sessions():
+    """ニュース取得用のHTTPセッションを閉じる"""
+    if registry.news_service.loaded:
+        await registry.news_service.close()
 
 
 @app.get("/charts")
@@ -67,17 +172,41 @@ async def root():
             "news": f"{settings.API_V1_PREFIX}/news",
             "signals": f"{settings.API_V1_PREFIX}/signals",
             "websocket_market": "/ws/market/{symbol}",
-            "websocket_news": "/ws/news"
+            "websocket_news": "/ws/news",
+            "metrics": "/metrics"
         }
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus形式のメトリクス"""
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.get("/health")
 async def health_check():
-    """ヘルスチェックエンドポイント"""
+    """ヘルスチェックエンドポイント（プロセスが応答できれば200）"""
     return {"status": "healthy"}
 
 
+@app.get("/ready")
+async def readiness_check():
+    """レディネスチェック（ウォームアップが完了するまで503）"""
+    services = {service.name: service.loaded for service in registry.SERVICES}
+    if warmup_task is None or (warmup_task.done() and warmup_task.exception() is None):
+        return {"status": "ready", "services": services}
+    
+    if warmup_task.done():
+        return JSONResponse(
+            status_code=503,
+            content={"status": "error", "error": str(warmup_task.exception()), "services": services}
+        )
+    return JSONResponse(status_code=503, content={"status": "warming_up", "services": services})
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
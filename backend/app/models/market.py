@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Union
 from pydantic import BaseModel, Field
 from enum import Enum
 
@@ -57,6 +57,7 @@ class MarketQuote(BaseModel):
     change: Optional[float] = None
     change_percent: Optional[float] = None
     timestamp: datetime = Field(default_factory=datetime.now)
+    age: Optional[float] = None  # 算出からの経過秒数（キャッシュから返した場合）
 
 
 class TrendAnalysis(BaseModel):
@@ -105,6 +106,8 @@ class TechnicalIndicators(BaseModel):
     # 出来高指標
     obv: Optional[float] = None
     vwap: Optional[float] = None
+    
+    age: Optional[float] = None  # 算出からの経過秒数（キャッシュから返した場合）
 
 
 class TradingSignal(BaseModel):
@@ -118,6 +121,7 @@ class TradingSignal(BaseModel):
     stop_loss: Optional[float] = None
     take_profit: Optional[float] = None
     timestamp: datetime = Field(default_factory=datetime.now)
+    age: Optional[float] = None  # 算出からの経過秒数（キャッシュから返した場合）
 
 
 class MultiTimeframeAnalysis(BaseModel):
@@ -131,6 +135,94 @@ class MultiTimeframeAnalysis(BaseModel):
     summary: str
 
 
+class ScreenerRow(BaseModel):
+    """スクリーナーの結果の1行"""
+    symbol: str
+    values: Dict[str, Optional[Union[float, str]]] = {}  # 「時間足.項目」ごとの値
+
+
+class ScreenerResult(BaseModel):
+    """スクリーナーの結果"""
+    filter: Optional[str] = None
+    sort: Optional[str] = None
+    count: int
+    rows: List[ScreenerRow]
+    updated_at: Optional[datetime] = None  # 索引を最後に更新した時刻
+
+
+class CorrelationMatrix(BaseModel):
+    """ローリング相関行列"""
+    timeframe: TimeFrame
+    symbols: List[str]
+    window: int  # 相関を計算する本数
+    observations: int  # 計算に使ったリターンの本数
+    correlation: List[List[Optional[float]]]  # symbols の順の行列（分散が0なら None）
+    covariance: Optional[List[List[Optional[float]]]] = None  # 対数リターンの共分散
+    timestamp: Optional[datetime] = None  # 最後に確定したバーの時刻
+
+
+class CurrencyStrength(BaseModel):
+    """通貨強弱"""
+    timeframe: TimeFrame
+    scores: Dict[str, Optional[float]]  # 通貨ごとのスコア（-1〜1、成分の加重平均）
+    components: Dict[str, Dict[str, Optional[float]]]  # 成分（returns / rsi / trend）ごとの通貨のスコア
+    ranking: List[str]  # 強い順の通貨
+    pairs: int  # 分解に使った通貨ペアの数
+    lookback: int  # リターンの本数
+    timestamp: Optional[datetime] = None  # 最後に確定したバーの時刻
+
+
+class AlertType(str, Enum):
+    """アラートの種類"""
+    PRICE = "price"          # 価格が水準を横切る
+    INDICATOR = "indicator"  # 指標が水準を横切る
+    SIGNAL = "signal"        # シグナル強度が変わる
+    LEVEL = "level"          # サポート・レジスタンスに近づく
+
+
+class AlertDirection(str, Enum):
+    """水準を横切る向き"""
+    ABOVE = "above"  # 上抜け
+    BELOW = "below"  # 下抜け
+    CROSS = "cross"  # どちらでも
+
+
+class AlertRequest(BaseModel):
+    """アラートの登録内容"""
+    owner: str = "default"  # 通知先（/ws/alerts/{owner}）
+    symbol: str
+    type: AlertType
+    timeframe: Optional[TimeFrame] = None  # 価格以外で必須
+    field: Optional[str] = None  # indicator: 指標名（rsi など）
+    direction: AlertDirection = AlertDirection.CROSS
+    value: Optional[float] = None  # price / indicator: 水準
+    signal: Optional[SignalStrength] = None  # signal: この強度になったとき（未指定なら変化のたび）
+    level: str = "any"  # level: support / resistance / any
+    distance: float = Field(default=0.1, gt=0)  # level: 水準からの距離（%）
+    repeat: bool = False  # 成立後も登録を残す
+
+
+class Alert(AlertRequest):
+    """登録済みのアラート"""
+    id: int
+    created_at: datetime
+    fired_count: int = 0
+    last_fired_at: Optional[datetime] = None
+
+
+class AlertEvent(BaseModel):
+    """成立したアラートの通知"""
+    alert_id: int
+    owner: str
+    symbol: str
+    type: AlertType
+    timeframe: Optional[TimeFrame] = None
+    message: str
+    value: Optional[Union[float, str]] = None  # 成立時の値（価格・指標・シグナル強度）
+    threshold: Optional[float] = None  # 横切った水準
+    fired_at: datetime
+
+
 class NewsImpact(str, Enum):
     """ニュースの影響度"""
     CRITICAL = "critical"  # 重大
@@ -175,6 +267,7 @@ class MarketSentiment(BaseModel):
     news_sentiment: float = Field(ge=-1, le=1)
     social_sentiment: Optional[float] = Field(default=None, ge=-1, le=1)
     technical_sentiment: float = Field(ge=-1, le=1)
-    bullish_count: int = 0
+    bullish_count: int = 0  # 直近 SENTIMENT_COUNT_WINDOW 秒に公開された記事数
     bearish_count: int = 0
     neutral_count: int = 0
+    article_weight: float = 0.0  # 半減期で減衰させた記事の重みの合計
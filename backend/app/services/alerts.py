@@ -0,0 +1,381 @@
+"""
+価格・指標アラート
+
+登録された条件（価格・指標が水準を横切る、シグナル強度が変わる、サポート・レジスタンスに近づく）を
+値の更新ごとに評価し、成立したアラートをリスナーに通知する。価格はティックごと（ティックがないか
+計算時の価格より古い場合はウォッチリストの再計算時の価格）、指標・シグナル・サポート/レジスタンスはウォッチリストの再計算ごとに評価する。
+
+水準はシンボル・項目ごとに上抜け用・下抜け用のソート済みリストに保持し、前回の値から今回の値までの区間にある
+水準だけを二分探索で取り出す。ティックごとの処理は索引の検索と二分探索2回で、登録数にほとんど依存しない
+（アラートのないシンボルのティックは辞書の検索だけで終わる）。サポート・レジスタンスへの接近は、
+水準の上下 distance% の帯の端を価格の索引に登録し、帯に入る向きに横切ったときに成立させる。
+"""
+
+import itertools
+import logging
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from ..core.metrics import ACTIVE_ALERTS, ALERTS_FIRED
+from ..models.market import (
+    Alert, AlertDirection, AlertEvent, AlertRequest, AlertType, SignalStrength, TimeFrame
+)
+from .indicator_kernel import FIELDS
+from .news_store import normalize_symbol
+from .providers import market_now
+from .tick_store import Tick, TickStore
+from .watchlist import Watchlist
+
+logger = logging.getLogger(__name__)
+
+LEVEL_KINDS = ("support", "resistance", "any")
+
+_LEVEL_NAMES = {"support": "サポート", "resistance": "レジスタンス"}
+
+
+class ThresholdIndex:
+    """1つの値（シンボルの価格、時間足の指標）に登録された水準の索引"""
+
+    def __init__(self, last: Optional[float] = None):
+        self.rising: List[Tuple[float, int]] = []   # 上抜けで成立する (水準, アラートID)
+        self.falling: List[Tuple[float, int]] = []  # 下抜けで成立する (水準, アラートID)
+        self.last = last
+
+    def __len__(self) -> int:
+        return len(self.rising) + len(self.falling)
+
+    def add(self, rising: bool, threshold: float, alert_id: int) -> None:
+        insort(self.rising if rising else self.falling, (threshold, alert_id))
+
+    def remove(self, rising: bool, threshold: float, alert_id: int) -> None:
+        entries = self.rising if rising else self.falling
+        i = bisect_left(entries, (threshold, alert_id))
+        if i < len(entries) and entries[i] == (threshold, alert_id):
+            del entries[i]
+
+    def update(self, value: Optional[float]) -> Tuple[bool, List[Tuple[float, int]]]:
+        """値を更新し、(上昇したか, 前回の値から今回の値までに横切った水準) を返す"""
+        last = self.last
+        if value is None or value != value:
+            return False, []
+        self.last = value
+        if last is None or value == last:
+            return False, []
+        if value > last:
+            # last < 水準 <= value
+            entries = self.rising
+            lo = bisect_right(entries, (last, float("inf")))
+            hi = bisect_right(entries, (value, float("inf")))
+            return True, entries[lo:hi]
+        # value <= 水準 < last
+        entries = self.falling
+        lo = bisect_left(entries, (value, float("-inf")))
+        hi = bisect_left(entries, (last, float("-inf")))
+        return False, entries[lo:hi]
+
+
+class AlertEngine:
+    """アラートを登録し、値の更新で成立したものを通知する"""
+
+    def __init__(
+        self,
+        tick_store: TickStore,
+        watchlist: Watchlist,
+        max_alerts: int = 200000,
+        history_size: int = 1000
+    ):
+        self.tick_store = tick_store
+        self.watchlist = watchlist
+        self.max_alerts = max_alerts
+        self._ids = itertools.count(1)
+        self._alerts: Dict[int, Alert] = {}
+        # 正規化したシンボル → 価格の索引
+        self._prices: Dict[str, ThresholdIndex] = {}
+        # (正規化したシンボル, 時間足, 指標名) → 指標の索引
+        self._values: Dict[Tuple[str, TimeFrame, str], ThresholdIndex] = {}
+        # アラートごとに登録した水準 (索引, 上抜けか, 水準)
+        self._thresholds: Dict[int, List[Tuple[ThresholdIndex, bool, float]]] = {}
+        # (正規化したシンボル, 時間足) → シグナル・サポート/レジスタンスのアラート
+        self._signal_alerts: Dict[Tuple[str, TimeFrame], Set[int]] = {}
+        self._level_alerts: Dict[Tuple[str, TimeFrame], Set[int]] = {}
+        self._signals: Dict[Tuple[str, TimeFrame], SignalStrength] = {}
+        # サポート/レジスタンスのアラートごとの現在の水準 (水準, 種類)
+        self._levels: Dict[int, List[Tuple[float, str]]] = {}
+        # ティックのシンボル → 正規化したシンボル
+        self._keys: Dict[str, str] = {}
+        # 正規化したシンボル → 最後に受けたティックの時刻（UNIX秒）
+        self._tick_times: Dict[str, float] = {}
+        self._listeners: List[Callable[[AlertEvent], None]] = []
+        self.history: deque = deque(maxlen=history_size)
+        ACTIVE_ALERTS.labels().set_function(lambda: len(self._alerts))
+        tick_store.add_tick_listener(self._on_tick)
+        watchlist.add_listener(self._on_refresh)
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+    def add_listener(self, listener: Callable[[AlertEvent], None]) -> Callable[[], None]:
+        """成立したアラートを受け取るリスナーを登録し、解除用の関数を返す"""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener) if listener in self._listeners else None
+
+    def create(self, request: AlertRequest) -> Alert:
+        """アラートを登録（条件が不正・対象外なら ValueError）"""
+        if len(self._alerts) >= self.max_alerts:
+            raise ValueError(f"Too many active alerts (max {self.max_alerts})")
+        key = normalize_symbol(request.symbol)
+        if not key:
+            raise ValueError("symbol is required")
+        if request.type in (AlertType.PRICE, AlertType.INDICATOR) and request.value is None:
+            raise ValueError(f"value is required for {request.type.value} alerts")
+        if request.type == AlertType.INDICATOR and request.field not in FIELDS:
+            raise ValueError(f"Unknown indicator: {request.field}")
+        if request.type == AlertType.LEVEL and request.level not in LEVEL_KINDS:
+            raise ValueError(f"level must be one of {', '.join(LEVEL_KINDS)}")
+
+        watched = None
+        if request.type != AlertType.PRICE:
+            if request.timeframe is None:
+                raise ValueError(f"timeframe is required for {request.type.value} alerts")
+            watched = self.watchlist.watched_symbol(request.symbol)
+            if watched is None or request.timeframe not in self.watchlist.timeframes:
+                raise ValueError(
+                    f"{request.symbol} {request.timeframe.value} is not precomputed by the watchlist"
+                )
+
+        alert = Alert(**request.model_dump(), id=next(self._ids), created_at=market_now())
+        self._alerts[alert.id] = alert
+        if alert.type == AlertType.PRICE:
+            self._add_crossing(self._price_index(key, request.symbol), alert)
+        elif alert.type == AlertType.INDICATOR:
+            self._add_crossing(self._value_index(key, watched, alert.timeframe, alert.field), alert)
+        elif alert.type == AlertType.SIGNAL:
+            self._signal_alerts.setdefault((key, alert.timeframe), set()).add(alert.id)
+            entry = self.watchlist.entry(watched, alert.timeframe)
+            if entry is not None:
+                self._signals.setdefault((key, alert.timeframe), entry.signal.signal)
+        else:
+            self._level_alerts.setdefault((key, alert.timeframe), set()).add(alert.id)
+            self._price_index(key, request.symbol)
+            entry = self.watchlist.entry(watched, alert.timeframe)
+            if entry is not None:
+                self._set_levels(alert, key, entry.trend.support_levels, entry.trend.resistance_levels)
+        return alert
+
+    def get(self, alert_id: int) -> Optional[Alert]:
+        return self._alerts.get(alert_id)
+
+    def list_alerts(self, owner: Optional[str] = None, symbol: Optional[str] = None) -> List[Alert]:
+        """登録中のアラート（所有者・シンボルで絞り込み）"""
+        key = normalize_symbol(symbol) if symbol else None
+        return [
+            alert for alert in self._alerts.values()
+            if (owner is None or alert.owner == owner)
+            and (key is None or normalize_symbol(alert.symbol) == key)
+        ]
+
+    def events(self, owner: Optional[str] = None, limit: int = 100) -> List[AlertEvent]:
+        """最近成立したアラート（新しい順）"""
+        result = []
+        for event in reversed(self.history):
+            if owner is None or event.owner == owner:
+                result.append(event)
+                if len(result) >= limit:
+                    break
+        return result
+
+    def cancel(self, alert_id: int) -> bool:
+        """アラートを削除（存在しなければ False）"""
+        alert = self._alerts.pop(alert_id, None)
+        if alert is None:
+            return False
+        key = normalize_symbol(alert.symbol)
+        self._remove_thresholds(alert_id)
+        self._levels.pop(alert_id, None)
+        for alerts in (self._signal_alerts, self._level_alerts):
+            ids = alerts.get((key, alert.timeframe))
+            if ids is not None:
+                ids.discard(alert_id)
+                if not ids:
+                    del alerts[(key, alert.timeframe)]
+        # 空になった索引は削除（アラートのないシンボルのティックを検索だけで済ませる）
+        index = self._prices.get(key)
+        if index is not None and not len(index) and not self._has_level_alerts(key):
+            del self._prices[key]
+        if alert.type == AlertType.INDICATOR:
+            value_key = (key, alert.timeframe, alert.field)
+            if value_key in self._values and not len(self._values[value_key]):
+                del self._values[value_key]
+        return True
+
+    def _has_level_alerts(self, key: str) -> bool:
+        return any(symbol == key for symbol, _ in self._level_alerts)
+
+    def _price_index(self, key: str, symbol: str) -> ThresholdIndex:
+        index = self._prices.get(key)
+        if index is None:
+            # ティックを受信中なら最新値、なければウォッチリストの計算時の価格から横切りを判定する
+            quote = self.tick_store.get_quote(symbol)
+            if quote is None:
+                watched = self.watchlist.watched_symbol(symbol)
+                quote = self.watchlist.quote(watched) if watched else None
+            index = self._prices[key] = ThresholdIndex(quote.price if quote else None)
+        return index
+
+    def _value_index(self, key: str, watched: str, timeframe: TimeFrame, field: str) -> ThresholdIndex:
+        index = self._values.get((key, timeframe, field))
+        if index is None:
+            entry = self.watchlist.entry(watched, timeframe)
+            last = getattr(entry.indicators, field) if entry else None
+            index = self._values[(key, timeframe, field)] = ThresholdIndex(last)
+        return index
+
+    def _add_crossing(self, index: ThresholdIndex, alert: Alert) -> None:
+        sides = {
+            AlertDirection.ABOVE: (True,),
+            AlertDirection.BELOW: (False,),
+            AlertDirection.CROSS: (True, False),
+        }[alert.direction]
+        entries = self._thresholds.setdefault(alert.id, [])
+        for rising in sides:
+            index.add(rising, alert.value, alert.id)
+            entries.append((index, rising, alert.value))
+
+    def _remove_thresholds(self, alert_id: int) -> None:
+        for index, rising, threshold in self._thresholds.pop(alert_id, ()):
+            index.remove(rising, threshold, alert_id)
+
+    def _set_levels(
+        self,
+        alert: Alert,
+        key: str,
+        support: List[float],
+        resistance: List[float]
+    ) -> None:
+        """サポート・レジスタンスの帯の端を価格の索引に登録し直す"""
+        self._remove_thresholds(alert.id)
+        levels = []
+        if alert.level in ("support", "any"):
+            levels += [(level, "support") for level in support]
+        if alert.level in ("resistance", "any"):
+            levels += [(level, "resistance") for level in resistance]
+        self._levels[alert.id] = levels
+
+        index = self._prices[key]
+        entries = self._thresholds[alert.id] = []
+        width = alert.distance / 100.0
+        for level, _ in levels:
+            # 下の端は上抜け、上の端は下抜けで帯に入る
+            for rising, threshold in ((True, level * (1.0 - width)), (False, level * (1.0 + width))):
+                index.add(rising, threshold, alert.id)
+                entries.append((index, rising, threshold))
+
+    def _on_tick(self, tick: Tick) -> None:
+        key = self._keys.get(tick.symbol)
+        if key is None:
+            key = self._keys[tick.symbol] = normalize_symbol(tick.symbol)
+        self._tick_times[key] = tick.timestamp
+        index = self._prices.get(key)
+        if index is None:
+            return
+        price = tick.price
+        rising, hits = index.update(price)
+        if hits:
+            self._fire(hits, price, rising, datetime.fromtimestamp(tick.timestamp, tz=timezone.utc))
+
+    def _on_refresh(self, symbol: str, timeframes: List[TimeFrame]) -> None:
+        """ウォッチリストの再計算結果で指標・シグナル・サポート/レジスタンスを評価"""
+        key = normalize_symbol(symbol)
+        now = market_now()
+        for timeframe in timeframes:
+            entry = self.watchlist.entry(symbol, timeframe)
+            if entry is None:
+                continue
+            for field in FIELDS:
+                index = self._values.get((key, timeframe, field))
+                if index is not None:
+                    value = getattr(entry.indicators, field)
+                    rising, hits = index.update(value)
+                    if hits:
+                        self._fire(hits, value, rising, now)
+
+            signal = entry.signal.signal
+            previous = self._signals.get((key, timeframe))
+            self._signals[(key, timeframe)] = signal
+            if previous is not None and previous != signal:
+                for alert_id in list(self._signal_alerts.get((key, timeframe), ())):
+                    alert = self._alerts.get(alert_id)
+                    if alert is not None and alert.signal in (None, signal):
+                        self._emit(
+                            alert, signal.value, None, now,
+                            f"{alert.symbol} {timeframe.value} のシグナルが {previous.value} → {signal.value}"
+                        )
+
+            for alert_id in list(self._level_alerts.get((key, timeframe), ())):
+                self._set_levels(
+                    self._alerts[alert_id], key,
+                    entry.trend.support_levels, entry.trend.resistance_levels
+                )
+
+        # ティックがない（計算時の価格より新しいティックを受けていない）場合だけ、
+        # 計算時の価格で価格・サポート/レジスタンスを評価する（古い価格で横切りを誤検出しないため）
+        index = self._prices.get(key)
+        quote = self.watchlist.quote(symbol)
+        last_tick = self._tick_times.get(key)
+        if last_tick is not None and quote is not None and last_tick >= quote.timestamp.timestamp():
+            return
+        if index is not None and quote is not None:
+            rising, hits = index.update(quote.price)
+            if hits:
+                self._fire(hits, quote.price, rising, now)
+
+    def _fire(self, hits: List[Tuple[float, int]], value: float, rising: bool, fired_at: datetime) -> None:
+        fired = set()
+        for threshold, alert_id in hits:
+            alert = self._alerts.get(alert_id)
+            if alert is None or alert_id in fired:
+                continue
+            fired.add(alert_id)
+            if alert.type == AlertType.LEVEL:
+                level, kind = min(self._levels[alert_id], key=lambda item: abs(item[0] - value))
+                message = f"{alert.symbol} が{_LEVEL_NAMES[kind]} {level:g} に接近 ({value:g})"
+                threshold = level
+            else:
+                name = alert.symbol if alert.type == AlertType.PRICE else (
+                    f"{alert.symbol} {alert.timeframe.value} {alert.field}"
+                )
+                message = f"{name} が {threshold:g} を{'上抜け' if rising else '下抜け'} ({value:g})"
+            self._emit(alert, value, threshold, fired_at, message)
+
+    def _emit(
+        self,
+        alert: Alert,
+        value,
+        threshold: Optional[float],
+        fired_at: datetime,
+        message: str
+    ) -> None:
+        alert.fired_count += 1
+        alert.last_fired_at = fired_at
+        event = AlertEvent(
+            alert_id=alert.id,
+            owner=alert.owner,
+            symbol=alert.symbol,
+            type=alert.type,
+            timeframe=alert.timeframe,
+            message=message,
+            value=value,
+            threshold=threshold,
+            fired_at=fired_at
+        )
+        self.history.append(event)
+        ALERTS_FIRED.labels(type=alert.type.value).inc()
+        if not alert.repeat:
+            self.cancel(alert.id)
+        for listener in list(self._listeners):
+            try:
+                listener(event)
+            except Exception as e:
+                logger.warning(f"Alert listener failed: {str(e)}")
@@ -0,0 +1,110 @@
+"""
+分析結果の stale-while-revalidate キャッシュ
+
+- 算出から ttl 秒以内: キャッシュをそのまま返す
+- max_staleness 秒以内: 古い結果をすぐに返し、バックグラウンドで再計算する
+- それより古い・未計算: その場で計算する（失敗すればエラー）
+
+同じキーの計算は同時に1つだけ実行する。上流の障害中もサーキットブレーカーで即座に失敗するため、
+max_staleness までは最後に成功した結果を遅延なく返し続ける。
+返す結果の age には算出からの経過秒数を設定する。
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, NamedTuple, Set
+
+from ..core.config import settings
+from ..core.metrics import ERRORS, STALE_RESPONSES, record_cache
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry(NamedTuple):
+    value: Any
+    computed_at: float
+
+
+class AnalysisCache:
+    """最後に成功した結果を返しつつ再計算するキャッシュ"""
+
+    def __init__(self, name: str, ttl: float, max_staleness: float, max_entries: int = 2048):
+        self.name = name
+        self.ttl = ttl
+        self.max_staleness = max(max_staleness, ttl)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        # 再計算に失敗し続けているキー（障害中のログを1回にする）
+        self._failing: Set[Hashable] = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """キャッシュ済みの結果（古ければ再計算を開始）またはその場で計算した結果"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry.computed_at
+            if age <= self.max_staleness:
+                self._entries.move_to_end(key)
+                record_cache(self.name, True)
+                if age > self.ttl:
+                    STALE_RESPONSES.labels(cache=self.name).inc()
+                    self._revalidate(key, compute)
+                return self._with_age(entry.value, age)
+
+        record_cache(self.name, False)
+        # 他のリクエストが待っていても、このリクエストのキャンセルで計算を止めない
+        value = await asyncio.shield(self._revalidate(key, compute))
+        return self._with_age(value, 0.0)
+
+    def _revalidate(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        """キーの計算を開始（実行中ならそれを返す）"""
+        future = self._inflight.get(key)
+        if future is None:
+            future = self._inflight[key] = asyncio.ensure_future(self._compute(key, compute))
+            future.add_done_callback(lambda f: self._done(key, f))
+        return future
+
+    async def _compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        value = await compute()
+        self._entries[key] = _Entry(value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    def _done(self, key: Hashable, future: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        if future.cancelled():
+            return
+        if future.exception() is None:
+            self._failing.discard(key)
+            return
+        ERRORS.labels(component=self.name).inc()
+        if key not in self._failing:
+            self._failing.add(key)
+            logger.warning(f"Failed to refresh {self.name} for {key}: {future.exception()}")
+
+    def _with_age(self, value: Any, age: float) -> Any:
+        return value.model_copy(update={"age": round(age, 3)})
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+quote_cache = AnalysisCache(
+    "quote", settings.QUOTE_CACHE_TTL, settings.QUOTE_MAX_STALENESS,
+    settings.ANALYSIS_CACHE_MAX_ENTRIES
+)
+indicators_cache = AnalysisCache(
+    "indicators", settings.INDICATORS_CACHE_TTL, settings.INDICATORS_MAX_STALENESS,
+    settings.ANALYSIS_CACHE_MAX_ENTRIES
+)
+signal_cache = AnalysisCache(
+    "signal", settings.SIGNAL_CACHE_TTL, settings.SIGNAL_MAX_STALENESS,
+    settings.ANALYSIS_CACHE_MAX_ENTRIES
+)
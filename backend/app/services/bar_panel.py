@@ -0,0 +1,272 @@
+"""
+時間足ごとの終値パネル
+
+ティックから集計したバーの確定通知と、ウォッチリストの再計算（MarketDataService から取得した履歴）の
+両方から、確定したバーの終値をシンボル × 時刻の行列に揃える。相関行列などの複数シンボルの分析は
+パネルのリスナーとして新しく確定した行を受け取り、作り直さずに差分で更新する。
+
+シンボルごとにバーの届く時刻はずれる（再計算ではシンボルごとに複数本がまとめて届く）ため、行は時刻ごとに
+確定待ちにしておき、終値のある全シンボルがその時刻まで届くか、確定待ちの行が max_pending 行を超えた時点で
+古い順に確定する。欠けたシンボルは直前の終値で埋め、確定後にそのバーが届いたときは行を書き換えて
+（埋めていた後続の行も含めて）パネルの作り直しとして通知する。
+まだ終値のないシンボルの計算結果がウォッチリストに揃ったときは、全シンボルの履歴から作り直す。
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..models.market import TimeFrame
+from .news_store import normalize_symbol
+from .tick_store import TickStore
+from .watchlist import PrecomputedAnalysis, Watchlist
+
+PanelListener = Callable[[TimeFrame, int, bool], None]
+
+
+class ClosePanel:
+    """確定したバーの終値のリングバッファ（行が時刻、列がシンボル）"""
+
+    def __init__(self, symbols: Sequence[str], capacity: int, max_pending: int = 3):
+        self.symbols = list(symbols)
+        self.capacity = capacity
+        self.max_pending = max_pending
+        self._columns = {normalize_symbol(s): i for i, s in enumerate(self.symbols)}
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.closes = np.full((capacity, len(self.symbols)), np.nan)
+        # 直前の終値で埋めたセル
+        self._filled = np.zeros((capacity, len(self.symbols)), dtype=bool)
+        self._pos = -1
+        self._count = 0
+        # 確定待ちの行（時刻 → シンボルごとの終値）
+        self._pending: Dict[float, np.ndarray] = {}
+        # シンボルごとに最後に届いたバーの時刻
+        self._latest = np.full(len(self.symbols), -np.inf)
+        # 1度でも終値を受け取ったシンボル
+        self._seen = np.zeros(len(self.symbols), dtype=bool)
+        # 確定済みの行を書き換えた回数
+        self.revision = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def column(self, symbol: str) -> Optional[int]:
+        return self._columns.get(normalize_symbol(symbol))
+
+    def has_data(self, column: int) -> bool:
+        return bool(self._seen[column])
+
+    def latest(self, column: int) -> Optional[float]:
+        """シンボルの最後に届いたバーの時刻（確定待ちを含む）"""
+        value = float(self._latest[column])
+        return value if value != -np.inf else None
+
+    @property
+    def last_timestamp(self) -> Optional[float]:
+        """最後に確定した行の時刻"""
+        return float(self.timestamps[self._pos]) if self._count else None
+
+    def _order(self) -> np.ndarray:
+        """古い順のインデックス配列"""
+        start = (self._pos - self._count + 1) % self.capacity
+        return (np.arange(self._count) + start) % self.capacity
+
+    def _commit(self, timestamp: float) -> None:
+        row = self._pending.pop(timestamp)
+        missing = np.isnan(row)
+        if self._count:
+            # 欠けたシンボルは直前の終値で埋める
+            row[missing] = self.closes[self._pos, missing]
+        self._pos = (self._pos + 1) % self.capacity
+        self.timestamps[self._pos] = timestamp
+        self.closes[self._pos] = row
+        self._filled[self._pos] = missing
+        if self._count < self.capacity:
+            self._count += 1
+
+    def _flush(self) -> int:
+        """確定できる行を古い順に確定し、確定した行数を返す"""
+        committed = 0
+        while self._pending:
+            oldest = min(self._pending)
+            arrived = bool(np.all(self._latest[self._seen] >= oldest))
+            if not arrived and len(self._pending) <= self.max_pending:
+                break
+            self._commit(oldest)
+            committed += 1
+        return committed
+
+    def _patch(self, column: int, timestamp: float, close: float) -> None:
+        """確定済みの行で埋めていた終値を、遅れて届いた終値で書き換える"""
+        idx = self._order()
+        i = int(np.searchsorted(self.timestamps[idx], timestamp))
+        if i >= len(idx) or self.timestamps[idx[i]] != timestamp or not self._filled[idx[i], column]:
+            return
+        for row in idx[i:]:
+            if row != idx[i] and not self._filled[row, column]:
+                break
+            self.closes[row, column] = close
+            self._filled[row, column] = row != idx[i]
+        self.revision += 1
+
+    def add(self, symbol: str, timestamp: float, close: float) -> int:
+        """確定したバーの終値を追加し、新しく確定した行数を返す（確定済みの行の書き換えは revision で分かる）"""
+        column = self.column(symbol)
+        if column is None or close != close or timestamp <= self._latest[column]:
+            return 0
+        self._latest[column] = timestamp
+        self._seen[column] = True
+        last = self.last_timestamp
+        if last is not None and timestamp <= last:
+            self._patch(column, timestamp, close)
+        else:
+            row = self._pending.get(timestamp)
+            if row is None:
+                row = self._pending[timestamp] = np.full(len(self.symbols), np.nan)
+            row[column] = close
+        return self._flush()
+
+    def reset(self, histories: Dict[str, Sequence[Tuple[float, float]]]) -> None:
+        """シンボルごとの (時刻, 終値) の履歴から作り直す"""
+        timestamps = sorted({ts for rows in histories.values() for ts, _ in rows})[-self.capacity:]
+        index = {ts: i for i, ts in enumerate(timestamps)}
+        values = np.full((len(timestamps), len(self.symbols)), np.nan)
+        for symbol, rows in histories.items():
+            column = self.column(symbol)
+            if column is None or not rows:
+                continue
+            self._seen[column] = True
+            self._latest[column] = max(self._latest[column], max(ts for ts, _ in rows))
+            for ts, close in rows:
+                i = index.get(ts)
+                if i is not None:
+                    values[i, column] = close
+        filled = np.isnan(values)
+        for i in range(1, len(timestamps)):
+            missing = filled[i]
+            values[i, missing] = values[i - 1, missing]
+
+        count = len(timestamps)
+        self.timestamps[:count] = timestamps
+        self.closes[:count] = values
+        self._filled[:count] = filled
+        self._pos = count - 1 if count else -1
+        self._count = count
+        # 作り直した範囲より新しい確定待ちの行だけを残す
+        self._pending = {
+            ts: row for ts, row in self._pending.items() if not timestamps or ts > timestamps[-1]
+        }
+
+    def to_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """古い順に並べた (時刻, 終値) のコピー"""
+        idx = self._order()
+        return self.timestamps[idx], self.closes[idx]
+
+    def returns(self, rows: Optional[int] = None) -> np.ndarray:
+        """直近 rows 行の対数リターン（行がない・終値がないシンボルは0）"""
+        count = self._count - 1 if rows is None else min(rows, self._count - 1)
+        if count <= 0:
+            return np.zeros((0, len(self.symbols)))
+        idx = (np.arange(self._pos - count, self._pos + 1)) % self.capacity
+        closes = self.closes[idx]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result = np.log(closes[1:] / closes[:-1])
+        result[~np.isfinite(result)] = 0.0
+        return result
+
+
+class BarPanels:
+    """時間足ごとの終値パネルを、ティックのバー確定とウォッチリストの再計算で更新する"""
+
+    def __init__(
+        self,
+        tick_store: TickStore,
+        watchlist: Watchlist,
+        timeframes: Sequence[TimeFrame],
+        capacity: int = 500,
+        max_pending: int = 3
+    ):
+        self.watchlist = watchlist
+        self.symbols = list(watchlist.symbols)
+        self.timeframes = [
+            tf for tf in dict.fromkeys(TimeFrame(tf) for tf in timeframes) if tf in watchlist.timeframes
+        ]
+        self.panels: Dict[TimeFrame, ClosePanel] = {
+            tf: ClosePanel(self.symbols, capacity, max_pending) for tf in self.timeframes
+        }
+        self._listeners: List[PanelListener] = []
+        tick_store.add_bar_listener(self._on_bar_close)
+        watchlist.add_listener(self._on_refresh)
+        for timeframe in self.timeframes:
+            self._reset(timeframe)
+
+    def add_listener(self, listener: PanelListener) -> Callable[[], None]:
+        """
+        パネルの更新を通知するリスナーを登録し、解除用の関数を返す
+
+        listener(時間足, 新しく確定した行数, 作り直したか) の形で呼ばれる。
+        """
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener) if listener in self._listeners else None
+
+    def _notify(self, timeframe: TimeFrame, rows: int, reset: bool) -> None:
+        for listener in list(self._listeners):
+            listener(timeframe, rows, reset)
+
+    @staticmethod
+    def _closed_bars(entry: PrecomputedAnalysis) -> List[Tuple[float, float]]:
+        """計算結果の履歴のうち確定したバーの (時刻, 終値)"""
+        bars = entry.bars
+        if bars and entry.bar_close > entry.computed_at:
+            bars = bars[:-1]
+        return [(o.timestamp.timestamp(), o.close) for o in bars]
+
+    def _reset(self, timeframe: TimeFrame) -> None:
+        histories = {}
+        for symbol in self.symbols:
+            entry = self.watchlist.entry(symbol, timeframe)
+            if entry is not None:
+                histories[symbol] = self._closed_bars(entry)
+        if histories:
+            panel = self.panels[timeframe]
+            panel.reset(histories)
+            self._notify(timeframe, len(panel), True)
+
+    def _on_refresh(self, symbol: str, timeframes: List[TimeFrame]) -> None:
+        for timeframe in timeframes:
+            panel = self.panels.get(timeframe)
+            column = panel.column(symbol) if panel is not None else None
+            if column is None:
+                continue
+            if not panel.has_data(column):
+                self._reset(timeframe)
+                continue
+            entry = self.watchlist.entry(symbol, timeframe)
+            if entry is None:
+                continue
+            # シンボルの最後に届いたバーより新しいバーだけを追加
+            last = panel.latest(column)
+            bars = self._closed_bars(entry)
+            start = len(bars)
+            while start > 0 and (last is None or bars[start - 1][0] > last):
+                start -= 1
+            revision = panel.revision
+            committed = 0
+            for ts, close in bars[start:]:
+                committed += panel.add(symbol, ts, close)
+            self._added(timeframe, panel, committed, revision)
+
+    def _on_bar_close(self, symbol: str, timeframe: TimeFrame, bar: tuple) -> None:
+        panel = self.panels.get(timeframe)
+        if panel is None:
+            return
+        revision = panel.revision
+        committed = panel.add(symbol, float(bar[0]), float(bar[4]))
+        self._added(timeframe, panel, committed, revision)
+
+    def _added(self, timeframe: TimeFrame, panel: ClosePanel, committed: int, revision: int) -> None:
+        """確定した行を通知する（確定済みの行を書き換えたときは作り直しとして通知）"""
+        if panel.revision != revision:
+            self._notify(timeframe, len(panel), True)
+        elif committed:
+            self._notify(timeframe, committed, False)
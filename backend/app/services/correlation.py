@@ -0,0 +1,164 @@
+"""
+ローリング相関・共分散行列
+
+時間足ごとの終値パネル（BarPanels）で確定した行の対数リターンを直近 window 本だけ保持し、
+リターンの和と外積の和を行が確定するたびに差分で更新する（追加した行の外積を足し、窓から外れた行の外積を引く）。
+1行あたりの更新はシンボル数の2乗で、窓の長さ（window）に依存しない。
+浮動小数点の誤差が溜まらないよう、window 回の更新ごとに保持しているリターンから和を計算し直す。
+"""
+
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..models.market import CorrelationMatrix, TimeFrame
+from .bar_panel import BarPanels
+from .news_store import normalize_symbol
+
+
+class RollingCovariance:
+    """直近 window 本のリターンの共分散"""
+
+    def __init__(self, size: int, window: int):
+        self.window = window
+        self.returns = np.zeros((window, size))
+        self.sum = np.zeros(size)
+        self.cross = np.zeros((size, size))
+        self._pos = 0
+        self._count = 0
+        self._updates = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def reset(self, returns: np.ndarray) -> None:
+        """リターンの行列（古い順）から作り直す"""
+        rows = returns[-self.window:]
+        count = len(rows)
+        self.returns[:count] = rows
+        self._pos = count % self.window
+        self._count = count
+        self._resync()
+
+    def _resync(self) -> None:
+        rows = self.returns[:self._count]
+        self.sum = rows.sum(axis=0)
+        self.cross = rows.T @ rows
+        self._updates = 0
+
+    def push(self, row: np.ndarray) -> None:
+        """リターンを1行追加（窓から外れる行を差し引く）"""
+        if self._count == self.window:
+            old = self.returns[self._pos]
+            self.sum -= old
+            self.cross -= np.outer(old, old)
+        else:
+            self._count += 1
+        self.returns[self._pos] = row
+        self.sum += row
+        self.cross += np.outer(row, row)
+        self._pos = (self._pos + 1) % self.window
+        self._updates += 1
+        if self._updates >= self.window:
+            self._resync()
+
+    def covariance(self) -> np.ndarray:
+        """不偏共分散（2本未満なら NaN）"""
+        count = self._count
+        if count < 2:
+            return np.full(self.cross.shape, np.nan)
+        mean = self.sum / count
+        return (self.cross - count * np.outer(mean, mean)) / (count - 1)
+
+    def correlation(self) -> np.ndarray:
+        """相関係数（分散が0のシンボルは NaN）"""
+        covariance = self.covariance()
+        std = np.sqrt(np.clip(np.diag(covariance), 0.0, None))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            correlation = covariance / np.outer(std, std)
+        correlation[~np.isfinite(correlation)] = np.nan
+        return np.clip(correlation, -1.0, 1.0)
+
+
+def _to_lists(matrix: np.ndarray) -> List[List[Optional[float]]]:
+    return [[None if value != value else float(value) for value in row] for row in matrix]
+
+
+class CorrelationService:
+    """時間足ごとのローリング相関・共分散行列を保持する"""
+
+    def __init__(self, panels: BarPanels, timeframes: Sequence[TimeFrame], window: int = 100):
+        self.panels = panels
+        self.window = window
+        self.symbols = panels.symbols
+        self.timeframes = [TimeFrame(tf) for tf in dict.fromkeys(timeframes) if TimeFrame(tf) in panels.panels]
+        self._matrices: Dict[TimeFrame, RollingCovariance] = {
+            tf: RollingCovariance(len(self.symbols), window) for tf in self.timeframes
+        }
+        self._listeners: List[Callable[[TimeFrame], None]] = []
+        for timeframe in self.timeframes:
+            self._matrices[timeframe].reset(panels.panels[timeframe].returns(window))
+        panels.add_listener(self._on_rows)
+
+    def add_listener(self, listener: Callable[[TimeFrame], None]) -> Callable[[], None]:
+        """行列を更新した時間足を通知するリスナーを登録し、解除用の関数を返す"""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener) if listener in self._listeners else None
+
+    def _on_rows(self, timeframe: TimeFrame, rows: int, reset: bool) -> None:
+        matrix = self._matrices.get(timeframe)
+        if matrix is None:
+            return
+        panel = self.panels.panels[timeframe]
+        if reset or rows >= self.window:
+            matrix.reset(panel.returns(self.window))
+        else:
+            for row in panel.returns(rows):
+                matrix.push(row)
+        for listener in list(self._listeners):
+            listener(timeframe)
+
+    def matrix(
+        self,
+        timeframe: TimeFrame,
+        symbols: Optional[Sequence[str]] = None,
+        covariance: bool = False
+    ) -> CorrelationMatrix:
+        """相関行列（symbols を指定するとその部分行列、対象外の時間足・シンボルは ValueError）"""
+        rolling = self._matrices.get(timeframe)
+        if rolling is None:
+            raise ValueError(f"Correlation is not tracked for {timeframe.value}")
+        panel = self.panels.panels[timeframe]
+        columns = list(range(len(self.symbols)))
+        if symbols:
+            columns = []
+            for symbol in symbols:
+                column = panel.column(symbol)
+                if column is None:
+                    raise ValueError(f"Symbol is not tracked: {symbol}")
+                columns.append(column)
+        index = np.ix_(columns, columns)
+        last = panel.last_timestamp
+        return CorrelationMatrix(
+            timeframe=timeframe,
+            symbols=[self.symbols[c] for c in columns],
+            window=self.window,
+            observations=len(rolling),
+            correlation=_to_lists(rolling.correlation()[index]),
+            covariance=_to_lists(rolling.covariance()[index]) if covariance else None,
+            timestamp=datetime.fromtimestamp(last, tz=timezone.utc) if last is not None else None
+        )
+
+    def pairs(self, timeframe: TimeFrame, symbol: str) -> Dict[str, Optional[float]]:
+        """1シンボルと他の全シンボルの相関"""
+        matrix = self.matrix(timeframe)
+        column = self.panels.panels[timeframe].column(symbol)
+        if column is None:
+            raise ValueError(f"Symbol is not tracked: {symbol}")
+        key = normalize_symbol(symbol)
+        return {
+            other: value
+            for other, value in zip(matrix.symbols, matrix.correlation[column])
+            if normalize_symbol(other) != key
+        }
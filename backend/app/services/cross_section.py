@@ -0,0 +1,241 @@
+"""
+シンボル × バーの行列による指標の一括計算
+
+同じ本数の履歴を持つシンボルを (シンボル数, 本数) の2次元配列に積み、全シンボルの指標を
+まとめてベクトル演算で計算する。スキャナーのように数百シンボルを扱う場合に、
+シンボルごとの Python の処理（1シンボルずつのカーネル呼び出し）をなくす。
+
+EMA・MACD・RSI・ATR は最新バーの値が履歴の線形結合（RSI は上昇幅・下落幅の線形結合の比）になるため、
+本数ごとの重みベクトルを1回だけ求めておき、行列とベクトルの積で計算する。
+定義は IndicatorKernel と同じ（pandas_ta 0.3.14b 準拠）で、結果も FIELDS の順に並ぶ。
+本数の異なる履歴は本数ごとのグループに分けて計算する（先頭を切り詰めると EMA の初期値が変わるため）。
+VWAP はシンボルごとの最新セッション（最新バーと同じ暦日）の先頭位置から累積する。
+"""
+
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, List, Mapping, NamedTuple, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from ..models.market import OHLCV, TechnicalIndicators, TimeFrame
+from .indicator_kernel import FIELDS, indicator_values, session_start
+from .tick_store import TickStore
+
+_INDEX = {name: i for i, name in enumerate(FIELDS)}
+
+# ストキャスティクスの高値・安値の幅が0のときに足す値（pandas_ta の non_zero_range と同じ）
+_EPSILON = 2.220446049250313e-16
+
+
+class BarMatrix(NamedTuple):
+    """同じ本数の履歴を積んだ行列（行がシンボル、列が古い順のバー）"""
+    symbols: List[str]
+    timestamps: List[object]  # シンボルごとの最新バーの時刻
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    sessions: np.ndarray  # シンボルごとの最新セッションの先頭位置（VWAP の起点）
+
+    @property
+    def bars(self) -> int:
+        return self.close.shape[1]
+
+
+def _group(rows: Dict[str, tuple]) -> List[BarMatrix]:
+    """シンボルごとの (最新時刻, high, low, close, volume, セッション先頭) を本数ごとの行列にまとめる"""
+    groups: Dict[int, List[str]] = {}
+    for symbol, row in rows.items():
+        groups.setdefault(len(row[3]), []).append(symbol)
+    matrices = []
+    for bars, symbols in groups.items():
+        if bars == 0:
+            continue
+        # 行ごとに代入する（リストのリストから np.array を作るより速い）
+        columns = np.empty((4, len(symbols), bars))
+        for i, symbol in enumerate(symbols):
+            row = rows[symbol]
+            for k in range(4):
+                columns[k, i] = row[k + 1]
+        matrices.append(BarMatrix(
+            symbols, [rows[s][0] for s in symbols], *columns,
+            np.array([rows[s][5] for s in symbols], dtype=np.int64)
+        ))
+    return matrices
+
+
+def stack_histories(histories: Mapping[str, Sequence[OHLCV]]) -> List[BarMatrix]:
+    """シンボルごとのOHLCVリストを本数ごとの行列に積む"""
+    return _group({
+        symbol: (
+            history[-1].timestamp if history else None,
+            [o.high for o in history],
+            [o.low for o in history],
+            [o.close for o in history],
+            [o.volume for o in history],
+            session_start(history),
+        )
+        for symbol, history in histories.items()
+    })
+
+
+def stack_bar_store(tick_store: TickStore, symbols: Sequence[str], timeframe: TimeFrame) -> List[BarMatrix]:
+    """ティックから集計したバー（形成中のバーを含む）を本数ごとの行列に積む"""
+    rows = {}
+    for symbol in symbols:
+        arrays = tick_store.get_bar_arrays(symbol, timeframe)
+        if arrays is not None:
+            # バーの時刻は UTC のエポック秒なので、UTC の暦日でセッションを区切る
+            days = np.floor_divide(arrays["timestamp"], 86400)
+            rows[symbol] = (
+                datetime.fromtimestamp(float(arrays["timestamp"][-1]), tz=timezone.utc),
+                arrays["high"], arrays["low"], arrays["close"], arrays["volume"],
+                int(np.searchsorted(days, days[-1])),
+            )
+    return _group(rows)
+
+
+def _adjoint(beta: np.ndarray, length: int) -> np.ndarray:
+    """
+    EMA(length) の系列に重み beta を掛けた和を、元の系列の重みに変換する
+
+    EMA は最初の length 本の平均で初期化し、以降は e[t] = (1-a)e[t-1] + a x[t]（a = 2/(length+1)）。
+    """
+    alpha = 2.0 / (length + 1)
+    n = len(beta)
+    carried = np.zeros(n)
+    g = 0.0
+    for t in range(n - 1, length - 2, -1):
+        g = beta[t] + (1.0 - alpha) * g
+        carried[t] = g
+    weights = alpha * carried
+    weights[:length] = carried[length - 1] / length
+    return weights
+
+
+@lru_cache(maxsize=64)
+def _weights(bars: int) -> Dict[str, np.ndarray]:
+    """本数ごとの重みベクトル（最新バーの値 = 履歴との内積）"""
+    weights: Dict[str, np.ndarray] = {}
+    last = np.zeros(bars)
+    last[-1] = 1.0
+    if bars >= 12:
+        weights["ema_12"] = _adjoint(last, 12)
+    if bars >= 26:
+        weights["ema_26"] = _adjoint(last, 26)
+    if bars >= 34:
+        # シグナル = MACD（26本目以降）の EMA(9)
+        beta = np.zeros(bars)
+        beta[25:] = _adjoint(last[25:], 9)
+        weights["macd_signal"] = _adjoint(beta, 12) - _adjoint(beta, 26)
+    if bars >= 15:
+        # Wilder の RMA（調整済みの指数加重平均、alpha = 1/14）の差分系列への重み
+        decay = (1.0 - 1.0 / 14.0) ** np.arange(bars - 2, -1, -1)
+        weights["rma"] = decay / decay.sum()
+    return weights
+
+
+class CrossSectionEngine:
+    """作業用バッファを再利用して行列の指標を計算する（スレッド間で共有しない）"""
+
+    def __init__(self):
+        self._work = np.empty(0)
+        self._scratch = np.empty(0)
+
+    def _buffers(self, count: int, bars: int) -> tuple:
+        size = count * bars
+        if self._work.size < size:
+            self._work = np.empty(size)
+            self._scratch = np.empty(size)
+        return self._work[:size].reshape(count, bars), self._scratch[:size].reshape(count, bars)
+
+    def compute_matrix(self, matrix: BarMatrix) -> np.ndarray:
+        """全シンボルの最新バーの指標（行がシンボル、列が FIELDS の順、データ不足は NaN）"""
+        high, low, close, volume = matrix.high, matrix.low, matrix.close, matrix.volume
+        count, n = close.shape
+        out = np.full((count, len(FIELDS)), np.nan)
+        weights = _weights(n)
+
+        for length, name in ((20, "sma_20"), (50, "sma_50"), (200, "sma_200")):
+            if n >= length:
+                out[:, _INDEX[name]] = close[:, -length:].mean(axis=1)
+
+        for name in ("ema_12", "ema_26", "macd_signal"):
+            if name in weights:
+                out[:, _INDEX[name]] = close @ weights[name]
+        if n >= 26:
+            out[:, _INDEX["macd"]] = out[:, _INDEX["ema_12"]] - out[:, _INDEX["ema_26"]]
+            out[:, _INDEX["macd_histogram"]] = out[:, _INDEX["macd"]] - out[:, _INDEX["macd_signal"]]
+
+        obv = volume[:, 0].copy()
+        if n > 1:
+            previous = close[:, :-1]
+            change, scratch = self._buffers(count, n - 1)
+            np.subtract(close[:, 1:], previous, out=change)
+            np.sign(change, out=scratch)
+            obv += np.einsum("ij,ij->i", scratch, volume[:, 1:])
+            if "rma" in weights:
+                rma = weights["rma"]
+                net = change @ rma
+                gain = np.maximum(change, 0.0, out=change) @ rma
+                loss = gain - net
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    out[:, _INDEX["rsi"]] = 100.0 * gain / (gain + loss)
+                # 高値 >= 安値なので真の値幅 = max(高値, 前日終値) - min(安値, 前日終値)
+                top = np.maximum(high[:, 1:], previous, out=change) @ rma
+                bottom = np.minimum(low[:, 1:], previous, out=scratch) @ rma
+                out[:, _INDEX["atr"]] = top - bottom
+        out[:, _INDEX["obv"]] = obv
+
+        if n >= 16:
+            # 直近5本の %K 生値（14本の高値・安値）
+            windows = min(n - 13, 5)
+            highest = sliding_window_view(high[:, -(windows + 13):], 14, axis=1).max(axis=2)
+            lowest = sliding_window_view(low[:, -(windows + 13):], 14, axis=1).min(axis=2)
+            width = highest - lowest
+            width[width == 0.0] = _EPSILON
+            raw = 100.0 * (close[:, -windows:] - lowest) / width
+            out[:, _INDEX["stoch_k"]] = raw[:, -3:].mean(axis=1)
+            if n >= 18:
+                k = (raw[:, :-2] + raw[:, 1:-1] + raw[:, 2:]) / 3.0
+                out[:, _INDEX["stoch_d"]] = k.mean(axis=1)
+
+        if n >= 20:
+            window = close[:, -20:]
+            middle = out[:, _INDEX["sma_20"]]
+            deviation = np.sqrt(((window - middle[:, None]) ** 2).mean(axis=1))
+            out[:, _INDEX["bb_upper"]] = middle + 2.0 * deviation
+            out[:, _INDEX["bb_middle"]] = middle
+            out[:, _INDEX["bb_lower"]] = middle - 2.0 * deviation
+
+        # 最新セッションより前のバーの出来高を0として累積する
+        session_volume = np.where(np.arange(n) >= matrix.sessions[:, None], volume, 0.0)
+        total_volume = session_volume.sum(axis=1)
+        price_volume = (
+            np.einsum("ij,ij->i", high, session_volume)
+            + np.einsum("ij,ij->i", low, session_volume)
+            + np.einsum("ij,ij->i", close, session_volume)
+        ) / 3.0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[:, _INDEX["vwap"]] = np.where(total_volume != 0.0, price_volume / total_volume, np.nan)
+        return out
+
+    def compute_indicators(
+        self,
+        matrices: Sequence[BarMatrix],
+        timeframe: TimeFrame
+    ) -> Dict[str, TechnicalIndicators]:
+        """行列ごとに指標を計算し、シンボルごとの TechnicalIndicators にする"""
+        result: Dict[str, TechnicalIndicators] = {}
+        for matrix in matrices:
+            values = self.compute_matrix(matrix)
+            for symbol, timestamp, row in zip(matrix.symbols, matrix.timestamps, values):
+                result[symbol] = TechnicalIndicators(
+                    symbol=symbol,
+                    timeframe=timeframe,
+                    timestamp=timestamp,
+                    **indicator_values(row)
+                )
+        return result
@@ -0,0 +1,192 @@
+"""
+通貨強弱
+
+ウォッチリストの全通貨ペアのリターン・指標の状態を、ペアのスコア = 基軸通貨の強さ - 決済通貨の強さ
+とみなして通貨ごとのスコアに分解する。ペア × 通貨の係数行列（基軸通貨 +1、決済通貨 -1）の擬似逆行列を
+一度だけ求めておき、時間足ごとに全ペアのスコアのベクトルとの積で全通貨を一度に計算する
+（最小ノルム解のため、つながった通貨の間ではスコアの合計が0になる）。分解した通貨のスコアは
+ペアの値の範囲を超えることがあるため、成分ごとに -1〜1 にクリップする。
+
+成分は次の3つで、設定した重みの加重平均を通貨のスコア（-1〜1）とする。
+- returns: 直近 lookback 本の対数リターンをペアごとのボラティリティ（直近100本）で割った値（±3でクリップして-1〜1）
+- rsi: (RSI - 50) / 50
+- trend: 上昇トレンドなら強度/100、下降トレンドなら -強度/100
+
+リターンは終値パネルの行が確定するたび、指標はウォッチリストの再計算のたびに、その時間足だけを計算し直す。
+"""
+
+import math
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..models.market import CurrencyStrength, TimeFrame, TrendDirection
+from .bar_panel import BarPanels
+from .news_store import normalize_symbol
+from .watchlist import Watchlist
+
+DEFAULT_WEIGHTS = {"returns": 0.5, "rsi": 0.25, "trend": 0.25}
+
+# リターンの成分をクリップする値（ボラティリティの何倍か）
+_RETURN_CLIP = 3.0
+
+# ボラティリティを計算するリターンの本数
+_VOLATILITY_BARS = 100
+
+
+def pair_currencies(symbol: str) -> Optional[Tuple[str, str]]:
+    """通貨ペアの (基軸通貨, 決済通貨)、通貨ペアでなければ None"""
+    key = normalize_symbol(symbol)
+    if len(key) != 6 or not key.isalpha():
+        return None
+    return key[:3], key[3:]
+
+
+class CurrencyStrengthService:
+    """時間足ごとの通貨強弱を保持する"""
+
+    def __init__(
+        self,
+        panels: BarPanels,
+        watchlist: Watchlist,
+        timeframes: Sequence[TimeFrame],
+        lookback: int = 20,
+        weights: Optional[Dict[str, float]] = None
+    ):
+        self.panels = panels
+        self.watchlist = watchlist
+        self.lookback = lookback
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
+
+        self.pairs: List[str] = []
+        columns = []
+        legs = []
+        for column, symbol in enumerate(panels.symbols):
+            currencies = pair_currencies(symbol)
+            if currencies is not None:
+                self.pairs.append(symbol)
+                columns.append(column)
+                legs.append(currencies)
+        self.currencies = sorted({currency for leg in legs for currency in leg})
+        index = {currency: i for i, currency in enumerate(self.currencies)}
+        self._columns = np.array(columns, dtype=int)
+        self._rows = {symbol: i for i, symbol in enumerate(self.pairs)}
+        # ペア × 通貨の係数行列
+        self._design = np.zeros((len(self.pairs), len(self.currencies)))
+        for i, (base, quote) in enumerate(legs):
+            self._design[i, index[base]] = 1.0
+            self._design[i, index[quote]] = -1.0
+        # 有効なペアの組み合わせごとの擬似逆行列
+        self._solvers: Dict[bytes, np.ndarray] = {}
+
+        self.timeframes = [
+            tf for tf in dict.fromkeys(TimeFrame(tf) for tf in timeframes)
+            if tf in panels.panels and tf in watchlist.timeframes
+        ]
+        # 時間足ごとのペアの指標の状態（self.pairs の順、未計算は NaN）
+        self._rsi = {tf: np.full(len(self.pairs), np.nan) for tf in self.timeframes}
+        self._trend = {tf: np.full(len(self.pairs), np.nan) for tf in self.timeframes}
+        self._results: Dict[TimeFrame, CurrencyStrength] = {}
+        self._listeners: List[Callable[[TimeFrame], None]] = []
+
+        for timeframe in self.timeframes:
+            for symbol in self.pairs:
+                self._load_state(symbol, timeframe)
+            self.recompute(timeframe)
+        panels.add_listener(self._on_rows)
+        watchlist.add_listener(self._on_refresh)
+
+    def add_listener(self, listener: Callable[[TimeFrame], None]) -> Callable[[], None]:
+        """通貨強弱を更新した時間足を通知するリスナーを登録し、解除用の関数を返す"""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener) if listener in self._listeners else None
+
+    def strength(self, timeframe: TimeFrame) -> CurrencyStrength:
+        """時間足の通貨強弱（対象外の時間足は ValueError）"""
+        result = self._results.get(timeframe)
+        if result is None:
+            raise ValueError(f"Currency strength is not tracked for {timeframe.value}")
+        return result
+
+    def _load_state(self, symbol: str, timeframe: TimeFrame) -> None:
+        entry = self.watchlist.entry(symbol, timeframe)
+        if entry is None:
+            return
+        i = self._rows[symbol]
+        rsi = entry.indicators.rsi
+        self._rsi[timeframe][i] = (rsi - 50.0) / 50.0 if rsi is not None else np.nan
+        sign = {TrendDirection.BULLISH: 1.0, TrendDirection.BEARISH: -1.0}.get(entry.trend.direction, 0.0)
+        self._trend[timeframe][i] = sign * entry.trend.strength / 100.0
+
+    def _on_refresh(self, symbol: str, timeframes: List[TimeFrame]) -> None:
+        if symbol not in self._rows:
+            return
+        for timeframe in timeframes:
+            if timeframe in self._rsi:
+                self._load_state(symbol, timeframe)
+                self.recompute(timeframe)
+
+    def _on_rows(self, timeframe: TimeFrame, rows: int, reset: bool) -> None:
+        if timeframe in self._rsi:
+            self.recompute(timeframe)
+
+    def _returns(self, timeframe: TimeFrame) -> np.ndarray:
+        """ペアごとの直近 lookback 本のリターン（直近 _VOLATILITY_BARS 本のボラティリティで正規化）"""
+        panel = self.panels.panels[timeframe]
+        if len(panel) <= self.lookback:
+            return np.full(len(self.pairs), np.nan)
+        returns = panel.returns(max(_VOLATILITY_BARS, self.lookback))[:, self._columns]
+        moves = returns[-self.lookback:].sum(axis=0)
+        # 終値のないペアはリターンが全て0（ボラティリティ0）になるため NaN にして分解から除く
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scores = moves / (returns.std(axis=0) * math.sqrt(self.lookback))
+        scores[~np.isfinite(scores)] = np.nan
+        return np.clip(scores, -_RETURN_CLIP, _RETURN_CLIP) / _RETURN_CLIP
+
+    def _decompose(self, values: np.ndarray) -> np.ndarray:
+        """ペアのスコアを通貨のスコアに分解（値のないペアは除き、どのペアにも現れない通貨は NaN）"""
+        valid = np.isfinite(values)
+        if not valid.any():
+            return np.full(len(self.currencies), np.nan)
+        key = valid.tobytes()
+        solver = self._solvers.get(key)
+        if solver is None:
+            solver = self._solvers[key] = np.linalg.pinv(self._design[valid])
+        scores = np.clip(solver @ values[valid], -1.0, 1.0)
+        scores[~np.abs(self._design[valid]).any(axis=0)] = np.nan
+        return scores
+
+    def recompute(self, timeframe: TimeFrame) -> CurrencyStrength:
+        """時間足の通貨強弱を現在のパネル・指標の状態から計算し直して返す（リスナーにも通知する）"""
+        components = {
+            "returns": self._decompose(self._returns(timeframe)),
+            "rsi": self._decompose(self._rsi[timeframe]),
+            "trend": self._decompose(self._trend[timeframe]),
+        }
+        # 値のある成分だけで加重平均
+        stacked = np.array([components[name] for name in components])
+        weights = np.array([self.weights.get(name, 0.0) for name in components])[:, None]
+        present = np.isfinite(stacked)
+        total = (weights * present).sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scores = (np.where(present, stacked, 0.0) * weights).sum(axis=0) / total
+        scores[total == 0] = np.nan
+
+        def to_dict(values: np.ndarray) -> Dict[str, Optional[float]]:
+            return {c: None if v != v else float(v) for c, v in zip(self.currencies, values)}
+
+        last = self.panels.panels[timeframe].last_timestamp
+        ranked = [self.currencies[i] for i in np.argsort(-scores, kind="stable") if scores[i] == scores[i]]
+        self._results[timeframe] = CurrencyStrength(
+            timeframe=timeframe,
+            scores=to_dict(scores),
+            components={name: to_dict(values) for name, values in components.items()},
+            ranking=ranked,
+            pairs=len(self.pairs),
+            lookback=self.lookback,
+            timestamp=datetime.fromtimestamp(last, tz=timezone.utc) if last is not None else None
+        )
+        for listener in list(self._listeners):
+            listener(timeframe)
+        return self._results[timeframe]
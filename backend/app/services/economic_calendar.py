@@ -0,0 +1,313 @@
+"""
+経済指標カレンダー
+
+イベントを発表時刻（エポック秒）の昇順に保持し、全体と通貨ごとの索引を二分探索で引く。
+期間指定・通貨・影響度での絞り込みと「現在から前後N分以内のイベント」の判定は
+索引の該当範囲だけを見るため、ティックごとの判定にも使える。
+
+ファイルは JSON（イベントの配列）/ JSONL / CSV に対応する。列名は EconomicEvent と同じ。
+時刻はすべて UTC の aware な datetime に揃える（タイムゾーンのない時刻は datetime.timestamp() と同じく
+サーバーのローカル時刻とみなす）。プロバイダからは reload_interval 秒ごとに読み込み直す。
+読み込みに失敗した場合は直前に読み込めたイベントを使い続け、retry_interval 秒後（失敗が続くと倍に
+延ばし、reload_interval を上限とする）に再試行する。
+"""
+
+import bisect
+import csv
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..core.config import settings
+from ..core.metrics import ERRORS
+from ..models.market import EconomicEvent, NewsImpact
+
+logger = logging.getLogger(__name__)
+
+# 影響度の順位（小さいほど重要）
+IMPACT_RANK = {
+    NewsImpact.CRITICAL: 0,
+    NewsImpact.HIGH: 1,
+    NewsImpact.MEDIUM: 2,
+    NewsImpact.LOW: 3,
+}
+
+_ALL = "*"
+
+
+def _as_utc(value: datetime) -> datetime:
+    """UTC の aware な datetime に変換（naive はローカル時刻とみなす）"""
+    return value.astimezone(timezone.utc)
+
+
+def _to_epoch(value: datetime) -> float:
+    return value.timestamp()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class _TimeIndex:
+    """発表時刻の昇順に並べたイベント"""
+    __slots__ = ("times", "events")
+
+    def __init__(self):
+        self.times: List[float] = []
+        self.events: List[EconomicEvent] = []
+
+    def insert(self, ts: float, event: EconomicEvent) -> None:
+        i = bisect.bisect_right(self.times, ts)
+        self.times.insert(i, ts)
+        self.events.insert(i, event)
+
+    def remove(self, ts: float, event_id: str) -> None:
+        i = bisect.bisect_left(self.times, ts)
+        while i < len(self.times) and self.times[i] == ts:
+            if self.events[i].id == event_id:
+                del self.times[i]
+                del self.events[i]
+                return
+            i += 1
+
+    def slice(self, start: float, end: float) -> List[EconomicEvent]:
+        """start <= 発表時刻 <= end のイベント"""
+        lo = bisect.bisect_left(self.times, start)
+        hi = bisect.bisect_right(self.times, end)
+        return self.events[lo:hi]
+
+
+class EconomicCalendar:
+    """発表時刻で索引付けした経済指標カレンダー"""
+
+    def __init__(
+        self,
+        events: Optional[Iterable[EconomicEvent]] = None,
+        provider: Optional["CalendarProvider"] = None,
+        reload_interval: Optional[float] = None,
+        retry_interval: float = 60
+    ):
+        self._by_id: Dict[str, Tuple[float, EconomicEvent]] = {}
+        self._index: Dict[str, _TimeIndex] = {_ALL: _TimeIndex()}
+        self.provider = provider
+        self.reload_interval = reload_interval
+        self.retry_interval = retry_interval
+        self._loaded_at: Optional[float] = None
+        # 連続して読み込みに失敗した回数と、次に読み込むまでの秒数
+        self.failures = 0
+        self._next_load = reload_interval
+        if events:
+            self.add_events(events)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def ensure_loaded(self) -> None:
+        """未読み込み、または次の読み込み時刻を過ぎていればプロバイダからイベントを読み込む"""
+        if self._loaded_at is None or (
+            self._next_load is not None and time.monotonic() - self._loaded_at >= self._next_load
+        ):
+            self.reload()
+
+    def reload(self) -> bool:
+        """プロバイダからイベントを読み込み直す（失敗した場合は直前のイベントを残して False を返す）"""
+        self._loaded_at = time.monotonic()
+        if self.provider is None:
+            return True
+        try:
+            loaded = EconomicCalendar(self.provider.load())
+        except Exception as e:
+            self.failures += 1
+            delay = self.retry_interval * 2 ** (self.failures - 1)
+            self._next_load = min(delay, self.reload_interval) if self.reload_interval is not None else delay
+            ERRORS.labels(component="calendar").inc()
+            logger.warning(
+                f"Failed to load economic calendar (retrying in {self._next_load:.0f}s): {str(e)}"
+            )
+            return False
+        self._by_id, self._index = loaded._by_id, loaded._index
+        self.failures = 0
+        self._next_load = self.reload_interval
+        return True
+
+    def add_events(self, events: Iterable[EconomicEvent]) -> None:
+        """イベントを追加（同じIDは置き換え。実際値の更新などに使う）"""
+        for event in events:
+            if event.event_time.tzinfo is not timezone.utc:
+                event = event.model_copy(update={"event_time": _as_utc(event.event_time)})
+            existing = self._by_id.get(event.id)
+            if existing is not None:
+                ts, old = existing
+                self._index[_ALL].remove(ts, old.id)
+                self._index[old.currency.upper()].remove(ts, old.id)
+            ts = _to_epoch(event.event_time)
+            self._by_id[event.id] = (ts, event)
+            self._index[_ALL].insert(ts, event)
+            self._index.setdefault(event.currency.upper(), _TimeIndex()).insert(ts, event)
+
+    def get(self, event_id: str) -> Optional[EconomicEvent]:
+        entry = self._by_id.get(event_id)
+        return entry[1] if entry else None
+
+    def clear(self) -> None:
+        self._by_id.clear()
+        self._index = {_ALL: _TimeIndex()}
+
+    def query(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        currencies: Optional[Sequence[str]] = None,
+        min_impact: Optional[NewsImpact] = None
+    ) -> List[EconomicEvent]:
+        """期間・通貨・影響度（指定以上）で絞り込んだイベント（発表時刻順）"""
+        lo = _to_epoch(start) if start else float("-inf")
+        hi = _to_epoch(end) if end else float("inf")
+        return self._range(lo, hi, currencies, min_impact)
+
+    def _range(
+        self,
+        lo: float,
+        hi: float,
+        currencies: Optional[Sequence[str]],
+        min_impact: Optional[NewsImpact]
+    ) -> List[EconomicEvent]:
+        if currencies:
+            keys = list(dict.fromkeys(c.upper() for c in currencies))
+            events = []
+            for key in keys:
+                index = self._index.get(key)
+                if index is not None:
+                    events.extend(index.slice(lo, hi))
+            if len(keys) > 1:
+                events.sort(key=lambda e: _to_epoch(e.event_time))
+        else:
+            events = self._index[_ALL].slice(lo, hi)
+
+        if min_impact is not None:
+            limit = IMPACT_RANK[min_impact]
+            events = [e for e in events if IMPACT_RANK[e.impact] <= limit]
+        return list(events)
+
+    def upcoming(
+        self,
+        minutes: float,
+        now: Optional[datetime] = None,
+        currencies: Optional[Sequence[str]] = None,
+        min_impact: Optional[NewsImpact] = None
+    ) -> List[EconomicEvent]:
+        """現在から minutes 分以内に発表されるイベント"""
+        now_ts = _to_epoch(now or _now())
+        return self._range(now_ts, now_ts + minutes * 60, currencies, min_impact)
+
+    def events_near(
+        self,
+        now: Optional[datetime] = None,
+        before_minutes: float = 30,
+        after_minutes: float = 30,
+        currencies: Optional[Sequence[str]] = None,
+        min_impact: Optional[NewsImpact] = NewsImpact.HIGH
+    ) -> List[EconomicEvent]:
+        """発表の before_minutes 分前から after_minutes 分後までの範囲に現在時刻が入るイベント"""
+        now_ts = _to_epoch(now or _now())
+        return self._range(
+            now_ts - after_minutes * 60, now_ts + before_minutes * 60, currencies, min_impact
+        )
+
+    def in_blackout(
+        self,
+        now: Optional[datetime] = None,
+        before_minutes: float = 30,
+        after_minutes: float = 30,
+        currencies: Optional[Sequence[str]] = None,
+        min_impact: Optional[NewsImpact] = NewsImpact.HIGH
+    ) -> bool:
+        """重要イベントの発表前後（シグナル・リスク判定用）"""
+        return bool(self.events_near(now, before_minutes, after_minutes, currencies, min_impact))
+
+
+class CalendarProvider(ABC):
+    """カレンダーの取得元の基底クラス"""
+
+    @abstractmethod
+    def load(self) -> List[EconomicEvent]:
+        """全イベントを読み込む"""
+
+
+class FileCalendarProvider(CalendarProvider):
+    """JSON / JSONL / CSV ファイルからイベントを読み込む"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> List[EconomicEvent]:
+        ext = os.path.splitext(self.path)[1].lower()
+        with open(self.path, encoding="utf-8") as f:
+            if ext == ".csv":
+                rows = [{k: v for k, v in row.items() if v not in ("", None)} for row in csv.DictReader(f)]
+            elif ext == ".jsonl":
+                rows = [json.loads(line) for line in f if line.strip()]
+            else:
+                data = json.load(f)
+                rows = data.get("events", []) if isinstance(data, dict) else data
+        return [EconomicEvent(**row) for row in rows]
+
+
+class DemoCalendarProvider(CalendarProvider):
+    """デモ用のイベント（読み込むたびにその時刻からの相対時刻で作る）"""
+
+    def load(self) -> List[EconomicEvent]:
+        now = _now().replace(second=0, microsecond=0)
+        return [
+            EconomicEvent(
+                id="event_1",
+                title="米国 雇用統計（NFP）",
+                country="US",
+                currency="USD",
+                event_time=now + timedelta(days=3, hours=8),
+                impact=NewsImpact.CRITICAL,
+                forecast="200K",
+                previous="180K",
+                description="非農業部門雇用者数の発表"
+            ),
+            EconomicEvent(
+                id="event_2",
+                title="日本 GDP速報値",
+                country="JP",
+                currency="JPY",
+                event_time=now + timedelta(days=5, hours=23),
+                impact=NewsImpact.HIGH,
+                forecast="0.5%",
+                previous="0.3%",
+                description="四半期GDP成長率の発表"
+            ),
+            EconomicEvent(
+                id="event_3",
+                title="ECB 政策金利発表",
+                country="EU",
+                currency="EUR",
+                event_time=now + timedelta(days=7, hours=12),
+                impact=NewsImpact.CRITICAL,
+                forecast="4.50%",
+                previous="4.50%",
+                description="欧州中央銀行の金融政策決定"
+            ),
+        ]
+
+
+def default_calendar_provider() -> CalendarProvider:
+    """設定されたファイル、なければデモデータ"""
+    if settings.ECONOMIC_CALENDAR_FILE:
+        return FileCalendarProvider(settings.ECONOMIC_CALENDAR_FILE)
+    return DemoCalendarProvider()
+
+
+economic_calendar = EconomicCalendar(
+    provider=default_calendar_provider(),
+    reload_interval=settings.ECONOMIC_CALENDAR_RELOAD_INTERVAL,
+    retry_interval=settings.ECONOMIC_CALENDAR_RETRY_INTERVAL
+)
@@ -0,0 +1,165 @@
+"""
+ニュースのエンティティリンク
+
+記事中の通貨・国・中央銀行・通貨ペアの言及を通貨コードに変換し、対象の通貨ペアに紐付ける。
+
+- ペアの明示（"USD/JPY", "EURUSD"）はそのペア
+- 2通貨以上の言及は、両方の通貨を含むペア（例: "Fed" と "BoJ" → USDJPY）
+- 1通貨のみの言及は、その通貨を含む全ペア（例: "BoJ" → USDJPY, EURJPY, GBPJPY, ...）
+
+国名・地域名や "dollar" のような通貨に限らない語は、通貨固有の語・通貨ペア・為替の語（"forex" など）と
+同じ記事に現れたときだけ通貨の言及とみなす（"America" だけの記事は USD に紐付けない）。
+"""
+
+from typing import Dict, List, Sequence, Set
+
+from ..utils.keyword_matcher import KeywordMatcher
+from .news_store import normalize_symbol
+
+# 通貨ごとの別名（通貨コード・通貨名・中央銀行・要人など、通貨に固有の語）
+CURRENCY_ALIASES: Dict[str, List[str]] = {
+    "USD": [
+        "usd", "greenback", "us dollar", "u.s. dollar", "fed", "frb", "federal reserve", "fomc",
+        "powell",
+        "米ドル", "米連邦準備",
+    ],
+    "JPY": [
+        "jpy", "yen", "boj", "bank of japan", "ueda",
+        "円", "日銀",
+    ],
+    "EUR": [
+        "eur", "euro", "ecb", "european central bank", "lagarde",
+        "ユーロ",
+    ],
+    "GBP": [
+        "gbp", "pound", "sterling", "boe", "bank of england", "bailey",
+        "ポンド", "英中銀", "イングランド銀行",
+    ],
+    "AUD": [
+        "aud", "aussie", "australian dollar", "rba", "reserve bank of australia",
+        "豪ドル",
+    ],
+    "NZD": [
+        "nzd", "kiwi", "new zealand dollar", "rbnz",
+        "NZドル",
+    ],
+    "CAD": [
+        "cad", "loonie", "canadian dollar", "boc", "bank of canada",
+        "カナダドル",
+    ],
+    "CHF": [
+        "chf", "franc", "swiss franc", "snb", "swiss national bank",
+        "スイスフラン",
+    ],
+    # 人民元は取引対象のオフショア人民元（CNH）に寄せる
+    "CNH": [
+        "cny", "cnh", "yuan", "renminbi", "pboc", "people's bank of china",
+        "人民元",
+    ],
+}
+
+# 通貨に限らない語（国・地域・国債など）。通貨固有の語や為替の語と一緒に現れたときだけ使う
+CONTEXT_ALIASES: Dict[str, List[str]] = {
+    "USD": [
+        "dollar", "dollars", "u.s.", "united states", "america", "american", "treasuries",
+        "ドル", "米国", "米雇用",
+    ],
+    "JPY": ["japan", "japanese", "tokyo", "日本"],
+    "EUR": [
+        "eurozone", "euro zone", "euro area", "germany", "german", "france", "french", "italy", "bund",
+        "欧州", "ドイツ",
+    ],
+    "GBP": ["uk", "britain", "british", "united kingdom", "gilts", "英国"],
+    "AUD": ["australia", "australian", "豪州", "オーストラリア"],
+    "NZD": ["new zealand", "ニュージーランド"],
+    "CAD": ["canada", "canadian", "カナダ"],
+    "CHF": ["switzerland", "swiss", "スイス"],
+    "CNH": ["china", "chinese", "中国"],
+}
+
+# 国・地域の語を通貨の言及とみなすための為替の語
+FX_TERMS: List[str] = [
+    "forex", "fx", "currency", "currencies", "exchange rate", "exchange rates",
+    "為替", "通貨",
+]
+
+
+class EntityLinker:
+    """通貨・国・中央銀行の言及から関連する通貨ペアを求める"""
+
+    def __init__(
+        self,
+        symbols: Sequence[str],
+        aliases: Dict[str, List[str]] = CURRENCY_ALIASES,
+        context_aliases: Dict[str, List[str]] = CONTEXT_ALIASES,
+        fx_terms: Sequence[str] = FX_TERMS
+    ):
+        # 6文字の通貨ペアのみを対象とする
+        self.pairs = [s for s in dict.fromkeys(normalize_symbol(s) for s in symbols) if len(s) == 6]
+        self._currencies = set(aliases)
+        self._by_pair = set(self.pairs)
+        self._by_currency: Dict[str, List[str]] = {}
+        for pair in self.pairs:
+            for currency in (pair[:3], pair[3:]):
+                self._by_currency.setdefault(currency, []).append(pair)
+
+        self.matcher = KeywordMatcher()
+        for currency, names in aliases.items():
+            for name in names:
+                self.matcher.add(name, ("currency", currency))
+        for currency, names in context_aliases.items():
+            for name in names:
+                self.matcher.add(name, ("context", currency))
+        for term in fx_terms:
+            self.matcher.add(term, ("fx", None))
+        for pair in self.pairs:
+            for name in (pair, f"{pair[:3]}/{pair[3:]}"):
+                self.matcher.add(name, ("pair", pair))
+        self.matcher.build()
+
+    def is_pair(self, symbol: str) -> bool:
+        """通貨ペアのシンボルか（設定にないペアも、両方の通貨が既知ならペアとみなす）"""
+        key = normalize_symbol(symbol)
+        return key in self._by_pair or (
+            len(key) == 6 and key[:3] in self._currencies and key[3:] in self._currencies
+        )
+
+    def _mentions(self, text: str) -> List[tuple]:
+        """一致箇所のうち、より長い一致に含まれるもの（"australian dollar" 中の "dollar"）を除く"""
+        matches = sorted(self.matcher.finditer(text), key=lambda m: (m[0], -m[1]))
+        mentions = []
+        covered_until = -1
+        for start, end, value in matches:
+            if end <= covered_until:
+                continue
+            mentions.append(value)
+            covered_until = max(covered_until, end)
+        # 国・地域の語は通貨固有の語・通貨ペア・為替の語があるときだけ通貨の言及とする
+        if any(kind != "context" for kind, _ in mentions):
+            mentions = [("currency", value) if kind == "context" else (kind, value) for kind, value in mentions]
+        return [(kind, value) for kind, value in mentions if kind in ("currency", "pair")]
+
+    def currencies(self, title: str, description: str = "") -> List[str]:
+        """言及された通貨コード（最初の出現順）"""
+        found = []
+        for kind, value in self._mentions(f"{title} {description or ''}"):
+            found.extend([value] if kind == "currency" else [value[:3], value[3:]])
+        return list(dict.fromkeys(found))
+
+    def link(self, title: str, description: str = "") -> List[str]:
+        """記事に関連する通貨ペア"""
+        pairs: List[str] = []
+        currencies: List[str] = []
+        for kind, value in self._mentions(f"{title} {description or ''}"):
+            if kind == "pair":
+                pairs.append(value)
+            else:
+                currencies.append(value)
+
+        mentioned: Set[str] = set(currencies)
+        if len(mentioned) >= 2:
+            pairs.extend(p for p in self.pairs if p[:3] in mentioned and p[3:] in mentioned)
+        if not pairs:
+            for currency in dict.fromkeys(currencies):
+                pairs.extend(self._by_currency.get(currency, []))
+        return list(dict.fromkeys(pairs))
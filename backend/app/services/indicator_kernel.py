@@ -0,0 +1,234 @@
+"""
+テクニカル指標の融合カーネル
+
+履歴を1回走査して TechnicalIndicators の全指標（最新バーの値）を出力バッファに書き込む。
+DataFrame や指標ごとの中間系列を作らず、状態を持つ指標（EMA・MACD・RSI・ATR・OBV・VWAP）は
+走査中に更新し、窓で決まる指標（SMA・ボリンジャーバンド・ストキャスティクス）は末尾の窓だけを計算する。
+
+定義は pandas_ta 0.3.14b と同じ（EMA は最初の length 本の平均で初期化、RSI・ATR は Wilder の RMA、
+ボリンジャーバンドは母標準偏差、VWAP は日（バーの時刻の暦日）ごとのセッションで累積をリセット）。
+データ不足の指標は NaN。
+numba がインストールされていれば JIT コンパイルする（なければそのまま Python で実行）。
+"""
+
+import math
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..models.market import OHLCV
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# 出力バッファの並び（TechnicalIndicators のフィールド名）
+FIELDS = (
+    "sma_20", "sma_50", "sma_200", "ema_12", "ema_26",
+    "macd", "macd_signal", "macd_histogram", "rsi", "stoch_k", "stoch_d",
+    "bb_upper", "bb_middle", "bb_lower", "atr", "obv", "vwap",
+)
+
+# ストキャスティクスの高値・安値の幅が0のときに足す値（pandas_ta の non_zero_range と同じ）
+_EPSILON = 2.220446049250313e-16
+
+
+def _window_mean(values, end: int, length: int) -> float:
+    total = 0.0
+    for i in range(end - length, end):
+        total += values[i]
+    return total / length
+
+
+def _raw_stoch(high, low, close, t: int) -> float:
+    """t 本目の %K（平滑化前、14本）"""
+    highest = high[t]
+    lowest = low[t]
+    for i in range(t - 13, t):
+        if high[i] > highest:
+            highest = high[i]
+        if low[i] < lowest:
+            lowest = low[i]
+    width = highest - lowest
+    if width == 0.0:
+        width = _EPSILON
+    return 100.0 * (close[t] - lowest) / width
+
+
+def _kernel(high, low, close, volume, n: int, session: int, out) -> None:
+    """n 本の履歴から最新バーの全指標を out（FIELDS の順）に書き込む（session は最新セッションの先頭位置）"""
+    for k in range(len(out)):
+        out[k] = math.nan
+    if n == 0:
+        return
+
+    a12 = 2.0 / 13.0
+    a26 = 2.0 / 27.0
+    a9 = 2.0 / 10.0
+    decay = 1.0 - 1.0 / 14.0  # RMA(14)
+
+    sum12 = 0.0
+    sum26 = 0.0
+    ema12 = math.nan
+    ema26 = math.nan
+    macd = math.nan
+    macd_sum = 0.0
+    signal = math.nan
+    gain = 0.0
+    loss = 0.0
+    true_range = 0.0
+    weight = 0.0
+    changes = 0
+    obv = volume[0]
+    price_volume = 0.0
+    total_volume = 0.0
+
+    for i in range(n):
+        c = close[i]
+        h = high[i]
+        lo = low[i]
+        v = volume[i]
+
+        # EMA（最初の length 本の平均で初期化）
+        if i < 12:
+            sum12 += c
+            if i == 11:
+                ema12 = sum12 / 12.0
+        else:
+            ema12 = (1.0 - a12) * ema12 + a12 * c
+        if i < 26:
+            sum26 += c
+            if i == 25:
+                ema26 = sum26 / 26.0
+        else:
+            ema26 = (1.0 - a26) * ema26 + a26 * c
+
+        # MACD とシグナル（MACD の最初の9本の平均で初期化）
+        if i >= 25:
+            macd = ema12 - ema26
+            if i < 34:
+                macd_sum += macd
+                if i == 33:
+                    signal = macd_sum / 9.0
+            else:
+                signal = (1.0 - a9) * signal + a9 * macd
+
+        if i > 0:
+            previous = close[i - 1]
+            change = c - previous
+            # RSI・ATR（RMA は調整済みの指数加重平均）
+            gain = gain * decay + (change if change > 0.0 else 0.0)
+            loss = loss * decay + (-change if change < 0.0 else 0.0)
+            true_range = true_range * decay + max(abs(h - lo), abs(h - previous), abs(lo - previous))
+            weight = weight * decay + 1.0
+            changes += 1
+            if change > 0.0:
+                obv += v
+            elif change < 0.0:
+                obv -= v
+
+        # VWAP（最新バーと同じセッションのバーだけを累積）
+        if i >= session:
+            price_volume += (h + lo + c) / 3.0 * v
+            total_volume += v
+
+    if n >= 20:
+        out[0] = _window_mean(close, n, 20)
+    if n >= 50:
+        out[1] = _window_mean(close, n, 50)
+    if n >= 200:
+        out[2] = _window_mean(close, n, 200)
+    out[3] = ema12
+    out[4] = ema26
+    out[5] = macd
+    out[6] = signal
+    out[7] = macd - signal
+
+    if changes >= 14:
+        if gain + loss > 0.0:
+            out[8] = 100.0 * gain / (gain + loss)
+        out[14] = true_range / weight
+
+    # ストキャスティクス（%K は14本の生値の3本平均、%D は %K の3本平均）
+    if n >= 16:
+        raw0 = _raw_stoch(high, low, close, n - 1)
+        raw1 = _raw_stoch(high, low, close, n - 2)
+        raw2 = _raw_stoch(high, low, close, n - 3)
+        out[9] = (raw0 + raw1 + raw2) / 3.0
+        if n >= 18:
+            raw3 = _raw_stoch(high, low, close, n - 4)
+            raw4 = _raw_stoch(high, low, close, n - 5)
+            out[10] = (out[9] + (raw1 + raw2 + raw3) / 3.0 + (raw2 + raw3 + raw4) / 3.0) / 3.0
+
+    # ボリンジャーバンド（20本、2σ、母標準偏差）
+    if n >= 20:
+        middle = out[0]
+        squares = 0.0
+        for i in range(n - 20, n):
+            squares += (close[i] - middle) ** 2
+        deviation = math.sqrt(squares / 20.0)
+        out[11] = middle + 2.0 * deviation
+        out[12] = middle
+        out[13] = middle - 2.0 * deviation
+
+    out[15] = obv
+    if total_volume != 0.0:
+        out[16] = price_volume / total_volume
+
+
+if NUMBA_AVAILABLE:
+    _window_mean = njit(cache=True)(_window_mean)
+    _raw_stoch = njit(cache=True)(_raw_stoch)
+    _kernel = njit(cache=True)(_kernel)
+
+
+def session_start(ohlcv_list: Sequence[OHLCV]) -> int:
+    """最新バーと同じ暦日のセッションが始まる位置（pandas_ta の VWAP の anchor="D" と同じ区切り）"""
+    start = len(ohlcv_list) - 1
+    if start <= 0:
+        return 0
+    day = ohlcv_list[-1].timestamp.date()
+    while start > 0 and ohlcv_list[start - 1].timestamp.date() == day:
+        start -= 1
+    return start
+
+
+class IndicatorKernel:
+    """入力と出力のバッファを再利用して全指標を計算する（スレッド間で共有しない）"""
+
+    def __init__(self, capacity: int = 1024):
+        self._bars = np.empty((4, capacity))
+        self.out = np.empty(len(FIELDS))
+
+    def compute(self, ohlcv_list: Sequence[OHLCV]) -> np.ndarray:
+        """最新バーの全指標（FIELDS の順、データ不足は NaN）。返す配列は次の呼び出しで上書きされる"""
+        n = len(ohlcv_list)
+        high = [o.high for o in ohlcv_list]
+        low = [o.low for o in ohlcv_list]
+        close = [o.close for o in ohlcv_list]
+        volume = [o.volume for o in ohlcv_list]
+        session = session_start(ohlcv_list)
+        if not NUMBA_AVAILABLE:
+            # Python で実行する場合は配列の要素アクセスよりリストの方が速い
+            _kernel(high, low, close, volume, n, session, self.out)
+            return self.out
+
+        if n > self._bars.shape[1]:
+            self._bars = np.empty((4, max(n, self._bars.shape[1] * 2)))
+        bars = self._bars
+        bars[0, :n] = high
+        bars[1, :n] = low
+        bars[2, :n] = close
+        bars[3, :n] = volume
+        _kernel(bars[0], bars[1], bars[2], bars[3], n, session, self.out)
+        return self.out
+
+
+def indicator_values(out: np.ndarray) -> Dict[str, Optional[float]]:
+    """出力バッファを TechnicalIndicators のフィールドに変換（NaN は None）"""
+    return {
+        name: None if math.isnan(value) else value
+        for name, value in zip(FIELDS, out.tolist())
+    }
@@ -1,14 +1,35 @@
-import yfinance as yf
-import pandas as pd
+import asyncio
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
-import pandas_ta as ta
+from typing import List, Optional, Dict, Any, Callable, Sequence, TypeVar
 
 from ..models.market import (
     OHLCV, MarketQuote, TimeFrame, TrendDirection, 
     TrendAnalysis, TechnicalIndicators
 )
+from .tick_store import TickStore, tick_store as shared_tick_store
+from .indicator_kernel import IndicatorKernel, indicator_values
+from .cross_section import CrossSectionEngine, stack_histories
+from .providers import MarketDataProvider, get_market_provider
+from .sentiment import sentiment_aggregator
+from ..core.config import settings
+from ..core.metrics import ERRORS, record_cache, stage_timer
+
+T = TypeVar("T")
+
+# プロバイダの呼び出し（yfinance はブロッキング）を実行するスレッド。最初の取得時に作る
+_upstream_executor: Optional[ThreadPoolExecutor] = None
+
+
+async def run_upstream(function: Callable[[], T]) -> T:
+    """プロバイダの呼び出しを上流用のスレッドで実行し、イベントループを止めない"""
+    global _upstream_executor
+    if _upstream_executor is None:
+        _upstream_executor = ThreadPoolExecutor(
+            max_workers=settings.UPSTREAM_MAX_WORKERS, thread_name_prefix="upstream"
+        )
+    return await asyncio.get_running_loop().run_in_executor(_upstream_executor, function)
 
 
 class MarketDataService:
@@ -42,15 +63,36 @@ class MarketDataService:
         TimeFrame.MN1: "5y",
     }
     
-    def __init__(self):
+    def __init__(
+        self,
+        tick_store: Optional[TickStore] = None,
+        provider: Optional[MarketDataProvider] = None
+    ):
         self.cache: Dict[str, Any] = {}
+        self.tick_store = tick_store or shared_tick_store
+        self._provider = provider
+        self.indicator_kernel = IndicatorKernel()
+        self.cross_section = CrossSectionEngine()
+    
+    @property
+    def provider(self) -> MarketDataProvider:
+        """データ取得元（未指定の場合は有効なプロバイダ）"""
+        return self._provider or get_market_provider()
     
     async def get_quote(self, symbol: str) -> MarketQuote:
         """リアルタイム価格を取得"""
+        # ティックを受信中のシンボルはメモリ上の最新値を返す
+        quote = self.tick_store.get_quote(symbol)
+        record_cache("quote_ticks", quote is not None)
+        if quote is not None:
+            return quote
+        
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            history = ticker.history(period="1d", interval="1m")
+            provider = self.provider
+            with stage_timer("fetch"):
+                info, history = await run_upstream(
+                    lambda: (provider.info(symbol), provider.history(symbol, "1m", period="1d"))
+                )
             
             if history.empty:
                 raise ValueError(f"No data available for {symbol}")
@@ -82,30 +124,28 @@ class MarketDataService:
     ) -> List[OHLCV]:
         """履歴データを取得"""
         try:
-            ticker = yf.Ticker(symbol)
-            
             interval = self.TIMEFRAME_MAPPING[timeframe]
             period = self.PERIOD_MAPPING[timeframe]
             
-            if start and end:
-                df = ticker.history(start=start, end=end, interval=interval)
-            else:
-                df = ticker.history(period=period, interval=interval)
+            provider = self.provider
+            with stage_timer("fetch"):
+                df = await run_upstream(lambda: provider.history(symbol, interval, period, start, end))
             
             if df.empty:
                 return []
             
-            ohlcv_list = []
-            for idx, row in df.iterrows():
-                ohlcv = OHLCV(
-                    timestamp=idx.to_pydatetime(),
-                    open=float(row['Open']),
-                    high=float(row['High']),
-                    low=float(row['Low']),
-                    close=float(row['Close']),
-                    volume=float(row['Volume'])
-                )
-                ohlcv_list.append(ohlcv)
+            with stage_timer("convert"):
+                ohlcv_list = []
+                for idx, row in df.iterrows():
+                    ohlcv = OHLCV(
+                        timestamp=idx.to_pydatetime(),
+                        open=float(row['Open']),
+                        high=float(row['High']),
+                        low=float(row['Low']),
+                        close=float(row['Close']),
+                        volume=float(row['Volume'])
+                    )
+                    ohlcv_list.append(ohlcv)
             
             return ohlcv_list
         except Exception as e:
@@ -114,98 +154,82 @@ class MarketDataService:
     async def calculate_indicators(
         self, 
         symbol: str, 
-        timeframe: TimeFrame
+        timeframe: TimeFrame,
+        ohlcv_list: Optional[List[OHLCV]] = None
     ) -> TechnicalIndicators:
-        """テクニカル指標を計算"""
+        """テクニカル指標を計算（取得済みの履歴を渡すと再取得しない）"""
         try:
             # 履歴データを取得
-            ohlcv_list = await self.get_historical_data(symbol, timeframe)
+            if ohlcv_list is None:
+                ohlcv_list = await self.get_historical_data(symbol, timeframe)
             
             if not ohlcv_list:
                 raise ValueError(f"No data available for {symbol}")
             
-            # DataFrameに変換
-            df = pd.DataFrame([{
-                'Open': o.open,
-                'High': o.high,
-                'Low': o.low,
-                'Close': o.close,
-                'Volume': o.volume
-            } for o in ohlcv_list])
-            
-            # 移動平均線
-            df['SMA_20'] = ta.sma(df['Close'], length=20)
-            df['SMA_50'] = ta.sma(df['Close'], length=50)
-            df['SMA_200'] = ta.sma(df['Close'], length=200)
-            df['EMA_12'] = ta.ema(df['Close'], length=12)
-            df['EMA_26'] = ta.ema(df['Close'], length=26)
-            
-            # MACD
-            macd = ta.macd(df['Close'])
-            if macd is not None:
-                df = pd.concat([df, macd], axis=1)
-            
-            # RSI
-            df['RSI'] = ta.rsi(df['Close'], length=14)
-            
-            # Stochastic
-            stoch = ta.stoch(df['High'], df['Low'], df['Close'])
-            if stoch is not None:
-                df = pd.concat([df, stoch], axis=1)
-            
-            # ボリンジャーバンド
-            bbands = ta.bbands(df['Close'], length=20, std=2)
-            if bbands is not None:
-                df = pd.concat([df, bbands], axis=1)
-            
-            # ATR
-            df['ATR'] = ta.atr(df['High'], df['Low'], df['Close'], length=14)
-            
-            # OBV
-            df['OBV'] = ta.obv(df['Close'], df['Volume'])
-            
-            # VWAP
-            df['VWAP'] = ta.vwap(df['High'], df['Low'], df['Close'], df['Volume'])
-            
-            # 最新の値を取得
-            latest = df.iloc[-1]
+            with stage_timer("indicators"):
+                # 全指標を1回の走査で計算
+                values = indicator_values(self.indicator_kernel.compute(ohlcv_list))
+                indicators = TechnicalIndicators(
+                    symbol=symbol,
+                    timeframe=timeframe,
+                    timestamp=ohlcv_list[-1].timestamp,
+                    **values
+                )
             
-            indicators = TechnicalIndicators(
-                symbol=symbol,
-                timeframe=timeframe,
-                timestamp=ohlcv_list[-1].timestamp,
-                sma_20=float(latest['SMA_20']) if pd.notna(latest.get('SMA_20')) else None,
-                sma_50=float(latest['SMA_50']) if pd.notna(latest.get('SMA_50')) else None,
-                sma_200=float(latest['SMA_200']) if pd.notna(latest.get('SMA_200')) else None,
-                ema_12=float(latest['EMA_12']) if pd.notna(latest.get('EMA_12')) else None,
-                ema_26=float(latest['EMA_26']) if pd.notna(latest.get('EMA_26')) else None,
-                macd=float(latest['MACD_12_26_9']) if pd.notna(latest.get('MACD_12_26_9')) else None,
-                macd_signal=float(latest['MACDs_12_26_9']) if pd.notna(latest.get('MACDs_12_26_9')) else None,
-                macd_histogram=float(latest['MACDh_12_26_9']) if pd.notna(latest.get('MACDh_12_26_9')) else None,
-                rsi=float(latest['RSI']) if pd.notna(latest.get('RSI')) else None,
-                stoch_k=float(latest['STOCHk_14_3_3']) if pd.notna(latest.get('STOCHk_14_3_3')) else None,
-                stoch_d=float(latest['STOCHd_14_3_3']) if pd.notna(latest.get('STOCHd_14_3_3')) else None,
-                bb_upper=float(latest['BBU_20_2.0']) if pd.notna(latest.get('BBU_20_2.0')) else None,
-                bb_middle=float(latest['BBM_20_2.0']) if pd.notna(latest.get('BBM_20_2.0')) else None,
-                bb_lower=float(latest['BBL_20_2.0']) if pd.notna(latest.get('BBL_20_2.0')) else None,
-                atr=float(latest['ATR']) if pd.notna(latest.get('ATR')) else None,
-                obv=float(latest['OBV']) if pd.notna(latest.get('OBV')) else None,
-                vwap=float(latest['VWAP']) if pd.notna(latest.get('VWAP')) else None,
-            )
+            # 最新の指標からテクニカルセンチメントを更新
+            sentiment_aggregator.update_technical(symbol, indicators, ohlcv_list[-1].close)
             
             return indicators
         except Exception as e:
             raise Exception(f"Failed to calculate indicators for {symbol}: {str(e)}")
     
+    async def calculate_indicators_many(
+        self,
+        symbols: Sequence[str],
+        timeframe: TimeFrame,
+        histories: Optional[Dict[str, List[OHLCV]]] = None
+    ) -> Dict[str, TechnicalIndicators]:
+        """
+        複数シンボルのテクニカル指標をまとめて計算（取得済みの履歴を渡すと再取得しない）
+        
+        履歴をシンボル × バーの行列に積んで全シンボルを一度に計算する。
+        履歴を取得できなかったシンボルは結果に含めない。
+        """
+        try:
+            histories = dict(histories or {})
+            for symbol in symbols:
+                if symbol not in histories:
+                    try:
+                        histories[symbol] = await self.get_historical_data(symbol, timeframe)
+                    except Exception:
+                        ERRORS.labels(component="indicators").inc()
+            histories = {s: histories[s] for s in symbols if histories.get(s)}
+            
+            with stage_timer("indicators"):
+                results = self.cross_section.compute_indicators(
+                    stack_histories(histories), timeframe
+                )
+            
+            for symbol, indicators in results.items():
+                sentiment_aggregator.update_technical(symbol, indicators, histories[symbol][-1].close)
+            
+            return results
+        except Exception as e:
+            raise Exception(f"Failed to calculate indicators for {len(symbols)} symbols: {str(e)}")
+    
     async def analyze_trend(
         self, 
         symbol: str, 
-        timeframe: TimeFrame
+        timeframe: TimeFrame,
+        indicators: Optional[TechnicalIndicators] = None,
+        ohlcv_list: Optional[List[OHLCV]] = None
     ) -> TrendAnalysis:
-        """トレンドを分析"""
+        """トレンドを分析（計算済みの指標・履歴を渡すと再計算しない）"""
         try:
-            indicators = await self.calculate_indicators(symbol, timeframe)
-            ohlcv_list = await self.get_historical_data(symbol, timeframe)
+            if ohlcv_list is None:
+                ohlcv_list = await self.get_historical_data(symbol, timeframe)
+            if indicators is None:
+                indicators = await self.calculate_indicators(symbol, timeframe, ohlcv_list)
             
             if not ohlcv_list:
                 return TrendAnalysis(
@@ -215,56 +239,57 @@ class MarketDataService:
                     description="データ不足"
                 )
             
-            current_price = ohlcv_list[-1].close
-            
-            # トレンド判定
-            direction = TrendDirection.SIDEWAYS
-            strength = 50.0
-            reasons = []
-            
-            # 移動平均線によるトレンド判定
-            if indicators.sma_20 and indicators.sma_50:
-                if current_price > indicators.sma_20 > indicators.sma_50:
-                    direction = TrendDirection.BULLISH
-                    strength += 20
-                    reasons.append("価格が移動平均線の上にある")
-                elif current_price < indicators.sma_20 < indicators.sma_50:
-                    direction = TrendDirection.BEARISH
-                    strength += 20
-                    reasons.append("価格が移動平均線の下にある")
-            
-            # RSIによる判定
-            if indicators.rsi:
-                if indicators.rsi > 70:
-                    reasons.append(f"RSI買われすぎ ({indicators.rsi:.1f})")
-                    if direction == TrendDirection.BEARISH:
-                        strength += 10
-                elif indicators.rsi < 30:
-                    reasons.append(f"RSI売られすぎ ({indicators.rsi:.1f})")
-                    if direction == TrendDirection.BULLISH:
-                        strength += 10
-                elif 40 <= indicators.rsi <= 60:
-                    reasons.append(f"RSI中立 ({indicators.rsi:.1f})")
-            
-            # MACDによる判定
-            if indicators.macd and indicators.macd_signal:
-                if indicators.macd > indicators.macd_signal:
-                    if direction == TrendDirection.BULLISH:
-                        strength += 15
-                    reasons.append("MACD上昇シグナル")
-                else:
-                    if direction == TrendDirection.BEARISH:
-                        strength += 15
-                    reasons.append("MACD下降シグナル")
-            
-            strength = min(strength, 100)
-            
-            # サポート・レジスタンスレベルを計算
-            closes = [o.close for o in ohlcv_list[-50:]]
-            support_levels = self._find_support_levels(closes, current_price)
-            resistance_levels = self._find_resistance_levels(closes, current_price)
-            
-            description = f"{timeframe.value}: {direction.value} (強度: {strength:.0f}%). " + "; ".join(reasons)
+            with stage_timer("trend"):
+                current_price = ohlcv_list[-1].close
+            
+                # トレンド判定
+                direction = TrendDirection.SIDEWAYS
+                strength = 50.0
+                reasons = []
+            
+                # 移動平均線によるトレンド判定
+                if indicators.sma_20 and indicators.sma_50:
+                    if current_price > indicators.sma_20 > indicators.sma_50:
+                        direction = TrendDirection.BULLISH
+                        strength += 20
+                        reasons.append("価格が移動平均線の上にある")
+                    elif current_price < indicators.sma_20 < indicators.sma_50:
+                        direction = TrendDirection.BEARISH
+                        strength += 20
+                        reasons.append("価格が移動平均線の下にある")
+            
+                # RSIによる判定
+                if indicators.rsi:
+                    if indicators.rsi > 70:
+                        reasons.append(f"RSI買われすぎ ({indicators.rsi:.1f})")
+                        if direction == TrendDirection.BEARISH:
+                            strength += 10
+                    elif indicators.rsi < 30:
+                        reasons.append(f"RSI売られすぎ ({indicators.rsi:.1f})")
+                        if direction == TrendDirection.BULLISH:
+                            strength += 10
+                    elif 40 <= indicators.rsi <= 60:
+                        reasons.append(f"RSI中立 ({indicators.rsi:.1f})")
+            
+                # MACDによる判定
+                if indicators.macd and indicators.macd_signal:
+                    if indicators.macd > indicators.macd_signal:
+                        if direction == TrendDirection.BULLISH:
+                            strength += 15
+                        reasons.append("MACD上昇シグナル")
+                    else:
+                        if direction == TrendDirection.BEARISH:
+                            strength += 15
+                        reasons.append("MACD下降シグナル")
+            
+                strength = min(strength, 100)
+            
+                # サポート・レジスタンスレベルを計算
+                closes = [o.close for o in ohlcv_list[-50:]]
+                support_levels = self._find_support_levels(closes, current_price)
+                resistance_levels = self._find_resistance_levels(closes, current_price)
+            
+                description = f"{timeframe.value}: {direction.value} (強度: {strength:.0f}%). " + "; ".join(reasons)
             
             return TrendAnalysis(
                 timeframe=timeframe,
@@ -0,0 +1,71 @@
+"""
+ニュース分類
+
+影響度・センチメント・タグのキーワードを1つの KeywordMatcher にまとめ、
+記事のテキストを1回走査するだけで3つの判定を行う。
+"""
+
+from typing import Dict, List, NamedTuple, Sequence
+
+from ..models.market import NewsImpact
+from ..utils.keyword_matcher import KeywordMatcher
+
+
+class Classification(NamedTuple):
+    """記事の分類結果"""
+    impact: NewsImpact
+    sentiment: float
+    tags: List[str]
+
+
+class NewsClassifier:
+    """キーワードによるニュース分類器"""
+
+    def __init__(
+        self,
+        impact_keywords: Dict[NewsImpact, Sequence[str]],
+        positive_keywords: Sequence[str],
+        negative_keywords: Sequence[str],
+        tag_keywords: Dict[str, Sequence[str]]
+    ):
+        # 影響度は定義順（先頭が最優先）
+        self._impacts = list(impact_keywords.keys())
+        self._tags = list(tag_keywords.keys())
+        self.matcher = KeywordMatcher()
+        for rank, keywords in enumerate(impact_keywords.values()):
+            for keyword in keywords:
+                self.matcher.add(keyword, ("impact", rank, keyword))
+        for keyword in positive_keywords:
+            self.matcher.add(keyword, ("positive", 0, keyword))
+        for keyword in negative_keywords:
+            self.matcher.add(keyword, ("negative", 0, keyword))
+        for rank, keywords in enumerate(tag_keywords.values()):
+            for keyword in keywords:
+                self.matcher.add(keyword, ("tag", rank, keyword))
+        self.matcher.build()
+
+    def classify(self, title: str, description: str = "") -> Classification:
+        """影響度・センチメント (-1 to 1)・タグを判定"""
+        impact_rank = len(self._impacts)
+        positive = set()
+        negative = set()
+        tag_ranks = set()
+
+        for _, _, (kind, rank, keyword) in self.matcher.finditer(f"{title} {description or ''}"):
+            if kind == "impact":
+                impact_rank = min(impact_rank, rank)
+            elif kind == "positive":
+                positive.add(keyword)
+            elif kind == "negative":
+                negative.add(keyword)
+            else:
+                tag_ranks.add(rank)
+
+        impact = self._impacts[impact_rank] if impact_rank < len(self._impacts) else NewsImpact.LOW
+
+        # キーワードの種類数で判定（同じ語の繰り返しは数えない）
+        total = len(positive) + len(negative)
+        sentiment = (len(positive) - len(negative)) / total if total else 0.0
+
+        tags = [self._tags[rank] for rank in sorted(tag_ranks)]
+        return Classification(impact, max(-1.0, min(1.0, sentiment)), tags)
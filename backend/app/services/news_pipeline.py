@@ -0,0 +1,215 @@
+"""
+ニュース分類パイプライン
+
+正規化済みの記事ストリームを読み込み、バッチ単位で分類してニュースストアに書き戻す。
+
+    読み込み -> [記事キュー] -> バッチ化・分類 -> [結果キュー] -> ストアへ書き込み
+
+両キューとも上限付きで、分類や書き込みが追いつかない場合は読み込み側が待たされる。
+workers > 0 の場合は分類をプロセスプールで実行する（重いスコアラー向け）。
+
+アーカイブのバックフィル:
+
+    cd backend
+    python -m app.services.news_pipeline archive.jsonl --workers 4 --batch-size 512 --out classified.jsonl
+
+入力は NewsAPI の記事形式（title, description, url, source.name, publishedAt）のJSONL。
+分類した記事（NewsItem）は --out のJSONLに重複を除いてすべて書き出す（メモリ上のストアは
+NEWS_STORE_MAX_ARTICLES 件を超えると古い記事から捨てるため、書き出しはストアの上限に左右されない）。
+--out を省略した場合は分類の処理速度の計測のみで、統計を表示して結果は捨てる。
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterable, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from ..core.metrics import QUEUE_DEPTH, stage_timer
+from ..models.market import NewsItem
+from .news_classifier import Classification
+from .news_store import NewsStore
+
+logger = logging.getLogger(__name__)
+
+Scorer = Callable[[List[Tuple[str, str]]], List[Classification]]
+
+_DONE = object()
+
+
+def classify_batch(texts: List[Tuple[str, str]]) -> List[Classification]:
+    """(タイトル, 説明) のバッチを分類（ワーカープロセスからも呼べるモジュール関数）"""
+    from .news_service import NewsService
+
+    classifier = NewsService.classifier
+    return [classifier.classify(title, description) for title, description in texts]
+
+
+class ClassificationPipeline:
+    """記事をバッチ分類してストアに書き込むストリーミングパイプライン"""
+
+    def __init__(
+        self,
+        store: NewsStore,
+        build_item: Callable[[Dict[str, Any], Classification], NewsItem],
+        scorer: Scorer = classify_batch,
+        batch_size: int = 256,
+        queue_size: int = 4096,
+        workers: int = 0,
+        max_inflight: Optional[int] = None,
+        on_added: Optional[Callable[[List[NewsItem]], None]] = None
+    ):
+        self.store = store
+        self.build_item = build_item
+        self.scorer = scorer
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.workers = workers
+        # 同時に処理中（分類待ち・書き込み待ち）のバッチ数
+        self.max_inflight = max_inflight or max(workers * 2, 1)
+        # 新規に追加された記事の通知先（センチメント集計など）
+        self.on_added = on_added
+
+    async def run(
+        self,
+        articles: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """全記事を処理して統計を返す"""
+        loop = asyncio.get_running_loop()
+        executor = ProcessPoolExecutor(self.workers) if self.workers > 0 else None
+        articles_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        results_queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_inflight)
+        QUEUE_DEPTH.labels(queue="news_classify").set_function(articles_queue.qsize)
+
+        stats = {"articles": 0, "added": 0, "batches": 0, "max_queue_depth": 0}
+        start = time.perf_counter()
+
+        async def produce():
+            if hasattr(articles, "__aiter__"):
+                async for article in articles:
+                    await articles_queue.put(article)
+            else:
+                for article in articles:
+                    await articles_queue.put(article)
+            await articles_queue.put(_DONE)
+
+        async def classify():
+            finished = False
+            while not finished:
+                first = await articles_queue.get()
+                if first is _DONE:
+                    break
+                stats["max_queue_depth"] = max(stats["max_queue_depth"], articles_queue.qsize() + 1)
+                batch = [first]
+                while len(batch) < self.batch_size:
+                    try:
+                        article = articles_queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                    if article is _DONE:
+                        finished = True
+                        break
+                    batch.append(article)
+
+                texts = [(a["title"], a.get("description") or "") for a in batch]
+                if executor is not None:
+                    future = loop.run_in_executor(executor, self.scorer, texts)
+                else:
+                    future = loop.create_future()
+                    with stage_timer("classify_batch"):
+                        future.set_result(self.scorer(texts))
+                # 結果キューが満杯なら書き込みが追いつくまで待つ
+                await results_queue.put((batch, future))
+                await asyncio.sleep(0)
+            await results_queue.put(_DONE)
+
+        async def write():
+            while True:
+                item = await results_queue.get()
+                if item is _DONE:
+                    break
+                batch, future = item
+                classifications = await future
+                items = [self.build_item(a, c) for a, c in zip(batch, classifications)]
+                added = self.store.merge(items)
+                if added and self.on_added is not None:
+                    self.on_added(added)
+                stats["added"] += len(added)
+                stats["articles"] += len(items)
+                stats["batches"] += 1
+
+        tasks = [asyncio.ensure_future(c) for c in (produce(), classify(), write())]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        elapsed = time.perf_counter() - start
+        stats.update({
+            "elapsed": elapsed,
+            "articles_per_sec": stats["articles"] / elapsed if elapsed > 0 else 0.0,
+            "batch_size": self.batch_size,
+            "workers": self.workers,
+        })
+        logger.info(
+            f"Classified {stats['articles']} articles in {elapsed:.2f}s "
+            f"({stats['articles_per_sec']:.0f}/s, {stats['added']} new)"
+        )
+        return stats
+
+
+def _read_archive(path: str) -> Iterable[Dict[str, Any]]:
+    from .news_sources import normalize_newsapi_article
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield normalize_newsapi_article(json.loads(line))
+
+
+def main() -> None:
+    from .news_service import NewsService
+
+    parser = argparse.ArgumentParser(description="ニュースアーカイブのバッチ分類")
+    parser.add_argument("path", help="NewsAPI形式の記事のJSONL")
+    parser.add_argument("--workers", type=int, default=0, help="分類プロセス数（0でイベントループ内）")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--symbols", nargs="*", help="記事に関連付ける通貨ペア以外のシンボル（株式など）")
+    parser.add_argument("--out", help="分類した記事を書き出すJSONL（省略時は統計の表示のみ）")
+    args = parser.parse_args()
+
+    service = NewsService(sources=[])
+    written = 0
+    with open(args.out, "w", encoding="utf-8") if args.out else contextlib.nullcontext() as out:
+        if out is not None:
+            # ストアから捨てられた記事がもう一度追加されても1回だけ書き出す
+            seen: Set[str] = set()
+
+            def write_items(items: List[NewsItem]) -> None:
+                nonlocal written
+                for item in items:
+                    if item.id not in seen:
+                        seen.add(item.id)
+                        out.write(item.model_dump_json() + "\n")
+                        written += 1
+
+            service.add_news_listener(write_items)
+        stats = asyncio.run(service.classify_stream(
+            _read_archive(args.path), args.symbols, workers=args.workers, batch_size=args.batch_size
+        ))
+    if args.out:
+        stats["written"] = written
+        stats["out"] = args.out
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
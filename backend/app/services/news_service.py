@@ -1,47 +1,131 @@
 import aiohttp
+import hashlib
+import logging
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict
+from typing import Any, AsyncIterable, Callable, Iterable, List, Optional, Dict, Union
 import asyncio
 from ..models.market import (
     NewsItem, NewsImpact, EconomicEvent, MarketSentiment
 )
 from ..core.config import settings
+from .providers import get_news_provider, market_now, market_sleep
+from .news_sources import ConditionalFetcher, NewsAPISource, NewsSource, RSSSource
+from .economic_calendar import EconomicCalendar, economic_calendar
+from .entity_linker import EntityLinker
+from .news_classifier import Classification, NewsClassifier
+from .news_pipeline import ClassificationPipeline
+from .news_store import ALL_SYMBOLS, NewsStore, normalize_symbols
+from .sentiment import SentimentAggregator, SentimentSnapshot, sentiment_aggregator
+from ..core.metrics import ERRORS, record_cache, upstream_call
+
+logger = logging.getLogger(__name__)
 
 
 class NewsService:
     """ニュース分析サービス"""
     
-    NEWS_API_URL = "https://newsapi.org/v2/everything"
-    
-    # キーワードによる影響度判定
+    # キーワードによる影響度判定（単語単位で一致するため活用形も列挙する）
     IMPACT_KEYWORDS = {
         NewsImpact.CRITICAL: [
-            "central bank", "interest rate", "fed", "ecb", "boj",
+            "central bank", "central banks", "interest rate", "interest rates",
+            "fed", "federal reserve", "ecb", "boj",
             "crisis", "war", "emergency", "default"
         ],
         NewsImpact.HIGH: [
             "gdp", "inflation", "employment", "unemployment",
-            "policy", "regulation", "sanctions"
+            "policy", "regulation", "regulations", "sanctions"
         ],
         NewsImpact.MEDIUM: [
-            "earnings", "forecast", "outlook", "data",
-            "report", "announcement"
+            "earnings", "forecast", "forecasts", "outlook", "data",
+            "report", "reports", "announcement", "announcements"
         ]
     }
     
     # センチメント分析用キーワード
     POSITIVE_KEYWORDS = [
-        "surge", "rally", "gain", "rise", "up", "positive",
-        "growth", "strong", "bullish", "recovery", "upgrade"
+        "surge", "surges", "surged", "rally", "rallies", "rallied",
+        "gain", "gains", "gained", "rise", "rises", "rising", "rose", "up", "positive",
+        "growth", "strong", "stronger", "bullish", "recovery", "upgrade", "upgraded"
     ]
     
     NEGATIVE_KEYWORDS = [
-        "fall", "drop", "decline", "down", "negative",
-        "weak", "bearish", "crisis", "concern", "downgrade"
+        "fall", "falls", "fell", "falling", "drop", "drops", "dropped",
+        "decline", "declines", "declined", "down", "negative",
+        "weak", "weaker", "bearish", "crisis", "concern", "concerns", "downgrade", "downgraded"
     ]
     
-    def __init__(self):
-        self.cache: Dict[str, List[NewsItem]] = {}
+    # タグ抽出用キーワード
+    TAG_KEYWORDS = {
+        "central_bank": ["fed", "federal reserve", "ecb", "boj", "central bank", "central banks"],
+        "interest_rate": ["interest rate", "interest rates", "rate hike", "rate cut"],
+        "gdp": ["gdp", "economic growth"],
+        "inflation": ["inflation", "cpi", "pce"],
+        "employment": ["employment", "jobs", "unemployment"],
+    }
+    
+    # 全キーワードをまとめたオートマトン（1回の走査で分類）
+    classifier = NewsClassifier(IMPACT_KEYWORDS, POSITIVE_KEYWORDS, NEGATIVE_KEYWORDS, TAG_KEYWORDS)
+    
+    # 通貨・国・中央銀行の言及から関連する通貨ペアを判定
+    linker = EntityLinker(settings.FX_SYMBOLS)
+    
+    def __init__(
+        self,
+        sources: Optional[List[NewsSource]] = None,
+        sentiment: Optional[SentimentAggregator] = None,
+        calendar: Optional[EconomicCalendar] = None
+    ):
+        self.sentiment = sentiment or sentiment_aggregator
+        self.calendar = calendar or economic_calendar
+        self.store = NewsStore(
+            ttl=settings.NEWS_UPDATE_INTERVAL, max_articles=settings.NEWS_STORE_MAX_ARTICLES
+        )
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        self._news_listeners: List[Callable[[List[NewsItem]], None]] = []
+        # デモモードで配信した記事の通し番号
+        self._demo_sequence = 0
+        self.sources = sources if sources is not None else self._default_sources()
+        self.fetcher = ConditionalFetcher(
+            retries=settings.NEWS_HTTP_RETRIES,
+            backoff=settings.NEWS_HTTP_BACKOFF,
+            max_entries=settings.NEWS_HTTP_CACHE_ENTRIES
+        )
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    @staticmethod
+    def _default_sources() -> List[NewsSource]:
+        """設定からニュースソースを構築"""
+        sources: List[NewsSource] = []
+        if settings.NEWS_API_KEY:
+            sources.append(NewsAPISource(settings.NEWS_API_URL, settings.NEWS_API_KEY))
+        for url in settings.NEWS_RSS_FEEDS:
+            sources.append(RSSSource(url))
+        return sources
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """キープアライブ付きの共有セッションを取得（イベントループごとに1つ）"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=settings.NEWS_HTTP_POOL_SIZE,
+                limit_per_host=settings.NEWS_HTTP_POOL_PER_HOST,
+                keepalive_timeout=settings.NEWS_HTTP_KEEPALIVE,
+                ttl_dns_cache=300
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=settings.NEWS_HTTP_TIMEOUT,
+                connect=settings.NEWS_HTTP_CONNECT_TIMEOUT
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            self._session_loop = loop
+        return self._session
+    
+    async def close(self):
+        """HTTPセッションを閉じる"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
     
     async def get_latest_news(
         self, 
@@ -50,71 +134,171 @@ class NewsService:
     ) -> List[NewsItem]:
         """最新ニュースを取得"""
         try:
-            # キャッシュチェック
-            cache_key = f"news_{','.join(symbols or [])}"
-            if cache_key in self.cache:
-                return self.cache[cache_key][:limit]
-            
-            news_items = []
+            # リプレイ中はテープのニュースを返す
+            provider = get_news_provider()
+            if provider is not None:
+                return provider.latest_news(symbols, limit)
             
-            # デモデータを返す（実際のAPIキーがない場合）
-            if not settings.NEWS_API_KEY:
-                news_items = self._get_demo_news(symbols)
-            else:
-                # NewsAPIから取得
-                news_items = await self._fetch_from_newsapi(symbols, limit)
+            # デモデータを返す（ニュースソースが設定されていない場合）
+            if not self.sources:
+                return self._get_demo_news(symbols)[:limit]
             
-            # キャッシュに保存
-            self.cache[cache_key] = news_items
-            
-            return news_items[:limit]
+            await self._ensure_fresh(symbols)
+            return self.store.query(symbols, limit)
         except Exception as e:
-            print(f"Failed to get news: {str(e)}")
-            return self._get_demo_news(symbols)
+            ERRORS.labels(component="news").inc()
+            logger.warning(f"Failed to get news: {str(e)}")
+            # 取得済みの記事があれば古くても返す
+            return self.store.query(symbols, limit) or self._get_demo_news(symbols)[:limit]
+    
+    def add_news_listener(self, listener: Callable[[List[NewsItem]], None]) -> Callable[[], None]:
+        """新着記事（ストアに初めて追加された記事）の通知先を登録し、解除用の関数を返す"""
+        self._news_listeners.append(listener)
+        return lambda: self._news_listeners.remove(listener) if listener in self._news_listeners else None
+    
+    def _on_added(self, items: List[NewsItem]) -> None:
+        """新着記事をセンチメント集計とリスナーに渡す"""
+        if not items:
+            return
+        self.sentiment.add_news(items)
+        for listener in list(self._news_listeners):
+            listener(items)
     
-    async def _fetch_from_newsapi(
+    async def poll_news(self) -> None:
+        """全体フィードを1回取り込む（新着はリスナーに通知される）"""
+        provider = get_news_provider()
+        if provider is not None:
+            # リプレイ中は時計までに公開された記事を取り込む
+            self._on_added(self.store.merge(provider.latest_news(None, settings.NEWS_FETCH_SIZE)))
+        elif self.sources:
+            await self._refresh([ALL_SYMBOLS])
+        else:
+            # ニュースソースが設定されていない場合はデモ記事を1件ずつ新着として流す
+            self._on_added(self.store.merge([self._next_demo_news()]))
+    
+    async def run_ingestion(self, interval: Optional[float] = None) -> None:
+        """ニュースを定期的に取り込む（条件付きリクエストのため更新がなければ軽い）"""
+        interval = interval or settings.NEWS_POLL_INTERVAL
+        while True:
+            try:
+                await self.poll_news()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                ERRORS.labels(component="news").inc()
+                logger.warning(f"Failed to poll news: {str(e)}")
+            await market_sleep(interval)
+    
+    async def _ensure_fresh(self, symbols: Optional[List[str]]) -> None:
+        """TTLを過ぎたシンボルのみ再取得し、ストアに差分を取り込む"""
+        stale = self.store.stale_symbols(symbols)
+        record_cache("news", not stale)
+        if stale:
+            await self._refresh(stale)
+    
+    async def _refresh(self, symbols: List[str]) -> None:
+        """同じシンボルの取得が進行中ならその完了を待つ（同時リクエストで重複取得しない）"""
+        key = tuple(sorted(symbols))
+        task = self._inflight.get(key)
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(self._fetch_and_merge(symbols))
+            self._inflight[key] = task
+            task.add_done_callback(
+                lambda t: self._inflight.pop(key, None) if self._inflight.get(key) is t else None
+            )
+        await asyncio.shield(task)
+    
+    async def _fetch_and_merge(self, symbols: List[str]) -> None:
+        """取得した記事をストアに統合し、取得時刻を更新"""
+        fetch_symbols = None if symbols == [ALL_SYMBOLS] else symbols
+        news_items = await self._fetch_from_sources(fetch_symbols, settings.NEWS_FETCH_SIZE)
+        self._on_added(self.store.merge(news_items))
+        self.store.mark_refreshed(fetch_symbols)
+    
+    async def _fetch_from_sources(
         self, 
         symbols: Optional[List[str]], 
         limit: int
     ) -> List[NewsItem]:
-        """NewsAPIからニュースを取得"""
-        news_items = []
+        """全ニュースソースから並行して取得し、URLで重複を除いて新しい順に統合"""
+        session = self._get_session()
+        results = await asyncio.gather(
+            *(source.fetch(session, self.fetcher, symbols, limit) for source in self.sources),
+            return_exceptions=True
+        )
         
-        query = "forex OR stock market OR economy"
-        if symbols:
-            query += " AND (" + " OR ".join(symbols) + ")"
+        articles: Dict[str, Dict[str, Any]] = {}
+        failures = 0
+        for source, result in zip(self.sources, results):
+            if isinstance(result, Exception):
+                failures += 1
+                ERRORS.labels(component="news").inc()
+                logger.warning(f"Failed to fetch news from {source.name}: {str(result)}")
+                continue
+            for article in result:
+                articles.setdefault(article["url"], article)
         
-        params = {
-            "q": query,
-            "apiKey": settings.NEWS_API_KEY,
-            "language": "en",
-            "sortBy": "publishedAt",
-            "pageSize": limit
-        }
+        if failures == len(self.sources):
+            raise Exception("Failed to fetch news from all sources")
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(self.NEWS_API_URL, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    for article in data.get("articles", []):
-                        news_item = NewsItem(
-                            id=str(hash(article["url"])),
-                            title=article["title"],
-                            description=article.get("description"),
-                            source=article["source"]["name"],
-                            url=article["url"],
-                            published_at=datetime.fromisoformat(
-                                article["publishedAt"].replace("Z", "+00:00")
-                            ),
-                            impact=self._assess_impact(article["title"], article.get("description", "")),
-                            sentiment=self._analyze_sentiment(article["title"], article.get("description", "")),
-                            related_symbols=symbols or [],
-                            tags=self._extract_tags(article["title"], article.get("description", ""))
-                        )
-                        news_items.append(news_item)
+        ordered = sorted(articles.values(), key=lambda a: a["published_at"], reverse=True)
+        return [self._to_news_item(article, symbols) for article in ordered]
+    
+    def _to_news_item(self, article: Dict[str, Any], symbols: Optional[List[str]] = None) -> NewsItem:
+        """正規化済みの記事を分類してNewsItemに変換"""
+        classification = self._classify(article["title"], article.get("description") or "")
+        return self._build_news_item(article, classification, symbols)
+    
+    def _build_news_item(
+        self,
+        article: Dict[str, Any],
+        classification: Classification,
+        symbols: Optional[List[str]] = None
+    ) -> NewsItem:
+        """
+        分類結果と関連シンボルからNewsItemを生成
         
-        return news_items
+        関連シンボルは記事中の言及から求めた通貨ペアと、取得時に指定した通貨ペア以外のシンボル
+        （株式など。記事の言及からは判定しない）。
+        """
+        tickers = [s for s in normalize_symbols(symbols) if not self.linker.is_pair(s)]
+        return NewsItem(
+            id=self._article_id(article["url"]),
+            title=article["title"],
+            description=article.get("description"),
+            source=article["source"],
+            url=article["url"],
+            published_at=article["published_at"],
+            impact=classification.impact,
+            sentiment=classification.sentiment,
+            related_symbols=list(dict.fromkeys(
+                self.linker.link(article["title"], article.get("description") or "") + tickers
+            )),
+            tags=classification.tags
+        )
+    
+    async def classify_stream(
+        self,
+        articles: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+        symbols: Optional[List[str]] = None,
+        workers: Optional[int] = None,
+        batch_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """正規化済みの記事をバッチ分類してストアに書き込む（アーカイブのバックフィル用）"""
+        pipeline = ClassificationPipeline(
+            self.store,
+            lambda article, classification: self._build_news_item(article, classification, symbols),
+            batch_size=batch_size or settings.NEWS_CLASSIFY_BATCH_SIZE,
+            queue_size=settings.NEWS_CLASSIFY_QUEUE_SIZE,
+            workers=settings.NEWS_CLASSIFY_WORKERS if workers is None else workers,
+            on_added=self._on_added
+        )
+        return await pipeline.run(articles)
+    
+    @staticmethod
+    def _article_id(url: str) -> str:
+        """URLから安定した記事IDを生成（プロセスをまたいでも同じ値）"""
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
     
     def _get_demo_news(self, symbols: Optional[List[str]] = None) -> List[NewsItem]:
         """デモニュースデータを生成"""
@@ -161,95 +345,53 @@ class NewsService:
         
         return demo_news
     
+    def _next_demo_news(self) -> NewsItem:
+        """デモ記事を順に選び、新しいIDと現在時刻を付けて返す"""
+        templates = self._get_demo_news()
+        template = templates[self._demo_sequence % len(templates)]
+        self._demo_sequence += 1
+        return template.model_copy(update={
+            "id": f"demo_live_{self._demo_sequence}",
+            "url": f"{template.url}?seq={self._demo_sequence}",
+            "published_at": market_now(),
+        })
+    
+    def _classify(self, title: str, description: str) -> Classification:
+        """影響度・センチメント・タグを1回の走査で判定"""
+        return self.classifier.classify(title, description)
+    
     def _assess_impact(self, title: str, description: str) -> NewsImpact:
         """ニュースの影響度を評価"""
-        text = (title + " " + description).lower()
-        
-        for impact, keywords in self.IMPACT_KEYWORDS.items():
-            if any(keyword in text for keyword in keywords):
-                return impact
-        
-        return NewsImpact.LOW
+        return self._classify(title, description).impact
     
     def _analyze_sentiment(self, title: str, description: str) -> float:
         """センチメントを分析 (-1 to 1)"""
-        text = (title + " " + description).lower()
-        
-        positive_count = sum(1 for keyword in self.POSITIVE_KEYWORDS if keyword in text)
-        negative_count = sum(1 for keyword in self.NEGATIVE_KEYWORDS if keyword in text)
-        
-        total = positive_count + negative_count
-        if total == 0:
-            return 0.0
-        
-        sentiment = (positive_count - negative_count) / total
-        return max(-1.0, min(1.0, sentiment))
+        return self._classify(title, description).sentiment
     
     def _extract_tags(self, title: str, description: str) -> List[str]:
         """タグを抽出"""
-        text = (title + " " + description).lower()
-        tags = []
-        
-        tag_keywords = {
-            "central_bank": ["fed", "ecb", "boj", "central bank"],
-            "interest_rate": ["interest rate", "rate hike", "rate cut"],
-            "gdp": ["gdp", "economic growth"],
-            "inflation": ["inflation", "cpi", "pce"],
-            "employment": ["employment", "jobs", "unemployment"],
-        }
-        
-        for tag, keywords in tag_keywords.items():
-            if any(keyword in text for keyword in keywords):
-                tags.append(tag)
-        
-        return tags
+        return self._classify(title, description).tags
     
     async def get_economic_calendar(
         self, 
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
+        end_date: Optional[datetime] = None,
+        currencies: Optional[List[str]] = None,
+        min_impact: Optional[NewsImpact] = None
     ) -> List[EconomicEvent]:
-        """経済カレンダーを取得"""
-        # デモデータを返す
-        now = datetime.now()
-        
-        events = [
-            EconomicEvent(
-                id="event_1",
-                title="米国 雇用統計（NFP）",
-                country="US",
-                currency="USD",
-                event_time=now + timedelta(days=3, hours=8),
-                impact=NewsImpact.CRITICAL,
-                forecast="200K",
-                previous="180K",
-                description="非農業部門雇用者数の発表"
-            ),
-            EconomicEvent(
-                id="event_2",
-                title="日本 GDP速報値",
-                country="JP",
-                currency="JPY",
-                event_time=now + timedelta(days=5, hours=23),
-                impact=NewsImpact.HIGH,
-                forecast="0.5%",
-                previous="0.3%",
-                description="四半期GDP成長率の発表"
-            ),
-            EconomicEvent(
-                id="event_3",
-                title="ECB 政策金利発表",
-                country="EU",
-                currency="EUR",
-                event_time=now + timedelta(days=7, hours=12),
-                impact=NewsImpact.CRITICAL,
-                forecast="4.50%",
-                previous="4.50%",
-                description="欧州中央銀行の金融政策決定"
-            ),
-        ]
-        
-        return events
+        """経済カレンダーを取得（期間・通貨・影響度で絞り込み）"""
+        self.calendar.ensure_loaded()
+        return self.calendar.query(start_date, end_date, currencies, min_impact)
+    
+    async def get_upcoming_events(
+        self,
+        minutes: float,
+        currencies: Optional[List[str]] = None,
+        min_impact: Optional[NewsImpact] = None
+    ) -> List[EconomicEvent]:
+        """現在から指定分以内に発表されるイベントを取得"""
+        self.calendar.ensure_loaded()
+        return self.calendar.upcoming(minutes, market_now(), currencies, min_impact)
     
     async def calculate_market_sentiment(
         self, 
@@ -257,35 +399,40 @@ class NewsService:
         news_items: Optional[List[NewsItem]] = None
     ) -> MarketSentiment:
         """市場センチメントを計算"""
-        if not news_items:
-            news_items = await self.get_latest_news([symbol])
-        
-        # ニュースセンチメント
-        related_news = [n for n in news_items if symbol in n.related_symbols]
-        
-        if related_news:
-            news_sentiment = sum(n.sentiment for n in related_news) / len(related_news)
+        now = market_now().timestamp()
+        if news_items:
+            # 指定された記事一覧から算出
+            snapshot = self.sentiment.summarize(symbol, news_items, now)
+        elif get_news_provider() is not None or not self.sources:
+            # リプレイ・デモのニュースは集計に含めず、その都度算出
+            snapshot = self.sentiment.summarize(symbol, await self.get_latest_news([symbol]), now)
         else:
-            news_sentiment = 0.0
-        
-        # センチメントのカウント
-        bullish = sum(1 for n in related_news if n.sentiment > 0.2)
-        bearish = sum(1 for n in related_news if n.sentiment < -0.2)
-        neutral = len(related_news) - bullish - bearish
-        
-        # テクニカルセンチメントは別サービスで計算される想定
-        technical_sentiment = 0.0
-        
-        # 総合センチメント
-        overall_sentiment = news_sentiment * 0.6 + technical_sentiment * 0.4
+            # TTLを過ぎていれば再取得し、集計済みの値を読み出す
+            try:
+                await self._ensure_fresh([symbol])
+            except Exception as e:
+                ERRORS.labels(component="news").inc()
+                logger.warning(f"Failed to refresh news for {symbol}: {str(e)}")
+            snapshot = self.sentiment.snapshot(symbol, now)
         
+        return self._to_market_sentiment(symbol, snapshot)
+    
+    def get_sentiment_snapshot(self, symbol: str) -> MarketSentiment:
+        """集計済みのセンチメントを取得（再取得しない）"""
+        return self._to_market_sentiment(
+            symbol, self.sentiment.snapshot(symbol, market_now().timestamp())
+        )
+    
+    @staticmethod
+    def _to_market_sentiment(symbol: str, snapshot: SentimentSnapshot) -> MarketSentiment:
         return MarketSentiment(
             symbol=symbol,
             timestamp=datetime.now(),
-            overall_sentiment=overall_sentiment,
-            news_sentiment=news_sentiment,
-            technical_sentiment=technical_sentiment,
-            bullish_count=bullish,
-            bearish_count=bearish,
-            neutral_count=neutral
+            overall_sentiment=snapshot.overall_sentiment,
+            news_sentiment=snapshot.news_sentiment,
+            technical_sentiment=snapshot.technical_sentiment,
+            bullish_count=snapshot.bullish_count,
+            bearish_count=snapshot.bearish_count,
+            neutral_count=snapshot.neutral_count,
+            article_weight=snapshot.article_weight
         )
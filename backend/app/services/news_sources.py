@@ -0,0 +1,210 @@
+"""
+ニュースソース
+
+各ソースは共有の aiohttp セッションを受け取り、正規化した記事（title, description, source,
+url, published_at）のリストを返す。HTTP取得はリトライ（指数バックオフ）と
+条件付きリクエスト（ETag / If-Modified-Since）に対応する。
+"""
+
+import asyncio
+import logging
+import random
+import xml.etree.ElementTree as ET
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+from ..core.metrics import record_cache, upstream_call
+
+logger = logging.getLogger(__name__)
+
+# リトライ対象のステータス
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ConditionalFetcher:
+    """リトライと条件付きリクエストを行うHTTP取得"""
+
+    def __init__(self, retries: int = 3, backoff: float = 0.5, max_entries: int = 256):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_entries = max_entries
+        # URL+パラメータごとの (ETag, Last-Modified, 前回の本文)。最近使ったものから max_entries 件だけ保持
+        self._validators: "OrderedDict[Tuple, Tuple[Optional[str], Optional[str], Any]]" = OrderedDict()
+
+    async def get(
+        self,
+        session: aiohttp.ClientSession,
+        upstream: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        parse: str = "json"
+    ) -> Any:
+        """本文を取得（304 の場合は前回の本文を返す）"""
+        key = (url, tuple(sorted((params or {}).items())))
+        etag, last_modified, cached = self._validators.get(key, (None, None, None))
+        if cached is not None:
+            self._validators.move_to_end(key)
+        headers = {}
+        if cached is not None:
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        for attempt in range(self.retries + 1):
+            try:
+                with upstream_call(upstream):
+                    async with session.get(url, params=params, headers=headers) as response:
+                        if response.status == 304 and cached is not None:
+                            record_cache(f"{upstream}_conditional", True)
+                            return cached
+                        if response.status in RETRY_STATUSES and attempt < self.retries:
+                            raise aiohttp.ClientResponseError(
+                                response.request_info, response.history, status=response.status
+                            )
+                        response.raise_for_status()
+                        body = await response.json() if parse == "json" else await response.text()
+                        record_cache(f"{upstream}_conditional", False)
+                        self._validators[key] = (
+                            response.headers.get("ETag"),
+                            response.headers.get("Last-Modified"),
+                            body
+                        )
+                        self._validators.move_to_end(key)
+                        while len(self._validators) > self.max_entries:
+                            self._validators.popitem(last=False)
+                        return body
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status = getattr(e, "status", None)
+                retryable = status is None or status in RETRY_STATUSES
+                if not retryable or attempt >= self.retries:
+                    raise
+                delay = self.backoff * (2 ** attempt) * (1 + random.random() * 0.1)
+                logger.info(f"Retrying {upstream} in {delay:.2f}s: {str(e)}")
+                await asyncio.sleep(delay)
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def normalize_newsapi_article(article: Dict[str, Any]) -> Dict[str, Any]:
+    """NewsAPI形式の記事を正規化"""
+    return {
+        "title": article["title"],
+        "description": article.get("description"),
+        "source": article["source"]["name"],
+        "url": article["url"],
+        "published_at": _as_utc(datetime.fromisoformat(
+            article["publishedAt"].replace("Z", "+00:00")
+        )),
+    }
+
+
+class NewsSource(ABC):
+    """ニュースソースの基底クラス"""
+
+    name = "source"
+
+    @abstractmethod
+    async def fetch(
+        self,
+        session: aiohttp.ClientSession,
+        fetcher: ConditionalFetcher,
+        symbols: Optional[List[str]],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """正規化した記事を取得"""
+
+
+class NewsAPISource(NewsSource):
+    """NewsAPI (everything エンドポイント互換)"""
+
+    name = "newsapi"
+
+    def __init__(self, url: str, api_key: str):
+        self.url = url
+        self.api_key = api_key
+
+    async def fetch(self, session, fetcher, symbols, limit):
+        query = "forex OR stock market OR economy"
+        if symbols:
+            query += " AND (" + " OR ".join(symbols) + ")"
+
+        params = {
+            "q": query,
+            "apiKey": self.api_key,
+            "language": "en",
+            "sortBy": "publishedAt",
+            "pageSize": limit
+        }
+        data = await fetcher.get(session, self.name, self.url, params)
+
+        return [normalize_newsapi_article(article) for article in data.get("articles", [])]
+
+
+class RSSSource(NewsSource):
+    """RSS 2.0 / Atom フィード"""
+
+    ATOM = "{http://www.w3.org/2005/Atom}"
+
+    def __init__(self, url: str, name: Optional[str] = None):
+        self.url = url
+        self.name = name or f"rss:{urlparse(url).hostname}"
+
+    async def fetch(self, session, fetcher, symbols, limit):
+        text = await fetcher.get(session, "rss", self.url, parse="text")
+        return self.parse(text)[:limit]
+
+    def parse(self, text: str) -> List[Dict[str, Any]]:
+        root = ET.fromstring(text)
+        articles = []
+
+        channel = root.find("channel")
+        feed_title = channel.findtext("title") if channel is not None else None
+        for item in root.iter("item"):
+            published = item.findtext("pubDate")
+            try:
+                if published:
+                    published_at = _as_utc(parsedate_to_datetime(published))
+                else:
+                    published_at = datetime.now(timezone.utc)
+            except (TypeError, ValueError):
+                # 日時が読めない記事だけを除き、フィードの残りは取り込む
+                logger.debug(f"Skipping RSS item with invalid pubDate: {published!r}")
+                continue
+            articles.append({
+                "title": (item.findtext("title") or "").strip(),
+                "description": item.findtext("description"),
+                "source": feed_title or self.name,
+                "url": item.findtext("link"),
+                "published_at": published_at,
+            })
+
+        feed_title = root.findtext(f"{self.ATOM}title") or feed_title
+        for entry in root.iter(f"{self.ATOM}entry"):
+            link = entry.find(f"{self.ATOM}link")
+            published = entry.findtext(f"{self.ATOM}published") or entry.findtext(f"{self.ATOM}updated")
+            try:
+                if published:
+                    published_at = _as_utc(datetime.fromisoformat(published.replace("Z", "+00:00")))
+                else:
+                    published_at = datetime.now(timezone.utc)
+            except ValueError:
+                logger.debug(f"Skipping Atom entry with invalid date: {published!r}")
+                continue
+            articles.append({
+                "title": (entry.findtext(f"{self.ATOM}title") or "").strip(),
+                "description": entry.findtext(f"{self.ATOM}summary"),
+                "source": feed_title or self.name,
+                "url": link.get("href") if link is not None else None,
+                "published_at": published_at,
+            })
+
+        return [a for a in articles if a["title"] and a["url"]]
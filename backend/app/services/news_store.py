@@ -0,0 +1,120 @@
+"""
+ニュースストア
+
+記事を記事IDで保持し、正規化したシンボルごとの索引と公開日時順の並びを持つ。
+シンボルごとに最終取得時刻を記録し、TTL を過ぎたシンボルだけを再取得する。
+シンボルの組み合わせや順序に関係なく、索引から直接回答する。
+"""
+
+import bisect
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..models.market import NewsItem
+
+# シンボル指定なし（全体フィード）の取得状態を表すキー
+ALL_SYMBOLS = "*"
+
+
+def normalize_symbol(symbol: str) -> str:
+    """索引用にシンボルを正規化（USDJPY=X, usd/jpy → USDJPY）"""
+    normalized = symbol.strip().upper()
+    if normalized.endswith("=X"):
+        normalized = normalized[:-2]
+    return normalized.replace("/", "").replace("-", "")
+
+
+def normalize_symbols(symbols: Optional[Iterable[str]]) -> List[str]:
+    """重複を除いて正規化（順序は保持）"""
+    return list(dict.fromkeys(normalize_symbol(s) for s in symbols or [] if s))
+
+
+class NewsStore:
+    """記事IDとシンボルで索引付けしたニュースストア"""
+
+    def __init__(self, ttl: float = 300, max_articles: int = 2000):
+        self.ttl = ttl
+        self.max_articles = max_articles
+        self._articles: Dict[str, NewsItem] = {}
+        # (公開日時のタイムスタンプ, 記事ID) の昇順
+        self._order: List[Tuple[float, str]] = []
+        self._by_symbol: Dict[str, Set[str]] = {}
+        self._refreshed_at: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._articles)
+
+    def get(self, article_id: str) -> Optional[NewsItem]:
+        return self._articles.get(article_id)
+
+    def stale_symbols(
+        self,
+        symbols: Optional[Iterable[str]],
+        now: Optional[float] = None
+    ) -> List[str]:
+        """TTL を過ぎた（または未取得の）シンボル。シンボル指定なしは ALL_SYMBOLS で判定"""
+        now = time.monotonic() if now is None else now
+        keys = normalize_symbols(symbols) or [ALL_SYMBOLS]
+        return [
+            key for key in keys
+            if now - self._refreshed_at.get(key, float("-inf")) >= self.ttl
+        ]
+
+    def mark_refreshed(self, symbols: Optional[Iterable[str]], now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        for key in normalize_symbols(symbols) or [ALL_SYMBOLS]:
+            self._refreshed_at[key] = now
+
+    def merge(self, items: Iterable[NewsItem]) -> List[NewsItem]:
+        """記事を取り込み、新規に追加された記事を返す（既存記事は関連シンボルのみ更新）"""
+        added = []
+        for item in items:
+            existing = self._articles.get(item.id)
+            if existing is None:
+                self._articles[item.id] = item
+                bisect.insort(self._order, (item.published_at.timestamp(), item.id))
+                added.append(item)
+            else:
+                known = set(normalize_symbols(existing.related_symbols))
+                extra = [s for s in item.related_symbols if normalize_symbol(s) not in known]
+                if extra:
+                    item = existing.model_copy(
+                        update={"related_symbols": existing.related_symbols + extra}
+                    )
+                    self._articles[item.id] = item
+            for key in normalize_symbols(item.related_symbols):
+                self._by_symbol.setdefault(key, set()).add(item.id)
+
+        self._evict()
+        return added
+
+    def _evict(self) -> None:
+        """上限を超えた分を古い記事から削除"""
+        overflow = len(self._order) - self.max_articles
+        if overflow <= 0:
+            return
+        for _, article_id in self._order[:overflow]:
+            item = self._articles.pop(article_id)
+            for key in normalize_symbols(item.related_symbols):
+                ids = self._by_symbol.get(key)
+                if ids is not None:
+                    ids.discard(article_id)
+                    if not ids:
+                        del self._by_symbol[key]
+        del self._order[:overflow]
+
+    def query(self, symbols: Optional[Iterable[str]] = None, limit: int = 20) -> List[NewsItem]:
+        """新しい順に記事を返す（シンボル指定時はいずれかに関連する記事）"""
+        keys = normalize_symbols(symbols)
+        if not keys:
+            return [self._articles[article_id] for _, article_id in reversed(self._order[-limit:])]
+
+        ids: Set[str] = set()
+        for key in keys:
+            ids |= self._by_symbol.get(key, set())
+        items = sorted(
+            (self._articles[article_id] for article_id in ids),
+            key=lambda item: item.published_at.timestamp(),
+            reverse=True
+        )
+        return items[:limit]
@@ -0,0 +1,202 @@
+import asyncio
+import zlib
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..models.market import NewsItem
+from ..core.circuit_breaker import CircuitBreaker
+from ..core.config import settings
+from ..core.metrics import upstream_call
+
+# pandas と yfinance は読み込みに時間がかかるため、履歴を取得するときに読み込む
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class MarketDataProvider(ABC):
+    """市場データプロバイダの基底クラス
+
+    history() は Yahoo Finance と同じ形式（DatetimeIndex + Open/High/Low/Close/Volume列）の
+    DataFrameを返す。
+    """
+
+    @abstractmethod
+    def history(
+        self,
+        symbol: str,
+        interval: str,
+        period: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> "pd.DataFrame":
+        """ローソク足の履歴を取得"""
+
+    def info(self, symbol: str) -> dict:
+        """銘柄情報を取得"""
+        return {}
+
+    def now(self) -> datetime:
+        """プロバイダ基準の現在時刻"""
+        return datetime.now()
+
+    async def sleep(self, seconds: float) -> None:
+        """プロバイダ基準の時間だけ待機"""
+        await asyncio.sleep(seconds)
+
+
+class YahooFinanceProvider(MarketDataProvider):
+    """Yahoo Financeからデータを取得するプロバイダ
+
+    連続して失敗するとサーキットブレーカーが開き、しばらくの間は呼び出さずに
+    CircuitOpenError を送出する。
+    """
+
+    def __init__(self, breaker: Optional[CircuitBreaker] = None):
+        self.breaker = breaker or CircuitBreaker(
+            "yahoo",
+            failure_threshold=settings.UPSTREAM_FAILURE_THRESHOLD,
+            reset_timeout=settings.UPSTREAM_RESET_TIMEOUT
+        )
+
+    def history(
+        self,
+        symbol: str,
+        interval: str,
+        period: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> "pd.DataFrame":
+        import yfinance as yf
+
+        ticker = yf.Ticker(symbol)
+        with self.breaker.call(), upstream_call("yahoo"):
+            if start and end:
+                return ticker.history(start=start, end=end, interval=interval)
+            return ticker.history(period=period, interval=interval)
+
+    def info(self, symbol: str) -> dict:
+        import yfinance as yf
+
+        with self.breaker.call(), upstream_call("yahoo"):
+            return yf.Ticker(symbol).info
+
+
+class SyntheticMarketDataProvider(MarketDataProvider):
+    """ランダムウォークで履歴を生成するオフライン用プロバイダ
+
+    シンボルごとに決定的な系列を返すため、ベンチマークや負荷試験の再現に使える。
+    bars を指定すると期間に関わらずその本数を返す。
+    """
+
+    INTERVAL_SECONDS = {
+        "1m": 60, "5m": 300, "15m": 900, "30m": 1800, "1h": 3600,
+        "4h": 14400, "1d": 86400, "1wk": 604800, "1mo": 2592000,
+    }
+    PERIOD_DAYS = {
+        "1d": 1, "5d": 5, "1mo": 30, "3mo": 90, "6mo": 180,
+        "1y": 365, "2y": 730, "5y": 1826,
+    }
+
+    def __init__(self, bars: Optional[int] = None, seed: int = 0):
+        self.bars = bars
+        self.seed = seed
+        self._frames: Dict[Tuple[str, str, int], "pd.DataFrame"] = {}
+
+    def _count(self, interval: str, period: Optional[str]) -> int:
+        if self.bars:
+            return self.bars
+        seconds = self.INTERVAL_SECONDS.get(interval, 3600)
+        days = self.PERIOD_DAYS.get(period or "", 30)
+        return max(int(days * 86400 // seconds), 1)
+
+    def history(
+        self,
+        symbol: str,
+        interval: str,
+        period: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> "pd.DataFrame":
+        count = self._count(interval, period)
+        key = (symbol, interval, count)
+        df = self._frames.get(key)
+        if df is None:
+            df = self._frames[key] = self._generate(symbol, interval, count)
+        if start and end:
+            import pandas as pd
+
+            return df.loc[pd.Timestamp(start):pd.Timestamp(end)]
+        return df
+
+    def _generate(self, symbol: str, interval: str, count: int) -> "pd.DataFrame":
+        """シンボル名から決まる乱数でOHLCVを生成"""
+        import pandas as pd
+
+        rng = np.random.default_rng(zlib.crc32(f"{symbol}:{interval}".encode()) + self.seed)
+        seconds = self.INTERVAL_SECONDS.get(interval, 3600)
+        base = 1.0 + (zlib.crc32(symbol.encode()) % 15000) / 100
+        returns = rng.normal(0, 0.001 * np.sqrt(seconds / 60), count)
+        close = base * np.exp(np.cumsum(returns))
+        open_ = np.concatenate([[base], close[:-1]])
+        wick = np.abs(rng.normal(0, 0.0005, count)) * close
+        end = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        index = pd.date_range(end=end, periods=count, freq=timedelta(seconds=seconds))
+        return pd.DataFrame({
+            "Open": open_,
+            "High": np.maximum(open_, close) + wick,
+            "Low": np.minimum(open_, close) - wick,
+            "Close": close,
+            "Volume": rng.integers(100, 10000, count).astype(np.float64),
+        }, index=index)
+
+    def info(self, symbol: str) -> dict:
+        daily = self.history(symbol, "1d", period="5d")
+        return {"previousClose": float(daily["Close"].iloc[-2])} if len(daily) >= 2 else {}
+
+
+class NewsProvider(ABC):
+    """ニュースプロバイダの基底クラス"""
+
+    @abstractmethod
+    def latest_news(self, symbols: Optional[List[str]], limit: int) -> List[NewsItem]:
+        """最新ニュースを新しい順に返す"""
+
+
+# 現在有効なプロバイダ（リプレイモードでは差し替えられる）
+_market_provider: MarketDataProvider = YahooFinanceProvider()
+_news_provider: Optional[NewsProvider] = None
+
+
+def get_market_provider() -> MarketDataProvider:
+    """有効な市場データプロバイダを取得"""
+    return _market_provider
+
+
+def set_market_provider(provider: MarketDataProvider) -> None:
+    """市場データプロバイダを差し替える"""
+    global _market_provider
+    _market_provider = provider
+
+
+def get_news_provider() -> Optional[NewsProvider]:
+    """有効なニュースプロバイダを取得（未設定ならNone）"""
+    return _news_provider
+
+
+def set_news_provider(provider: Optional[NewsProvider]) -> None:
+    """ニュースプロバイダを差し替える"""
+    global _news_provider
+    _news_provider = provider
+
+
+def market_now() -> datetime:
+    """市場データ基準の現在時刻（リプレイ中はテープ上の時刻）"""
+    return _market_provider.now()
+
+
+async def market_sleep(seconds: float) -> None:
+    """市場データ基準で待機（リプレイ中は再生速度に応じて短縮）"""
+    await _market_provider.sleep(seconds)
@@ -0,0 +1,135 @@
+"""
+サービスの遅延生成
+
+ルーターはインポート時にサービスを生成せず、最初の利用時に生成する。
+pandas / yfinance / numba を読み込む分析モジュールもこのときに読み込まれるため、
+アプリのインポート（ワーカーの起動）は軽く、重い読み込みは起動後のウォームアップで行う。
+"""
+
+import threading
+from typing import Any, Callable, List
+
+from ..core.config import settings
+
+
+class LazyService:
+    """最初の属性アクセス時に factory でサービスを生成するプロキシ"""
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self.name = name
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        """サービスを返す（未生成なら生成。ウォームアップのスレッドと同時に呼ばれても1つだけ）"""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get(), name)
+
+
+def _create_market_service():
+    from .market_data import MarketDataService
+    return MarketDataService()
+
+
+def _create_signal_service():
+    from .signal_service import SignalService
+    return SignalService(market_service.get())
+
+
+def _create_news_service():
+    from .news_service import NewsService
+    return NewsService()
+
+
+def _create_watchlist():
+    from .watchlist import Watchlist
+    # スクリーナーのユニバースと相関行列・通貨強弱の時間足も事前計算する
+    return Watchlist(
+        market_service.get(),
+        signal_service.get(),
+        settings.WATCHLIST_SYMBOLS + settings.SCREENER_SYMBOLS,
+        settings.WATCHLIST_TIMEFRAMES + settings.SCREENER_TIMEFRAMES
+        + settings.CORRELATION_TIMEFRAMES + settings.STRENGTH_TIMEFRAMES,
+        refresh_interval=settings.WATCHLIST_REFRESH_INTERVAL,
+        max_staleness=settings.WATCHLIST_MAX_STALENESS,
+        refresh_intervals=settings.WATCHLIST_REFRESH_INTERVALS
+    )
+
+
+def _create_screener():
+    from .screener import Screener
+    return Screener(watchlist.get(), settings.SCREENER_SYMBOLS, settings.SCREENER_TIMEFRAMES)
+
+
+def _create_alert_engine():
+    from .alerts import AlertEngine
+    from .tick_store import tick_store
+    return AlertEngine(
+        tick_store,
+        watchlist.get(),
+        max_alerts=settings.ALERT_MAX_ACTIVE,
+        history_size=settings.ALERT_HISTORY_SIZE
+    )
+
+
+def _create_bar_panels():
+    from .bar_panel import BarPanels
+    return BarPanels(
+        market_service.get().tick_store,
+        watchlist.get(),
+        settings.CORRELATION_TIMEFRAMES + settings.STRENGTH_TIMEFRAMES,
+        capacity=settings.BAR_PANEL_SIZE,
+        max_pending=settings.BAR_PANEL_MAX_PENDING
+    )
+
+
+def _create_correlation_service():
+    from .correlation import CorrelationService
+    return CorrelationService(
+        bar_panels.get(), settings.CORRELATION_TIMEFRAMES, window=settings.CORRELATION_WINDOW
+    )
+
+
+def _create_currency_strength():
+    from .currency_strength import CurrencyStrengthService
+    return CurrencyStrengthService(
+        bar_panels.get(),
+        watchlist.get(),
+        settings.STRENGTH_TIMEFRAMES,
+        lookback=settings.STRENGTH_LOOKBACK,
+        weights=settings.STRENGTH_WEIGHTS
+    )
+
+
+# 全ルーターで共有するサービス（ルーターごとにキャッシュが分かれないよう1つずつ）
+market_service = LazyService("market", _create_market_service)
+signal_service = LazyService("signal", _create_signal_service)
+news_service = LazyService("news", _create_news_service)
+watchlist = LazyService("watchlist", _create_watchlist)
+screener = LazyService("screener", _create_screener)
+alerts = LazyService("alerts", _create_alert_engine)
+bar_panels = LazyService("bar_panels", _create_bar_panels)
+correlation_service = LazyService("correlation", _create_correlation_service)
+currency_strength = LazyService("currency_strength", _create_currency_strength)
+
+SERVICES: List[LazyService] = [
+    market_service, signal_service, news_service, watchlist, screener,
+    bar_panels, correlation_service, currency_strength
+] + ([alerts] if settings.ALERTS_ENABLED else [])
+
+
+def warm_up() -> None:
+    """全サービスを生成（分析モジュールの読み込みを含む。スレッドから呼ぶ）"""
+    for service in SERVICES:
+        service.get()
@@ -0,0 +1,411 @@
+"""
+記録済みマーケットテープの再生（リプレイモード）
+
+テープはJSON Lines形式で、1行に1イベントを記録する。
+
+    {"type": "bar", "symbol": "USDJPY=X", "interval": "1h", "timestamp": "...",
+     "open": ..., "high": ..., "low": ..., "close": ..., "volume": ...}
+    {"type": "tick", "symbol": "USDJPY=X", "timestamp": "...", "bid": ..., "ask": ...}
+    {"type": "news", "timestamp": "...", "item": {NewsItem}}
+    {"type": "meta", "start": "..."}
+
+バーは確定時刻（開始時刻 + 時間足）に公開される。再生開始時刻より前のイベントは
+起動直後から参照でき、それ以降のイベントは指定速度（1倍、10倍、0=最速）で順次公開される。
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..models.market import NewsImpact, NewsItem
+from .providers import MarketDataProvider, NewsProvider, YahooFinanceProvider
+from .tick_store import Tick, TickProvider, bar_bounds, parse_tick
+
+
+# Yahoo Financeの足種別ごとの秒数
+INTERVAL_SECONDS = {
+    "1m": 60,
+    "5m": 300,
+    "15m": 900,
+    "30m": 1800,
+    "1h": 3600,
+    "4h": 14400,
+    "1d": 86400,
+    "1wk": 604800,
+    "1mo": 2592000,
+}
+
+# Yahoo Financeの期間指定
+PERIOD_DELTAS = {
+    "1d": timedelta(days=1),
+    "5d": timedelta(days=5),
+    "1mo": timedelta(days=30),
+    "3mo": timedelta(days=90),
+    "6mo": timedelta(days=180),
+    "1y": timedelta(days=365),
+    "2y": timedelta(days=730),
+    "5y": timedelta(days=1826),
+}
+
+
+def _to_epoch(value) -> float:
+    """ISO8601文字列・datetime・UNIX秒をUNIX秒に変換"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+class ReplayClock:
+    """テープ上の時刻を管理する時計"""
+
+    def __init__(self, start: float, speed: float = 1.0):
+        self.speed = speed
+        self._now = start
+
+    def now(self) -> float:
+        return self._now
+
+    def advance(self, ts: float) -> None:
+        if ts > self._now:
+            self._now = ts
+
+
+class _BarSeries:
+    """1シンボル・1足種別のバー系列"""
+
+    def __init__(self, interval: str, rows: List[tuple]):
+        rows.sort(key=lambda r: r[0])
+        data = np.array(rows, dtype=np.float64).reshape(-1, 6)
+        self.timestamp = data[:, 0]
+        self.available_at = self.timestamp + INTERVAL_SECONDS.get(interval, 60)
+        self.ohlcv = data[:, 1:]
+
+
+class ReplayMarketDataProvider(MarketDataProvider):
+    """テープのバーを時計に合わせて返すプロバイダ"""
+
+    def __init__(self, series: Dict[Tuple[str, str], _BarSeries], clock: ReplayClock):
+        self.series = series
+        self.clock = clock
+
+    def history(
+        self,
+        symbol: str,
+        interval: str,
+        period: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> pd.DataFrame:
+        series = self.series.get((symbol, interval))
+        if series is None:
+            return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume"])
+
+        # 時計の時刻までに確定したバーのみ参照できる
+        now = self.clock.now()
+        if start and end:
+            lo = np.searchsorted(series.timestamp, _to_epoch(start), side="left")
+            hi = np.searchsorted(series.available_at, min(_to_epoch(end), now), side="right")
+        else:
+            hi = np.searchsorted(series.available_at, now, side="right")
+            delta = PERIOD_DELTAS.get(period or "", timedelta(days=30))
+            lo = np.searchsorted(series.timestamp, now - delta.total_seconds(), side="left")
+
+        index = pd.to_datetime(series.timestamp[lo:hi], unit="s", utc=True)
+        return pd.DataFrame(
+            series.ohlcv[lo:hi],
+            index=index,
+            columns=["Open", "High", "Low", "Close", "Volume"]
+        )
+
+    def info(self, symbol: str) -> dict:
+        # 前日終値は日足から算出
+        daily = self.history(symbol, "1d", period="5d")
+        if len(daily) >= 2:
+            return {"previousClose": float(daily["Close"].iloc[-2])}
+        return {}
+
+    def now(self) -> datetime:
+        return datetime.fromtimestamp(self.clock.now(), tz=timezone.utc)
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(_scaled(seconds, self.clock.speed))
+
+
+class ReplayNewsProvider(NewsProvider):
+    """テープのニュースを時計に合わせて返すプロバイダ"""
+
+    def __init__(self, items: List[NewsItem], clock: ReplayClock):
+        self.items = sorted(items, key=lambda n: _to_epoch(n.published_at))
+        self.published = [_to_epoch(n.published_at) for n in self.items]
+        self.clock = clock
+
+    def latest_news(self, symbols: Optional[List[str]], limit: int) -> List[NewsItem]:
+        hi = bisect.bisect_right(self.published, self.clock.now())
+        result = []
+        for item in reversed(self.items[:hi]):
+            if symbols and not any(s in item.related_symbols for s in symbols):
+                continue
+            result.append(item)
+            if len(result) >= limit:
+                break
+        return result
+
+
+def _scaled(seconds: float, speed: float) -> float:
+    """再生速度に応じた待機時間（最速再生時も最低限の間隔を空ける）"""
+    if speed > 0:
+        return seconds / speed
+    return 0.05
+
+
+class ReplayController(TickProvider):
+    """テープを再生し、時計・ティック・バー・ニュースを進める
+
+    TickIngestorのプロバイダとして動作し、ティックはライブと同じ経路でストアに流れる。
+    """
+
+    def __init__(
+        self,
+        events: List[Tuple[float, int, Optional[Tick]]],
+        series: Dict[Tuple[str, str], _BarSeries],
+        news: List[NewsItem],
+        start: float,
+        speed: float = 1.0
+    ):
+        self.events = events
+        self.clock = ReplayClock(start, speed)
+        self.market_provider = ReplayMarketDataProvider(series, self.clock)
+        self.news_provider = ReplayNewsProvider(news, self.clock)
+        self.finished = False
+
+    @classmethod
+    def from_file(cls, path: str, speed: float = 1.0) -> "ReplayController":
+        """テープファイルを読み込む"""
+        bars: Dict[Tuple[str, str], List[tuple]] = {}
+        ticks: List[Tick] = []
+        news: List[NewsItem] = []
+        start: Optional[float] = None
+
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                kind = record.get("type")
+                if kind == "bar":
+                    bars.setdefault((record["symbol"], record["interval"]), []).append((
+                        _to_epoch(record["timestamp"]),
+                        float(record["open"]), float(record["high"]),
+                        float(record["low"]), float(record["close"]),
+                        float(record.get("volume") or 0.0)
+                    ))
+                elif kind == "tick":
+                    ticks.append(parse_tick(record))
+                elif kind == "news":
+                    news.append(NewsItem(**record["item"]))
+                elif kind == "meta" and record.get("start"):
+                    start = _to_epoch(record["start"])
+
+        series = {key: _BarSeries(key[1], rows) for key, rows in bars.items()}
+
+        # 再生対象のイベント（時刻, 種別, ティック）
+        events: List[Tuple[float, int, Optional[Tick]]] = [(t.timestamp, 0, t) for t in ticks]
+        events += [(_to_epoch(n.published_at), 1, None) for n in news]
+        if start is None:
+            # ティック・ニュースの最初の時刻から再生（なければ全て公開済みとする）
+            start = min(e[0] for e in events) if events else max(
+                (float(s.available_at[-1]) for s in series.values()), default=0.0
+            )
+        for s in series.values():
+            events += [(float(t), 2, None) for t in s.available_at if t > start]
+        events = [e for e in events if e[0] >= start]
+        events.sort(key=lambda e: (e[0], e[1]))
+
+        return cls(events, series, news, start, speed)
+
+    async def stream(self) -> AsyncIterator[Tick]:
+        previous = self.clock.now()
+        for ts, kind, tick in self.events:
+            if self.clock.speed > 0:
+                delay = (ts - previous) / self.clock.speed
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            else:
+                # 最速再生時もREST・WebSocket処理に制御を渡す
+                await asyncio.sleep(0)
+            previous = ts
+            self.clock.advance(ts)
+            if tick is not None:
+                yield tick
+        self.finished = True
+
+
+def _write(f, record: dict) -> None:
+    f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+
+def record_tape(path: str, symbols: List[str], news: Optional[List[NewsItem]] = None) -> None:
+    """Yahoo Financeの履歴をテープとして記録"""
+    from .market_data import MarketDataService
+
+    provider = YahooFinanceProvider()
+    intervals = {}
+    for tf, interval in MarketDataService.TIMEFRAME_MAPPING.items():
+        intervals[interval] = MarketDataService.PERIOD_MAPPING[tf]
+
+    with open(path, "w", encoding="utf-8") as f:
+        for symbol in symbols:
+            for interval, period in intervals.items():
+                df = provider.history(symbol, interval, period=period)
+                for idx, row in df.iterrows():
+                    _write(f, {
+                        "type": "bar", "symbol": symbol, "interval": interval,
+                        "timestamp": idx.isoformat(),
+                        "open": float(row["Open"]), "high": float(row["High"]),
+                        "low": float(row["Low"]), "close": float(row["Close"]),
+                        "volume": float(row["Volume"])
+                    })
+        for item in news or []:
+            _write(f, {
+                "type": "news",
+                "timestamp": item.published_at.isoformat(),
+                "item": item.model_dump(mode="json")
+            })
+
+
+def generate_synthetic_tape(
+    path: str,
+    symbols: List[str],
+    minutes: int = 60,
+    tick_seconds: float = 1.0,
+    news_every_minutes: int = 5,
+    seed: int = 0
+) -> None:
+    """ランダムウォークによる合成テープを生成
+
+    再生開始時刻までの各時間足の履歴と、開始後 minutes 分間のティック・バー・ニュースを出力する。
+    """
+    from .market_data import MarketDataService
+
+    rng = np.random.default_rng(seed)
+    start = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    start_ts = start.timestamp()
+    intervals = {}
+    for tf, interval in MarketDataService.TIMEFRAME_MAPPING.items():
+        intervals[interval] = (tf, MarketDataService.PERIOD_MAPPING[tf])
+
+    with open(path, "w", encoding="utf-8") as f:
+        _write(f, {"type": "meta", "start": start.isoformat()})
+
+        for symbol in symbols:
+            base = float(rng.uniform(0.5, 150.0))
+            spread = base * 0.0001
+
+            # 履歴バー（開始時刻を含むバーの直前で終わるランダムウォーク）
+            for interval, (tf, period) in intervals.items():
+                seconds = INTERVAL_SECONDS[interval]
+                first_live, _ = bar_bounds(tf, start_ts)
+                count = int(PERIOD_DELTAS[period].total_seconds() // seconds)
+                returns = rng.normal(0, 0.001 * np.sqrt(seconds / 60), count)
+                closes = base * np.exp(np.cumsum(returns[::-1]))[::-1]
+                for i in range(count):
+                    ts = first_live - (count - i) * seconds
+                    close = float(closes[i])
+                    open_ = close * float(np.exp(-returns[i]))
+                    wick = abs(float(rng.normal(0, 0.0005))) * close
+                    _write(f, {
+                        "type": "bar", "symbol": symbol, "interval": interval,
+                        "timestamp": ts,
+                        "open": open_, "high": max(open_, close) + wick,
+                        "low": min(open_, close) - wick, "close": close,
+                        "volume": float(rng.integers(100, 10000))
+                    })
+
+            # 開始後のティックと、そこから集計した確定バー
+            price = base
+            live_bars: Dict[str, list] = {}
+            for step in range(int(minutes * 60 / tick_seconds)):
+                ts = start_ts + step * tick_seconds
+                price *= float(np.exp(rng.normal(0, 0.0001)))
+                volume = float(rng.integers(1, 100))
+                _write(f, {
+                    "type": "tick", "symbol": symbol, "timestamp": ts,
+                    "bid": price - spread / 2, "ask": price + spread / 2, "volume": volume
+                })
+                for interval, (tf, _) in intervals.items():
+                    bar_start, _ = bar_bounds(tf, ts)
+                    bar = live_bars.get(interval)
+                    if bar is None or bar[0] != bar_start:
+                        if bar is not None:
+                            _write(f, _bar_record(symbol, interval, bar))
+                        bar = live_bars[interval] = [bar_start, price, price, price, price, 0.0]
+                    bar[2] = max(bar[2], price)
+                    bar[3] = min(bar[3], price)
+                    bar[4] = price
+                    bar[5] += volume
+            # 終了時点で形成中のバーは出力しない
+
+        # ニュース
+        impacts = list(NewsImpact)
+        for i in range(0, minutes, max(news_every_minutes, 1)):
+            published = start + timedelta(minutes=i)
+            item = NewsItem(
+                id=f"replay_{i}",
+                title=f"Synthetic market headline {i}",
+                description="Synthetic news item for replay",
+                source="Replay",
+                published_at=published,
+                impact=random.Random(seed + i).choice(impacts),
+                sentiment=float(np.clip(rng.normal(0, 0.4), -1, 1)),
+                related_symbols=list(symbols),
+                tags=[]
+            )
+            _write(f, {
+                "type": "news", "timestamp": published.isoformat(),
+                "item": item.model_dump(mode="json")
+            })
+
+
+def _bar_record(symbol: str, interval: str, bar: list) -> dict:
+    return {
+        "type": "bar", "symbol": symbol, "interval": interval, "timestamp": bar[0],
+        "open": bar[1], "high": bar[2], "low": bar[3], "close": bar[4], "volume": bar[5]
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="マーケットテープの記録・生成")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="Yahoo Financeの履歴を記録")
+    rec.add_argument("--out", required=True)
+    rec.add_argument("--symbols", nargs="+", required=True)
+
+    syn = sub.add_parser("synthetic", help="合成テープを生成")
+    syn.add_argument("--out", required=True)
+    syn.add_argument("--symbols", nargs="+", default=["USDJPY=X", "EURUSD=X"])
+    syn.add_argument("--minutes", type=int, default=60)
+    syn.add_argument("--tick-seconds", type=float, default=1.0)
+    syn.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record_tape(args.out, args.symbols)
+    else:
+        generate_synthetic_tape(
+            args.out, args.symbols, args.minutes, args.tick_seconds, seed=args.seed
+        )
@@ -0,0 +1,359 @@
+"""
+スクリーナー
+
+ウォッチリストで事前計算した指標・トレンド・シグナルを、ユニバースのシンボルごとに
+「時間足.項目」（例: 1h.rsi, 1d.trend）の値として索引に保持し、条件式で絞り込む。
+数値項目はソート済みの索引（二分探索で範囲を求める）、分類項目は値ごとの集合を持ち、
+問い合わせは索引の集合演算だけで行う（再計算しない）。索引はウォッチリストの再計算ごとに更新する。
+
+条件式の例:
+    1h.rsi < 30 and 1d.trend == bullish
+    (4h.signal == strong_buy or 4h.signal == buy) and not 1h.stoch_k > 80
+並べ替えは項目名（先頭に - を付けると降順）、例: -1h.confidence
+"""
+
+import bisect
+import re
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from ..models.market import (
+    ScreenerResult, ScreenerRow, SignalStrength, TimeFrame, TrendDirection
+)
+from .indicator_kernel import FIELDS
+from .watchlist import PrecomputedAnalysis, Watchlist
+
+# 数値項目（計算結果から値を取り出す関数）
+NUMERIC_FIELDS: Dict[str, Callable[[PrecomputedAnalysis], Optional[float]]] = {
+    "price": lambda entry: entry.bars[-1].close,
+    "trend_strength": lambda entry: entry.trend.strength,
+    "confidence": lambda entry: entry.signal.confidence,
+    **{name: (lambda entry, name=name: getattr(entry.indicators, name)) for name in FIELDS},
+}
+
+# 分類項目（取り得る値）
+CATEGORICAL_FIELDS: Dict[str, Tuple[Callable[[PrecomputedAnalysis], str], List[str]]] = {
+    "trend": (lambda entry: entry.trend.direction.value, [d.value for d in TrendDirection]),
+    "signal": (lambda entry: entry.signal.signal.value, [s.value for s in SignalStrength]),
+}
+
+_TOKEN = re.compile(
+    r"\s*(?:(<=|>=|==|!=|<|>|\(|\))"
+    r"|([-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?(?![\w.]))"
+    r"|([\w.]+|'[^']*'|\"[^\"]*\")"
+    r"|(\S))"
+)
+
+
+class SortedIndex:
+    """数値項目のソート済み索引（値, シンボル）"""
+
+    def __init__(self):
+        self._items: List[Tuple[float, str]] = []
+        self._values: Dict[str, float] = {}
+
+    def update(self, symbol: str, value: Optional[float]) -> None:
+        old = self._values.pop(symbol, None)
+        if old is not None:
+            del self._items[bisect.bisect_left(self._items, (old, symbol))]
+        if value is not None:
+            self._values[symbol] = value
+            bisect.insort(self._items, (value, symbol))
+
+    def get(self, symbol: str) -> Optional[float]:
+        return self._values.get(symbol)
+
+    def select(self, op: str, value: float) -> Set[str]:
+        """条件に合うシンボルの集合"""
+        items = self._items
+        if op == "!=":
+            return set(self._values) - self.select("==", value)
+        # (value, "") は同じ値のどのシンボルより前、(value, "\uffff") は後ろ
+        low = bisect.bisect_left(items, (value, ""))
+        high = bisect.bisect_right(items, (value, "\uffff"))
+        if op == "<":
+            selected = items[:low]
+        elif op == "<=":
+            selected = items[:high]
+        elif op == ">":
+            selected = items[high:]
+        elif op == ">=":
+            selected = items[low:]
+        else:
+            selected = items[low:high]
+        return {symbol for _, symbol in selected}
+
+    def ordered(self, descending: bool = False) -> Iterator[str]:
+        """値の順のシンボル（値のないシンボルは含まない）"""
+        items = reversed(self._items) if descending else iter(self._items)
+        return (symbol for _, symbol in items)
+
+
+class EqualityIndex:
+    """分類項目の索引（値ごとのシンボル集合）"""
+
+    def __init__(self):
+        self._sets: Dict[str, Set[str]] = {}
+        self._values: Dict[str, str] = {}
+
+    def update(self, symbol: str, value: Optional[str]) -> None:
+        old = self._values.pop(symbol, None)
+        if old is not None:
+            self._sets[old].discard(symbol)
+        if value is not None:
+            self._values[symbol] = value
+            self._sets.setdefault(value, set()).add(symbol)
+
+    def get(self, symbol: str) -> Optional[str]:
+        return self._values.get(symbol)
+
+    def select(self, op: str, value: str) -> Set[str]:
+        matched = self._sets.get(value, set())
+        return set(matched) if op == "==" else set(self._values) - matched
+
+
+class ScreenQuery:
+    """構文解析済みの条件式と並べ替え"""
+
+    def __init__(
+        self,
+        condition: Optional[tuple],
+        sort: Optional[str],
+        descending: bool,
+        limit: int,
+        fields: List[str],
+        text: Optional[str] = None,
+        sort_text: Optional[str] = None
+    ):
+        self.condition = condition
+        self.sort = sort
+        self.descending = descending
+        self.limit = limit
+        self.fields = fields  # 結果に含める項目
+        self.text = text
+        self.sort_text = sort_text
+
+
+class _Parser:
+    """条件式の再帰下降パーサー（or < and < not の順に結合が強い）"""
+
+    def __init__(self, text: str, field_kind: Callable[[str], str]):
+        self.tokens = self._tokenize(text)
+        self.pos = 0
+        self.field_kind = field_kind
+        self.fields: List[str] = []
+
+    @staticmethod
+    def _tokenize(text: str) -> List[Tuple[str, Any]]:
+        tokens = []
+        for op, number, word, other in _TOKEN.findall(text):
+            if other:
+                raise ValueError(f"Unexpected character in filter: {other}")
+            if op:
+                tokens.append(("op", op))
+            elif number:
+                tokens.append(("number", float(number)))
+            elif word.lower() in ("and", "or", "not"):
+                tokens.append((word.lower(), word))
+            else:
+                tokens.append(("word", word))
+        return tokens
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def _next(self) -> Tuple[str, Any]:
+        if self.pos >= len(self.tokens):
+            raise ValueError("Unexpected end of filter")
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse(self) -> tuple:
+        node = self._or()
+        if self.pos < len(self.tokens):
+            raise ValueError(f"Unexpected token in filter: {self.tokens[self.pos][1]}")
+        return node
+
+    def _or(self) -> tuple:
+        node = self._and()
+        while self._peek() == "or":
+            self._next()
+            node = ("or", node, self._and())
+        return node
+
+    def _and(self) -> tuple:
+        node = self._not()
+        while self._peek() == "and":
+            self._next()
+            node = ("and", node, self._not())
+        return node
+
+    def _not(self) -> tuple:
+        if self._peek() == "not":
+            self._next()
+            return ("not", self._not())
+        if self.pos < len(self.tokens) and self.tokens[self.pos] == ("op", "("):
+            self._next()
+            node = self._or()
+            if self._next() != ("op", ")"):
+                raise ValueError("Missing ) in filter")
+            return node
+        return self._comparison()
+
+    def _comparison(self) -> tuple:
+        kind, field = self._next()
+        if kind != "word":
+            raise ValueError(f"Expected field name in filter: {field}")
+        field_type = self.field_kind(field)
+        kind, op = self._next()
+        if kind != "op" or op in ("(", ")"):
+            raise ValueError(f"Expected comparison after {field}")
+        kind, value = self._next()
+        if field_type == "numeric":
+            if kind != "number":
+                raise ValueError(f"{field} must be compared with a number")
+        else:
+            if op not in ("==", "!="):
+                raise ValueError(f"{field} supports only == and !=")
+            allowed = CATEGORICAL_FIELDS[field.split(".", 1)[1]][1]
+            value = str(value).strip("'\"").lower()
+            if value not in allowed:
+                raise ValueError(f"{field} must be one of {', '.join(allowed)}")
+        if field not in self.fields:
+            self.fields.append(field)
+        return ("cmp", field, op, value)
+
+
+class Screener:
+    """ユニバースの計算済みの値を索引に保持し、条件式で絞り込む"""
+
+    def __init__(self, watchlist: Watchlist, symbols: Sequence[str], timeframes: Sequence[TimeFrame]):
+        self.watchlist = watchlist
+        self.symbols = list(dict.fromkeys(symbols))
+        self.timeframes = [TimeFrame(tf) for tf in dict.fromkeys(timeframes)]
+        self._universe = set(self.symbols)
+        self._indexes: Dict[str, Any] = {}
+        for timeframe in self.timeframes:
+            for name in NUMERIC_FIELDS:
+                self._indexes[f"{timeframe.value}.{name}"] = SortedIndex()
+            for name in CATEGORICAL_FIELDS:
+                self._indexes[f"{timeframe.value}.{name}"] = EqualityIndex()
+        self.updated_at: Optional[datetime] = None
+        self._listeners: List[Callable[[str], None]] = []
+        for symbol in self.symbols:
+            self._update(symbol, self.timeframes)
+        self.watchlist.add_listener(self._on_refresh)
+
+    def add_listener(self, listener: Callable[[str], None]) -> Callable[[], None]:
+        """索引を更新したシンボルを通知するリスナーを登録し、解除用の関数を返す"""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener) if listener in self._listeners else None
+
+    def _on_refresh(self, symbol: str, timeframes: List[TimeFrame]) -> None:
+        if symbol not in self._universe:
+            return
+        self._update(symbol, [tf for tf in timeframes if tf in self.timeframes])
+        for listener in list(self._listeners):
+            listener(symbol)
+
+    def _update(self, symbol: str, timeframes: Sequence[TimeFrame]) -> None:
+        for timeframe in timeframes:
+            entry = self.watchlist.entry(symbol, timeframe)
+            if entry is None:
+                continue
+            prefix = timeframe.value
+            for name, extract in NUMERIC_FIELDS.items():
+                self._indexes[f"{prefix}.{name}"].update(symbol, extract(entry))
+            for name, (extract, _) in CATEGORICAL_FIELDS.items():
+                self._indexes[f"{prefix}.{name}"].update(symbol, extract(entry))
+            self.updated_at = datetime.now()
+
+    def field_kind(self, field: str) -> str:
+        """項目の種類（numeric / categorical）、存在しなければ ValueError"""
+        index = self._indexes.get(field)
+        if index is None:
+            raise ValueError(f"Unknown field: {field}")
+        return "numeric" if isinstance(index, SortedIndex) else "categorical"
+
+    def describe_fields(self) -> Dict[str, Any]:
+        """条件式で使える項目"""
+        return {
+            "symbols": self.symbols,
+            "timeframes": [tf.value for tf in self.timeframes],
+            "numeric": list(NUMERIC_FIELDS),
+            "categorical": {name: values for name, (_, values) in CATEGORICAL_FIELDS.items()},
+        }
+
+    def compile(
+        self,
+        text: Optional[str] = None,
+        sort: Optional[str] = None,
+        limit: int = 50,
+        fields: Optional[Sequence[str]] = None
+    ) -> ScreenQuery:
+        """条件式・並べ替え・追加項目を検証して ScreenQuery にする（不正なら ValueError）"""
+        condition = None
+        selected: List[str] = []
+        if text and text.strip():
+            parser = _Parser(text, self.field_kind)
+            condition = parser.parse()
+            selected = parser.fields
+
+        sort_field = None
+        descending = False
+        if sort:
+            descending = sort.startswith("-")
+            sort_field = sort.lstrip("+-")
+            if self.field_kind(sort_field) != "numeric":
+                raise ValueError(f"Cannot sort by {sort_field}")
+            if sort_field not in selected:
+                selected.append(sort_field)
+
+        for field in fields or []:
+            self.field_kind(field)
+            if field not in selected:
+                selected.append(field)
+        return ScreenQuery(condition, sort_field, descending, limit, selected, text, sort)
+
+    def _evaluate(self, node: tuple) -> Set[str]:
+        kind = node[0]
+        if kind == "and":
+            return self._evaluate(node[1]) & self._evaluate(node[2])
+        if kind == "or":
+            return self._evaluate(node[1]) | self._evaluate(node[2])
+        if kind == "not":
+            return self._universe - self._evaluate(node[1])
+        _, field, op, value = node
+        return self._indexes[field].select(op, value)
+
+    def match(self, query: ScreenQuery) -> List[str]:
+        """条件に合うシンボル（並べ替えと件数制限を適用）"""
+        matched = self._universe if query.condition is None else self._evaluate(query.condition)
+        if query.sort is not None:
+            ordered = (s for s in self._indexes[query.sort].ordered(query.descending) if s in matched)
+        else:
+            ordered = (s for s in self.symbols if s in matched)
+        result = []
+        for symbol in ordered:
+            if len(result) >= query.limit:
+                break
+            result.append(symbol)
+        return result
+
+    def row(self, symbol: str, fields: Sequence[str]) -> ScreenerRow:
+        return ScreenerRow(
+            symbol=symbol,
+            values={field: self._indexes[field].get(symbol) for field in fields}
+        )
+
+    def query(self, query: ScreenQuery) -> ScreenerResult:
+        """条件に合うシンボルと項目の値"""
+        symbols = self.match(query)
+        return ScreenerResult(
+            filter=query.text,
+            sort=query.sort_text,
+            count=len(symbols),
+            rows=[self.row(symbol, query.fields) for symbol in symbols],
+            updated_at=self.updated_at
+        )
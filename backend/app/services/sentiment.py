@@ -0,0 +1,226 @@
+"""
+センチメント集計
+
+シンボルごとにニュースセンチメントの指数減衰付きの合計を保持する。記事の追加は O(1)、
+読み出しは保持している合計に経過時間分の減衰を掛けるだけで O(1)。
+強気・弱気・中立の件数は直近 count_window 秒に公開された記事数（二分探索で O(log n)）で、
+減衰後の重みの合計は article_weight として別に返す。
+prior_weight を指定すると記事の重みが少ないほどニュースセンチメントを0に寄せる（0なら重み付き平均）。
+テクニカルセンチメントは計算済みの指標から求めた値を時間足ごとに保持する。
+"""
+
+import bisect
+import math
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from ..core.config import settings
+from ..models.market import NewsItem, TechnicalIndicators
+from .news_store import normalize_symbols
+
+# 強気・弱気とみなすセンチメントの閾値
+BULLISH_THRESHOLD = 0.2
+BEARISH_THRESHOLD = -0.2
+
+
+class SentimentSnapshot(NamedTuple):
+    """ある時点のセンチメント"""
+    news_sentiment: float
+    technical_sentiment: float
+    overall_sentiment: float
+    bullish_count: int
+    bearish_count: int
+    neutral_count: int
+    article_weight: float = 0.0
+
+
+def _clip(value: float) -> float:
+    return max(-1.0, min(1.0, value))
+
+
+def technical_sentiment(indicators: TechnicalIndicators, price: Optional[float] = None) -> float:
+    """テクニカル指標から -1 to 1 のセンチメントを算出（各指標の平均）"""
+    price = price if price is not None else indicators.ema_12
+    scores = []
+
+    if indicators.rsi is not None:
+        scores.append((indicators.rsi - 50) / 50)
+    if indicators.stoch_k is not None:
+        scores.append((indicators.stoch_k - 50) / 50)
+    if indicators.macd_histogram is not None:
+        if indicators.atr:
+            scores.append(math.tanh(indicators.macd_histogram / indicators.atr))
+        else:
+            scores.append(math.copysign(1.0, indicators.macd_histogram) if indicators.macd_histogram else 0.0)
+    if price is not None and indicators.sma_20 and indicators.sma_50:
+        if price > indicators.sma_20 > indicators.sma_50:
+            scores.append(1.0)
+        elif price < indicators.sma_20 < indicators.sma_50:
+            scores.append(-1.0)
+        else:
+            scores.append(0.5 if price > indicators.sma_50 else -0.5)
+    if price is not None and indicators.bb_upper and indicators.bb_middle:
+        half_width = indicators.bb_upper - indicators.bb_middle
+        if half_width > 0:
+            scores.append((price - indicators.bb_middle) / half_width)
+
+    if not scores:
+        return 0.0
+    return _clip(sum(_clip(s) for s in scores) / len(scores))
+
+
+class _DecayedSums:
+    """減衰付きの合計（基準時刻 t の値として保持）"""
+    __slots__ = ("t", "weight", "score", "published")
+
+    def __init__(self):
+        self.t = float("-inf")
+        self.weight = 0.0
+        self.score = 0.0
+        # 強気・弱気・中立の記事の公開時刻（昇順。最新の記事より window 秒以上古いものは捨てる）
+        self.published = ([], [], [])
+
+    def add(self, ts: float, sentiment: float, tau: float, window: float) -> None:
+        if ts >= self.t:
+            # 基準時刻を進め、既存の合計を減衰させる
+            if self.weight:
+                factor = math.exp(-(ts - self.t) / tau)
+                self.weight *= factor
+                self.score *= factor
+            self.t = ts
+            w = 1.0
+        else:
+            # 基準時刻より古い記事は減衰させた重みで加算
+            w = math.exp(-(self.t - ts) / tau)
+        self.weight += w
+        self.score += w * sentiment
+        if sentiment > BULLISH_THRESHOLD:
+            bucket = 0
+        elif sentiment < BEARISH_THRESHOLD:
+            bucket = 1
+        else:
+            bucket = 2
+        bisect.insort(self.published[bucket], ts)
+        horizon = self.t - window
+        for times in self.published:
+            del times[:bisect.bisect_left(times, horizon)]
+
+    def counts(self, now: float, window: float) -> tuple:
+        """now から window 秒以内に公開された強気・弱気・中立の記事数"""
+        return tuple(len(times) - bisect.bisect_left(times, now - window) for times in self.published)
+
+
+class SentimentAggregator:
+    """シンボルごとのニュース・テクニカルセンチメント"""
+
+    def __init__(
+        self,
+        half_life: float = 6 * 3600,
+        prior_weight: float = 0.0,
+        news_weight: float = 0.6,
+        max_seen: int = 10000,
+        count_window: float = 86400
+    ):
+        self.tau = half_life / math.log(2)
+        # 強気・弱気・中立の件数を数える期間（秒）
+        self.count_window = count_window
+        # 記事が少ない・古いほどニュースセンチメントを0に寄せる
+        self.prior_weight = prior_weight
+        self.news_weight = news_weight
+        self.max_seen = max_seen
+        self._news: Dict[str, _DecayedSums] = {}
+        self._technical: Dict[str, Dict[str, float]] = {}
+        # 複数のサービスから同じ記事が届いても一度だけ数える
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._listeners: List[Callable[[str], None]] = []
+
+    def add_listener(self, listener: Callable[[str], None]) -> Callable[[], None]:
+        """更新されたシンボルを通知するリスナーを登録し、解除用の関数を返す"""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener) if listener in self._listeners else None
+
+    def _notify(self, symbols: Iterable[str]) -> None:
+        for symbol in symbols:
+            for listener in list(self._listeners):
+                listener(symbol)
+
+    def add_news(self, items: Iterable[NewsItem]) -> None:
+        """記事を集計に加える"""
+        updated = set()
+        for item in items:
+            if item.id in self._seen:
+                continue
+            self._seen[item.id] = None
+            if len(self._seen) > self.max_seen:
+                self._seen.popitem(last=False)
+            ts = item.published_at.timestamp()
+            for symbol in normalize_symbols(item.related_symbols):
+                sums = self._news.get(symbol)
+                if sums is None:
+                    sums = self._news[symbol] = _DecayedSums()
+                sums.add(ts, item.sentiment, self.tau, self.count_window)
+                updated.add(symbol)
+        self._notify(updated)
+
+    def update_technical(
+        self,
+        symbol: str,
+        indicators: TechnicalIndicators,
+        price: Optional[float] = None
+    ) -> None:
+        """計算済みの指標からテクニカルセンチメントを更新"""
+        keys = normalize_symbols([symbol])
+        if not keys:
+            return
+        timeframe = getattr(indicators.timeframe, "value", str(indicators.timeframe))
+        self._technical.setdefault(keys[0], {})[timeframe] = technical_sentiment(indicators, price)
+        self._notify(keys)
+
+    def snapshot(self, symbol: str, now: Optional[float] = None) -> SentimentSnapshot:
+        """現在のセンチメント（O(1)）"""
+        keys = normalize_symbols([symbol])
+        key = keys[0] if keys else symbol
+        now = time.time() if now is None else now
+
+        news = weight = 0.0
+        bullish = bearish = neutral = 0
+        sums = self._news.get(key)
+        if sums is not None and sums.weight:
+            factor = math.exp(-(now - sums.t) / self.tau) if now > sums.t else 1.0
+            weight = sums.weight * factor
+            if weight > 0:
+                news = sums.score * factor / (weight + self.prior_weight)
+            bullish, bearish, neutral = sums.counts(now, self.count_window)
+
+        technical_by_timeframe = self._technical.get(key)
+        technical = (
+            sum(technical_by_timeframe.values()) / len(technical_by_timeframe)
+            if technical_by_timeframe else 0.0
+        )
+
+        overall = news * self.news_weight + technical * (1 - self.news_weight)
+        return SentimentSnapshot(
+            _clip(news), _clip(technical), _clip(overall), bullish, bearish, neutral, weight
+        )
+
+    def summarize(
+        self,
+        symbol: str,
+        items: Iterable[NewsItem],
+        now: Optional[float] = None
+    ) -> SentimentSnapshot:
+        """記事一覧から同じ方式で算出（保持している集計は変更しない）"""
+        scratch = SentimentAggregator(
+            self.tau * math.log(2), self.prior_weight, self.news_weight, self.max_seen, self.count_window
+        )
+        scratch._technical = self._technical
+        scratch.add_news(items)
+        return scratch.snapshot(symbol, now)
+
+
+sentiment_aggregator = SentimentAggregator(
+    half_life=settings.SENTIMENT_HALF_LIFE,
+    prior_weight=settings.SENTIMENT_PRIOR_WEIGHT,
+    count_window=settings.SENTIMENT_COUNT_WINDOW
+)
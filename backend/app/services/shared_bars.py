@@ -0,0 +1,566 @@
+"""
+共有メモリのバーストア（マルチプロセスモード）
+
+1つの取り込みプロセスだけが上流（Yahoo Finance / 合成データ）からバーを取得して共有メモリに書き込み、
+複数のAPIワーカー（MARKET_DATA_MODE=shared）は共有メモリの上で必要な範囲を決め、その範囲だけを
+コピーして分析・応答する。
+ワーカー数を増やしても上流への取得は増えない。
+
+    取り込みプロセス --(書き込み)--> 共有メモリ --(読み取り)--> APIワーカー × N
+
+共有メモリのレイアウト（各領域は64バイト境界に揃える）:
+- ヘッダ: マジック・シンボル数の上限・時間足（interval）の一覧・系列ごとの本数の上限・登録済みシンボル数
+- シンボルディレクトリ: スロットごとのシンボル名（取り込みプロセスが登録し、ワーカーは名前からスロットを引く）
+- 系列のメタデータ: (スロット, interval) ごとの世代・ページごとの本数・更新時刻
+- バー: (スロット, interval) ごとに2ページ分の時刻（UTCナノ秒）と OHLCV
+
+書き込みは使っていない方のページに系列全体を書いてから世代を進めて切り替える（ダブルバッファ）。
+ワーカーは世代からページを選んで読むため、読み取った系列はその次の書き込みでは変わらず、
+2回後の書き込みで上書きされる。copy=True の読み取りは範囲（window）の決定とコピーの後に世代を確かめ、
+その間に同じページが書き直されていれば読み直す（SharedBarsProvider はこの読み取りで、period・start/end の
+範囲や前日の終値だけをコピーする）。
+copy=False のビューは検証されないため、2回の書き込みの間に使い終える場合にだけ使うこと。
+
+Python 3.12 以前の SharedMemory は開いただけで resource_tracker に登録され、登録したプロセス
+（またはそれと resource_tracker を共有する子プロセス）の終了時に削除されてしまう。そのため作成側・接続側とも
+登録を解除し（3.13 以降は track=False）、削除は作成したプロセスの unlink() だけで行う。
+登録と解除はプロセス間でファイルロックをかけて1組ずつ送る。
+
+アラートなどプロセス内の状態はワーカーごとに分かれるため、--workers 2 以上ではアラートを無効にして起動する
+（ALERTS_ENABLED を明示的に true にした場合は起動しない）。
+
+起動（取り込みプロセスと uvicorn のワーカーをまとめて起動）:
+
+    cd backend
+    SHARED_BARS_UPSTREAM=synthetic python -m app.services.shared_bars --workers 4 --port 8000
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from multiprocessing import resource_tracker, shared_memory
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..core.config import settings
+from ..core.metrics import ERRORS, record_cache
+from .providers import MarketDataProvider, SyntheticMarketDataProvider, YahooFinanceProvider
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"MKTBARS1"
+# SharedMemory の track 引数（3.13 以降）
+_TRACK_ARGUMENT = sys.version_info >= (3, 13)
+_MAX_INTERVALS = 16
+_ALIGN = 64
+
+# Yahoo Finance と同じ列の並び
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+_HEADER = np.dtype([
+    ("magic", "S8"),
+    ("max_symbols", "<u4"),
+    ("capacity", "<u4"),
+    ("n_intervals", "<u4"),
+    ("symbol_count", "<u4"),
+    ("intervals", "S8", (_MAX_INTERVALS,)),
+])
+_SYMBOL = np.dtype("S32")
+_META = np.dtype([
+    ("generation", "<u8"),
+    ("count", "<u8", (2,)),
+    ("updated_at", "<f8"),
+])
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _layout(max_symbols: int, n_intervals: int, capacity: int) -> Tuple[Dict[str, int], int]:
+    """領域ごとのオフセットと全体のサイズ"""
+    sizes = {
+        "header": _HEADER.itemsize,
+        "directory": _SYMBOL.itemsize * max_symbols,
+        "meta": _META.itemsize * max_symbols * n_intervals,
+        "times": 8 * max_symbols * n_intervals * 2 * capacity,
+        "values": 8 * max_symbols * n_intervals * 2 * capacity * len(COLUMNS),
+    }
+    offsets = {}
+    offset = 0
+    for name, size in sizes.items():
+        offsets[name] = offset
+        offset = _aligned(offset + size)
+    return offsets, offset
+
+
+@contextmanager
+def _tracker_lock(name: Optional[str]):
+    """同じ共有メモリを開くプロセスの間で resource_tracker への登録と解除を1組ずつ送る
+
+    ワーカーは起動したプロセスの resource_tracker を共有するため、登録と解除が他のプロセスと
+    交互に届くと解除済みの名前をもう一度解除することになり、resource_tracker が KeyError を出す。
+    """
+    if name is None or _TRACK_ARGUMENT or os.name != "posix":
+        yield
+        return
+    import fcntl
+
+    with open(_lock_path(name), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def _lock_path(name: str) -> str:
+    return os.path.join(tempfile.gettempdir(), f"{name.lstrip('/')}.lock")
+
+
+def _open_segment(name: Optional[str], create: bool = False, size: int = 0) -> shared_memory.SharedMemory:
+    """共有メモリを開く（resource_tracker には登録しない。削除は作成したプロセスの unlink で行う）"""
+    if _TRACK_ARGUMENT:
+        return shared_memory.SharedMemory(name=name, create=create, size=size, track=False)
+    with _tracker_lock(name):
+        segment = shared_memory.SharedMemory(name=name, create=create, size=size)
+        if os.name == "posix":
+            # 開いた時点で登録されるため、このプロセスの終了時に削除されないよう解除する
+            resource_tracker.unregister(f"/{segment.name}", "shared_memory")
+    return segment
+
+
+class SharedBarStore:
+    """シンボル × interval ごとのバーの系列を保持する共有メモリ"""
+
+    def __init__(self, segment: shared_memory.SharedMemory, owner: bool = False):
+        self.segment = segment
+        self.owner = owner
+        buf = segment.buf
+        self._header = np.ndarray(1, dtype=_HEADER, buffer=buf)[0]
+        if bytes(self._header["magic"]) != _MAGIC:
+            raise ValueError(f"Shared memory {segment.name} is not a bar store")
+        self.max_symbols = int(self._header["max_symbols"])
+        self.capacity = int(self._header["capacity"])
+        n_intervals = int(self._header["n_intervals"])
+        self.intervals = [name.decode() for name in self._header["intervals"][:n_intervals]]
+        self._interval_index = {name: i for i, name in enumerate(self.intervals)}
+
+        offsets, _ = _layout(self.max_symbols, n_intervals, self.capacity)
+        shape = (self.max_symbols, n_intervals)
+        self._directory = np.ndarray(self.max_symbols, dtype=_SYMBOL, buffer=buf, offset=offsets["directory"])
+        self._meta = np.ndarray(shape, dtype=_META, buffer=buf, offset=offsets["meta"])
+        self._times = np.ndarray(shape + (2, self.capacity), dtype=np.int64, buffer=buf, offset=offsets["times"])
+        self._values = np.ndarray(
+            shape + (2, self.capacity, len(COLUMNS)), dtype=np.float64, buffer=buf, offset=offsets["values"]
+        )
+        # シンボル名 -> スロット（ディレクトリから読んだ分）
+        self._slots: Dict[str, int] = {}
+
+    @classmethod
+    def create(
+        cls,
+        name: Optional[str],
+        intervals: Sequence[str],
+        max_symbols: int = 64,
+        capacity: int = 2048
+    ) -> "SharedBarStore":
+        """共有メモリを確保して初期化（作成したプロセスが unlink する）"""
+        intervals = list(dict.fromkeys(intervals))
+        if not intervals or len(intervals) > _MAX_INTERVALS:
+            raise ValueError(f"Between 1 and {_MAX_INTERVALS} intervals are required")
+        _, size = _layout(max_symbols, len(intervals), capacity)
+        segment = _open_segment(name, create=True, size=size)
+        header = np.ndarray(1, dtype=_HEADER, buffer=segment.buf)[0]
+        header["max_symbols"] = max_symbols
+        header["capacity"] = capacity
+        header["n_intervals"] = len(intervals)
+        header["symbol_count"] = 0
+        header["intervals"][:len(intervals)] = [i.encode() for i in intervals]
+        header["magic"] = _MAGIC
+        del header
+        return cls(segment, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedBarStore":
+        """取り込みプロセスが作成した共有メモリに接続"""
+        return cls(_open_segment(name))
+
+    @property
+    def name(self) -> str:
+        return self.segment.name
+
+    @property
+    def symbols(self) -> List[str]:
+        """登録済みのシンボル"""
+        self._sync_directory()
+        return list(self._slots)
+
+    def _sync_directory(self) -> None:
+        """取り込みプロセスが追加したシンボルをディレクトリから読む"""
+        count = int(self._header["symbol_count"])
+        for slot in range(len(self._slots), count):
+            self._slots[self._directory[slot].decode()] = slot
+
+    def _slot(self, symbol: str, register: bool = False) -> Optional[int]:
+        slot = self._slots.get(symbol)
+        if slot is None:
+            self._sync_directory()
+            slot = self._slots.get(symbol)
+        if slot is None and register:
+            slot = len(self._slots)
+            if slot >= self.max_symbols:
+                raise ValueError(f"Shared bar store is full ({self.max_symbols} symbols)")
+            encoded = symbol.encode()
+            if len(encoded) > _SYMBOL.itemsize:
+                raise ValueError(f"Symbol is too long: {symbol}")
+            # 名前を書いてから件数を増やす（ワーカーは件数までしか読まない）
+            self._directory[slot] = encoded
+            self._header["symbol_count"] = slot + 1
+            self._slots[symbol] = slot
+        return slot
+
+    def write(self, symbol: str, interval: str, times: np.ndarray, values: np.ndarray) -> None:
+        """
+        系列全体を書き込む（取り込みプロセスのみ）
+
+        times は UTC のナノ秒（int64）、values は (本数, 5) の OHLCV。上限を超える分は古い方を捨てる。
+        """
+        column = self._interval_index.get(interval)
+        if column is None:
+            raise ValueError(f"Interval is not stored: {interval}")
+        slot = self._slot(symbol, register=True)
+        times = times[-self.capacity:]
+        values = values[-self.capacity:]
+        count = len(times)
+        meta = self._meta[slot, column]
+        page = (int(meta["generation"]) + 1) & 1
+        self._times[slot, column, page, :count] = times
+        self._values[slot, column, page, :count] = values
+        meta["count"][page] = count
+        meta["updated_at"] = time.time()
+        # 系列を書き終えてから世代を進めてページを切り替える
+        meta["generation"] += 1
+
+    def read(
+        self,
+        symbol: str,
+        interval: str,
+        copy: bool = False,
+        window: Optional[Callable[[np.ndarray], Optional[slice]]] = None
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        系列の (時刻, OHLCV)、未取り込みなら None
+
+        window は共有メモリ上の時刻（ビュー）から読む範囲を返す関数で、None を返すと結果も None になる。
+        copy=True なら範囲だけをコピーして返す（範囲の決定からコピーまでの間に同じページが書き直されたら読み直す）。
+        copy=False なら共有メモリの読み取り専用ビューを返す（検証しないため、2回後の書き込みで上書きされる）。
+        """
+        column = self._interval_index.get(interval)
+        slot = self._slot(symbol)
+        if column is None or slot is None:
+            return None
+        meta = self._meta[slot, column]
+        while True:
+            generation = int(meta["generation"])
+            if generation == 0:
+                return None
+            page = generation & 1
+            count = int(meta["count"][page])
+            times = self._times[slot, column, page, :count]
+            values = self._values[slot, column, page, :count]
+            selected = window(times) if window is not None else slice(None)
+            if selected is not None:
+                times, values = times[selected], values[selected]
+            if not copy:
+                if selected is None:
+                    return None
+                break
+            if selected is not None:
+                times = times.copy()
+                values = values.copy()
+            # コピーし終えるまでに同じページが書き直されていなければ（書き込みが2回未満なら）有効
+            if int(meta["generation"]) - generation < 2:
+                return (times, values) if selected is not None else None
+        times = times.view()
+        values = values.view()
+        times.flags.writeable = False
+        values.flags.writeable = False
+        return times, values
+
+    def updated_at(self, symbol: str, interval: str) -> Optional[float]:
+        """系列を最後に書き込んだ時刻（UNIX秒）"""
+        column = self._interval_index.get(interval)
+        slot = self._slot(symbol)
+        if column is None or slot is None or not self._meta[slot, column]["generation"]:
+            return None
+        return float(self._meta[slot, column]["updated_at"])
+
+    def close(self) -> None:
+        """共有メモリから切断（ビューが残っている場合はプロセスの終了時に解放される）"""
+        del self._header, self._directory, self._meta, self._times, self._values
+        try:
+            self.segment.close()
+        except BufferError:
+            logger.debug("Shared bar views are still referenced; leaving %s mapped", self.name)
+
+    def unlink(self) -> None:
+        """共有メモリを削除（作成したプロセスのみ）"""
+        if self.owner:
+            if _TRACK_ARGUMENT or os.name != "posix":
+                self.segment.unlink()
+                return
+            with _tracker_lock(self.name):
+                # 3.12 以前の unlink は登録の解除も行うため、開いたときに解除した登録を戻してから削除する
+                resource_tracker.register(f"/{self.name}", "shared_memory")
+                self.segment.unlink()
+            try:
+                os.unlink(_lock_path(self.name))
+            except OSError:
+                pass
+
+
+def frame_to_arrays(df: "pd.DataFrame") -> Tuple[np.ndarray, np.ndarray]:
+    """プロバイダの DataFrame を (UTCナノ秒, OHLCV) の配列に変換"""
+    index = df.index
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    times = index.as_unit("ns").asi8
+    values = df[COLUMNS].to_numpy(dtype=np.float64)
+    return times, values
+
+
+def arrays_to_frame(times: np.ndarray, values: np.ndarray) -> "pd.DataFrame":
+    """(UTCナノ秒, OHLCV) から Yahoo Finance と同じ形式の DataFrame を作る（OHLCV はコピーしない）"""
+    import pandas as pd
+
+    index = pd.DatetimeIndex(times.view("datetime64[ns]")).tz_localize("UTC")
+    return pd.DataFrame(values, index=index, columns=COLUMNS, copy=False)
+
+
+class SharedBarsProvider(MarketDataProvider):
+    """
+    共有メモリのバーを返すプロバイダ（APIワーカー用）
+
+    取り込み対象外のシンボル・interval は fallback があればそこから直接取得し、なければ ValueError。
+    period を指定すると最新のバーから遡ってその期間の分だけを返す（取り込みプロセスは interval ごとに
+    最も長い期間で取得しているため）。共有メモリの系列は検証付きでコピーしてから返す。
+    """
+
+    def __init__(self, store: SharedBarStore, fallback: Optional[MarketDataProvider] = None):
+        self.store = store
+        self.fallback = fallback
+
+    def history(
+        self,
+        symbol: str,
+        interval: str,
+        period: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> "pd.DataFrame":
+        # 共有メモリ上で範囲を決めてから、その範囲だけをコピーする
+        bars = self.store.read(symbol, interval, copy=True, window=_history_window(period, start, end))
+        record_cache("shared_bars", bars is not None)
+        if bars is None:
+            if self.fallback is None:
+                raise ValueError(
+                    f"{symbol} ({interval}) is not in the shared bar store; add it to SHARED_BARS_SYMBOLS / "
+                    "SHARED_BARS_TIMEFRAMES or enable SHARED_BARS_FALLBACK"
+                )
+            return self.fallback.history(symbol, interval, period, start, end)
+        return arrays_to_frame(*bars)
+
+    def info(self, symbol: str) -> dict:
+        daily = self.store.read(symbol, "1d", copy=True, window=lambda times: slice(-2, None))
+        if daily is not None and len(daily[1]) >= 2:
+            return {"previousClose": float(daily[1][-2, COLUMNS.index("Close")])}
+        return self.fallback.info(symbol) if self.fallback is not None else {}
+
+
+# period（Yahoo Finance の指定）の日数
+PERIOD_DAYS = SyntheticMarketDataProvider.PERIOD_DAYS
+
+
+def _to_ns(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1_000_000_000)
+
+
+def _history_window(
+    period: Optional[str], start: Optional[datetime], end: Optional[datetime]
+) -> Optional[Callable[[np.ndarray], Optional[slice]]]:
+    """history() の期間を共有メモリ上の時刻から読む範囲に変換する関数（全体を読む場合は None）"""
+    if start and end:
+        lo, hi = _to_ns(start), _to_ns(end)
+
+        def window(times: np.ndarray) -> Optional[slice]:
+            # 保持している範囲より古い期間は上流から取得する
+            if not len(times) or times[0] > lo:
+                return None
+            return slice(np.searchsorted(times, lo, side="left"), np.searchsorted(times, hi, side="right"))
+
+        return window
+    if period in PERIOD_DAYS:
+        span = PERIOD_DAYS[period] * 86400 * 1_000_000_000
+        return lambda times: slice(np.searchsorted(times, times[-1] - span, side="right") if len(times) else 0, None)
+    return None
+
+
+class BarIngestor:
+    """上流のプロバイダから全シンボル × interval のバーを定期的に取得して共有メモリに書き込む"""
+
+    def __init__(
+        self,
+        store: SharedBarStore,
+        provider: MarketDataProvider,
+        symbols: Sequence[str],
+        series: Sequence[Tuple[str, str]],
+        fetch_workers: int = 8
+    ):
+        self.store = store
+        self.provider = provider
+        self.symbols = list(dict.fromkeys(symbols))
+        # (interval, period)
+        self.series = list(series)
+        self.fetch_workers = fetch_workers
+
+    def _fetch(self, symbol: str, interval: str, period: str) -> Tuple[np.ndarray, np.ndarray]:
+        return frame_to_arrays(self.provider.history(symbol, interval, period))
+
+    def poll_once(self) -> int:
+        """全系列を1回取得して書き込み、書き込んだ系列数を返す（共有メモリへの書き込みはこのスレッドのみ）"""
+        written = 0
+        with ThreadPoolExecutor(max_workers=self.fetch_workers) as pool:
+            futures = {
+                pool.submit(self._fetch, symbol, interval, period): (symbol, interval)
+                for symbol in self.symbols
+                for interval, period in self.series
+            }
+            for future in as_completed(futures):
+                symbol, interval = futures[future]
+                try:
+                    times, values = future.result()
+                except Exception as e:
+                    ERRORS.labels(component="shared_bars").inc()
+                    logger.warning(f"Failed to fetch {symbol} ({interval}): {str(e)}")
+                    continue
+                if len(times):
+                    self.store.write(symbol, interval, times, values)
+                    written += 1
+        return written
+
+    def run(self, interval: float, stop=None, ready=None) -> None:
+        """stop がセットされるまで interval 秒ごとに取得（初回の取得が終わると ready をセット）"""
+        while True:
+            started = time.monotonic()
+            written = self.poll_once()
+            logger.info(f"Wrote {written} bar series to {self.store.name}")
+            if ready is not None:
+                ready.set()
+            wait = max(interval - (time.monotonic() - started), 0.0)
+            if stop is None:
+                time.sleep(wait)
+            elif stop.wait(wait):
+                return
+
+
+def ingest_series(timeframes: Sequence[str]) -> List[Tuple[str, str]]:
+    """時間足を MarketDataService が上流に要求する (interval, period) に変換"""
+    from ..models.market import TimeFrame
+    from .market_data import MarketDataService
+
+    series = []
+    for timeframe in dict.fromkeys(TimeFrame(tf) for tf in timeframes):
+        series.append((
+            MarketDataService.TIMEFRAME_MAPPING[timeframe],
+            MarketDataService.PERIOD_MAPPING[timeframe]
+        ))
+    return list(dict(series).items())
+
+
+def upstream_provider(mode: str) -> MarketDataProvider:
+    """取り込みプロセスが使う上流のプロバイダ"""
+    if mode == "synthetic":
+        return SyntheticMarketDataProvider()
+    if mode == "live":
+        return YahooFinanceProvider()
+    raise ValueError(f"Unsupported upstream for shared bars: {mode}")
+
+
+def _run_ingest(name: str, mode: str, symbols: List[str], series: List[Tuple[str, str]], stop, ready) -> None:
+    """取り込みプロセスの本体"""
+    logging.basicConfig(level=logging.INFO)
+    store = SharedBarStore.attach(name)
+    try:
+        BarIngestor(
+            store, upstream_provider(mode), symbols, series, fetch_workers=settings.SHARED_BARS_FETCH_WORKERS
+        ).run(settings.SHARED_BARS_POLL_INTERVAL, stop=stop, ready=ready)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="取り込みプロセスと共有メモリを読むAPIワーカーを起動")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="APIワーカー数")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--ready-timeout", type=float, default=120.0, help="初回の取り込みを待つ秒数")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.workers > 1 and settings.ALERTS_ENABLED:
+        # アラートの登録・成立はワーカーごとの状態で、別のワーカーに届いたリクエストからは見えない
+        if "ALERTS_ENABLED" in settings.model_fields_set:
+            parser.error("alerts are kept per worker; unset ALERTS_ENABLED to run more than one worker")
+        logger.warning("Alerts are kept per worker; disabling /alerts and /ws/alerts for %d workers", args.workers)
+        os.environ["ALERTS_ENABLED"] = "false"
+        settings.ALERTS_ENABLED = False
+
+    mode = settings.SHARED_BARS_UPSTREAM
+    upstream_provider(mode)
+    symbols = settings.WATCHLIST_SYMBOLS + settings.SCREENER_SYMBOLS + settings.SHARED_BARS_SYMBOLS
+    series = ingest_series(settings.SHARED_BARS_TIMEFRAMES)
+    store = SharedBarStore.create(
+        settings.SHARED_BARS_NAME or f"market-bars-{os.getpid()}",
+        [interval for interval, _ in series],
+        max_symbols=settings.SHARED_BARS_MAX_SYMBOLS,
+        capacity=settings.SHARED_BARS_CAPACITY
+    )
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event()
+    ready = context.Event()
+    ingest = context.Process(
+        target=_run_ingest, args=(store.name, mode, symbols, series, stop, ready), name="bar-ingest"
+    )
+    try:
+        ingest.start()
+        if not ready.wait(args.ready_timeout):
+            logger.warning("Initial bar ingestion did not finish; starting workers anyway")
+        # ワーカーは環境変数で設定を受け取り、共有メモリのバーを読む（workers=1 ではこのプロセスで動く）
+        os.environ["MARKET_DATA_MODE"] = settings.MARKET_DATA_MODE = "shared"
+        os.environ["SHARED_BARS_NAME"] = settings.SHARED_BARS_NAME = store.name
+        uvicorn.run("app.main:app", host=args.host, port=args.port, workers=args.workers)
+    finally:
+        stop.set()
+        ingest.join(10)
+        if ingest.is_alive():
+            ingest.terminate()
+        store.close()
+        store.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,19 @@
-from typing import List, Dict
+import logging
+from typing import List, Dict, Optional
 from datetime import datetime
 
 from ..models.market import (
     TradingSignal, SignalStrength, TimeFrame, TrendDirection,
-    TechnicalIndicators, MultiTimeframeAnalysis
+    TechnicalIndicators, MultiTimeframeAnalysis, MarketQuote, TrendAnalysis
 )
 from .market_data import MarketDataService
+from .economic_calendar import economic_calendar
+from .news_store import normalize_symbol
+from .providers import market_now
+from ..core.config import settings
+from ..core.metrics import ERRORS, stage_timer
+
+logger = logging.getLogger(__name__)
 
 
 class SignalService:
@@ -17,93 +25,106 @@ class SignalService:
     async def generate_signal(
         self, 
         symbol: str, 
-        timeframe: TimeFrame
+        timeframe: TimeFrame,
+        indicators: Optional[TechnicalIndicators] = None,
+        trend: Optional[TrendAnalysis] = None,
+        quote: Optional[MarketQuote] = None
     ) -> TradingSignal:
-        """トレーディングシグナルを生成"""
+        """トレーディングシグナルを生成（計算済みの指標・トレンド・価格を渡すと再計算しない）"""
         try:
             # テクニカル指標とトレンド分析を取得
-            indicators = await self.market_service.calculate_indicators(symbol, timeframe)
-            trend = await self.market_service.analyze_trend(symbol, timeframe)
-            quote = await self.market_service.get_quote(symbol)
-            
-            # シグナル強度を計算
-            signal_strength = SignalStrength.NEUTRAL
-            confidence = 50.0
-            reasons = []
-            
-            # トレンドベースの判定
-            if trend.direction == TrendDirection.BULLISH and trend.strength > 60:
-                signal_strength = SignalStrength.BUY
-                confidence += 20
-                reasons.append(f"強い上昇トレンド (強度: {trend.strength:.0f}%)")
-            elif trend.direction == TrendDirection.BEARISH and trend.strength > 60:
-                signal_strength = SignalStrength.SELL
-                confidence += 20
-                reasons.append(f"強い下降トレンド (強度: {trend.strength:.0f}%)")
-            
-            # RSIベースの判定
-            if indicators.rsi:
-                if indicators.rsi > 70:
-                    if signal_strength == SignalStrength.SELL:
-                        signal_strength = SignalStrength.STRONG_SELL
-                        confidence += 15
-                    reasons.append(f"RSI買われすぎ ({indicators.rsi:.1f})")
-                elif indicators.rsi < 30:
-                    if signal_strength == SignalStrength.BUY:
-                        signal_strength = SignalStrength.STRONG_BUY
-                        confidence += 15
-                    reasons.append(f"RSI売られすぎ ({indicators.rsi:.1f})")
-            
-            # MACDベースの判定
-            if indicators.macd and indicators.macd_signal:
-                macd_diff = indicators.macd - indicators.macd_signal
-                if macd_diff > 0 and indicators.macd_histogram and indicators.macd_histogram > 0:
-                    if signal_strength in [SignalStrength.BUY, SignalStrength.NEUTRAL]:
-                        confidence += 10
-                    reasons.append("MACD買いシグナル")
-                elif macd_diff < 0 and indicators.macd_histogram and indicators.macd_histogram < 0:
-                    if signal_strength in [SignalStrength.SELL, SignalStrength.NEUTRAL]:
-                        confidence += 10
-                    reasons.append("MACD売りシグナル")
-            
-            # ボリンジャーバンドベースの判定
-            if indicators.bb_upper and indicators.bb_lower and indicators.bb_middle:
-                current_price = quote.price
-                if current_price > indicators.bb_upper:
-                    reasons.append("価格がボリンジャーバンド上限を超えている")
-                    if signal_strength == SignalStrength.SELL:
-                        confidence += 10
-                elif current_price < indicators.bb_lower:
-                    reasons.append("価格がボリンジャーバンド下限を下回っている")
-                    if signal_strength == SignalStrength.BUY:
-                        confidence += 10
-            
-            # 移動平均線クロス
-            if indicators.sma_20 and indicators.sma_50:
-                if quote.price > indicators.sma_20 > indicators.sma_50:
-                    if signal_strength in [SignalStrength.BUY, SignalStrength.NEUTRAL]:
-                        confidence += 10
-                    reasons.append("価格が移動平均線の上にある")
-                elif quote.price < indicators.sma_20 < indicators.sma_50:
-                    if signal_strength in [SignalStrength.SELL, SignalStrength.NEUTRAL]:
-                        confidence += 10
-                    reasons.append("価格が移動平均線の下にある")
-            
-            confidence = min(confidence, 100)
-            
-            # エントリー、ストップロス、テイクプロフィットを計算
-            entry_price = quote.price
-            atr = indicators.atr or (quote.price * 0.02)  # ATRがない場合は2%を使用
-            
-            if signal_strength in [SignalStrength.BUY, SignalStrength.STRONG_BUY]:
-                stop_loss = entry_price - (2 * atr)
-                take_profit = entry_price + (3 * atr)
-            elif signal_strength in [SignalStrength.SELL, SignalStrength.STRONG_SELL]:
-                stop_loss = entry_price + (2 * atr)
-                take_profit = entry_price - (3 * atr)
-            else:
-                stop_loss = None
-                take_profit = None
+            if indicators is None:
+                indicators = await self.market_service.calculate_indicators(symbol, timeframe)
+            if trend is None:
+                trend = await self.market_service.analyze_trend(symbol, timeframe, indicators)
+            if quote is None:
+                quote = await self.market_service.get_quote(symbol)
+            
+            with stage_timer("signal"):
+                # シグナル強度を計算
+                signal_strength = SignalStrength.NEUTRAL
+                confidence = 50.0
+                reasons = []
+            
+                # トレンドベースの判定
+                if trend.direction == TrendDirection.BULLISH and trend.strength > 60:
+                    signal_strength = SignalStrength.BUY
+                    confidence += 20
+                    reasons.append(f"強い上昇トレンド (強度: {trend.strength:.0f}%)")
+                elif trend.direction == TrendDirection.BEARISH and trend.strength > 60:
+                    signal_strength = SignalStrength.SELL
+                    confidence += 20
+                    reasons.append(f"強い下降トレンド (強度: {trend.strength:.0f}%)")
+            
+                # RSIベースの判定
+                if indicators.rsi:
+                    if indicators.rsi > 70:
+                        if signal_strength == SignalStrength.SELL:
+                            signal_strength = SignalStrength.STRONG_SELL
+                            confidence += 15
+                        reasons.append(f"RSI買われすぎ ({indicators.rsi:.1f})")
+                    elif indicators.rsi < 30:
+                        if signal_strength == SignalStrength.BUY:
+                            signal_strength = SignalStrength.STRONG_BUY
+                            confidence += 15
+                        reasons.append(f"RSI売られすぎ ({indicators.rsi:.1f})")
+            
+                # MACDベースの判定
+                if indicators.macd and indicators.macd_signal:
+                    macd_diff = indicators.macd - indicators.macd_signal
+                    if macd_diff > 0 and indicators.macd_histogram and indicators.macd_histogram > 0:
+                        if signal_strength in [SignalStrength.BUY, SignalStrength.NEUTRAL]:
+                            confidence += 10
+                        reasons.append("MACD買いシグナル")
+                    elif macd_diff < 0 and indicators.macd_histogram and indicators.macd_histogram < 0:
+                        if signal_strength in [SignalStrength.SELL, SignalStrength.NEUTRAL]:
+                            confidence += 10
+                        reasons.append("MACD売りシグナル")
+            
+                # ボリンジャーバンドベースの判定
+                if indicators.bb_upper and indicators.bb_lower and indicators.bb_middle:
+                    current_price = quote.price
+                    if current_price > indicators.bb_upper:
+                        reasons.append("価格がボリンジャーバンド上限を超えている")
+                        if signal_strength == SignalStrength.SELL:
+                            confidence += 10
+                    elif current_price < indicators.bb_lower:
+                        reasons.append("価格がボリンジャーバンド下限を下回っている")
+                        if signal_strength == SignalStrength.BUY:
+                            confidence += 10
+            
+                # 移動平均線クロス
+                if indicators.sma_20 and indicators.sma_50:
+                    if quote.price > indicators.sma_20 > indicators.sma_50:
+                        if signal_strength in [SignalStrength.BUY, SignalStrength.NEUTRAL]:
+                            confidence += 10
+                        reasons.append("価格が移動平均線の上にある")
+                    elif quote.price < indicators.sma_20 < indicators.sma_50:
+                        if signal_strength in [SignalStrength.SELL, SignalStrength.NEUTRAL]:
+                            confidence += 10
+                        reasons.append("価格が移動平均線の下にある")
+            
+                confidence = min(confidence, 100)
+            
+                # 重要指標の発表前後は信頼度を下げる
+                events = self._events_near(symbol)
+                if events:
+                    confidence = max(confidence - 20, 0)
+                    reasons.append(f"重要指標の発表前後 ({events[0].title})")
+            
+                # エントリー、ストップロス、テイクプロフィットを計算
+                entry_price = quote.price
+                atr = indicators.atr or (quote.price * 0.02)  # ATRがない場合は2%を使用
+            
+                if signal_strength in [SignalStrength.BUY, SignalStrength.STRONG_BUY]:
+                    stop_loss = entry_price - (2 * atr)
+                    take_profit = entry_price + (3 * atr)
+                elif signal_strength in [SignalStrength.SELL, SignalStrength.STRONG_SELL]:
+                    stop_loss = entry_price + (2 * atr)
+                    take_profit = entry_price - (3 * atr)
+                else:
+                    stop_loss = None
+                    take_profit = None
             
             return TradingSignal(
                 symbol=symbol,
@@ -119,6 +140,24 @@ class SignalService:
         except Exception as e:
             raise Exception(f"Failed to generate signal for {symbol}: {str(e)}")
     
+    def _events_near(self, symbol: str) -> list:
+        """通貨ペアの両通貨について、発表前後の重要イベントを取得"""
+        pair = normalize_symbol(symbol)
+        currencies = [pair[:3], pair[3:]] if len(pair) == 6 else [pair]
+        # カレンダーを読み込めない場合はイベントなしとして扱い、シグナル生成は止めない
+        try:
+            economic_calendar.ensure_loaded()
+            return economic_calendar.events_near(
+                market_now(),
+                before_minutes=settings.SIGNAL_EVENT_BLACKOUT_BEFORE,
+                after_minutes=settings.SIGNAL_EVENT_BLACKOUT_AFTER,
+                currencies=currencies
+            )
+        except Exception as e:
+            ERRORS.labels(component="calendar").inc()
+            logger.warning(f"Economic calendar unavailable for {symbol}: {str(e)}")
+            return []
+    
     async def get_multi_timeframe_analysis(
         self, 
         symbol: str,
@@ -142,37 +181,48 @@ class SignalService:
                 trend = await self.market_service.analyze_trend(symbol, tf)
                 analyses[tf] = trend
             
-            # 全体的なトレンドを判定
-            bullish_count = sum(1 for a in analyses.values() if a.direction == TrendDirection.BULLISH)
-            bearish_count = sum(1 for a in analyses.values() if a.direction == TrendDirection.BEARISH)
-            
-            if bullish_count > bearish_count:
-                overall_trend = TrendDirection.BULLISH
-                consensus_signal = SignalStrength.BUY if bullish_count > len(timeframes) / 2 else SignalStrength.NEUTRAL
-            elif bearish_count > bullish_count:
-                overall_trend = TrendDirection.BEARISH
-                consensus_signal = SignalStrength.SELL if bearish_count > len(timeframes) / 2 else SignalStrength.NEUTRAL
-            else:
-                overall_trend = TrendDirection.SIDEWAYS
-                consensus_signal = SignalStrength.NEUTRAL
-            
-            # サマリーを作成
-            summary_parts = []
-            for tf, analysis in analyses.items():
-                summary_parts.append(
-                    f"{tf.value}: {analysis.direction.value} ({analysis.strength:.0f}%)"
-                )
-            
-            summary = f"全体的なトレンド: {overall_trend.value}. " + ", ".join(summary_parts)
-            
-            return MultiTimeframeAnalysis(
-                symbol=symbol,
-                timestamp=datetime.now(),
-                current_price=quote.price,
-                analyses=analyses,
-                overall_trend=overall_trend,
-                consensus_signal=consensus_signal,
-                summary=summary
-            )
+            return self.build_multi_timeframe_analysis(symbol, quote.price, analyses)
         except Exception as e:
             raise Exception(f"Failed to perform multi-timeframe analysis: {str(e)}")
+    
+    def build_multi_timeframe_analysis(
+        self,
+        symbol: str,
+        current_price: float,
+        analyses: Dict[TimeFrame, TrendAnalysis]
+    ) -> MultiTimeframeAnalysis:
+        """時間足ごとのトレンド分析からマルチタイムフレーム分析を組み立てる"""
+        timeframes = list(analyses.keys())
+        
+        # 全体的なトレンドを判定
+        bullish_count = sum(1 for a in analyses.values() if a.direction == TrendDirection.BULLISH)
+        bearish_count = sum(1 for a in analyses.values() if a.direction == TrendDirection.BEARISH)
+        
+        if bullish_count > bearish_count:
+            overall_trend = TrendDirection.BULLISH
+            consensus_signal = SignalStrength.BUY if bullish_count > len(timeframes) / 2 else SignalStrength.NEUTRAL
+        elif bearish_count > bullish_count:
+            overall_trend = TrendDirection.BEARISH
+            consensus_signal = SignalStrength.SELL if bearish_count > len(timeframes) / 2 else SignalStrength.NEUTRAL
+        else:
+            overall_trend = TrendDirection.SIDEWAYS
+            consensus_signal = SignalStrength.NEUTRAL
+        
+        # サマリーを作成
+        summary_parts = []
+        for tf, analysis in analyses.items():
+            summary_parts.append(
+                f"{tf.value}: {analysis.direction.value} ({analysis.strength:.0f}%)"
+            )
+        
+        summary = f"全体的なトレンド: {overall_trend.value}. " + ", ".join(summary_parts)
+        
+        return MultiTimeframeAnalysis(
+            symbol=symbol,
+            timestamp=datetime.now(),
+            current_price=current_price,
+            analyses=analyses,
+            overall_trend=overall_trend,
+            consensus_signal=consensus_signal,
+            summary=summary
+        )
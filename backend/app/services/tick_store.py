@@ -0,0 +1,442 @@
+import asyncio
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from ..models.market import OHLCV, MarketQuote, TimeFrame
+from ..core.config import settings
+from ..core.metrics import DROPPED_MESSAGES, ERRORS, QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+
+# 時間足ごとの秒数（週足・月足はカレンダー基準で別途計算）
+TIMEFRAME_SECONDS = {
+    TimeFrame.M1: 60,
+    TimeFrame.M5: 300,
+    TimeFrame.M15: 900,
+    TimeFrame.M30: 1800,
+    TimeFrame.M45: 2700,
+    TimeFrame.H1: 3600,
+    TimeFrame.H4: 14400,
+    TimeFrame.D1: 86400,
+    TimeFrame.W1: 604800,
+    TimeFrame.MN1: 2592000,  # 目安値（実際の境界は暦月）
+}
+
+# 1970-01-05 (月曜日) 00:00 UTC
+_WEEK_ORIGIN = 4 * 86400
+
+
+def bar_bounds(timeframe: TimeFrame, ts: float) -> tuple:
+    """タイムスタンプが属するバーの開始・終了時刻（UNIX秒）を返す"""
+    if timeframe == TimeFrame.MN1:
+        dt = datetime.fromtimestamp(ts, tz=timezone.utc)
+        start = datetime(dt.year, dt.month, 1, tzinfo=timezone.utc)
+        if dt.month == 12:
+            end = datetime(dt.year + 1, 1, 1, tzinfo=timezone.utc)
+        else:
+            end = datetime(dt.year, dt.month + 1, 1, tzinfo=timezone.utc)
+        return start.timestamp(), end.timestamp()
+
+    seconds = TIMEFRAME_SECONDS[timeframe]
+    origin = _WEEK_ORIGIN if timeframe == TimeFrame.W1 else 0
+    start = ((ts - origin) // seconds) * seconds + origin
+    return start, start + seconds
+
+
+class Tick(NamedTuple):
+    """ティックデータ"""
+    symbol: str
+    timestamp: float  # UNIX秒 (UTC)
+    bid: float
+    ask: float
+    last: float = float("nan")  # 約定価格（FXではNaN → 仲値を使用）
+    volume: float = 0.0
+
+    @property
+    def price(self) -> float:
+        """約定価格、なければ仲値"""
+        if self.last == self.last:
+            return self.last
+        return (self.bid + self.ask) / 2
+
+
+class TickRingBuffer:
+    """固定長のティックリングバッファ"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamp = np.zeros(capacity, dtype=np.float64)
+        self.bid = np.zeros(capacity, dtype=np.float64)
+        self.ask = np.zeros(capacity, dtype=np.float64)
+        self.price = np.zeros(capacity, dtype=np.float64)
+        self.volume = np.zeros(capacity, dtype=np.float64)
+        self._pos = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, tick: Tick) -> None:
+        """ティックを追加（満杯時は最古のものを上書き）"""
+        i = self._pos
+        self.timestamp[i] = tick.timestamp
+        self.bid[i] = tick.bid
+        self.ask[i] = tick.ask
+        self.price[i] = tick.price
+        self.volume[i] = tick.volume
+        self._pos = (i + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    @property
+    def last_index(self) -> int:
+        """最新ティックのインデックス"""
+        return (self._pos - 1) % self.capacity
+
+    def _order(self) -> np.ndarray:
+        """古い順のインデックス配列"""
+        start = (self._pos - self._count) % self.capacity
+        return (np.arange(self._count) + start) % self.capacity
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """古い順に並べた配列のコピーを返す"""
+        idx = self._order()
+        return {
+            "timestamp": self.timestamp[idx],
+            "bid": self.bid[idx],
+            "ask": self.ask[idx],
+            "price": self.price[idx],
+            "volume": self.volume[idx],
+        }
+
+
+class BarRingBuffer:
+    """ティックからリアルタイムに集計されるバーのリングバッファ"""
+
+    def __init__(self, timeframe: TimeFrame, capacity: int):
+        self.timeframe = timeframe
+        self.capacity = capacity
+        self.timestamp = np.zeros(capacity, dtype=np.float64)
+        self.open = np.zeros(capacity, dtype=np.float64)
+        self.high = np.zeros(capacity, dtype=np.float64)
+        self.low = np.zeros(capacity, dtype=np.float64)
+        self.close = np.zeros(capacity, dtype=np.float64)
+        self.volume = np.zeros(capacity, dtype=np.float64)
+        self._pos = -1  # 形成中バーのインデックス
+        self._count = 0
+        self._bar_end = float("-inf")
+        self.late_ticks = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def update(self, ts: float, price: float, volume: float) -> bool:
+        """ティックをバーに反映する。新しいバーが始まった場合はTrueを返す"""
+        i = self._pos
+        if i >= 0 and self.timestamp[i] <= ts < self._bar_end:
+            if price > self.high[i]:
+                self.high[i] = price
+            if price < self.low[i]:
+                self.low[i] = price
+            self.close[i] = price
+            self.volume[i] += volume
+            return False
+
+        if i >= 0 and ts < self.timestamp[i]:
+            # 形成中バーより古いティックは集計しない
+            self.late_ticks += 1
+            return False
+
+        start, self._bar_end = bar_bounds(self.timeframe, ts)
+        i = (i + 1) % self.capacity
+        self._pos = i
+        self.timestamp[i] = start
+        self.open[i] = self.high[i] = self.low[i] = self.close[i] = price
+        self.volume[i] = volume
+        if self._count < self.capacity:
+            self._count += 1
+        return self._count > 1
+
+    def bar_at(self, offset: int = 0) -> Optional[tuple]:
+        """最新から offset 本前のバーを (timestamp, open, high, low, close, volume) で返す"""
+        if offset >= self._count:
+            return None
+        i = (self._pos - offset) % self.capacity
+        return (
+            self.timestamp[i], self.open[i], self.high[i],
+            self.low[i], self.close[i], self.volume[i]
+        )
+
+    def _order(self) -> np.ndarray:
+        """古い順のインデックス配列"""
+        start = (self._pos - self._count + 1) % self.capacity
+        return (np.arange(self._count) + start) % self.capacity
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """古い順に並べた配列のコピーを返す"""
+        idx = self._order()
+        return {
+            "timestamp": self.timestamp[idx],
+            "open": self.open[idx],
+            "high": self.high[idx],
+            "low": self.low[idx],
+            "close": self.close[idx],
+            "volume": self.volume[idx],
+        }
+
+    def to_ohlcv(self) -> List[OHLCV]:
+        """古い順のOHLCVリストに変換"""
+        idx = self._order()
+        return [
+            OHLCV(
+                timestamp=datetime.fromtimestamp(float(self.timestamp[i]), tz=timezone.utc),
+                open=float(self.open[i]),
+                high=float(self.high[i]),
+                low=float(self.low[i]),
+                close=float(self.close[i]),
+                volume=float(self.volume[i])
+            )
+            for i in idx
+        ]
+
+
+BarListener = Callable[[str, TimeFrame, tuple], None]
+TickListener = Callable[[Tick], None]
+
+
+class TickStore:
+    """シンボルごとのティック・バーをメモリ上に保持するストア"""
+
+    def __init__(
+        self,
+        tick_capacity: int = settings.TICK_BUFFER_SIZE,
+        bar_capacity: int = settings.BAR_BUFFER_SIZE,
+        timeframes: Optional[List[TimeFrame]] = None
+    ):
+        self.tick_capacity = tick_capacity
+        self.bar_capacity = bar_capacity
+        self.timeframes = timeframes or list(TimeFrame)
+        self._ticks: Dict[str, TickRingBuffer] = {}
+        self._bars: Dict[str, Dict[TimeFrame, BarRingBuffer]] = {}
+        self._bar_listeners: List[BarListener] = []
+        self._tick_listeners: List[TickListener] = []
+
+    def symbols(self) -> List[str]:
+        """保持しているシンボル一覧"""
+        return list(self._ticks.keys())
+
+    def has_symbol(self, symbol: str) -> bool:
+        return symbol in self._ticks
+
+    def add_bar_listener(self, listener: BarListener) -> None:
+        """バー確定時のコールバックを登録（確定したバーのタプルが渡される）"""
+        self._bar_listeners.append(listener)
+
+    def add_tick_listener(self, listener: TickListener) -> None:
+        """ティック追加時のコールバックを登録（取り込みの経路で呼ばれるため軽い処理に限る）"""
+        self._tick_listeners.append(listener)
+
+    def add_tick(self, tick: Tick) -> None:
+        """ティックを追加し、全時間足のバーを更新"""
+        ticks = self._ticks.get(tick.symbol)
+        if ticks is None:
+            ticks = self._ticks[tick.symbol] = TickRingBuffer(self.tick_capacity)
+            self._bars[tick.symbol] = {
+                tf: BarRingBuffer(tf, self.bar_capacity) for tf in self.timeframes
+            }
+        ticks.append(tick)
+
+        price = tick.price
+        for tf, bars in self._bars[tick.symbol].items():
+            if bars.update(tick.timestamp, price, tick.volume) and self._bar_listeners:
+                closed = bars.bar_at(1)
+                for listener in self._bar_listeners:
+                    listener(tick.symbol, tf, closed)
+        for listener in self._tick_listeners:
+            listener(tick)
+
+    def get_quote(self, symbol: str) -> Optional[MarketQuote]:
+        """最新ティックから価格情報を組み立てる（データがなければNone）"""
+        ticks = self._ticks.get(symbol)
+        if ticks is None or not len(ticks):
+            return None
+
+        i = ticks.last_index
+        price = float(ticks.price[i])
+        bars = self._bars[symbol]
+
+        # 前日終値（なければ当日始値）を基準に変動を計算
+        previous_close = price
+        daily = bars.get(TimeFrame.D1)
+        if daily is not None and len(daily):
+            prev = daily.bar_at(1)
+            previous_close = float(prev[4]) if prev else float(daily.bar_at(0)[1])
+
+        minute = bars.get(TimeFrame.M1)
+        current = minute.bar_at(0) if minute is not None else None
+        change = price - previous_close
+
+        return MarketQuote(
+            symbol=symbol,
+            price=price,
+            bid=float(ticks.bid[i]),
+            ask=float(ticks.ask[i]),
+            high=float(current[2]) if current else None,
+            low=float(current[3]) if current else None,
+            volume=float(current[5]) if current else None,
+            change=change,
+            change_percent=change / previous_close * 100 if previous_close else 0.0,
+            timestamp=datetime.fromtimestamp(float(ticks.timestamp[i]), tz=timezone.utc)
+        )
+
+    def get_ticks(self, symbol: str) -> Optional[Dict[str, np.ndarray]]:
+        """ティック履歴を配列で取得"""
+        ticks = self._ticks.get(symbol)
+        return ticks.to_arrays() if ticks is not None else None
+
+    def get_bar_arrays(self, symbol: str, timeframe: TimeFrame) -> Optional[Dict[str, np.ndarray]]:
+        """集計済みバーを配列で取得（形成中のバーを含む）"""
+        bars = self._bars.get(symbol, {}).get(timeframe)
+        return bars.to_arrays() if bars is not None and len(bars) else None
+
+    def get_bars(self, symbol: str, timeframe: TimeFrame) -> List[OHLCV]:
+        """集計済みバーを取得（形成中のバーを含む）"""
+        bars = self._bars.get(symbol, {}).get(timeframe)
+        return bars.to_ohlcv() if bars is not None else []
+
+
+def _parse_timestamp(value) -> float:
+    """ISO8601文字列またはUNIX秒をUNIX秒に変換"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def parse_tick(record: dict) -> Tick:
+    """辞書形式のレコードをTickに変換"""
+    last = record.get("last")
+    return Tick(
+        symbol=record["symbol"],
+        timestamp=_parse_timestamp(record["timestamp"]),
+        bid=float(record["bid"]),
+        ask=float(record["ask"]),
+        last=float(last) if last is not None else float("nan"),
+        volume=float(record.get("volume") or 0.0)
+    )
+
+
+class TickProvider(ABC):
+    """ティック配信プロバイダの基底クラス"""
+
+    @abstractmethod
+    def stream(self) -> AsyncIterator[Tick]:
+        """ティックを順次返す非同期イテレータ"""
+
+
+class FileReplayTickProvider(TickProvider):
+    """記録済みファイル（JSON Lines）からティックを再生するプロバイダ
+
+    1行1ティック: {"symbol": "USDJPY=X", "timestamp": "...", "bid": ..., "ask": ...}
+    speed=1.0で実時間、10.0で10倍速、0で待機なし（最速）
+    """
+
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = False):
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+
+    async def stream(self) -> AsyncIterator[Tick]:
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Tick replay file not found: {self.path}")
+
+        while True:
+            previous_ts = None
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    tick = parse_tick(json.loads(line))
+
+                    if self.speed > 0 and previous_ts is not None:
+                        delay = (tick.timestamp - previous_ts) / self.speed
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                    previous_ts = tick.timestamp
+                    yield tick
+
+            if not self.loop:
+                break
+
+
+class TickIngestor:
+    """プロバイダからのティックをキュー経由でストアに取り込む"""
+
+    def __init__(
+        self,
+        provider: TickProvider,
+        store: TickStore,
+        queue_size: int = settings.TICK_QUEUE_SIZE
+    ):
+        self.provider = provider
+        self.store = store
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        QUEUE_DEPTH.labels(queue="ticks").set_function(self.queue.qsize)
+        self.dropped = 0
+        self.ingested = 0
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """取り込みタスクを開始"""
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._produce()),
+            asyncio.create_task(self._consume()),
+        ]
+
+    async def stop(self) -> None:
+        """取り込みタスクを停止"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _produce(self) -> None:
+        """プロバイダからティックを受け取りキューに投入"""
+        try:
+            async for tick in self.provider.stream():
+                try:
+                    self.queue.put_nowait(tick)
+                except asyncio.QueueFull:
+                    # バックログが溢れた場合は最古のティックを捨てる
+                    self.queue.get_nowait()
+                    self.queue.put_nowait(tick)
+                    self.dropped += 1
+                    DROPPED_MESSAGES.labels(source="tick_queue").inc()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            ERRORS.labels(component="tick_ingest").inc()
+            logger.error(f"Tick provider error: {str(e)}")
+
+    async def _consume(self) -> None:
+        """キューからティックを取り出しストアに反映"""
+        while True:
+            tick = await self.queue.get()
+            self.store.add_tick(tick)
+            self.ingested += 1
+
+
+# アプリケーション全体で共有するティックストア
+tick_store = TickStore()
@@ -0,0 +1,295 @@
+"""
+ウォッチリストの事前計算
+
+設定したシンボル × 時間足について、起動時に履歴・指標・トレンド・シグナルを計算しておき、
+以降はバー確定時（ティック受信中はバー確定の通知、それ以外は最新バーの終了時刻）と
+時間足ごとの間隔（refresh_intervals、未指定の時間足は refresh_interval）でバックグラウンド更新する。
+マルチタイムフレーム分析は時間足ごとのトレンドから組み立てる。
+
+価格・履歴の取得は並行して行い（ブロッキングの呼び出しは上流用のスレッドで実行される）、
+指標は時間足ごとに更新対象の全シンボルの履歴を行列に積んで一括計算する（calculate_indicators_many）。
+計算から max_staleness 秒（間隔が refresh_interval より長い時間足はその差だけ延ばす）以内の結果のみを返し、
+それより古い・対象外の場合は None を返す（呼び出し側でその場で計算する）。
+"""
+
+import asyncio
+import logging
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from ..core.metrics import ERRORS, record_cache
+from ..models.market import (
+    OHLCV, MarketQuote, MultiTimeframeAnalysis, TechnicalIndicators, TimeFrame,
+    TradingSignal, TrendAnalysis
+)
+from .market_data import MarketDataService
+from .news_store import normalize_symbol
+from .providers import market_now
+from .signal_service import SignalService
+from .tick_store import bar_bounds
+
+logger = logging.getLogger(__name__)
+
+
+class PrecomputedAnalysis(NamedTuple):
+    """シンボル・時間足ごとの計算結果"""
+    bars: List[OHLCV]
+    indicators: TechnicalIndicators
+    trend: TrendAnalysis
+    signal: TradingSignal
+    computed_at: float
+    bar_close: float  # 計算時点の最新バーが確定する時刻
+
+
+class Watchlist:
+    """ウォッチリストの分析結果を事前計算して保持する"""
+
+    def __init__(
+        self,
+        market_service: MarketDataService,
+        signal_service: SignalService,
+        symbols: Sequence[str],
+        timeframes: Sequence[TimeFrame],
+        refresh_interval: float = 60,
+        max_staleness: float = 120,
+        refresh_intervals: Optional[Dict[TimeFrame, float]] = None
+    ):
+        self.market_service = market_service
+        self.signal_service = signal_service
+        self.symbols = list(dict.fromkeys(symbols))
+        self.timeframes = [TimeFrame(tf) for tf in dict.fromkeys(timeframes)]
+        self.refresh_interval = refresh_interval
+        self.max_staleness = max_staleness
+        self.refresh_intervals = {TimeFrame(tf): seconds for tf, seconds in (refresh_intervals or {}).items()}
+        self._entries: Dict[Tuple[str, TimeFrame], PrecomputedAnalysis] = {}
+        self._quotes: Dict[str, MarketQuote] = {}
+        # 失敗したシンボル・時間足は refresh_interval 後に再試行する
+        self._retry_at: Dict[Tuple[str, TimeFrame], float] = {}
+        # ティックからバー確定を通知されたシンボル・時間足
+        self._closed: Set[Tuple[str, TimeFrame]] = set()
+        self._by_key = {normalize_symbol(s): s for s in self.symbols}
+        self._watched = set(self.symbols)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[str, List[TimeFrame]], None]] = []
+        self.market_service.tick_store.add_bar_listener(self._on_bar_close)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def start(self) -> None:
+        """全件を計算してから、バックグラウンド更新を開始"""
+        self._wakeup = asyncio.Event()
+        await self.refresh_due()
+        if self._task is None and self.symbols:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def add_listener(self, listener: Callable[[str, List[TimeFrame]], None]) -> Callable[[], None]:
+        """再計算したシンボルと時間足を通知するリスナーを登録し、解除用の関数を返す"""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener) if listener in self._listeners else None
+
+    def _on_bar_close(self, symbol: str, timeframe: TimeFrame, bar: tuple) -> None:
+        watched = self._by_key.get(normalize_symbol(symbol))
+        if watched is not None and timeframe in self.timeframes:
+            self._closed.add((watched, timeframe))
+            if self._wakeup is not None:
+                self._wakeup.set()
+
+    def interval(self, timeframe: TimeFrame) -> float:
+        """バー確定を待たずに再計算する間隔（秒）"""
+        return self.refresh_intervals.get(timeframe, self.refresh_interval)
+
+    def _max_age(self, timeframe: TimeFrame) -> float:
+        return self.max_staleness + max(self.interval(timeframe) - self.refresh_interval, 0.0)
+
+    def _is_due(self, symbol: str, timeframe: TimeFrame, now: float) -> bool:
+        key = (symbol, timeframe)
+        if key in self._closed:
+            return True
+        entry = self._entries.get(key)
+        if entry is None:
+            return now >= self._retry_at.get(key, 0.0)
+        # 市場の休場中は最新バーが確定済みのままなので、確定後に計算した結果は間隔でのみ更新
+        closed = entry.computed_at < entry.bar_close <= now
+        return closed or now - entry.computed_at >= self.interval(timeframe)
+
+    def _next_due(self, now: float) -> float:
+        """次に更新が必要になるまでの秒数"""
+        times = [now + self.refresh_interval]
+        for (_, timeframe), entry in self._entries.items():
+            times.append(entry.computed_at + self.interval(timeframe))
+            if entry.bar_close > entry.computed_at:
+                times.append(entry.bar_close)
+        times.extend(self._retry_at.values())
+        return max(min(times) - now, 0.1)
+
+    async def refresh_due(self) -> int:
+        """更新が必要なシンボル・時間足を計算し、計算した件数を返す"""
+        now = market_now().timestamp()
+        due = {}
+        for symbol in self.symbols:
+            timeframes = [tf for tf in self.timeframes if self._is_due(symbol, tf, now)]
+            if timeframes:
+                due[symbol] = timeframes
+        return await self._refresh_batch(due) if due else 0
+
+    async def refresh(self, symbol: str, timeframes: Optional[Sequence[TimeFrame]] = None) -> int:
+        """シンボルの指定時間足を計算（価格は1回だけ取得する）"""
+        return await self._refresh_batch({symbol: list(timeframes or self.timeframes)})
+
+    async def _refresh_batch(self, due: Dict[str, List[TimeFrame]]) -> int:
+        """シンボルごとの時間足を計算（指標は時間足ごとに全シンボルを行列でまとめて計算する）"""
+        by_timeframe: Dict[TimeFrame, List[str]] = {}
+        quotes = await asyncio.gather(
+            *(self.market_service.get_quote(symbol) for symbol in due), return_exceptions=True
+        )
+        for (symbol, timeframes), quote in zip(due.items(), quotes):
+            if isinstance(quote, Exception):
+                self._failed(symbol, timeframes, quote)
+                continue
+            self._quotes[symbol] = quote
+            for timeframe in timeframes:
+                by_timeframe.setdefault(timeframe, []).append(symbol)
+
+        refreshed: Dict[str, List[TimeFrame]] = {}
+        for timeframe, symbols in by_timeframe.items():
+            histories: Dict[str, List[OHLCV]] = {}
+            for symbol in symbols:
+                self._closed.discard((symbol, timeframe))
+            fetched = await asyncio.gather(
+                *(self.market_service.get_historical_data(symbol, timeframe) for symbol in symbols),
+                return_exceptions=True
+            )
+            for symbol, bars in zip(symbols, fetched):
+                if not isinstance(bars, Exception) and not bars:
+                    bars = ValueError(f"No data available for {symbol}")
+                if isinstance(bars, Exception):
+                    self._failed(symbol, [timeframe], bars)
+                    continue
+                histories[symbol] = bars
+            try:
+                indicators = await self.market_service.calculate_indicators_many(
+                    list(histories), timeframe, histories
+                )
+            except Exception as e:
+                for symbol in histories:
+                    self._failed(symbol, [timeframe], e)
+                continue
+
+            for symbol, bars in histories.items():
+                key = (symbol, timeframe)
+                try:
+                    trend = await self.market_service.analyze_trend(
+                        symbol, timeframe, indicators[symbol], bars
+                    )
+                    signal = await self.signal_service.generate_signal(
+                        symbol, timeframe, indicators[symbol], trend, self._quotes[symbol]
+                    )
+                except Exception as e:
+                    self._failed(symbol, [timeframe], e)
+                    continue
+                now = market_now().timestamp()
+                self._entries[key] = PrecomputedAnalysis(
+                    bars, indicators[symbol], trend, signal, now,
+                    bar_bounds(timeframe, bars[-1].timestamp.timestamp())[1]
+                )
+                self._retry_at.pop(key, None)
+                refreshed.setdefault(symbol, []).append(timeframe)
+            # 計算の合間にリクエストを処理させる
+            await asyncio.sleep(0)
+
+        for symbol in due:
+            if symbol in refreshed:
+                for listener in list(self._listeners):
+                    listener(symbol, refreshed[symbol])
+        return sum(len(timeframes) for timeframes in refreshed.values())
+
+    def _failed(self, symbol: str, timeframes: Sequence[TimeFrame], error: Exception) -> None:
+        ERRORS.labels(component="watchlist").inc()
+        logger.warning(f"Failed to precompute {symbol}: {str(error)}")
+        retry_at = market_now().timestamp() + self.refresh_interval
+        for timeframe in timeframes:
+            self._retry_at[(symbol, timeframe)] = retry_at
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), self._next_due(market_now().timestamp())
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.refresh_due()
+            except Exception as e:
+                ERRORS.labels(component="watchlist").inc()
+                logger.warning(f"Failed to refresh watchlist: {str(e)}")
+
+    def entry(self, symbol: str, timeframe: TimeFrame) -> Optional[PrecomputedAnalysis]:
+        """最後に計算した結果（経過時間に関わらず、未計算なら None）"""
+        return self._entries.get((symbol, timeframe))
+
+    def quote(self, symbol: str) -> Optional[MarketQuote]:
+        """最後の計算時に取得した価格（未計算なら None）"""
+        return self._quotes.get(symbol)
+
+    def watched_symbol(self, symbol: str) -> Optional[str]:
+        """ウォッチリスト上のシンボル名（USDJPY・USDJPY=X のどちらでも、対象外なら None）"""
+        return self._by_key.get(normalize_symbol(symbol))
+
+    def _fresh(self, symbol: str, timeframe: TimeFrame) -> Optional[PrecomputedAnalysis]:
+        """max_staleness 以内の計算結果（対象外なら None）"""
+        if symbol not in self._watched or timeframe not in self.timeframes:
+            return None
+        entry = self._entries.get((symbol, timeframe))
+        hit = entry is not None and market_now().timestamp() - entry.computed_at <= self._max_age(timeframe)
+        record_cache("watchlist", hit)
+        return entry if hit else None
+
+    def history(self, symbol: str, timeframe: TimeFrame) -> Optional[List[OHLCV]]:
+        entry = self._fresh(symbol, timeframe)
+        return entry.bars if entry else None
+
+    def indicators(self, symbol: str, timeframe: TimeFrame) -> Optional[TechnicalIndicators]:
+        entry = self._fresh(symbol, timeframe)
+        return self._with_age(entry.indicators, entry) if entry else None
+
+    def trend(self, symbol: str, timeframe: TimeFrame) -> Optional[TrendAnalysis]:
+        entry = self._fresh(symbol, timeframe)
+        return entry.trend if entry else None
+
+    def signal(self, symbol: str, timeframe: TimeFrame) -> Optional[TradingSignal]:
+        entry = self._fresh(symbol, timeframe)
+        return self._with_age(entry.signal, entry) if entry else None
+
+    def _with_age(self, value, entry: PrecomputedAnalysis):
+        age = max(market_now().timestamp() - entry.computed_at, 0.0)
+        return value.model_copy(update={"age": round(age, 3)})
+
+    def multi_timeframe(
+        self,
+        symbol: str,
+        timeframes: Sequence[TimeFrame]
+    ) -> Optional[MultiTimeframeAnalysis]:
+        """計算済みのトレンドからマルチタイムフレーム分析を組み立てる（1つでも欠けていれば None）"""
+        analyses = {}
+        for timeframe in timeframes:
+            entry = self._fresh(symbol, timeframe)
+            if entry is None:
+                return None
+            analyses[timeframe] = entry.trend
+        # ティックを受信中なら最新値、なければ計算時の価格
+        quote = self.market_service.tick_store.get_quote(symbol) or self._quotes.get(symbol)
+        if quote is None:
+            return None
+        return self.signal_service.build_multi_timeframe_analysis(symbol, quote.price, analyses)
@@ -0,0 +1,100 @@
+"""
+複数キーワードの一括照合（Aho–Corasick法）
+
+全キーワードを1つのオートマトンにまとめ、テキストを1回走査するだけで全出現位置を求める。
+単語境界を考慮し、"up" が "update" に、"fed" が "federal" に一致しないようにする。
+境界判定は英数字のみを単語構成文字とみなすため、日本語に隣接する英単語（"GDP成長率"）も一致する。
+"""
+
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isascii() and (ch.isalnum() or ch == "_")
+
+
+class KeywordMatcher:
+    """Aho–Corasick法による複数キーワード照合"""
+
+    def __init__(
+        self,
+        keywords: Optional[Iterable[Tuple[str, Any]]] = None,
+        word_boundary: bool = True,
+        case_sensitive: bool = False
+    ):
+        self.word_boundary = word_boundary
+        self.case_sensitive = case_sensitive
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # 状態ごとの (キーワード長, 値)。構築後は失敗遷移先の出力も含む
+        self._out: List[List[Tuple[int, Any]]] = [[]]
+        self._built = False
+        for keyword, value in keywords or ():
+            self.add(keyword, value)
+
+    def add(self, keyword: str, value: Any = None) -> None:
+        """キーワードを追加（値は一致時に返される）"""
+        if not keyword:
+            raise ValueError("Keyword must not be empty")
+        if not self.case_sensitive:
+            keyword = keyword.lower()
+        state = 0
+        for ch in keyword:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        self._out[state].append((len(keyword), keyword if value is None else value))
+        self._built = False
+
+    def build(self) -> None:
+        """失敗遷移を構築"""
+        queue = deque()
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            queue.append(state)
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(ch, 0)
+                self._fail[next_state] = fail
+                self._out[next_state] = self._out[next_state] + self._out[fail]
+        self._built = True
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, Any]]:
+        """一致したキーワードの (開始位置, 終了位置, 値) を出現順に返す"""
+        if not self._built:
+            self.build()
+        if not self.case_sensitive:
+            text = text.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        boundary = self.word_boundary
+        length = len(text)
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            for size, value in out[state]:
+                start = i - size + 1
+                if boundary and (
+                    (start > 0 and _is_word_char(text[start - 1]))
+                    or (i + 1 < length and _is_word_char(text[i + 1]))
+                ):
+                    continue
+                yield start, i + 1, value
+
+    def values(self, text: str) -> List[Any]:
+        """一致したキーワードの値（重複なし、最初の出現順）"""
+        return list(dict.fromkeys(value for _, _, value in self.finditer(text)))
@@ -0,0 +1,10 @@
+"""
+ベンチマークスイート
+
+オフラインの合成データ（SyntheticMarketDataProvider）を使い、リクエスト経路と
+分析カーネルの処理時間を計測する。
+
+    cd backend
+    python -m benchmarks.run --save baseline
+    python -m benchmarks.run --compare baseline
+"""
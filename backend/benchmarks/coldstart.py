@@ -0,0 +1,147 @@
+"""
+コールドスタートの計測
+
+毎回新しいPythonプロセスでアプリを読み込み、以下を計測する（合成データを使用）。
+
+- import: `import app.main` にかかる時間
+- startup: lifespanのstartupイベントにかかる時間
+- ready: 起動から /ready が200を返すまでの時間（ウォームアップ完了）
+- first_request: 起動直後の各エンドポイントへの最初のリクエストの時間
+
+    cd backend
+    python -m benchmarks.coldstart --runs 5
+    python -m benchmarks.coldstart --no-warmup      # 分析モジュールを最初のリクエストで読み込む場合
+    python -m benchmarks.coldstart --save coldstart --compare coldstart-baseline
+
+結果は benchmarks.run と同じ形式で保存・比較できる。
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+from .harness import _format, compare, load_results, save_results
+
+# import 直後に読み込まれていてはいけない重いモジュール
+HEAVY_MODULES = ["pandas", "pandas_ta", "numba", "yfinance", "app.services.market_data"]
+
+_CHILD = r"""
+import asyncio, json, sys, time
+
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+loaded = [m for m in HEAVY_MODULES if m in sys.modules]
+
+from benchmarks.loadtest import ASGIClient, api_usage_requests
+
+
+async def main():
+    client = ASGIClient(app.main.app)
+    t0 = time.perf_counter()
+    await client.startup()
+    started = time.perf_counter()
+    while (await client.get("/ready"))[0] != 200:
+        await asyncio.sleep(0.005)
+    ready = time.perf_counter()
+
+    first = {}
+    for route, path, params in api_usage_requests(SYMBOL):
+        t = time.perf_counter()
+        status, _ = await client.get(path, params)
+        first[route] = (time.perf_counter() - t, status)
+    await client.shutdown()
+    return started - t0, ready - t0, first
+
+
+startup, ready, first = asyncio.run(main())
+print(json.dumps({
+    "import": imported - start,
+    "startup": startup,
+    "ready": ready,
+    "first_request": first,
+    "heavy_modules_at_import": loaded,
+}))
+"""
+
+
+def run_once(symbol: str, warmup: bool) -> Dict[str, Any]:
+    """新しいプロセスで1回計測"""
+    env = dict(os.environ)
+    env.setdefault("MARKET_DATA_MODE", "synthetic")
+    env["WARMUP_ON_STARTUP"] = "true" if warmup else "false"
+    code = f"HEAVY_MODULES = {HEAVY_MODULES!r}\nSYMBOL = {symbol!r}\n" + _CHILD
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.check_output([sys.executable, "-c", code], cwd=backend_dir, env=env, text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _stats(samples: List[float]) -> Dict[str, float]:
+    median = statistics.median(samples)
+    return {
+        "min": min(samples),
+        "median": median,
+        "mean": statistics.mean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "ops_per_sec": 1.0 / median if median > 0 else 0.0,
+        "number": 1,
+        "repeat": len(samples),
+    }
+
+
+def measure_cold_start(runs: int = 5, symbol: str = "USDJPY=X", warmup: bool = True) -> Dict[str, Dict[str, Any]]:
+    """runs 回のコールドスタートを計測し、項目ごとの統計を返す"""
+    samples: Dict[str, List[float]] = {}
+    heavy: List[str] = []
+    for _ in range(runs):
+        result = run_once(symbol, warmup)
+        heavy = sorted(set(heavy) | set(result["heavy_modules_at_import"]))
+        for name in ("import", "startup", "ready"):
+            samples.setdefault(f"cold_start.{name}", []).append(result[name])
+        for route, (seconds, status) in result["first_request"].items():
+            if status != 200:
+                raise RuntimeError(f"{route} returned {status}")
+            samples.setdefault(f"cold_start.first_request[route={route}]", []).append(seconds)
+
+    results = {key: _stats(values) for key, values in samples.items()}
+    for key, value in results.items():
+        print(f"{key:<55} {_format(value['median']):>12}")
+    if heavy:
+        print(f"\n警告: import 時に読み込まれた重いモジュール: {', '.join(heavy)}")
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Market Analysis System コールドスタート計測")
+    parser.add_argument("--runs", type=int, default=5, help="起動の繰り返し回数")
+    parser.add_argument("--symbol", default="USDJPY=X")
+    parser.add_argument("--no-warmup", action="store_true", help="起動時のウォームアップを無効にする")
+    parser.add_argument("--save", metavar="NAME", help="結果を保存する名前")
+    parser.add_argument("--compare", metavar="NAME", help="比較するベースライン名またはファイル")
+    parser.add_argument("--threshold", type=float, default=0.2, help="劣化とみなす比率（0.2 = 20%%）")
+    args = parser.parse_args()
+
+    results = measure_cold_start(args.runs, args.symbol, warmup=not args.no_warmup)
+
+    if args.save:
+        path = save_results(args.save, results)
+        print(f"\n結果を保存しました: {path}")
+
+    if args.compare:
+        regressions = compare(load_results(args.compare), results, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)}件の性能劣化を検出しました:")
+            for key in regressions:
+                print(f"  - {key}")
+            return 1
+        print("\n性能劣化はありません")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+class Benchmark:
+    """パラメータ付きベンチマークの定義"""
+
+    def __init__(self, name: str, setup: Callable[..., Callable[[], Any]], params: Dict[str, list]):
+        self.name = name
+        self.setup = setup
+        self.params = params
+
+    def cases(self) -> List[Dict[str, Any]]:
+        """パラメータの全組み合わせ"""
+        if not self.params:
+            return [{}]
+        keys = list(self.params.keys())
+        return [dict(zip(keys, values)) for values in itertools.product(*self.params.values())]
+
+
+_registry: List[Benchmark] = []
+
+
+def benchmark(name: str, **params: list):
+    """ベンチマークを登録するデコレータ
+
+    デコレートした関数はパラメータを受け取って準備を行い、計測対象の呼び出しを返す。
+    """
+    def decorator(setup: Callable[..., Callable[[], Any]]):
+        _registry.append(Benchmark(name, setup, params))
+        return setup
+    return decorator
+
+
+def registered() -> List[Benchmark]:
+    return list(_registry)
+
+
+def case_key(name: str, params: Dict[str, Any]) -> str:
+    """結果の識別子 (例: calculate_indicators[bars=1000])"""
+    if not params:
+        return name
+    return f"{name}[" + ",".join(f"{k}={v}" for k, v in params.items()) + "]"
+
+
+def measure(func: Callable[[], Any], repeat: int = 5, min_time: float = 0.05) -> Dict[str, float]:
+    """1回あたりの実行時間を計測（ループ回数は自動調整）"""
+    func()  # ウォームアップ
+
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+
+    median = statistics.median(samples)
+    return {
+        "min": min(samples),
+        "median": median,
+        "mean": statistics.mean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "ops_per_sec": 1.0 / median if median > 0 else 0.0,
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def run_benchmarks(
+    pattern: Optional[str] = None,
+    repeat: int = 5,
+    min_time: float = 0.05,
+    quick: bool = False
+) -> Dict[str, Dict[str, Any]]:
+    """登録済みベンチマークを実行"""
+    results: Dict[str, Dict[str, Any]] = {}
+    for bench in _registry:
+        if pattern and pattern not in bench.name:
+            continue
+        cases = bench.cases()
+        if quick:
+            cases = cases[:1]
+        for params in cases:
+            key = case_key(bench.name, params)
+            try:
+                func = bench.setup(**params)
+                results[key] = measure(func, repeat=repeat, min_time=min_time)
+                print(f"{key:<55} {_format(results[key]['median']):>12}")
+            except Exception as e:
+                results[key] = {"error": str(e)}
+                print(f"{key:<55} {'ERROR':>12}  {str(e)}")
+    return results
+
+
+def _format(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.3f} s"
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def save_results(name: str, results: Dict[str, Dict[str, Any]]) -> str:
+    """結果をJSONで保存"""
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{name}.json")
+    payload = {
+        "meta": {
+            "created_at": datetime.now().isoformat(),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    return path
+
+
+def load_results(name: str) -> Dict[str, Dict[str, Any]]:
+    """保存済みの結果を読み込む（ファイルパスも指定可能）"""
+    path = name if os.path.exists(name) else os.path.join(RESULTS_DIR, f"{name}.json")
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def compare(
+    baseline: Dict[str, Dict[str, Any]],
+    current: Dict[str, Dict[str, Any]],
+    threshold: float = 0.2
+) -> List[str]:
+    """ベースラインと比較し、閾値を超えて遅くなったケースを返す"""
+    regressions = []
+    print(f"\n{'benchmark':<55} {'baseline':>12} {'current':>12} {'ratio':>8}")
+    for key, result in current.items():
+        base = baseline.get(key)
+        if not base or "median" not in base or "median" not in result:
+            continue
+        ratio = result["median"] / base["median"] if base["median"] else 0.0
+        mark = ""
+        if ratio > 1 + threshold:
+            regressions.append(key)
+            mark = "  REGRESSION"
+        elif ratio < 1 - threshold:
+            mark = "  improved"
+        print(
+            f"{key:<55} {_format(base['median']):>12} "
+            f"{_format(result['median']):>12} {ratio:>7.2f}x{mark}"
+        )
+    return regressions
@@ -0,0 +1,170 @@
+"""
+指標カーネルと pandas_ta の一致検証
+
+従来の pandas_ta による計算（DataFrame + 指標ごとの関数呼び出し）を基準として、
+IndicatorKernel と CrossSectionEngine（シンボル × バーの行列での一括計算）の全指標が
+許容誤差内で一致するかを、合成データとランダムウォーク
+（出来高0・値幅0の区間を含む）の様々な履歴長で確認する。一致しなければ終了コード1。
+VWAP は日ごとのセッションで区切られるため、基準の DataFrame はバーの時刻を DatetimeIndex に持つ。
+
+    cd backend
+    python -m benchmarks.indicator_parity
+    python -m benchmarks.indicator_parity --cases 500 --rtol 1e-8
+"""
+
+import argparse
+import math
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pandas_ta as ta
+
+from app.models.market import OHLCV, TimeFrame
+from app.services.cross_section import CrossSectionEngine, stack_histories
+from app.services.indicator_kernel import FIELDS, NUMBA_AVAILABLE, IndicatorKernel, indicator_values
+from app.services.providers import SyntheticMarketDataProvider
+
+# pandas_ta の列名
+_COLUMNS = {
+    "sma_20": "SMA_20", "sma_50": "SMA_50", "sma_200": "SMA_200",
+    "ema_12": "EMA_12", "ema_26": "EMA_26",
+    "macd": "MACD_12_26_9", "macd_signal": "MACDs_12_26_9", "macd_histogram": "MACDh_12_26_9",
+    "rsi": "RSI", "stoch_k": "STOCHk_14_3_3", "stoch_d": "STOCHd_14_3_3",
+    "bb_upper": "BBU_20_2.0", "bb_middle": "BBM_20_2.0", "bb_lower": "BBL_20_2.0",
+    "atr": "ATR", "obv": "OBV", "vwap": "VWAP",
+}
+
+# MACD のシグナルが計算できる最短の履歴（これより短いと pandas_ta が失敗する）
+MIN_BARS = 34
+
+
+def reference_indicators(ohlcv_list: List[OHLCV]) -> Dict[str, Optional[float]]:
+    """pandas_ta による最新バーの指標（従来の calculate_indicators と同じ計算）"""
+    df = pd.DataFrame([{
+        'Open': o.open, 'High': o.high, 'Low': o.low, 'Close': o.close, 'Volume': o.volume
+    } for o in ohlcv_list], index=pd.DatetimeIndex([o.timestamp for o in ohlcv_list]))
+    df['SMA_20'] = ta.sma(df['Close'], length=20)
+    df['SMA_50'] = ta.sma(df['Close'], length=50)
+    df['SMA_200'] = ta.sma(df['Close'], length=200)
+    df['EMA_12'] = ta.ema(df['Close'], length=12)
+    df['EMA_26'] = ta.ema(df['Close'], length=26)
+    for frame in (
+        ta.macd(df['Close']),
+        ta.stoch(df['High'], df['Low'], df['Close']),
+        ta.bbands(df['Close'], length=20, std=2),
+    ):
+        if frame is not None:
+            df = pd.concat([df, frame], axis=1)
+    df['RSI'] = ta.rsi(df['Close'], length=14)
+    df['ATR'] = ta.atr(df['High'], df['Low'], df['Close'], length=14)
+    df['OBV'] = ta.obv(df['Close'], df['Volume'])
+    df['VWAP'] = ta.vwap(df['High'], df['Low'], df['Close'], df['Volume'])
+    latest = df.iloc[-1]
+    return {
+        name: float(latest[column]) if pd.notna(latest.get(column)) else None
+        for name, column in _COLUMNS.items()
+    }
+
+
+def random_walk(bars: int, seed: int) -> List[OHLCV]:
+    """出来高0の区間・値幅0のバーを含むランダムウォーク"""
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.002, bars)))
+    spread = np.abs(rng.normal(0, 0.001, (2, bars))) * close
+    volume = rng.integers(0, 1000, bars).astype(float)
+    volume[: bars // 4] = 0.0
+    flat = rng.random(bars) < 0.05
+    spread[:, flat] = 0.0
+    close[flat] = np.round(close[flat], 2)
+    start = datetime(2024, 1, 1)
+    return [
+        OHLCV(
+            timestamp=start + timedelta(hours=i),
+            open=float(close[i - 1] if i else close[0]),
+            high=float(close[i] + spread[0, i]),
+            low=float(close[i] - spread[1, i]),
+            close=float(close[i]),
+            volume=float(volume[i]),
+        )
+        for i in range(bars)
+    ]
+
+
+def synthetic(bars: int, symbol: str) -> List[OHLCV]:
+    df = SyntheticMarketDataProvider(bars=bars).history(symbol, "1h", "1mo")
+    return [
+        OHLCV(
+            timestamp=idx.to_pydatetime(), open=float(row['Open']), high=float(row['High']),
+            low=float(row['Low']), close=float(row['Close']), volume=float(row['Volume'])
+        )
+        for idx, row in df.iterrows()
+    ]
+
+
+def _close(expected: Optional[float], actual: Optional[float], rtol: float, atol: float) -> bool:
+    if expected is None or actual is None:
+        return expected is None and actual is None
+    return math.isclose(expected, actual, rel_tol=rtol, abs_tol=atol)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="指標カーネルと pandas_ta の一致検証")
+    parser.add_argument("--cases", type=int, default=200, help="ランダムウォークの件数")
+    parser.add_argument("--rtol", type=float, default=1e-9)
+    parser.add_argument("--atol", type=float, default=1e-9)
+    args = parser.parse_args()
+
+    histories = [synthetic(bars, "USDJPY=X") for bars in (MIN_BARS, 200, 1000, 5000)]
+    rng = np.random.default_rng(0)
+    histories += [
+        random_walk(int(rng.integers(MIN_BARS, 3000)), seed) for seed in range(args.cases)
+    ]
+
+    kernel = IndicatorKernel()
+    t = time.perf_counter()
+    cross_section = CrossSectionEngine().compute_indicators(
+        stack_histories({str(i): history for i, history in enumerate(histories)}), TimeFrame.H1
+    )
+    cross_section_time = time.perf_counter() - t
+
+    worst: Dict[str, float] = {name: 0.0 for name in FIELDS}
+    mismatches = 0
+    kernel_time = reference_time = 0.0
+    for i, history in enumerate(histories):
+        t = time.perf_counter()
+        expected = reference_indicators(history)
+        reference_time += time.perf_counter() - t
+        t = time.perf_counter()
+        actual = indicator_values(kernel.compute(history))
+        kernel_time += time.perf_counter() - t
+        batched = cross_section[str(i)].model_dump()
+
+        for name in FIELDS:
+            for label, value in (("kernel", actual[name]), ("cross_section", batched[name])):
+                if not _close(expected[name], value, args.rtol, args.atol):
+                    mismatches += 1
+                    print(f"不一致: {name} bars={len(history)} pandas_ta={expected[name]} {label}={value}")
+                elif expected[name] is not None:
+                    error = abs(expected[name] - value) / max(abs(expected[name]), 1.0)
+                    worst[name] = max(worst[name], error)
+
+    print(f"{len(histories)}件の履歴を検証（numba: {'有効' if NUMBA_AVAILABLE else '無効'}）")
+    for name in FIELDS:
+        print(f"  {name:<16} 最大相対誤差 {worst[name]:.2e}")
+    print(
+        f"pandas_ta {reference_time * 1000:.1f} ms / カーネル {kernel_time * 1000:.1f} ms"
+        f" / 行列 {cross_section_time * 1000:.1f} ms"
+    )
+    if mismatches:
+        print(f"\n{mismatches}件の不一致があります")
+        return 1
+    print("\nすべて一致しました")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
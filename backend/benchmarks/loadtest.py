@@ -0,0 +1,458 @@
+"""
+HTTP / WebSocket 負荷試験
+
+オフラインのプロバイダ（合成データまたはリプレイテープ）に対してASGIアプリを
+プロセス内で直接駆動するか、起動済みサーバー（localhost等）に接続して負荷をかけ、
+エンドポイントごとのレイテンシ分布（p50/p95/p99）・スループット・エラー率を出力する。
+
+    cd backend
+    python -m benchmarks.loadtest --scenario signals --concurrency 20 --duration 30
+    python -m benchmarks.loadtest --scenario api --target http://localhost:8000
+    python -m benchmarks.loadtest --scenario websocket --subscribers 500 --duration 60
+
+シナリオは examples/api_usage.py と examples/websocket_usage.py のクライアントに対応する。
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+API_PREFIX = "/api/v1"
+DEFAULT_SYMBOLS = ["USDJPY=X", "EURUSD=X", "GBPUSD=X", "AUDUSD=X"]
+MTF_TIMEFRAMES = ["15m", "1h", "4h", "1d"]
+
+# ヒストグラムの区切り（ミリ秒、2倍刻み）
+BUCKET_BOUNDS_MS = [2 ** i for i in range(-2, 14)]
+
+
+class LatencyRecorder:
+    """ルートごとのレイテンシとエラーを記録"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {}
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    def record(self, route: str, seconds: float, ok: bool = True) -> None:
+        self.latencies.setdefault(route, []).append(seconds)
+        if not ok:
+            self.errors[route] = self.errors.get(route, 0) + 1
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def stop(self) -> None:
+        self.finished = time.perf_counter()
+
+    def report(self) -> Dict[str, Any]:
+        """ルートごとの集計結果"""
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        routes = {}
+        for route, samples in sorted(self.latencies.items()):
+            ordered = sorted(samples)
+            errors = self.errors.get(route, 0)
+            routes[route] = {
+                "requests": len(ordered),
+                "errors": errors,
+                "error_rate": errors / len(ordered) if ordered else 0.0,
+                "throughput": len(ordered) / elapsed if elapsed > 0 else 0.0,
+                "p50_ms": _percentile(ordered, 50) * 1000,
+                "p95_ms": _percentile(ordered, 95) * 1000,
+                "p99_ms": _percentile(ordered, 99) * 1000,
+                "max_ms": ordered[-1] * 1000 if ordered else 0.0,
+                "histogram": _histogram(ordered),
+            }
+        return {"elapsed": elapsed, "routes": routes, "counters": dict(self.counters)}
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    k = max(int(math.ceil(pct / 100 * len(ordered))) - 1, 0)
+    return ordered[k]
+
+
+def _histogram(ordered: List[float]) -> Dict[str, int]:
+    """2倍刻みのバケットに集計（キーは上限ミリ秒）"""
+    buckets: Dict[str, int] = {}
+    i = 0
+    for bound in BUCKET_BOUNDS_MS:
+        n = 0
+        while i < len(ordered) and ordered[i] * 1000 <= bound:
+            n += 1
+            i += 1
+        if n:
+            buckets[f"<={bound:g}ms"] = n
+    if i < len(ordered):
+        buckets[f">{BUCKET_BOUNDS_MS[-1]:g}ms"] = len(ordered) - i
+    return buckets
+
+
+class ASGIClient:
+    """ASGIアプリをプロセス内で直接呼び出すクライアント"""
+
+    def __init__(self, app):
+        self.app = app
+        self._lifespan_task: Optional[asyncio.Task] = None
+        self._lifespan_in: asyncio.Queue = asyncio.Queue()
+        self._lifespan_out: asyncio.Queue = asyncio.Queue()
+
+    async def startup(self) -> None:
+        """lifespanのstartupイベントを送る"""
+        scope = {"type": "lifespan", "asgi": {"version": "3.0"}}
+        self._lifespan_task = asyncio.create_task(
+            self.app(scope, self._lifespan_in.get, self._lifespan_out.put)
+        )
+        await self._lifespan_in.put({"type": "lifespan.startup"})
+        await self._lifespan_out.get()
+
+    async def shutdown(self) -> None:
+        if self._lifespan_task is None:
+            return
+        await self._lifespan_in.put({"type": "lifespan.shutdown"})
+        await self._lifespan_out.get()
+        self._lifespan_task.cancel()
+
+    def _scope(self, kind: str, path: str, params: Optional[dict]) -> dict:
+        return {
+            "type": kind,
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http" if kind == "http" else "ws",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": urlencode(params or {}, doseq=True).encode(),
+            "headers": [(b"host", b"loadtest")],
+            "client": ("127.0.0.1", 0),
+            "server": ("loadtest", 80),
+        }
+
+    async def get(self, path: str, params: Optional[dict] = None) -> Tuple[int, bytes]:
+        """GETリクエストを実行し (ステータス, 本文) を返す"""
+        done = asyncio.Event()
+        sent_request = False
+        status = 500
+        body = bytearray()
+
+        async def receive():
+            nonlocal sent_request
+            if not sent_request:
+                sent_request = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                body.extend(message.get("body", b""))
+                if not message.get("more_body"):
+                    done.set()
+
+        await self.app(self._scope("http", path, params), receive, send)
+        done.set()
+        return status, bytes(body)
+
+    async def websocket(
+        self,
+        path: str,
+        on_message: Callable[[str], None],
+        stop: asyncio.Event,
+        heartbeat: float = 30.0
+    ) -> bool:
+        """WebSocketに接続し、stopがセットされるまでメッセージを受信する"""
+        incoming: asyncio.Queue = asyncio.Queue()
+        accepted = asyncio.Event()
+        closed = asyncio.Event()
+        await incoming.put({"type": "websocket.connect"})
+
+        async def send(message):
+            kind = message["type"]
+            if kind == "websocket.accept":
+                accepted.set()
+            elif kind == "websocket.send":
+                on_message(message.get("text") or message.get("bytes", b"").decode())
+            elif kind == "websocket.close":
+                closed.set()
+                accepted.set()
+
+        async def pinger():
+            while not stop.is_set():
+                try:
+                    await asyncio.wait_for(stop.wait(), heartbeat)
+                except asyncio.TimeoutError:
+                    await incoming.put({"type": "websocket.receive", "text": "ping"})
+            await incoming.put({"type": "websocket.disconnect", "code": 1000})
+
+        app_task = asyncio.create_task(self.app(self._scope("websocket", path, None), incoming.get, send))
+        await accepted.wait()
+        if closed.is_set():
+            return False
+        ping_task = asyncio.create_task(pinger())
+        await stop.wait()
+        await ping_task
+        try:
+            await asyncio.wait_for(app_task, 5)
+        except (asyncio.TimeoutError, Exception):
+            app_task.cancel()
+        return True
+
+
+class HTTPClient:
+    """起動済みサーバーに接続するクライアント（aiohttp）"""
+
+    def __init__(self, base_url: str, connections: int = 100):
+        self.base_url = base_url.rstrip("/")
+        self.connections = connections
+        self.session = None
+
+    async def startup(self) -> None:
+        import aiohttp
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.connections),
+            timeout=aiohttp.ClientTimeout(total=60)
+        )
+
+    async def shutdown(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+
+    async def get(self, path: str, params: Optional[dict] = None) -> Tuple[int, bytes]:
+        query = urlencode(params or {}, doseq=True)
+        url = f"{self.base_url}{path}" + (f"?{query}" if query else "")
+        async with self.session.get(url) as response:
+            return response.status, await response.read()
+
+    async def websocket(
+        self,
+        path: str,
+        on_message: Callable[[str], None],
+        stop: asyncio.Event,
+        heartbeat: float = 30.0
+    ) -> bool:
+        url = self.base_url.replace("http", "ws", 1) + path
+        async with self.session.ws_connect(url, heartbeat=None) as ws:
+            async def pinger():
+                while not stop.is_set():
+                    try:
+                        await asyncio.wait_for(stop.wait(), heartbeat)
+                    except asyncio.TimeoutError:
+                        await ws.send_str("ping")
+
+            async def reader():
+                async for msg in ws:
+                    on_message(msg.data)
+
+            tasks = [asyncio.create_task(pinger()), asyncio.create_task(reader())]
+            await stop.wait()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return True
+
+
+# シナリオ定義: (ルート名, パス, パラメータ) を返す関数の列
+
+Request = Tuple[str, str, Optional[dict]]
+
+
+def api_usage_requests(symbol: str) -> List[Request]:
+    """examples/api_usage.py の main() と同じ順序の呼び出し"""
+    return [
+        ("/market/quote/{symbol}", f"{API_PREFIX}/market/quote/{symbol}", None),
+        ("/market/indicators/{symbol}", f"{API_PREFIX}/market/indicators/{symbol}", {"timeframe": "1h"}),
+        ("/market/trend/{symbol}", f"{API_PREFIX}/market/trend/{symbol}", {"timeframe": "1h"}),
+        ("/market/multi-timeframe/{symbol}", f"{API_PREFIX}/market/multi-timeframe/{symbol}",
+         {"timeframes": MTF_TIMEFRAMES}),
+        ("/signals/{symbol}", f"{API_PREFIX}/signals/{symbol}", {"timeframe": "1h"}),
+        ("/news/latest", f"{API_PREFIX}/news/latest", {"limit": 5}),
+        ("/news/calendar", f"{API_PREFIX}/news/calendar", None),
+    ]
+
+
+def signals_requests(symbol: str) -> List[Request]:
+    return [("/signals/{symbol}", f"{API_PREFIX}/signals/{symbol}", {"timeframe": "1h"})]
+
+
+def multi_timeframe_requests(symbol: str) -> List[Request]:
+    return [(
+        "/market/multi-timeframe/{symbol}",
+        f"{API_PREFIX}/market/multi-timeframe/{symbol}",
+        {"timeframes": MTF_TIMEFRAMES}
+    )]
+
+
+HTTP_SCENARIOS: Dict[str, Callable[[str], List[Request]]] = {
+    "api": api_usage_requests,
+    "signals": signals_requests,
+    "multi-timeframe": multi_timeframe_requests,
+}
+
+
+async def run_http_scenario(
+    client,
+    scenario: str,
+    symbols: List[str],
+    concurrency: int,
+    duration: float,
+    recorder: LatencyRecorder
+) -> None:
+    """仮想ユーザーを並行実行し、duration秒間リクエストを送り続ける"""
+    build = HTTP_SCENARIOS[scenario]
+    deadline = time.perf_counter() + duration
+
+    async def user(index: int):
+        n = index
+        while time.perf_counter() < deadline:
+            symbol = symbols[n % len(symbols)]
+            n += 1
+            for route, path, params in build(symbol):
+                start = time.perf_counter()
+                try:
+                    status, _ = await client.get(path, params)
+                    ok = status < 400
+                except Exception:
+                    ok = False
+                recorder.record(route, time.perf_counter() - start, ok)
+                if time.perf_counter() >= deadline:
+                    break
+
+    await asyncio.gather(*(user(i) for i in range(concurrency)))
+
+
+async def run_websocket_scenario(
+    client,
+    symbols: List[str],
+    subscribers: int,
+    duration: float,
+    recorder: LatencyRecorder,
+    news_ratio: float = 0.1
+) -> None:
+    """examples/websocket_usage.py と同様の購読者を多数接続して保持する"""
+    stop = asyncio.Event()
+
+    async def subscriber(index: int):
+        if index < int(subscribers * news_ratio):
+            route, path = "/ws/news", "/ws/news"
+        else:
+            symbol = symbols[index % len(symbols)]
+            route, path = "/ws/market/{symbol}", f"/ws/market/{symbol}"
+
+        connected_at = time.perf_counter()
+        first = True
+
+        def on_message(text: str):
+            nonlocal first
+            if text == "pong":
+                recorder.count("pongs")
+                return
+            recorder.count(f"messages {route}")
+            if first:
+                first = False
+                recorder.record(f"{route} first message", time.perf_counter() - connected_at)
+
+        try:
+            ok = await client.websocket(path, on_message, stop)
+            recorder.record(f"{route} session", time.perf_counter() - connected_at, ok)
+            if ok:
+                recorder.count("subscribers held")
+        except Exception:
+            recorder.record(f"{route} session", time.perf_counter() - connected_at, False)
+
+    tasks = [asyncio.create_task(subscriber(i)) for i in range(subscribers)]
+    await asyncio.sleep(duration)
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\n経過時間: {report['elapsed']:.1f}s")
+    header = f"{'route':<40} {'reqs':>7} {'err%':>6} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9}"
+    print(header)
+    print("-" * len(header))
+    for route, r in report["routes"].items():
+        print(
+            f"{route:<40} {r['requests']:>7} {r['error_rate'] * 100:>5.1f}% {r['throughput']:>8.1f} "
+            f"{r['p50_ms']:>7.1f}ms {r['p95_ms']:>7.1f}ms {r['p99_ms']:>7.1f}ms"
+        )
+    for route, r in report["routes"].items():
+        print(f"\n{route}")
+        total = max(r["requests"], 1)
+        for bucket, n in r["histogram"].items():
+            bar = "#" * max(int(40 * n / total), 1)
+            print(f"  {bucket:>12} {n:>7} {bar}")
+    if report["counters"]:
+        print()
+        for name, value in sorted(report["counters"].items()):
+            print(f"{name}: {value}")
+
+
+def _load_app(tape: Optional[str], speed: float):
+    """オフラインのプロバイダでアプリを読み込む（設定は読み込み時に確定するため先に環境変数を設定）"""
+    if tape:
+        os.environ["MARKET_DATA_MODE"] = "replay"
+        os.environ["REPLAY_TAPE_FILE"] = tape
+        os.environ["REPLAY_SPEED"] = str(speed)
+    else:
+        os.environ.setdefault("MARKET_DATA_MODE", "synthetic")
+    from app.main import app
+    return app
+
+
+async def main_async(args) -> Dict[str, Any]:
+    if args.target == "inprocess":
+        client = ASGIClient(_load_app(args.tape, args.speed))
+    else:
+        client = HTTPClient(args.target, connections=max(args.concurrency, args.subscribers))
+
+    await client.startup()
+    recorder = LatencyRecorder()
+    try:
+        if args.scenario == "websocket":
+            await run_websocket_scenario(
+                client, args.symbols, args.subscribers, args.duration, recorder
+            )
+        else:
+            await run_http_scenario(
+                client, args.scenario, args.symbols, args.concurrency, args.duration, recorder
+            )
+    finally:
+        recorder.stop()
+        await client.shutdown()
+    return recorder.report()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Market Analysis System 負荷試験")
+    parser.add_argument("--scenario", choices=list(HTTP_SCENARIOS) + ["websocket"], default="api")
+    parser.add_argument("--target", default="inprocess",
+                        help="inprocess（ASGI直接）または http://localhost:8000 などのURL")
+    parser.add_argument("--concurrency", type=int, default=10, help="HTTPの仮想ユーザー数")
+    parser.add_argument("--subscribers", type=int, default=100, help="WebSocket購読者数")
+    parser.add_argument("--duration", type=float, default=30.0, help="実行時間（秒）")
+    parser.add_argument("--symbols", nargs="+", default=DEFAULT_SYMBOLS)
+    parser.add_argument("--tape", help="プロセス内実行時に再生するテープ（省略時は合成データ）")
+    parser.add_argument("--speed", type=float, default=0.0, help="テープの再生速度")
+    parser.add_argument("--json", metavar="PATH", help="結果をJSONで保存")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
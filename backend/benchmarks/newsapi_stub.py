@@ -0,0 +1,166 @@
+"""
+NewsAPI / RSS のローカルスタブ
+
+NewsAPI の everything エンドポイント互換のJSONと、RSS 2.0 フィードを返す。
+ETag / Last-Modified による条件付きリクエスト、応答遅延、障害（503）の注入に対応し、
+ニュース取得の負荷試験や動作確認で外部APIの代わりに使う。
+
+    cd backend
+    python -m benchmarks.newsapi_stub --port 8001 --interval 30
+    NEWS_API_KEY=stub NEWS_API_URL=http://127.0.0.1:8001/v2/everything \\
+        NEWS_RSS_FEEDS='["http://127.0.0.1:8001/rss"]' python -m app.main
+"""
+
+import argparse
+import asyncio
+import hashlib
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import Any, Dict, List
+from xml.sax.saxutils import escape
+
+from aiohttp import web
+
+HEADLINES = [
+    ("Fed holds interest rate steady as inflation cools", "Federal Reserve"),
+    ("ECB signals policy outlook amid weak growth data", "European Central Bank"),
+    ("BOJ keeps ultra-loose policy, yen falls", "Bank of Japan"),
+    ("US employment report beats forecast, dollar rallies", "Labor market"),
+    ("UK GDP growth slows, pound drops", "Economy"),
+    ("China exports surge, boosting Australian dollar", "Trade"),
+    ("Oil prices rise on supply concern", "Commodities"),
+    ("Stock market rally extends on strong earnings", "Equities"),
+]
+
+
+class NewsStub:
+    """一定間隔で記事が1件ずつ増えるスタブ"""
+
+    def __init__(
+        self,
+        interval: float = 60.0,
+        articles: int = 50,
+        latency: float = 0.0,
+        fail_rate: float = 0.0,
+        seed: int = 0
+    ):
+        self.interval = interval
+        self.articles = articles
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.random = random.Random(seed)
+        self.started = time.time()
+        self.requests = 0
+        self.not_modified = 0
+        self.failures = 0
+
+    def _generation(self) -> int:
+        """現在までに公開された記事数（interval ごとに1件増える）"""
+        if self.interval <= 0:
+            return self.articles
+        return self.articles + int((time.time() - self.started) / self.interval)
+
+    def _articles(self, count: int) -> List[Dict[str, Any]]:
+        generation = self._generation()
+        base = datetime.fromtimestamp(self.started, tz=timezone.utc)
+        step = timedelta(seconds=self.interval or 60)
+        articles = []
+        for n in range(generation - 1, max(generation - count, 0) - 1, -1):
+            title, section = HEADLINES[n % len(HEADLINES)]
+            articles.append({
+                "source": {"id": None, "name": f"Stub {section}"},
+                "title": f"{title} (#{n})",
+                "description": f"{section}: {title.lower()}.",
+                "url": f"https://news.example.com/articles/{n}",
+                "publishedAt": (base + step * (n - self.articles)).isoformat().replace("+00:00", "Z"),
+            })
+        return articles
+
+    def _validators(self, generation: int):
+        etag = '"' + hashlib.md5(str(generation).encode()).hexdigest() + '"'
+        modified = datetime.fromtimestamp(
+            self.started + max(generation - self.articles, 0) * self.interval, tz=timezone.utc
+        )
+        return etag, format_datetime(modified, usegmt=True)
+
+    async def _prepare(self, request: web.Request):
+        """遅延・障害の注入と条件付きリクエストの判定"""
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail_rate and self.random.random() < self.fail_rate:
+            self.failures += 1
+            raise web.HTTPServiceUnavailable()
+
+        etag, last_modified = self._validators(self._generation())
+        headers = {"ETag": etag, "Last-Modified": last_modified}
+        if request.headers.get("If-None-Match") == etag or (
+            "If-None-Match" not in request.headers
+            and request.headers.get("If-Modified-Since") == last_modified
+        ):
+            self.not_modified += 1
+            raise web.HTTPNotModified(headers=headers)
+        return headers
+
+    async def everything(self, request: web.Request) -> web.Response:
+        if not request.query.get("apiKey"):
+            return web.json_response(
+                {"status": "error", "code": "apiKeyMissing"}, status=401
+            )
+        headers = await self._prepare(request)
+        page_size = int(request.query.get("pageSize", 20))
+        articles = self._articles(page_size)
+        return web.json_response(
+            {"status": "ok", "totalResults": len(articles), "articles": articles},
+            headers=headers
+        )
+
+    async def rss(self, request: web.Request) -> web.Response:
+        headers = await self._prepare(request)
+        items = "".join(
+            "<item>"
+            f"<title>{escape(a['title'])}</title>"
+            f"<link>{escape(a['url'])}</link>"
+            f"<description>{escape(a['description'])}</description>"
+            f"<pubDate>{format_datetime(datetime.fromisoformat(a['publishedAt'].replace('Z', '+00:00')), usegmt=True)}</pubDate>"
+            "</item>"
+            for a in self._articles(20)
+        )
+        body = f'<?xml version="1.0"?><rss version="2.0"><channel><title>Stub RSS</title>{items}</channel></rss>'
+        return web.Response(text=body, content_type="application/rss+xml", headers=headers)
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "failures": self.failures,
+            "articles": self._generation(),
+        })
+
+
+def create_app(stub: NewsStub) -> web.Application:
+    app = web.Application()
+    app.router.add_get("/v2/everything", stub.everything)
+    app.router.add_get("/rss", stub.rss)
+    app.router.add_get("/stats", stub.stats)
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="NewsAPI / RSS スタブサーバー")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--interval", type=float, default=60.0, help="新しい記事が増える間隔（秒、0で固定）")
+    parser.add_argument("--articles", type=int, default=50, help="初期の記事数")
+    parser.add_argument("--latency", type=float, default=0.0, help="応答遅延（秒）")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="503を返す割合")
+    args = parser.parse_args()
+
+    stub = NewsStub(args.interval, args.articles, args.latency, args.fail_rate)
+    web.run_app(create_app(stub), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
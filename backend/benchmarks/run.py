@@ -0,0 +1,47 @@
+"""
+ベンチマークの実行
+
+    python -m benchmarks.run                        # 全ベンチマークを実行
+    python -m benchmarks.run --filter indicators    # 名前で絞り込み
+    python -m benchmarks.run --save baseline        # 結果を benchmarks/results/baseline.json に保存
+    python -m benchmarks.run --compare baseline     # ベースラインと比較（劣化があれば終了コード1）
+"""
+
+import argparse
+import sys
+
+from . import suite  # noqa: F401  ベンチマークを登録
+from .harness import compare, load_results, run_benchmarks, save_results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Market Analysis System ベンチマーク")
+    parser.add_argument("--filter", help="名前に指定文字列を含むベンチマークのみ実行")
+    parser.add_argument("--repeat", type=int, default=5, help="計測の繰り返し回数")
+    parser.add_argument("--min-time", type=float, default=0.05, help="1計測あたりの最短時間（秒）")
+    parser.add_argument("--quick", action="store_true", help="各ベンチマークの最初のパラメータのみ実行")
+    parser.add_argument("--save", metavar="NAME", help="結果を保存する名前")
+    parser.add_argument("--compare", metavar="NAME", help="比較するベースライン名またはファイル")
+    parser.add_argument("--threshold", type=float, default=0.2, help="劣化とみなす比率（0.2 = 20%%）")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.filter, args.repeat, args.min_time, args.quick)
+
+    if args.save:
+        path = save_results(args.save, results)
+        print(f"\n結果を保存しました: {path}")
+
+    if args.compare:
+        regressions = compare(load_results(args.compare), results, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)}件の性能劣化を検出しました:")
+            for key in regressions:
+                print(f"  - {key}")
+            return 1
+        print("\n性能劣化はありません")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
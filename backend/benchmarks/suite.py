@@ -0,0 +1,304 @@
+import asyncio
+import itertools
+import json
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from app.api.websocket import ConnectionManager
+from app.models.market import AlertRequest, AlertType, TimeFrame
+from app.services.alerts import AlertEngine
+from app.services.correlation import RollingCovariance
+from app.services.cross_section import stack_histories
+from app.services.currency_strength import CurrencyStrengthService
+from app.services.market_data import MarketDataService
+from app.services.news_service import NewsService
+from app.services.providers import SyntheticMarketDataProvider
+from app.services.shared_bars import BarIngestor, SharedBarStore, SharedBarsProvider
+from app.services.signal_service import SignalService
+from app.services.bar_panel import BarPanels, ClosePanel
+from app.services.tick_store import Tick, TickStore
+from app.services.watchlist import Watchlist
+
+from .harness import benchmark
+from .newsapi_stub import HEADLINES
+
+HISTORY_LENGTHS = [200, 1000, 5000]
+SYMBOL_COUNTS = [1, 10, 50]
+SUBSCRIBER_COUNTS = [10, 100, 1000]
+ARTICLE_COUNTS = [100, 1000]
+
+SYMBOL = "USDJPY=X"
+
+_loop = asyncio.new_event_loop()
+
+
+def run(coro):
+    """コルーチンを同期的に実行"""
+    return _loop.run_until_complete(coro)
+
+
+def make_services(bars: int):
+    """合成データを使うサービスを生成（ティックストアは空にしてプロバイダを経由させる）"""
+    provider = SyntheticMarketDataProvider(bars=bars)
+    market_service = MarketDataService(tick_store=TickStore(), provider=provider)
+    return market_service, SignalService(market_service)
+
+
+def make_universe(count: int):
+    """ベンチマーク用のシンボル一覧"""
+    return [f"SYM{i:03d}=X" for i in range(count)]
+
+
+@benchmark("get_historical_data", bars=HISTORY_LENGTHS)
+def bench_historical_data(bars):
+    market_service, _ = make_services(bars)
+    return lambda: run(market_service.get_historical_data(SYMBOL, TimeFrame.H1))
+
+
+@benchmark("calculate_indicators", bars=HISTORY_LENGTHS)
+def bench_calculate_indicators(bars):
+    market_service, _ = make_services(bars)
+    return lambda: run(market_service.calculate_indicators(SYMBOL, TimeFrame.H1))
+
+
+@benchmark("indicator_kernel", bars=HISTORY_LENGTHS)
+def bench_indicator_kernel(bars):
+    market_service, _ = make_services(bars)
+    ohlcv_list = run(market_service.get_historical_data(SYMBOL, TimeFrame.H1))
+    return lambda: market_service.indicator_kernel.compute(ohlcv_list)
+
+
+@benchmark("indicators_universe", symbols=[10, 100, 500])
+def bench_indicators_universe(symbols):
+    market_service, _ = make_services(1000)
+    universe = make_universe(symbols)
+    histories = {
+        symbol: run(market_service.get_historical_data(symbol, TimeFrame.H1)) for symbol in universe
+    }
+    return lambda: run(market_service.calculate_indicators_many(universe, TimeFrame.H1, histories))
+
+
+@benchmark("cross_section_indicators", symbols=[10, 100, 500])
+def bench_cross_section_indicators(symbols):
+    market_service, _ = make_services(1000)
+    matrices = stack_histories({
+        symbol: run(market_service.get_historical_data(symbol, TimeFrame.H1))
+        for symbol in make_universe(symbols)
+    })
+    return lambda: market_service.cross_section.compute_indicators(matrices, TimeFrame.H1)
+
+
+@benchmark("analyze_trend", bars=HISTORY_LENGTHS)
+def bench_analyze_trend(bars):
+    market_service, _ = make_services(bars)
+    return lambda: run(market_service.analyze_trend(SYMBOL, TimeFrame.H1))
+
+
+@benchmark("find_support_levels", bars=[50] + HISTORY_LENGTHS)
+def bench_find_support_levels(bars):
+    market_service, _ = make_services(bars)
+    closes = [o.close for o in run(market_service.get_historical_data(SYMBOL, TimeFrame.H1))]
+    price = closes[-1]
+    return lambda: market_service._find_support_levels(closes, price)
+
+
+@benchmark("generate_signal", bars=HISTORY_LENGTHS)
+def bench_generate_signal(bars):
+    _, signal_service = make_services(bars)
+    return lambda: run(signal_service.generate_signal(SYMBOL, TimeFrame.H1))
+
+
+@benchmark("generate_signal_universe", symbols=SYMBOL_COUNTS)
+def bench_generate_signal_universe(symbols):
+    _, signal_service = make_services(1000)
+    universe = make_universe(symbols)
+
+    async def scan():
+        for symbol in universe:
+            await signal_service.generate_signal(symbol, TimeFrame.H1)
+
+    return lambda: run(scan())
+
+
+@benchmark("multi_timeframe_analysis", bars=HISTORY_LENGTHS)
+def bench_multi_timeframe(bars):
+    _, signal_service = make_services(bars)
+    return lambda: run(signal_service.get_multi_timeframe_analysis(SYMBOL))
+
+
+@benchmark("json_serialization", symbols=SYMBOL_COUNTS)
+def bench_json_serialization(symbols):
+    """WebSocketの market_update メッセージと同じ形でシリアライズ"""
+    market_service, signal_service = make_services(1000)
+    payloads = []
+    for symbol in make_universe(symbols):
+        payloads.append((
+            run(market_service.get_quote(symbol)),
+            run(market_service.calculate_indicators(symbol, TimeFrame.H1)),
+            run(market_service.analyze_trend(symbol, TimeFrame.H1)),
+            run(signal_service.get_multi_timeframe_analysis(symbol)),
+        ))
+
+    def serialize():
+        for quote, indicators, trend, analysis in payloads:
+            json.dumps({
+                "type": "market_update",
+                "symbol": quote.symbol,
+                "data": {
+                    "quote": quote.model_dump(mode="json"),
+                    "indicators": indicators.model_dump(mode="json"),
+                    "trend": trend.model_dump(mode="json"),
+                },
+            })
+            analysis.model_dump_json()
+
+    return serialize
+
+
+class _NullWebSocket:
+    """送信内容をシリアライズするだけのWebSocket代替（Starletteのsend_jsonと同等の処理）"""
+
+    async def send_json(self, message):
+        json.dumps(message, separators=(",", ":"))
+
+
+@benchmark("websocket_broadcast", subscribers=SUBSCRIBER_COUNTS, symbols=SYMBOL_COUNTS)
+def bench_websocket_broadcast(subscribers, symbols):
+    market_service, _ = make_services(1000)
+    manager = ConnectionManager()
+    messages = {}
+    for symbol in make_universe(symbols):
+        channel = f"market:{symbol}"
+        manager.active_connections[channel] = {_NullWebSocket() for _ in range(subscribers)}
+        messages[channel] = {
+            "type": "market_update",
+            "symbol": symbol,
+            "data": {
+                "quote": run(market_service.get_quote(symbol)).model_dump(mode="json"),
+                "indicators": run(
+                    market_service.calculate_indicators(symbol, TimeFrame.H1)
+                ).model_dump(mode="json"),
+            },
+        }
+
+    async def fan_out():
+        for channel, message in messages.items():
+            await manager.broadcast(channel, message)
+
+    return lambda: run(fan_out())
+
+
+@benchmark("tick_ingest_alerts", alerts=[0, 10000, 100000])
+def bench_tick_ingest_alerts(alerts):
+    """20シンボルのティック1000件の取り込み（全時間足のバー更新とアラート評価を含む）"""
+    market_service, signal_service = make_services(200)
+    store = market_service.tick_store
+    engine = AlertEngine(store, Watchlist(market_service, signal_service, [], []), max_alerts=alerts)
+    universe = [symbol[:-2] for symbol in make_universe(20)]
+    rng = np.random.default_rng(0)
+    for i in range(alerts):
+        # 価格の上下 1〜20 に水準を散らす（評価のみの負荷を測るため、ティックの範囲では成立しない）
+        offset = rng.uniform(1.0, 20.0) * rng.choice([-1.0, 1.0])
+        engine.create(AlertRequest(
+            symbol=universe[i % len(universe)], type=AlertType.PRICE, value=float(100.0 + offset)
+        ))
+    walk = 100.0 + np.cumsum(rng.normal(0, 0.01, 1000))
+    ticks = [
+        Tick(universe[i % len(universe)], 1704067200.0 + i, price, price)
+        for i, price in enumerate(walk)
+    ]
+
+    def ingest():
+        for tick in ticks:
+            store.add_tick(tick)
+
+    return ingest
+
+
+@benchmark("correlation_bar_close", symbols=[20, 100], window=[100, 500], incremental=[True, False])
+def bench_correlation_bar_close(symbols, window, incremental):
+    """バー確定1回分の共分散の更新（差分 / 直近 window 本から計算し直し）"""
+    universe = make_universe(symbols)
+    panel = ClosePanel(universe, window + 1)
+    rng = np.random.default_rng(0)
+    closes = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.001, (window + 1, symbols)), axis=0))
+    panel.reset({
+        symbol: [(3600.0 * t, closes[t, i]) for t in range(window + 1)] for i, symbol in enumerate(universe)
+    })
+    returns = panel.returns(window)
+    rolling = RollingCovariance(symbols, window)
+    rolling.reset(returns)
+    rows = itertools.cycle(returns)
+
+    if incremental:
+        return lambda: rolling.push(next(rows))
+    return lambda: rolling.reset(panel.returns(window))
+
+
+@benchmark("currency_strength_bar_close", currencies=[8, 16])
+def bench_currency_strength_bar_close(currencies):
+    """バー確定1回分の通貨強弱の計算（全クロスのリターン・RSI・トレンドを通貨に分解）"""
+    codes = ["USD", "EUR", "JPY", "GBP", "AUD", "NZD", "CAD", "CHF",
+             "SEK", "NOK", "DKK", "SGD", "HKD", "MXN", "ZAR", "TRY"][:currencies]
+    universe = [f"{base}{quote}=X" for i, base in enumerate(codes) for quote in codes[i + 1:]]
+    market_service, signal_service = make_services(200)
+    watchlist = Watchlist(market_service, signal_service, universe, [TimeFrame.H1])
+    panels = BarPanels(market_service.tick_store, watchlist, [TimeFrame.H1])
+    rng = np.random.default_rng(0)
+    closes = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.001, (500, len(universe))), axis=0))
+    panels.panels[TimeFrame.H1].reset({
+        symbol: [(3600.0 * t, closes[t, i]) for t in range(500)] for i, symbol in enumerate(universe)
+    })
+    service = CurrencyStrengthService(panels, watchlist, [TimeFrame.H1])
+    return lambda: service.recompute(TimeFrame.H1)
+
+
+@benchmark("shared_bars_history", bars=HISTORY_LENGTHS)
+def bench_shared_bars_history(bars):
+    """APIワーカーが共有メモリのバーから履歴の DataFrame を作る（読む範囲だけを世代を確かめながらコピー）"""
+    store = SharedBarStore.create(None, ["1h"], max_symbols=1, capacity=max(HISTORY_LENGTHS))
+    # 名前だけ先に削除する（マッピングはプロセスの終了まで有効）
+    store.unlink()
+    BarIngestor(store, SyntheticMarketDataProvider(bars=bars), ["USDJPY=X"], [("1h", "1mo")]).poll_once()
+    provider = SharedBarsProvider(store)
+    # period で切り出さず bars 本すべてを読む
+    return lambda: provider.history("USDJPY=X", "1h")
+
+
+@benchmark("news_classification", articles=ARTICLE_COUNTS)
+def bench_news_classification(articles):
+    """影響度・センチメント・タグの判定（アーカイブのバックフィル相当）"""
+    service = NewsService(sources=[])
+    texts = [
+        (f"{title} (#{i})", f"{section}: {title.lower()}. Investors weighed the outlook for policy and growth.")
+        for i, (title, section) in enumerate(HEADLINES * (articles // len(HEADLINES) + 1))
+    ][:articles]
+
+    def classify():
+        for title, description in texts:
+            service._classify(title, description)
+
+    return classify
+
+
+@benchmark("news_classification_pipeline", workers=[0, 2])
+def bench_news_classification_pipeline(workers):
+    """5000件の記事をバッチ分類してストアへ書き込む"""
+    texts = [
+        {
+            "title": f"{title} (#{i})",
+            "description": f"{section}: {title.lower()}.",
+            "source": "bench",
+            "url": f"https://news.example.com/{i}",
+            "published_at": datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=i),
+        }
+        for i, (title, section) in enumerate(HEADLINES * 625)
+    ]
+
+    def classify():
+        service = NewsService(sources=[])
+        service.store.max_articles = len(texts)
+        run(service.classify_stream(texts, workers=workers))
+
+    return classify
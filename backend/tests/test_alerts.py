@@ -0,0 +1,90 @@
+import time
+from datetime import datetime, timedelta
+
+from app.models.market import AlertDirection, AlertRequest, AlertType, MarketQuote
+from app.services.alerts import AlertEngine
+from app.services.tick_store import Tick, TickStore
+
+
+class StubWatchlist:
+    """ウォッチリストの再計算結果（価格のみ）を差し替えるためのスタブ"""
+
+    timeframes = []
+
+    def __init__(self):
+        self.quotes = {}
+        self._listeners = []
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def refresh(self, symbol, price, timestamp):
+        self.quotes[symbol] = MarketQuote(symbol=symbol, price=price, timestamp=timestamp)
+        for listener in self._listeners:
+            listener(symbol, [])
+
+    def quote(self, symbol):
+        return self.quotes.get(symbol)
+
+    def watched_symbol(self, symbol):
+        return symbol
+
+    def entry(self, symbol, timeframe):
+        return None
+
+
+def make_engine():
+    tick_store = TickStore()
+    watchlist = StubWatchlist()
+    engine = AlertEngine(tick_store, watchlist)
+    fired = []
+    engine.add_listener(fired.append)
+    return tick_store, watchlist, engine, fired
+
+
+def tick(symbol, price, timestamp):
+    return Tick(symbol, timestamp, price, price)
+
+
+def test_refresh_price_is_ignored_while_ticks_are_newer():
+    tick_store, watchlist, engine, fired = make_engine()
+    now = time.time()
+    tick_store.add_tick(tick("USDJPY=X", 100.0, now))
+    engine.create(AlertRequest(symbol="USDJPY=X", type=AlertType.PRICE, value=101.0,
+                               direction=AlertDirection.ABOVE, repeat=True))
+
+    # ティックより古い計算時の価格では横切らない
+    watchlist.refresh("USDJPY=X", 102.0, datetime.fromtimestamp(now - 30))
+    assert fired == []
+    tick_store.add_tick(tick("USDJPY=X", 100.5, now + 1))
+    assert fired == []
+
+    tick_store.add_tick(tick("USDJPY=X", 101.5, now + 2))
+    assert len(fired) == 1
+    assert fired[0].value == 101.5
+
+    # 再計算の価格が古いままなら、ティックで下に戻っても二重に成立しない
+    tick_store.add_tick(tick("USDJPY=X", 100.0, now + 3))
+    watchlist.refresh("USDJPY=X", 102.0, datetime.fromtimestamp(now - 30))
+    assert len(fired) == 1
+
+
+def test_refresh_price_is_used_when_newer_than_ticks():
+    tick_store, watchlist, engine, fired = make_engine()
+    now = time.time()
+    tick_store.add_tick(tick("USDJPY=X", 100.0, now - 60))
+    engine.create(AlertRequest(symbol="USDJPY=X", type=AlertType.PRICE, value=101.0,
+                               direction=AlertDirection.ABOVE))
+
+    # ティックが途絶えた後の再計算の価格では評価する
+    watchlist.refresh("USDJPY=X", 102.0, datetime.fromtimestamp(now))
+    assert [event.value for event in fired] == [102.0]
+
+
+def test_refresh_price_is_used_without_ticks():
+    _, watchlist, engine, fired = make_engine()
+    watchlist.refresh("EURUSD=X", 1.08, datetime.now() - timedelta(seconds=5))
+    engine.create(AlertRequest(symbol="EURUSD=X", type=AlertType.PRICE, value=1.1,
+                               direction=AlertDirection.ABOVE))
+    watchlist.refresh("EURUSD=X", 1.11, datetime.now())
+    assert [event.value for event in fired] == [1.11]
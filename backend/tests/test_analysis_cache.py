@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+from app.models.market import TimeFrame
+from app.services.analysis_cache import AnalysisCache
+from app.services.market_data import MarketDataService
+from app.services.providers import SyntheticMarketDataProvider
+
+
+class SlowProvider(SyntheticMarketDataProvider):
+    """上流の遅延（ブロッキング）を再現するプロバイダ"""
+
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+
+    def history(self, symbol, interval, period=None, start=None, end=None):
+        time.sleep(self.delay)
+        return super().history(symbol, interval, period, start, end)
+
+
+def test_revalidation_does_not_block_the_event_loop():
+    service = MarketDataService(provider=SlowProvider(0.3))
+    cache = AnalysisCache("test", ttl=0.0, max_staleness=60.0)
+
+    async def run():
+        def compute():
+            return service.calculate_indicators("USDJPY=X", TimeFrame.H1)
+
+        await cache.get("USDJPY=X", compute)
+
+        # 古い結果はすぐに返り、再計算中もイベントループは止まらない
+        start = time.perf_counter()
+        await cache.get("USDJPY=X", compute)
+        assert time.perf_counter() - start < 0.05
+
+        gaps = []
+        for _ in range(20):
+            tick = time.perf_counter()
+            await asyncio.sleep(0.01)
+            gaps.append(time.perf_counter() - tick)
+        return max(gaps)
+
+    assert asyncio.run(run()) < 0.1
@@ -0,0 +1,66 @@
+import numpy as np
+
+from app.services.bar_panel import ClosePanel
+
+
+def make_panel(max_pending=3):
+    panel = ClosePanel(["A", "B"], capacity=10, max_pending=max_pending)
+    panel.reset({"A": [(0.0, 100.0)], "B": [(0.0, 50.0)]})
+    return panel
+
+
+def test_rows_wait_for_every_symbol_when_bars_arrive_per_symbol():
+    panel = make_panel()
+    # 再計算ではシンボルごとに複数本がまとめて届く
+    assert panel.add("A", 1.0, 101.0) == 0
+    assert panel.add("A", 2.0, 102.0) == 0
+    assert panel.add("B", 1.0, 51.0) == 1
+    assert panel.add("B", 2.0, 52.0) == 1
+
+    timestamps, closes = panel.to_arrays()
+    assert timestamps.tolist() == [0.0, 1.0, 2.0]
+    assert closes.tolist() == [[100.0, 50.0], [101.0, 51.0], [102.0, 52.0]]
+    assert panel.revision == 0
+
+
+def test_symbol_that_skips_a_bar_releases_the_row():
+    panel = make_panel()
+    panel.add("A", 1.0, 101.0)
+    # B は時刻1のバーがなく時刻2から届く
+    assert panel.add("B", 2.0, 52.0) == 1
+    assert panel.add("A", 2.0, 102.0) == 1
+    assert panel.to_arrays()[1].tolist() == [[100.0, 50.0], [101.0, 50.0], [102.0, 52.0]]
+
+
+def test_late_bar_patches_committed_rows():
+    panel = make_panel(max_pending=1)
+    assert panel.add("A", 1.0, 101.0) == 0
+    # 待ちきれずに確定した行は B を直前の終値で埋める
+    assert panel.add("A", 2.0, 102.0) == 1
+    assert panel.add("A", 3.0, 103.0) == 1
+    assert panel.to_arrays()[1][:, 1].tolist() == [50.0, 50.0, 50.0]
+
+    revision = panel.revision
+    assert panel.add("B", 1.0, 51.0) == 0
+    assert panel.revision == revision + 1
+    # 埋めていた後続の行も書き換わる
+    assert panel.to_arrays()[1][:, 1].tolist() == [50.0, 51.0, 51.0]
+
+    assert panel.add("B", 2.0, 52.0) == 0
+    assert panel.add("B", 3.0, 53.0) == 1
+    assert panel.to_arrays()[1].tolist() == [
+        [100.0, 50.0], [101.0, 51.0], [102.0, 52.0], [103.0, 53.0]
+    ]
+    returns = panel.returns()
+    assert np.allclose(returns[:, 1], np.log([51.0 / 50.0, 52.0 / 51.0, 53.0 / 52.0]))
+
+
+def test_duplicate_and_old_bars_are_ignored():
+    panel = make_panel()
+    panel.add("A", 1.0, 101.0)
+    panel.add("B", 1.0, 51.0)
+    revision = panel.revision
+    assert panel.add("A", 1.0, 999.0) == 0
+    assert panel.add("B", 0.0, 999.0) == 0
+    assert panel.revision == revision
+    assert panel.to_arrays()[1].tolist() == [[100.0, 50.0], [101.0, 51.0]]
@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta, timezone
+
+from app.models.market import EconomicEvent, NewsImpact
+from app.services import economic_calendar as economic_calendar_module
+from app.services.economic_calendar import (
+    CalendarProvider, DemoCalendarProvider, EconomicCalendar, FileCalendarProvider
+)
+
+
+def make_event(event_id: str, event_time: datetime, currency: str = "USD") -> EconomicEvent:
+    return EconomicEvent(
+        id=event_id,
+        title=event_id,
+        country="US",
+        currency=currency,
+        event_time=event_time,
+        impact=NewsImpact.HIGH,
+    )
+
+
+def test_events_are_normalised_to_utc():
+    base = datetime(2026, 1, 5, 13, 30, tzinfo=timezone.utc)
+    jst = timezone(timedelta(hours=9))
+    calendar = EconomicCalendar([
+        make_event("aware", base.astimezone(jst)),
+        make_event("naive", (base + timedelta(hours=1)).astimezone().replace(tzinfo=None)),
+        make_event("parsed", EconomicEvent.model_validate({
+            "id": "x", "title": "x", "country": "US", "currency": "USD",
+            "event_time": "2026-01-05T15:30:00Z", "impact": "high",
+        }).event_time),
+    ])
+    events = calendar.query()
+    assert [e.id for e in events] == ["aware", "naive", "parsed"]
+    assert all(e.event_time.tzinfo is timezone.utc for e in events)
+    assert events[0].event_time == base
+    # aware と naive の時刻を比較しても TypeError にならない
+    assert sorted(e.event_time for e in events)[0] == base
+
+
+def test_query_accepts_naive_and_aware_bounds():
+    base = datetime(2026, 1, 5, 13, 30, tzinfo=timezone.utc)
+    calendar = EconomicCalendar([make_event("nfp", base)])
+    assert calendar.query(base - timedelta(minutes=1), base + timedelta(minutes=1))
+    naive = base.astimezone().replace(tzinfo=None)
+    assert calendar.query(naive - timedelta(minutes=1), naive + timedelta(minutes=1))
+    assert calendar.in_blackout(base + timedelta(minutes=10), currencies=["USD"])
+    assert not calendar.in_blackout(base + timedelta(hours=2), currencies=["USD"])
+
+
+def test_demo_events_are_rebuilt_relative_to_now():
+    calendar = EconomicCalendar(provider=DemoCalendarProvider(), reload_interval=0)
+    calendar.ensure_loaded()
+    now = datetime.now(timezone.utc)
+    assert calendar.upcoming(8 * 24 * 60, now)
+    # 読み込み直すたびに現在時刻からの相対時刻で作り直す
+    calendar.ensure_loaded()
+    assert all(e.event_time > datetime.now(timezone.utc) for e in calendar.query())
+
+
+def test_reload_interval_limits_reloads():
+    class CountingProvider(DemoCalendarProvider):
+        loads = 0
+
+        def load(self):
+            CountingProvider.loads += 1
+            return super().load()
+
+    calendar = EconomicCalendar(provider=CountingProvider(), reload_interval=3600)
+    calendar.ensure_loaded()
+    calendar.ensure_loaded()
+    assert CountingProvider.loads == 1
+
+
+class FlakyProvider(CalendarProvider):
+    """失敗を切り替えられるプロバイダ"""
+
+    def __init__(self, events):
+        self.events = events
+        self.error = None
+        self.calls = 0
+
+    def load(self):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return self.events
+
+
+def test_load_failures_keep_last_events_and_back_off(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(economic_calendar_module.time, "monotonic", lambda: clock[0])
+    base = datetime(2026, 1, 5, 13, 30, tzinfo=timezone.utc)
+    provider = FlakyProvider([make_event("nfp", base)])
+    calendar = EconomicCalendar(provider=provider, reload_interval=3600, retry_interval=60)
+
+    calendar.ensure_loaded()
+    assert [e.id for e in calendar.query()] == ["nfp"]
+
+    provider.error = FileNotFoundError("calendar.json")
+    clock[0] += 3600
+    calendar.ensure_loaded()
+    assert [e.id for e in calendar.query()] == ["nfp"]
+    assert calendar.failures == 1
+
+    # 失敗した後は retry_interval まで読み込まず、失敗が続くと間隔を倍にする
+    clock[0] += 30
+    calendar.ensure_loaded()
+    assert provider.calls == 2
+    clock[0] += 30
+    calendar.ensure_loaded()
+    assert provider.calls == 3 and calendar.failures == 2
+    clock[0] += 60
+    calendar.ensure_loaded()
+    assert provider.calls == 3
+
+    provider.error = None
+    clock[0] += 60
+    calendar.ensure_loaded()
+    assert provider.calls == 4 and calendar.failures == 0
+
+
+def test_signal_ignores_unavailable_calendar(monkeypatch):
+    from app.services import signal_service
+
+    calendar = EconomicCalendar(provider=FileCalendarProvider("/nonexistent/calendar.json"))
+    monkeypatch.setattr(signal_service, "economic_calendar", calendar)
+    assert signal_service.SignalService(None)._events_near("USDJPY=X") == []
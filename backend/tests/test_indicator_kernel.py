@@ -0,0 +1,161 @@
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.models.market import OHLCV, TimeFrame
+from app.services.cross_section import CrossSectionEngine, stack_histories
+from app.services.indicator_kernel import FIELDS, IndicatorKernel, indicator_values, session_start
+
+
+def _ema(close: pd.Series, length: int) -> pd.Series:
+    """pandas_ta の EMA（最初の length 本の平均で初期化）"""
+    if len(close) < length:
+        return pd.Series(np.nan, index=close.index)
+    seeded = close.copy()
+    seeded.iloc[:length] = np.nan
+    seeded.iloc[length - 1] = close.iloc[:length].mean()
+    return seeded.ewm(span=length, adjust=False).mean()
+
+
+def _after_first_valid(series: pd.Series) -> pd.Series:
+    first = series.first_valid_index()
+    return series.loc[first:] if first is not None else series.iloc[0:0]
+
+
+def reference(ohlcv_list: List[OHLCV]) -> Dict[str, Optional[float]]:
+    """pandas だけで書いた基準値（pandas_ta 0.3.14b の定義、DatetimeIndex で日ごとの VWAP）"""
+    df = pd.DataFrame(
+        [o.model_dump() for o in ohlcv_list],
+        index=pd.DatetimeIndex([o.timestamp for o in ohlcv_list])
+    )
+    close, high, low, volume = df["close"], df["high"], df["low"], df["volume"]
+    values: Dict[str, pd.Series] = {}
+    for length in (20, 50, 200):
+        values[f"sma_{length}"] = close.rolling(length).mean()
+    values["ema_12"] = _ema(close, 12)
+    values["ema_26"] = _ema(close, 26)
+    macd = values["ema_12"] - values["ema_26"]
+    signal = _ema(_after_first_valid(macd), 9).reindex(df.index)
+    values["macd"], values["macd_signal"], values["macd_histogram"] = macd, signal, macd - signal
+
+    change = close.diff()
+    gain = change.clip(lower=0).ewm(alpha=1 / 14, min_periods=14).mean()
+    loss = (-change).clip(lower=0).ewm(alpha=1 / 14, min_periods=14).mean()
+    values["rsi"] = 100.0 * gain / (gain + loss)
+    previous = close.shift(1)
+    true_range = pd.concat([high - low, high - previous, previous - low], axis=1).abs().max(axis=1)
+    true_range.iloc[0] = np.nan
+    values["atr"] = true_range.ewm(alpha=1 / 14, min_periods=14).mean()
+
+    width = high.rolling(14).max() - low.rolling(14).min()
+    raw = 100.0 * (close - low.rolling(14).min()) / width.where(width != 0, 2.220446049250313e-16)
+    stoch_k = _after_first_valid(raw).rolling(3).mean()
+    values["stoch_k"] = stoch_k.reindex(df.index)
+    values["stoch_d"] = _after_first_valid(stoch_k).rolling(3).mean().reindex(df.index)
+
+    deviation = close.rolling(20).std(ddof=0)
+    values["bb_middle"] = values["sma_20"]
+    values["bb_upper"] = values["sma_20"] + 2.0 * deviation
+    values["bb_lower"] = values["sma_20"] - 2.0 * deviation
+
+    values["obv"] = (np.sign(change).fillna(1.0) * volume).cumsum()
+    days = df.index.normalize()
+    price_volume = (high + low + close) / 3.0 * volume
+    values["vwap"] = price_volume.groupby(days).cumsum() / volume.groupby(days).cumsum()
+
+    return {
+        name: None if pd.isna(values[name].iloc[-1]) else float(values[name].iloc[-1])
+        for name in FIELDS
+    }
+
+
+def random_walk(bars: int, seed: int, step: timedelta = timedelta(hours=1)) -> List[OHLCV]:
+    """出来高0の区間・値幅0のバーを含むランダムウォーク"""
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.002, bars)))
+    spread = np.abs(rng.normal(0, 0.001, (2, bars))) * close
+    volume = rng.integers(0, 1000, bars).astype(float)
+    volume[: bars // 4] = 0.0
+    flat = rng.random(bars) < 0.05
+    spread[:, flat] = 0.0
+    start = datetime(2024, 1, 1, 5, tzinfo=timezone.utc)
+    return [
+        OHLCV(
+            timestamp=start + step * i,
+            open=float(close[i - 1] if i else close[0]),
+            high=float(close[i] + spread[0, i]),
+            low=float(close[i] - spread[1, i]),
+            close=float(close[i]),
+            volume=float(volume[i]),
+        )
+        for i in range(bars)
+    ]
+
+
+def _assert_matches(expected: Dict[str, Optional[float]], actual: Dict[str, Optional[float]], bars: int):
+    for name in FIELDS:
+        if expected[name] is None:
+            assert actual[name] is None, f"{name} bars={bars}: expected None, got {actual[name]}"
+        else:
+            assert actual[name] is not None, f"{name} bars={bars}: expected {expected[name]}, got None"
+            assert math.isclose(expected[name], actual[name], rel_tol=1e-9, abs_tol=1e-9), (
+                f"{name} bars={bars}: expected {expected[name]}, got {actual[name]}"
+            )
+
+
+BAR_COUNTS = [1, 2, 5, 13, 14, 15, 16, 17, 18, 19, 20, 25, 26, 33, 34, 35, 49, 50, 60, 199, 200, 500]
+
+
+@pytest.mark.parametrize("bars", BAR_COUNTS)
+def test_kernel_matches_reference(bars):
+    history = random_walk(bars, seed=bars)
+    _assert_matches(reference(history), indicator_values(IndicatorKernel().compute(history)), bars)
+
+
+def test_cross_section_matches_reference():
+    histories = {str(bars): random_walk(bars, seed=bars) for bars in BAR_COUNTS}
+    histories.update({f"{bars}b": random_walk(bars, seed=bars + 1000) for bars in (60, 500)})
+    result = CrossSectionEngine().compute_indicators(stack_histories(histories), TimeFrame.H1)
+    for symbol, history in histories.items():
+        _assert_matches(reference(history), result[symbol].model_dump(), len(history))
+
+
+def test_vwap_resets_at_each_session():
+    history = random_walk(72, seed=7, step=timedelta(hours=1))
+    start = session_start(history)
+    assert history[start].timestamp.date() == history[-1].timestamp.date()
+    assert history[start - 1].timestamp.date() != history[-1].timestamp.date()
+
+    today = history[start:]
+    expected = sum((o.high + o.low + o.close) / 3.0 * o.volume for o in today) / sum(o.volume for o in today)
+    assert IndicatorKernel().compute(history)[FIELDS.index("vwap")] == pytest.approx(expected)
+
+
+def test_missing_values_are_none():
+    # 最新セッションの出来高が0なら VWAP、値動きがなければ RSI は計算できない
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    flat = [
+        OHLCV(timestamp=start + timedelta(hours=i), open=1.0, high=1.0, low=1.0, close=1.0, volume=0.0)
+        for i in range(20)
+    ]
+    values = indicator_values(IndicatorKernel().compute(flat))
+    _assert_matches(reference(flat), values, len(flat))
+    assert values["vwap"] is None
+    assert values["rsi"] is None
+    assert values["sma_50"] is None
+    assert values["atr"] == 0.0
+
+    assert all(value is None for value in indicator_values(IndicatorKernel().compute([])).values())
+
+
+def test_matches_pandas_ta():
+    pytest.importorskip("pandas_ta")
+    from benchmarks.indicator_parity import MIN_BARS, reference_indicators
+
+    for bars in (MIN_BARS, 100, 600):
+        history = random_walk(bars, seed=bars)
+        _assert_matches(reference_indicators(history), indicator_values(IndicatorKernel().compute(history)), bars)
@@ -0,0 +1,65 @@
+import asyncio
+from datetime import datetime, timezone
+
+from app.services.news_service import NewsService
+from app.services.news_sources import NewsSource
+from app.services.sentiment import SentimentAggregator
+
+
+class StubSource(NewsSource):
+    """検索したシンボルに関わらず同じ記事を返すソース"""
+
+    name = "stub"
+
+    def __init__(self, articles):
+        self.articles = articles
+
+    async def fetch(self, session, fetcher, symbols, limit):
+        return self.articles[:limit]
+
+
+def article(title: str, url: str) -> dict:
+    return {
+        "title": title,
+        "description": None,
+        "source": "Stub",
+        "url": url,
+        "published_at": datetime.now(timezone.utc),
+    }
+
+
+def test_searched_stock_tickers_stay_related():
+    service = NewsService(
+        sources=[StubSource([
+            article("Apple shares surge after strong iPhone sales, AAPL hits record", "https://example.com/aapl"),
+            article("BoJ keeps rates unchanged as yen weakens", "https://example.com/boj"),
+        ])],
+        sentiment=SentimentAggregator()
+    )
+
+    async def run():
+        try:
+            news = await service.get_latest_news(["AAPL"])
+            sentiment = await service.calculate_market_sentiment("AAPL")
+            return news, sentiment
+        finally:
+            await service.close()
+
+    news, sentiment = asyncio.run(run())
+    by_url = {item.url: item for item in news}
+    assert by_url["https://example.com/aapl"].related_symbols == ["AAPL"]
+    # 通貨ペアは本文から判定し、検索したシンボルには加えない
+    assert "AAPL" in by_url["https://example.com/boj"].related_symbols
+    assert "USDJPY" in by_url["https://example.com/boj"].related_symbols
+    assert sentiment.news_sentiment > 0
+
+
+def test_searched_fx_pairs_are_not_forced_onto_articles():
+    linker = NewsService.linker
+    assert linker.is_pair("USDJPY=X") and linker.is_pair("cad/chf")
+    assert not linker.is_pair("AAPL")
+
+    item = NewsService(sources=[])._to_news_item(
+        article("Apple shares surge", "https://example.com/a"), ["USDJPY=X", "AAPL"]
+    )
+    assert item.related_symbols == ["AAPL"]
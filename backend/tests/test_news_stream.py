@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+
+from app.api.websocket import NewsSubscription
+from app.models.market import NewsImpact
+from app.services.news_service import NewsService
+from app.services.sentiment import SentimentAggregator
+
+
+def test_subscription_accepts_bare_string():
+    assert NewsSubscription("USDJPY").symbols == {"USDJPY"}
+    assert NewsSubscription("usdjpy, EURUSD").symbols == {"USDJPY", "EURUSD"}
+    assert NewsSubscription(["USD/JPY"], NewsImpact.HIGH).symbols == {"USDJPY"}
+
+
+@pytest.mark.parametrize("symbols", [123, {"USDJPY": 1}, ["USDJPY", 1]])
+def test_subscription_rejects_non_list(symbols):
+    with pytest.raises(ValueError):
+        NewsSubscription(symbols)
+
+
+def test_demo_mode_pushes_new_articles():
+    service = NewsService(sources=[], sentiment=SentimentAggregator())
+    received = []
+    service.add_news_listener(received.extend)
+
+    async def poll_twice():
+        await service.poll_news()
+        await service.poll_news()
+
+    asyncio.run(poll_twice())
+    assert len(received) == 2
+    assert received[0].id != received[1].id
@@ -0,0 +1,80 @@
+import math
+from datetime import datetime, timezone
+
+import pytest
+
+from app.models.market import NewsImpact, NewsItem
+from app.services.sentiment import SentimentAggregator
+
+HALF_LIFE = 3600.0
+NOW = datetime(2026, 1, 5, 12, 0, tzinfo=timezone.utc).timestamp()
+
+
+def make_item(i: int, sentiment: float, age: float = 0.0, symbols=("USDJPY",)) -> NewsItem:
+    return NewsItem(
+        id=f"n{i}",
+        title=f"headline {i}",
+        source="test",
+        published_at=datetime.fromtimestamp(NOW - age, tz=timezone.utc),
+        impact=NewsImpact.MEDIUM,
+        sentiment=sentiment,
+        related_symbols=list(symbols),
+    )
+
+
+def test_counts_cover_the_count_window():
+    aggregator = SentimentAggregator(half_life=HALF_LIFE, count_window=3 * HALF_LIFE)
+    aggregator.add_news([
+        make_item(0, 0.8, age=5 * HALF_LIFE),
+        make_item(1, 0.5),
+        make_item(2, -0.6, age=HALF_LIFE),
+        make_item(3, 0.0),
+    ])
+    snapshot = aggregator.snapshot("USDJPY", NOW)
+    assert (snapshot.bullish_count, snapshot.bearish_count, snapshot.neutral_count) == (1, 1, 1)
+    # 時間が経つと期間から外れた記事は数えない（減衰させた重みと同じく件数も減る）
+    later = aggregator.snapshot("USDJPY", NOW + 2.5 * HALF_LIFE)
+    assert (later.bullish_count, later.bearish_count, later.neutral_count) == (1, 0, 1)
+    assert aggregator.snapshot("USDJPY", NOW + 4 * HALF_LIFE).bullish_count == 0
+
+
+def test_article_weight_is_decayed():
+    aggregator = SentimentAggregator(half_life=HALF_LIFE)
+    aggregator.add_news([make_item(0, 0.5, age=HALF_LIFE), make_item(1, 0.5)])
+    assert aggregator.snapshot("USDJPY", NOW).article_weight == pytest.approx(1.5)
+    assert aggregator.snapshot("USDJPY", NOW + HALF_LIFE).article_weight == pytest.approx(0.75)
+
+
+def test_duplicate_articles_count_once():
+    aggregator = SentimentAggregator(half_life=HALF_LIFE)
+    item = make_item(0, 0.5)
+    aggregator.add_news([item])
+    aggregator.add_news([item])
+    assert aggregator.snapshot("USDJPY", NOW).bullish_count == 1
+
+
+def test_default_prior_keeps_weighted_average():
+    aggregator = SentimentAggregator(half_life=HALF_LIFE)
+    aggregator.add_news([make_item(0, 0.6)])
+    assert aggregator.snapshot("USDJPY", NOW).news_sentiment == pytest.approx(0.6)
+
+    aggregator.add_news([make_item(1, -0.2, age=HALF_LIFE)])
+    expected = (0.6 * 1.0 - 0.2 * 0.5) / 1.5
+    assert aggregator.snapshot("USDJPY", NOW).news_sentiment == pytest.approx(expected)
+
+
+def test_prior_weight_shrinks_sparse_news():
+    aggregator = SentimentAggregator(half_life=HALF_LIFE, prior_weight=1.0)
+    aggregator.add_news([make_item(0, 0.6)])
+    assert aggregator.snapshot("USDJPY", NOW).news_sentiment == pytest.approx(0.3)
+    # 時間が経つほど重みが減り、0に近づく
+    later = aggregator.snapshot("USDJPY", NOW + HALF_LIFE).news_sentiment
+    assert later == pytest.approx(0.6 * 0.5 / (0.5 + 1.0))
+    assert not math.isnan(later)
+
+
+def test_unknown_symbol_is_neutral():
+    snapshot = SentimentAggregator(half_life=HALF_LIFE).snapshot("EURUSD", NOW)
+    assert snapshot.news_sentiment == 0.0
+    assert snapshot.article_weight == 0.0
+    assert snapshot.bullish_count == 0
@@ -0,0 +1,111 @@
+import threading
+
+import numpy as np
+import pytest
+
+from app.services.shared_bars import SharedBarStore, SharedBarsProvider
+
+HOUR_NS = 3600 * 1_000_000_000
+
+
+def make_series(count, offset=0):
+    times = (np.arange(count, dtype=np.int64) + offset) * HOUR_NS
+    values = np.repeat((np.arange(count, dtype=np.float64) + offset)[:, None], 5, axis=1)
+    return times, values
+
+
+@pytest.fixture
+def store():
+    store = SharedBarStore.create(None, ["1h", "1d"], max_symbols=4, capacity=2000)
+    try:
+        yield store
+    finally:
+        store.close()
+        store.unlink()
+
+
+def test_attach_reads_written_series(store):
+    store.write("USDJPY=X", "1h", *make_series(10))
+    reader = SharedBarStore.attach(store.name)
+    try:
+        times, values = reader.read("USDJPY=X", "1h", copy=True)
+        assert times.tolist() == make_series(10)[0].tolist()
+        assert reader.read("EURUSD=X", "1h") is None
+    finally:
+        reader.close()
+
+
+def test_history_is_sliced_by_period(store):
+    store.write("USDJPY=X", "1h", *make_series(24 * 60))
+    provider = SharedBarsProvider(store)
+    assert len(provider.history("USDJPY=X", "1h")) == 24 * 60
+    month = provider.history("USDJPY=X", "1h", "1mo")
+    assert len(month) == 24 * 30
+    assert month.index[-1] == provider.history("USDJPY=X", "1h").index[-1]
+
+
+def test_missing_series_without_fallback_is_an_error(store):
+    store.write("USDJPY=X", "1h", *make_series(10))
+    provider = SharedBarsProvider(store)
+    with pytest.raises(ValueError, match="not in the shared bar store"):
+        provider.history("USDJPY=X", "1d", "1y")
+    with pytest.raises(ValueError, match="not in the shared bar store"):
+        provider.history("EURUSD=X", "1h", "1mo")
+
+
+def test_copied_reads_are_consistent_while_writing(store):
+    stop = threading.Event()
+
+    def writer():
+        offset = 0
+        while not stop.is_set():
+            offset += 1
+            store.write("USDJPY=X", "1h", *make_series(2000, offset))
+
+    store.write("USDJPY=X", "1h", *make_series(2000))
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(500):
+            times, values = store.read("USDJPY=X", "1h", copy=True)
+            # 1回の書き込みの系列だけから成る（時刻と値が同じオフセット）
+            assert np.array_equal(times // HOUR_NS, values[:, 0].astype(np.int64))
+    finally:
+        stop.set()
+        thread.join()
+
+
+def test_only_the_requested_window_is_copied(store):
+    store.write("USDJPY=X", "1h", *make_series(2000))
+    times, values = store.read("USDJPY=X", "1h", copy=True, window=lambda t: slice(-24, None))
+    assert len(times) == 24 and times.base is None and values.base is None
+    assert times[-1] == make_series(2000)[0][-1]
+    assert store.read("USDJPY=X", "1h", copy=True, window=lambda t: None) is None
+
+    store.write("USDJPY=X", "1d", *make_series(5))
+    assert SharedBarsProvider(store).info("USDJPY=X") == {"previousClose": 3.0}
+
+
+def test_windowed_reads_are_consistent_while_writing(store):
+    stop = threading.Event()
+
+    def writer():
+        offset = 0
+        while not stop.is_set():
+            offset += 1
+            store.write("USDJPY=X", "1h", *make_series(2000, offset))
+
+    store.write("USDJPY=X", "1h", *make_series(2000))
+    provider = SharedBarsProvider(store)
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(500):
+            frame = provider.history("USDJPY=X", "1h", "5d")
+            assert len(frame) == 24 * 5
+            assert np.array_equal(
+                frame.index.asi8 // HOUR_NS, frame["Close"].to_numpy().astype(np.int64)
+            )
+    finally:
+        stop.set()
+        thread.join()
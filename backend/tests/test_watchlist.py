@@ -0,0 +1,75 @@
+import asyncio
+import math
+
+import pytest
+
+from app.models.market import TimeFrame
+from app.services.indicator_kernel import FIELDS
+from app.services.market_data import MarketDataService
+from app.services.providers import (
+    SyntheticMarketDataProvider, get_market_provider, set_market_provider
+)
+from app.services.signal_service import SignalService
+from app.services.watchlist import Watchlist
+
+SYMBOLS = ["USDJPY=X", "EURUSD=X", "GBPUSD=X", "AUDUSD=X"]
+TIMEFRAMES = [TimeFrame.H1, TimeFrame.D1]
+
+
+@pytest.fixture
+def market_service():
+    previous = get_market_provider()
+    set_market_provider(SyntheticMarketDataProvider())
+    try:
+        yield MarketDataService()
+    finally:
+        set_market_provider(previous)
+
+
+def test_batched_refresh_matches_per_symbol_indicators(market_service):
+    watchlist = Watchlist(market_service, SignalService(market_service), SYMBOLS, TIMEFRAMES)
+    refreshed = []
+    watchlist.add_listener(lambda symbol, timeframes: refreshed.append((symbol, timeframes)))
+
+    async def run():
+        assert await watchlist.refresh_due() == len(SYMBOLS) * len(TIMEFRAMES)
+        single = {}
+        for symbol in SYMBOLS:
+            for timeframe in TIMEFRAMES:
+                bars = watchlist.entry(symbol, timeframe).bars
+                single[symbol, timeframe] = await market_service.calculate_indicators(
+                    symbol, timeframe, bars
+                )
+        return single
+
+    single = asyncio.run(run())
+    assert refreshed == [(symbol, TIMEFRAMES) for symbol in SYMBOLS]
+    for (symbol, timeframe), expected in single.items():
+        batched = watchlist.entry(symbol, timeframe).indicators
+        assert batched.timestamp == expected.timestamp
+        for name in FIELDS:
+            a, b = getattr(expected, name), getattr(batched, name)
+            if a is None:
+                assert b is None, (symbol, timeframe, name)
+            else:
+                assert math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9), (symbol, timeframe, name, a, b)
+
+
+def test_longer_timeframes_refresh_on_their_own_interval(market_service):
+    watchlist = Watchlist(
+        market_service, SignalService(market_service), SYMBOLS[:1], TIMEFRAMES,
+        refresh_interval=60, max_staleness=120, refresh_intervals={"1d": 1800}
+    )
+    asyncio.run(watchlist.refresh(SYMBOLS[0]))
+    computed_at = {}
+    for timeframe in TIMEFRAMES:
+        # バーの確定を除いて、間隔だけで更新されるかを確かめる
+        entry = watchlist.entry(SYMBOLS[0], timeframe)._replace(bar_close=math.inf)
+        watchlist._entries[SYMBOLS[0], timeframe] = entry
+        computed_at[timeframe] = entry.computed_at
+
+    minute_later = computed_at[TimeFrame.H1] + 61
+    assert watchlist._is_due(SYMBOLS[0], TimeFrame.H1, minute_later)
+    assert not watchlist._is_due(SYMBOLS[0], TimeFrame.D1, computed_at[TimeFrame.D1] + 61)
+    assert watchlist._is_due(SYMBOLS[0], TimeFrame.D1, computed_at[TimeFrame.D1] + 1800)
+    assert watchlist._max_age(TimeFrame.D1) == 120 + 1800 - 60